@@ -1,37 +1,99 @@
 """
 GPX file upload and analysis API endpoints
 """
-from fastapi import APIRouter, UploadFile, File, HTTPException, Request
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Query, Request
 from fastapi.responses import JSONResponse, Response
 from app.models.gpx import (
     GPXUploadResponse,
     GPXData,
+    Track,
+    ElevationProfilePoint,
+    GradientProfilePoint,
     ExportSegmentRequest,
     ClimbSegment,
+    ClimbParameters,
+    ClimbSweepRequest,
+    ClimbSweepResponse,
+    ClimbSweepResult,
     MergeGPXRequest,
     MergeGPXResponse,
     GPXFileInput,
+    AidStation,
+    AidStationScenario,
     AidStationTableRequest,
     AidStationTableResponse,
+    AidStationScenarioResult,
+    AidStationScenariosRequest,
+    AidStationScenariosResponse,
+    PredictedPosition,
+    PredictedTimesRequest,
+    PredictedTimesResponse,
+    RaceSimulationRequest,
+    RaceSimulationResponse,
+    SimulationStation,
+    StationSimulation,
+    TrackSourceRequest,
 )
+from app.db.database import get_db
+from app.services.climb_cache import climb_cache
+from app.services.climb_detector import ClimbDetector
 from app.services.gpx_parser import GPXParser
+from app.services.race_service import RaceService
+from app.services.race_simulator import RaceSimulator, parse_cutoff_minutes
+from app.services.simplification import TrackSimplifier
+from app.services.statistics_calculator import StatisticsCalculator
+from app.services.time_calculator import TimeCalculator
+from app.services.track_arrays import TrackArrays
+from app.services.track_store import TrackNotFoundError, TrackStore
 from app.core.config import settings
+from app.core.process_pool import PoolSaturatedError, process_pool, set_server_timing
+from app.services.parse_cache import parse_cache, hash_upload
+from app.services.wire_format import WireFormat, encode_tracks, negotiate, render
 from app.middleware.rate_limit import limiter
-from typing import List
-import uuid
+from sqlalchemy.orm import Session
+from typing import List, Optional, Tuple
+import math
 import os
+import shutil
 
 router = APIRouter()
 
 
+def _render_compact(payload: dict, fmt: WireFormat, response: Response) -> Response:
+    """Columnar/binary response, keeping the Server-Timing header set on `response`"""
+    timing = response.headers.get("Server-Timing")
+    return render(payload, fmt, headers={"Server-Timing": timing} if timing else None)
+
+
+async def _resolve_track(track_request: TrackSourceRequest, db: Session) -> Tuple[TrackArrays, Optional[str]]:
+    """Track arrays (and stored name) referenced by an analysis request"""
+    return await TrackStore.resolve(
+        track_points=track_request.track_points,
+        file_id=track_request.file_id,
+        race_slug=track_request.race_slug,
+        track_index=track_request.track_index,
+        db=db,
+    )
+
+
 @router.post("/upload", response_model=GPXUploadResponse)
 @limiter.limit("30/minute")  # 30 uploads per minute per IP
-async def upload_gpx(request: Request, file: UploadFile = File(...)):
+async def upload_gpx(
+    request: Request,
+    response: Response,
+    file: UploadFile = File(...),
+    format: Optional[WireFormat] = None,
+    zoom: Optional[int] = Query(None, ge=0, le=22),
+):
     """
     Upload and parse a GPX file
 
     Args:
         file: GPX file upload
+        format: Track point encoding (json, columnar or binary); defaults to
+            the Accept header, then json
+        zoom: Return the map level of detail for this zoom instead of every
+            point (statistics are always computed on the full track)
 
     Returns:
         Parsed GPX data with tracks and statistics
@@ -43,29 +105,49 @@ async def upload_gpx(request: Request, file: UploadFile = File(...)):
             detail="Invalid file type. Only .gpx files are allowed",
         )
 
-    # Check file size
-    contents = await file.read()
-    if len(contents) > settings.MAX_UPLOAD_SIZE:
+    # Check file size without loading the whole body in memory
+    file.file.seek(0, os.SEEK_END)
+    file_size = file.file.tell()
+    file.file.seek(0)
+    if file_size > settings.MAX_UPLOAD_SIZE:
         raise HTTPException(
             status_code=413,
             detail=f"File too large. Maximum size is {settings.MAX_UPLOAD_SIZE / 1024 / 1024}MB",
         )
 
-    try:
-        # Parse GPX content
-        content_str = contents.decode("utf-8")
-        gpx_data = GPXParser.parse_gpx_file(content_str, file.filename)
+    # The content hash identifies the file: same bytes, same file_id
+    file_id = await hash_upload(file)
 
-        # Save file (optional, for Phase 1 we keep it in memory)
-        # In Phase 2, we'll upload to Google Drive
-        file_id = str(uuid.uuid4())
+    try:
+        tracks = parse_cache.get(file_id)
+        if tracks is None:
+            # Parse in the process pool (streaming parser), bytes in, arrays out;
+            # the body is only read into memory on a miss, as a single copy
+            tracks, timing = await process_pool.run("parse_gpx", GPXParser.analyze_gpx_bytes, await file.read())
+            set_server_timing(response, timing)
+            parse_cache.put(file_id, tracks)
 
         # Optionally save to local uploads directory
         if settings.DEBUG:
             file_path = os.path.join(settings.UPLOAD_DIR, f"{file_id}.gpx")
-            with open(file_path, "wb") as f:
-                f.write(contents)
-
+            if not os.path.exists(file_path):
+                await file.seek(0)
+                with open(file_path, "wb") as f:
+                    shutil.copyfileobj(file.file, f)
+
+        fmt = negotiate(request, format)
+        if fmt != WireFormat.JSON:
+            return _render_compact({
+                "success": True,
+                "message": "GPX file uploaded and parsed successfully",
+                "data": {"filename": file.filename, "tracks": encode_tracks(tracks, fmt, zoom), "waypoints": []},
+                "file_id": file_id,
+            }, fmt, response)
+
+        gpx_data = GPXData(filename=file.filename, tracks=[
+            t.to_track(None if zoom is None else TrackSimplifier.level_indices(t.levels, zoom))
+            for t in tracks
+        ])
         return GPXUploadResponse(
             success=True,
             message="GPX file uploaded and parsed successfully",
@@ -73,6 +155,8 @@ async def upload_gpx(request: Request, file: UploadFile = File(...)):
             file_id=file_id,
         )
 
+    except PoolSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=400,
@@ -86,28 +170,127 @@ async def test_endpoint():
     return {"message": "GPX API is running", "version": "1.0.0"}
 
 
+@router.get("/cache-stats")
+async def cache_stats():
+    """Parse cache counters (hits, disk hits, misses, evictions) and memory usage"""
+    return parse_cache.stats()
+
+
+@router.get("/tracks/{file_id}/geometry", response_model=Track)
+async def get_track_geometry(
+    request: Request,
+    file_id: str,
+    zoom: Optional[int] = Query(None, ge=0, le=22),
+    track_index: int = Query(0, ge=0),
+    format: Optional[WireFormat] = None,
+):
+    """
+    Points of an uploaded track at the level of detail of a map zoom
+
+    Levels are precomputed at parse time (Douglas-Peucker, about one pixel
+    of tolerance), so zooming the map only costs a lookup.
+
+    Args:
+        file_id: Content hash returned by /gpx/upload
+        zoom: Map zoom (every point when omitted or deeper than the finest level)
+        track_index: Track to use when the file has several
+        format: Track point encoding (json, columnar or binary)
+
+    Returns:
+        Track with the simplified points and full-track statistics
+    """
+    try:
+        track = TrackStore.pick(TrackStore.get_uploaded(file_id), track_index)
+    except TrackNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    fmt = negotiate(request, format)
+    if fmt != WireFormat.JSON:
+        return render(encode_tracks([track], fmt, zoom)[0], fmt)
+
+    return track.to_track(None if zoom is None else TrackSimplifier.level_indices(track.levels, zoom))
+
+
+@router.get("/tracks/{file_id}/profile", response_model=List[ElevationProfilePoint])
+async def get_track_profile(
+    file_id: str,
+    max_points: int = Query(1000, ge=3, le=20000),
+    track_index: int = Query(0, ge=0),
+):
+    """
+    Elevation profile of an uploaded track, downsampled for charting
+
+    Args:
+        file_id: Content hash returned by /gpx/upload
+        max_points: Maximum number of profile points (LTTB downsampling)
+        track_index: Track to use when the file has several
+
+    Returns:
+        List of distance/elevation points
+    """
+    try:
+        track = TrackStore.pick(TrackStore.get_uploaded(file_id), track_index)
+    except TrackNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    return StatisticsCalculator.get_elevation_profile(track.arrays, max_points=max_points)
+
+
+@router.get("/tracks/{file_id}/gradient", response_model=List[GradientProfilePoint])
+async def get_track_gradient(
+    file_id: str,
+    window: float = Query(500, gt=0, le=10000),
+    resolution: float = Query(50, ge=1, le=10000),
+    track_index: int = Query(0, ge=0),
+):
+    """
+    Rolling-window gradient profile of an uploaded track, for gradient colouring
+
+    Args:
+        file_id: Content hash returned by /gpx/upload
+        window: Distance window for each gradient in meters
+        resolution: Spacing of the profile samples in meters
+        track_index: Track to use when the file has several
+
+    Returns:
+        List of distance/gradient points
+    """
+    try:
+        track = TrackStore.pick(TrackStore.get_uploaded(file_id), track_index)
+    except TrackNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    return StatisticsCalculator.calculate_gradient_profile(
+        track.arrays, window_distance=window, resolution=resolution
+    )
+
+
 @router.post("/export-segment")
-async def export_segment(request: ExportSegmentRequest):
+async def export_segment(request: ExportSegmentRequest, db: Session = Depends(get_db)):
     """
     Export a segment of a GPX track as a downloadable .gpx file
 
     Args:
-        request: Export segment request with track points and segment range
+        request: Export segment request with a track (file_id, race_slug or
+            track points) and segment range
 
     Returns:
         GPX file as downloadable attachment
     """
     try:
+        track, stored_name = await _resolve_track(request, db)
+        track_name = request.track_name or stored_name or "Track"
+
         # Generate GPX XML from segment
         gpx_xml = GPXParser.generate_gpx_from_segment(
-            points=request.track_points,
+            points=track,
             start_km=request.start_km,
             end_km=request.end_km,
-            track_name=request.track_name
+            track_name=track_name
         )
 
         # Create filename
-        filename = f"{request.track_name.replace(' ', '_')}_segment_{request.start_km:.1f}km-{request.end_km:.1f}km.gpx"
+        filename = f"{track_name.replace(' ', '_')}_segment_{request.start_km:.1f}km-{request.end_km:.1f}km.gpx"
 
         # Return as downloadable file
         return Response(
@@ -118,6 +301,8 @@ async def export_segment(request: ExportSegmentRequest):
             }
         )
 
+    except TrackNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=400,
@@ -126,7 +311,7 @@ async def export_segment(request: ExportSegmentRequest):
 
 
 @router.post("/detect-climbs", response_model=List[ClimbSegment])
-async def detect_climbs(request: ExportSegmentRequest):
+async def detect_climbs(request: ExportSegmentRequest, response: Response, db: Session = Depends(get_db)):
     """
     Detect climb segments in a GPX track based on elevation criteria
 
@@ -136,19 +321,97 @@ async def detect_climbs(request: ExportSegmentRequest):
     - Average gradient ≥ 4% (real climbs, not gentle slopes)
 
     Args:
-        request: Contains track points for analysis
+        request: Contains the track to analyze (file_id, race_slug or track points)
 
     Returns:
         List of detected climb segments
     """
     try:
-        # Detect climbs
-        climbs = GPXParser.detect_climbs(
-            points=request.track_points
-        )
+        track, _ = await _resolve_track(request, db)
+
+        digest = track.digest()
+        parameters = ClimbParameters()
+        climbs = climb_cache.get(digest, parameters)
+        if climbs is None:
+            # Detect climbs
+            climbs, timing = await process_pool.run(
+                "detect_climbs",
+                GPXParser.detect_climbs,
+                track,
+            )
+            set_server_timing(response, timing)
+            climb_cache.put(digest, parameters, climbs)
 
         return climbs
 
+    except TrackNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except PoolSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Error detecting climbs: {str(e)}"
+        )
+
+
+@router.post("/detect-climbs-sweep", response_model=ClimbSweepResponse)
+async def detect_climbs_sweep(request: ClimbSweepRequest, response: Response, db: Session = Depends(get_db)):
+    """
+    Detect climbs for many parameter sets on one track
+
+    Smoothing, the range index and the scan stops are shared between the
+    parameter sets, and results are cached per (track content, parameters),
+    so moving a slider back to a previous value costs a lookup.
+
+    Args:
+        request: Track to analyze and the parameter sets (explicit and/or grid)
+
+    Returns:
+        Climbs per parameter set, in request order
+    """
+    try:
+        track, _ = await _resolve_track(request, db)
+        parameter_sets = request.all_parameter_sets()
+
+        digest = track.digest()
+        climbs = [climb_cache.get(digest, parameters) for parameters in parameter_sets]
+        cached = sum(1 for found in climbs if found is not None)
+
+        # Detect each missing parameter set once, even if the request repeats it
+        missing = {}
+        for parameters, found in zip(parameter_sets, climbs):
+            if found is None:
+                missing.setdefault(climb_cache.key(digest, parameters), parameters)
+
+        if missing:
+            detected, timing = await process_pool.run(
+                "detect_climbs_sweep",
+                ClimbDetector.detect_climbs_sweep,
+                track,
+                list(missing.values()),
+            )
+            set_server_timing(response, timing)
+            results = dict(zip(missing, detected))
+            for parameters, found in zip(missing.values(), detected):
+                climb_cache.put(digest, parameters, found)
+            climbs = [
+                found if found is not None else results[climb_cache.key(digest, parameters)]
+                for parameters, found in zip(parameter_sets, climbs)
+            ]
+
+        return ClimbSweepResponse(
+            results=[
+                ClimbSweepResult(parameters=parameters, climbs=found)
+                for parameters, found in zip(parameter_sets, climbs)
+            ],
+            cached=cached,
+        )
+
+    except TrackNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except PoolSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=400,
@@ -158,7 +421,12 @@ async def detect_climbs(request: ExportSegmentRequest):
 
 @router.post("/merge", response_model=MergeGPXResponse)
 @limiter.limit("10/minute")  # 10 merge operations per minute per IP
-async def merge_gpx_files(request: Request, merge_request: MergeGPXRequest):
+async def merge_gpx_files(
+    request: Request,
+    response: Response,
+    merge_request: MergeGPXRequest,
+    format: Optional[WireFormat] = None,
+):
     """
     Merge multiple GPX files into a single GPX track
 
@@ -171,6 +439,7 @@ async def merge_gpx_files(request: Request, merge_request: MergeGPXRequest):
 
     Args:
         request: Contains list of GPX files and merge options
+        format: Track point encoding of the preview (json, columnar or binary)
 
     Returns:
         Merged GPX file (XML) and parsed data for preview
@@ -186,22 +455,36 @@ async def merge_gpx_files(request: Request, merge_request: MergeGPXRequest):
         # Prepare files for merge
         files_content = [(f.filename, f.content) for f in merge_request.files]
 
-        # Merge GPX files
-        merged_gpx, warnings = GPXParser.merge_gpx_files(
+        # Merge GPX files and parse the result for preview, in the process pool
+        merged_track_name = merge_request.merged_track_name or "Merged Track"
+        (merged_gpx_xml, warnings, merged_tracks), timing = await process_pool.run(
+            "merge_gpx",
+            GPXParser.merge_and_analyze,
             files_content=files_content,
             gap_threshold_seconds=merge_request.options.gap_threshold_seconds,
             interpolate_gaps=merge_request.options.interpolate_gaps,
             sort_by_time=merge_request.options.sort_by_time,
-            merged_track_name=merge_request.merged_track_name or "Merged Track"
+            merged_track_name=merged_track_name
         )
-
-        # Convert merged GPX to XML string
-        merged_gpx_xml = merged_gpx.to_xml()
-
-        # Parse the merged GPX for preview data
-        merged_data = GPXParser.parse_gpx_file(
-            merged_gpx_xml,
-            filename=f"{merge_request.merged_track_name or 'Merged_Track'}.gpx"
+        set_server_timing(response, timing)
+
+        fmt = negotiate(request, format)
+        if fmt != WireFormat.JSON:
+            return _render_compact({
+                "success": True,
+                "message": f"Successfully merged {len(merge_request.files)} files",
+                "merged_gpx": merged_gpx_xml,
+                "data": {
+                    "filename": f"{merge_request.merged_track_name or 'Merged_Track'}.gpx",
+                    "tracks": encode_tracks(merged_tracks, fmt),
+                    "waypoints": [],
+                },
+                "warnings": warnings,
+            }, fmt, response)
+
+        merged_data = GPXData(
+            filename=f"{merge_request.merged_track_name or 'Merged_Track'}.gpx",
+            tracks=[t.to_track() for t in merged_tracks]
         )
 
         return MergeGPXResponse(
@@ -212,6 +495,8 @@ async def merge_gpx_files(request: Request, merge_request: MergeGPXRequest):
             warnings=warnings
         )
 
+    except PoolSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except ValueError as e:
         raise HTTPException(
             status_code=400,
@@ -226,7 +511,12 @@ async def merge_gpx_files(request: Request, merge_request: MergeGPXRequest):
 
 @router.post("/aid-station-table", response_model=AidStationTableResponse)
 @limiter.limit("20/minute")  # 20 table generations per minute per IP
-async def generate_aid_station_table(request: Request, table_request: AidStationTableRequest):
+async def generate_aid_station_table(
+    request: Request,
+    response: Response,
+    table_request: AidStationTableRequest,
+    db: Session = Depends(get_db),
+):
     """
     Generate aid station table with segment statistics
 
@@ -255,23 +545,33 @@ async def generate_aid_station_table(request: Request, table_request: AidStation
                 detail="At least 2 aid stations are required"
             )
 
-        if not table_request.track_points:
+        if table_request.file_id is None and table_request.race_slug is None and not table_request.track_points:
             raise HTTPException(
                 status_code=400,
                 detail="No track points provided"
             )
 
+        track, _ = await _resolve_track(table_request, db)
+
         # Generate table
-        result = GPXParser.generate_aid_station_table(
-            points=table_request.track_points,
+        result, timing = await process_pool.run(
+            "aid_station_table",
+            GPXParser.generate_aid_station_table,
+            points=track,
             aid_stations=table_request.aid_stations,
             calc_mode=table_request.calc_mode,
             constant_pace_kmh=table_request.constant_pace_kmh,
             trail_planner_config=table_request.trail_planner_config,
+            interpolate_boundaries=table_request.interpolate_boundaries,
         )
+        set_server_timing(response, timing)
 
         return result
 
+    except TrackNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except PoolSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except ValueError as e:
         raise HTTPException(
             status_code=400,
@@ -282,3 +582,211 @@ async def generate_aid_station_table(request: Request, table_request: AidStation
             status_code=500,
             detail=f"Error generating aid station table: {str(e)}"
         )
+
+
+@router.post("/aid-station-scenarios", response_model=AidStationScenariosResponse)
+@limiter.limit("20/minute")
+async def generate_aid_station_scenarios(
+    request: Request,
+    response: Response,
+    scenarios_request: AidStationScenariosRequest,
+    db: Session = Depends(get_db),
+):
+    """
+    Compare aid station tables for several time-estimation scenarios
+
+    Segment distance, D+/D- and gradient are computed once for the track;
+    every scenario (NAISMITH, CONSTANT_PACE, TRAIL_PLANNER configs) is then
+    evaluated over all segments in one matrix.
+
+    Args:
+        request: Contains the track, aid stations and scenarios
+
+    Returns:
+        One table per scenario, in request order
+    """
+    try:
+        if len(scenarios_request.aid_stations) < 2:
+            raise HTTPException(
+                status_code=400,
+                detail="At least 2 aid stations are required"
+            )
+
+        track, _ = await _resolve_track(scenarios_request, db)
+
+        tables, timing = await process_pool.run(
+            "aid_station_scenarios",
+            GPXParser.generate_aid_station_tables,
+            points=track,
+            aid_stations=scenarios_request.aid_stations,
+            scenarios=scenarios_request.scenarios,
+            interpolate_boundaries=scenarios_request.interpolate_boundaries,
+        )
+        set_server_timing(response, timing)
+
+        return AidStationScenariosResponse(
+            results=[
+                AidStationScenarioResult(scenario=scenario, table=table)
+                for scenario, table in zip(scenarios_request.scenarios, tables)
+            ]
+        )
+
+    except HTTPException:
+        raise
+    except TrackNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except PoolSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error generating aid station tables: {str(e)}"
+        )
+
+
+def _race_stations(db: Session, slug: str) -> List[SimulationStation]:
+    """Aid stations (with cutoffs) of a published race, in race order"""
+    race = RaceService.get_race_by_slug(db, slug)
+    if not race or not race.is_published:
+        raise TrackNotFoundError("Race not found")
+    return [
+        SimulationStation(name=s.name, distance_km=s.distance_km, cutoff_time=s.cutoff_time)
+        for s in sorted(race.aid_stations, key=lambda s: s.position_order)
+    ]
+
+
+def _optional(value: float) -> Optional[float]:
+    return None if math.isnan(value) else value
+
+
+@router.post("/simulate-race", response_model=RaceSimulationResponse)
+@limiter.limit("20/minute")
+async def simulate_race(
+    request: Request,
+    response: Response,
+    simulation_request: RaceSimulationRequest,
+    db: Session = Depends(get_db),
+):
+    """
+    Simulate finish and aid station arrival times (Monte Carlo)
+
+    Thousands of runners are sampled around the Trail Planner config
+    (pace, climb penalty, fatigue, per-segment noise) and evaluated over
+    every aid-station segment at once.
+
+    Cutoffs are given per station in elapsed minutes, or as clock times
+    ("HH:MM", "Wed 08:45 PM") together with `start_time`. Without
+    `aid_stations`, the stations and cutoffs of `race_slug` are used.
+
+    Args:
+        request: Track, aid stations, Trail Planner config and sampling settings
+
+    Returns:
+        Percentile arrival times and cutoff-miss probability per station
+    """
+    try:
+        track, _ = await _resolve_track(simulation_request, db)
+        stations = simulation_request.aid_stations
+        if stations is None:
+            stations = _race_stations(db, simulation_request.race_slug)
+        if len(stations) < 2:
+            raise ValueError("At least 2 aid stations are required")
+
+        stations = sorted(stations, key=lambda s: s.distance_km)
+        cutoffs = [math.nan] * len(stations)
+        if simulation_request.start_time is not None:
+            cutoffs = parse_cutoff_minutes(
+                [s.cutoff_time for s in stations], simulation_request.start_time
+            ).tolist()
+        cutoffs = [s.cutoff_minutes if s.cutoff_minutes is not None else c for s, c in zip(stations, cutoffs)]
+
+        result, timing = await process_pool.run(
+            "simulate_race",
+            RaceSimulator.simulate,
+            track,
+            [AidStation(name=s.name, distance_km=s.distance_km) for s in stations],
+            simulation_request.trail_planner_config,
+            simulation_request.settings,
+            cutoff_minutes=cutoffs,
+            interpolate_boundaries=simulation_request.interpolate_boundaries,
+        )
+        set_server_timing(response, timing)
+
+        return RaceSimulationResponse(
+            samples=simulation_request.settings.samples,
+            percentiles=result.percentiles.tolist(),
+            stations=[
+                StationSimulation(
+                    name=station.name,
+                    distance_km=station.distance_km,
+                    arrival_minutes=result.arrival_minutes[:, i].tolist(),
+                    mean_minutes=float(result.mean_minutes[i]),
+                    cutoff_minutes=_optional(float(result.cutoff_minutes[i])),
+                    miss_probability=_optional(float(result.miss_probability[i])),
+                )
+                for i, station in enumerate(result.stations)
+            ],
+        )
+
+    except TrackNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except PoolSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error simulating race: {str(e)}"
+        )
+
+
+@router.post("/predicted-times", response_model=PredictedTimesResponse)
+async def predicted_times(request: PredictedTimesRequest, response: Response, db: Session = Depends(get_db)):
+    """
+    Predicted elapsed time at every track point
+
+    Every interval between points is estimated with the chosen calc mode
+    (fatigue paliers included), then summed. `at_minutes` are located on
+    the course by binary search in the cumulative times.
+
+    Args:
+        request: Track, calc mode settings and elapsed times to locate
+
+    Returns:
+        Cumulative minutes per point and the position at each requested time
+    """
+    try:
+        track, _ = await _resolve_track(request, db)
+        scenario = AidStationScenario(
+            calc_mode=request.calc_mode,
+            constant_pace_kmh=request.constant_pace_kmh,
+            trail_planner_config=request.trail_planner_config,
+        )
+
+        minutes, timing = await process_pool.run(
+            "predicted_times", TimeCalculator.predict_point_times, track, scenario
+        )
+        set_server_timing(response, timing)
+        distance_km, lat, lon = TimeCalculator.locate_at_times(track, minutes, request.at_minutes)
+
+        return PredictedTimesResponse(
+            minutes=minutes.tolist(),
+            total_minutes=float(minutes[-1]) if len(minutes) else 0.0,
+            positions=[
+                PredictedPosition(minutes=t, distance_km=d, lat=la, lon=lo)
+                for t, d, la, lo in zip(request.at_minutes, distance_km.tolist(), lat.tolist(), lon.tolist())
+            ],
+        )
+
+    except TrackNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except PoolSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Error predicting times: {str(e)}"
+        )
@@ -1,119 +1,96 @@
 """
 Race Recovery API - Reconstruct complete GPX from partial recording
 """
-from fastapi import APIRouter, File, UploadFile, Form, HTTPException
-from fastapi.responses import Response
+from fastapi import APIRouter, Depends, File, UploadFile, Form, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
 import gpxpy
 import gpxpy.gpx
-from datetime import datetime, timedelta
-from typing import List, Tuple
-import math
+from datetime import timedelta
+from io import BytesIO
+from pathlib import PurePath
+from typing import List, NamedTuple, Optional, Tuple, Union
+import asyncio
+import json
 import logging
-from app.utils.elevation_quality import assess_elevation_quality, smooth_elevation_data, interpolate_elevation_linear
+import zipfile
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.process_pool import JobTiming, PoolSaturatedError, process_pool, set_server_timing
+from app.db.database import get_db
+from app.services.course_index import CourseIndex
+from app.models.gpx import OffCourseResponse, OffCourseSection
+from app.services.course_matcher import CourseMatcher, MatchSettings, off_course_sections
+from app.services.dem_service import dem_service
+from app.services.distance_calculator import DistanceCalculator
+from app.services.gpx_stream_parser import GPXStreamParser
+from app.services.gpx_stream_writer import iter_gpx_xml
+from app.services.track_arrays import AnalyzedTrack, TrackArrays
+from app.services.track_store import TrackNotFoundError, TrackStore
+from app.utils.elevation_quality import (
+    assess_elevation_array,
+    correct_elevation_array,
+    smooth_elevation_array,
+)
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+RECOVERY_CREATOR = "GPX Ninja - Race Recovery"
+MAX_BATCH_RUNNERS = 200  # Partial recordings accepted by one /recover-batch request
 
-def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    """
-    Calculate distance between two points in meters using Haversine formula
-    """
-    R = 6371000  # Earth radius in meters
-    phi1 = math.radians(lat1)
-    phi2 = math.radians(lat2)
-    delta_phi = math.radians(lat2 - lat1)
-    delta_lambda = math.radians(lon2 - lon1)
-
-    a = (math.sin(delta_phi / 2) ** 2 +
-         math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda / 2) ** 2)
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+MAX_SLOPE = 0.4  # Slopes are capped at 40%
+MIN_SPEED_FACTOR = 0.3  # Slowest pace: 30% of the base speed
+MAX_SPEED_FACTOR = 2.0  # Fastest pace: 200% of the base speed
 
-    return R * c
+MIN_GAP_M = 100.0  # Course distance skipped between two recorded points that is filled from the course
+MAX_RUNNER_SPEED_MS = 8.0  # Bounds how far along the course the next recorded point can be
+LOOKAHEAD_M = 500.0  # Forward reach between two recorded points, on top of the speed bound
+BACKTRACK_M = 50.0  # Allowed step back along the course (GPS noise, course vertex spacing)
+OFF_COURSE_SEARCH_M = 1000.0  # Farthest off-course distance measured exactly (beyond: reported as this bound)
 
 
-def find_closest_point_index(target_lat: float, target_lon: float,
-                              points: List[gpxpy.gpx.GPXTrackPoint],
-                              approx_distance_km: float = None,
-                              distance_tolerance_km: float = 5.0,
-                              max_search_ratio: float = 0.75) -> int:
+def calculate_slopes(distances: np.ndarray, elevations: np.ndarray) -> np.ndarray:
     """
-    Find the index of the closest point in a GPX track to a target coordinate
+    Slope of every segment as a ratio (0.25 = 25%), capped at ±40%
 
     Args:
-        target_lat: Target latitude
-        target_lon: Target longitude
-        points: List of GPX track points
-        approx_distance_km: Approximate distance covered in km (if known)
-        distance_tolerance_km: Search within ± this many km around approx_distance (default 5 km)
-        max_search_ratio: If approx_distance not provided, search in first X% (default 0.75)
+        distances: Horizontal length of the n - 1 segments in meters
+        elevations: Elevations of the n points (NaN when missing)
 
     Returns:
-        Index of the closest point
+        Array of n - 1 slopes; 0 for zero-length segments or missing elevations
     """
-    min_distance = float('inf')
-    closest_index = 0
+    rise = np.diff(elevations)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        slopes = np.where((distances > 0) & ~np.isnan(rise), rise / distances, 0.0)
+    return np.clip(slopes, -MAX_SLOPE, MAX_SLOPE)
 
-    # If approximate distance is provided, calculate cumulative distances and search in that range
-    if approx_distance_km is not None:
-        # Calculate cumulative distance for all points
-        cumulative_distances = [0.0]
-        for i in range(1, len(points)):
-            prev_point = points[i - 1]
-            curr_point = points[i]
-            segment_dist = haversine_distance(
-                prev_point.latitude, prev_point.longitude,
-                curr_point.latitude, curr_point.longitude
-            )
-            cumulative_distances.append(cumulative_distances[-1] + segment_dist / 1000.0)  # km
-
-        # Define search range
-        min_km = max(0, approx_distance_km - distance_tolerance_km)
-        max_km = approx_distance_km + distance_tolerance_km
-
-        # Search only in points within the distance range
-        for i, cum_dist in enumerate(cumulative_distances):
-            if min_km <= cum_dist <= max_km:
-                point = points[i]
-                distance = haversine_distance(target_lat, target_lon, point.latitude, point.longitude)
-                if distance < min_distance:
-                    min_distance = distance
-                    closest_index = i
-    else:
-        # Fallback: search in the first portion of the track
-        max_search_index = int(len(points) * max_search_ratio)
-        for i in range(max_search_index):
-            point = points[i]
-            distance = haversine_distance(target_lat, target_lon, point.latitude, point.longitude)
-            if distance < min_distance:
-                min_distance = distance
-                closest_index = i
 
-    return closest_index
+def speed_factors(slopes: np.ndarray) -> np.ndarray:
+    """Speed of every segment relative to the base speed: 1 - 2 * slope, within bounds"""
+    return np.clip(1 - 2 * slopes, MIN_SPEED_FACTOR, MAX_SPEED_FACTOR)
 
 
-def calculate_slope(point1: gpxpy.gpx.GPXTrackPoint,
-                   point2: gpxpy.gpx.GPXTrackPoint) -> float:
+def solve_base_speed(distances: np.ndarray, slopes: np.ndarray, target_seconds: float) -> float:
     """
-    Calculate slope between two points as a ratio (0.25 = 25%)
-    Capped at 0.4 (40%)
-    """
-    if point1.elevation is None or point2.elevation is None:
-        return 0.0
-
-    elevation_diff = point2.elevation - point1.elevation
-    horizontal_distance = haversine_distance(
-        point1.latitude, point1.longitude,
-        point2.latitude, point2.longitude
-    )
+    Base speed that covers the segments in exactly target_seconds
 
-    if horizontal_distance == 0:
-        return 0.0
+    The speed bounds are proportional to the base speed, so every segment's
+    speed factor does not depend on it and the total time is
+    Σ(distance_i / factor_i) / v_base: the solution is closed-form.
 
-    slope = elevation_diff / horizontal_distance
+    Args:
+        distances: Segment lengths in meters
+        slopes: Segment slopes (see calculate_slopes)
+        target_seconds: Time to spend on the segments (> 0)
 
-    # Cap slope at 40%
-    return max(min(slope, 0.4), -0.4)
+    Returns:
+        Base speed in m/s (0 when there is no distance left)
+    """
+    return float(np.sum(distances / speed_factors(slopes))) / target_seconds
 
 
 def parse_time_duration(time_str: str) -> timedelta:
@@ -132,6 +109,591 @@ def parse_time_duration(time_str: str) -> timedelta:
         raise ValueError("Time format must be HH:MM:SS or MM:SS")
 
 
+class RaceRecoveryError(Exception):
+    """Recovery inputs that cannot be reconciled (answered with HTTP 400)"""
+
+
+class PreparedCourse(NamedTuple):
+    """
+    Reference course ready for recovery (parsed, elevation-corrected, indexed)
+
+    Built once and reused for every runner recovered against the course.
+    Arrays only, so it pickles cheaply to pool workers.
+
+    Attributes:
+        index: Nearest-point index (holds lat, lon and cumulative distance)
+        elevation: Course elevations after quality processing (NaN when missing)
+        quality: Elevation quality report of the course as given
+    """
+    index: CourseIndex
+    elevation: np.ndarray
+    quality: dict
+
+
+def prepare_course(lat: np.ndarray, lon: np.ndarray, elevation: np.ndarray) -> PreparedCourse:
+    """
+    Assess and correct the course elevation, then index the course
+
+    Args:
+        lat: Course latitudes
+        lon: Course longitudes
+        elevation: Course elevations (NaN when missing)
+
+    Returns:
+        PreparedCourse
+
+    Raises:
+        RaceRecoveryError: If the course has no points
+    """
+    if not len(lat):
+        raise RaceRecoveryError("GPX files must contain valid tracks")
+
+    elevation = np.asarray(elevation, dtype=np.float64)
+    quality = assess_elevation_array(elevation)
+    logger.info(f"Complete GPX elevation quality: {quality['quality_score']:.1f}/100 ({quality['source']})")
+
+    # Process complete track elevation if quality is poor
+    if quality['recommended_action'] == 'smooth':
+        logger.info("Smoothing complete GPX elevation data")
+        elevation = smooth_elevation_array(elevation, window_size=7)
+    elif quality['quality_score'] < 50:
+        logger.warning(f"Complete GPX has poor elevation quality. Issues: {quality['issues']}")
+        if dem_service.available:
+            elevation, coverage = correct_elevation_array(elevation, np.asarray(lat), np.asarray(lon))
+            logger.info(f"Complete GPX elevation replaced from DEM ({coverage:.0%} coverage)")
+
+    return PreparedCourse(CourseIndex(lat, lon), elevation, quality)
+
+
+def prepare_course_gpx(complete_content: bytes) -> PreparedCourse:
+    """
+    Parse a course GPX (every track and segment, in order) and prepare it
+
+    Args:
+        complete_content: Complete course GPX
+
+    Returns:
+        PreparedCourse
+
+    Raises:
+        RaceRecoveryError: If the GPX has no track points
+        ValueError: If the GPX is malformed
+    """
+    course = read_track(complete_content)
+    return prepare_course(course.lat, course.lon, course.elevation)
+
+
+def read_track(content: bytes) -> TrackArrays:
+    """
+    Every track point of a GPX (all tracks and segments, in order) as one track
+
+    Args:
+        content: GPX file content
+
+    Returns:
+        TrackArrays with raw elevations and cumulative distance
+
+    Raises:
+        ValueError: If the GPX is malformed
+    """
+    segments = [
+        segment
+        for track in GPXStreamParser.parse(content)
+        for segment in track.segments
+        if len(segment)
+    ]
+    if not segments:
+        return TrackArrays(lat=[], lon=[], elevation=[], distance=[])
+
+    lat = np.concatenate([np.frombuffer(s.lat, dtype=np.float64) for s in segments])
+    lon = np.concatenate([np.frombuffer(s.lon, dtype=np.float64) for s in segments])
+    return TrackArrays(
+        lat=lat,
+        lon=lon,
+        elevation=np.concatenate([np.frombuffer(s.elevation, dtype=np.float64) for s in segments]),
+        distance=DistanceCalculator.cumulative_distance(lat, lon),
+        time=np.concatenate([np.frombuffer(s.time_us, dtype=np.int64) for s in segments]),
+        tz_offset=np.concatenate([np.frombuffer(s.tz_offset, dtype=np.int16) for s in segments]),
+    )
+
+
+def reconstruct_race_track(
+    incomplete_content: bytes,
+    complete_content: bytes,
+    official_time: str,
+    approx_distance_km: Optional[str] = None,
+) -> TrackArrays:
+    """
+    Reconstruct a complete track from a partial recording and the official course
+
+    Synchronous and CPU-bound: the route runs it in the process pool.
+
+    Args:
+        incomplete_content: Partial GPX recording (with timestamps)
+        complete_content: Complete course GPX (without timestamps)
+        official_time: Official finish time (HH:MM:SS or MM:SS)
+        approx_distance_km: Approximate distance covered in km (optional)
+
+    Returns:
+        Reconstructed track (write it with iter_gpx_xml)
+
+    Raises:
+        RaceRecoveryError: If the inputs cannot be reconciled
+        ValueError: If the official time or a GPX has an invalid format
+    """
+    # Parse official time first: a typo should not cost a course parse
+    parse_time_duration(official_time)
+    recording = read_track(incomplete_content)
+    course = prepare_course_gpx(complete_content)
+    return recover_against_course(course, recording, official_time, approx_distance_km)
+
+
+def project_recording(
+    course_index: CourseIndex,
+    recording: TrackArrays,
+    approx_distance_km: Optional[float] = None,
+    distance_tolerance_km: float = 5.0,
+) -> np.ndarray:
+    """
+    Course distance reached at every recorded point
+
+    The whole recording is map-matched onto the course (CourseMatcher), so
+    loops and out-and-back sections keep to the right lap: between two
+    points the runner can only step back BACKTRACK_M or move forward
+    LOOKAHEAD_M plus MAX_RUNNER_SPEED_MS over the elapsed time. Progress
+    never decreases. The recording is assumed to start at the race start
+    (its first point is matched in the first half of the course) and the
+    course before the first point is not filled.
+
+    Args:
+        course_index: Index of the course
+        recording: Timed recording
+        approx_distance_km: Approximate course distance of the last point (if known)
+        distance_tolerance_km: Search within ± this many km around approx_distance_km
+
+    Returns:
+        float64 array of course distance in meters per recorded point
+    """
+    if len(course_index) < 2:
+        return np.zeros(len(recording))
+
+    last_window = None
+    if approx_distance_km is not None:
+        last_window = (
+            (approx_distance_km - distance_tolerance_km) * 1000,
+            (approx_distance_km + distance_tolerance_km) * 1000,
+        )
+    match = CourseMatcher.match(
+        course_index,
+        recording.lat,
+        recording.lon,
+        seconds=(recording.time - recording.time[0]) / 1e6,
+        settings=MatchSettings(
+            backtrack_m=BACKTRACK_M,
+            lookahead_m=LOOKAHEAD_M,
+            max_speed_ms=MAX_RUNNER_SPEED_MS,
+        ),
+        first_window_m=(0.0, course_index.cumulative[-1] / 2),
+        last_window_m=last_window,
+    )
+    progress = np.maximum.accumulate(match.distance_along_m)
+
+    if not match.matched[-1]:
+        # Stopped off the course (or a recording offset from it): the
+        # nearest course point past the progress, or in the hinted window
+        start, stop = course_index.window(*(
+            (w / 1000 for w in last_window) if last_window else (progress[-1] / 1000, np.inf)
+        ))
+        projection = course_index.project(
+            float(recording.lat[-1]), float(recording.lon[-1]), max(start - 1, 0), max(stop, start + 1)
+        )
+        if projection is not None:
+            progress[-1] = max(progress[-1], projection.distance_along_m)
+    return progress
+
+
+class GapFill(NamedTuple):
+    """
+    Course vertices inserted after one recorded point
+
+    Attributes:
+        after: Index of the recorded point the gap starts at
+        lat: Latitudes of the inserted vertices
+        lon: Longitudes of the inserted vertices
+        elevation: Elevations of the inserted vertices (NaN when missing)
+        offset_us: Microseconds after the entry point's timestamp
+    """
+    after: int
+    lat: np.ndarray
+    lon: np.ndarray
+    elevation: np.ndarray
+    offset_us: np.ndarray
+
+
+def fill_gap(
+    course: PreparedCourse,
+    recording: TrackArrays,
+    entry: int,
+    progress: np.ndarray,
+    duration_seconds: float,
+    follow_recording_elevation: bool,
+) -> Optional[GapFill]:
+    """
+    Timestamps of the course vertices between two recorded points
+
+    The path runs from the entry point through the course vertices past its
+    progress to the exit point (the next recorded point), or to the course
+    end when the entry is the last recorded point. One base speed, scaled
+    by the slope of each segment, covers the path in exactly duration_seconds.
+
+    Args:
+        course: Prepared course
+        recording: Timed recording
+        entry: Recorded point the gap starts at
+        progress: Course distance of every recorded point (project_recording)
+        duration_seconds: Time between the entry and the exit
+        follow_recording_elevation: Rebuild elevations from the course
+            slopes starting at the entry elevation instead of copying the
+            course elevations (when the recording has the better altimeter)
+
+    Returns:
+        GapFill, or None if no course vertex lies in the gap
+    """
+    cumulative = course.index.cumulative
+    trailing = entry == len(recording) - 1
+    first = int(np.searchsorted(cumulative, progress[entry], side="right"))
+    stop = len(cumulative) if trailing else int(np.searchsorted(cumulative, progress[entry + 1], side="left"))
+    if stop <= first:
+        return None
+
+    # Entry point, course vertices, then the exit point for a mid-race gap
+    ends = slice(entry, entry + 1) if trailing else slice(entry, entry + 2)
+    path_lat = np.concatenate((recording.lat[ends][:1], course.index.lat[first:stop], recording.lat[ends][1:]))
+    path_lon = np.concatenate((recording.lon[ends][:1], course.index.lon[first:stop], recording.lon[ends][1:]))
+    path_elevation = np.concatenate(
+        (recording.elevation[ends][:1], course.elevation[first:stop], recording.elevation[ends][1:])
+    )
+    distances = DistanceCalculator.segment_lengths(path_lat, path_lon)
+    slopes = calculate_slopes(distances, path_elevation)
+
+    base_speed = solve_base_speed(distances, slopes, duration_seconds)
+    if base_speed > 0:
+        seconds = np.cumsum(distances / (base_speed * speed_factors(slopes)))
+    else:
+        seconds = np.zeros(len(distances))
+
+    if follow_recording_elevation:
+        entry_elevation = recording.elevation[entry]
+        start_elevation = 0.0 if np.isnan(entry_elevation) else entry_elevation
+        elevation = start_elevation + np.cumsum(distances * slopes)
+    else:
+        elevation = path_elevation[1:]
+
+    count = stop - first
+    return GapFill(
+        after=entry,
+        lat=course.index.lat[first:stop],
+        lon=course.index.lon[first:stop],
+        elevation=elevation[:count],
+        offset_us=np.rint(seconds[:count] * 1e6).astype(np.int64),
+    )
+
+
+def recover_against_course(
+    course: PreparedCourse,
+    recording: Union[bytes, TrackArrays],
+    official_time: str,
+    approx_distance_km: Optional[str] = None,
+) -> TrackArrays:
+    """
+    Reconstruct one runner's track against a prepared course
+
+    The recording is projected onto the course. Every gap, where the
+    recording jumps more than MIN_GAP_M along the course (watch paused,
+    GPS lost in a tunnel), is filled with the course vertices it skipped,
+    timed between the points on either side. If the recording stops
+    early, the rest of the course is timed to finish at the official time.
+    Points without a timestamp between the first and last are dropped.
+
+    Args:
+        course: Course from prepare_course / prepare_course_gpx
+        recording: Partial GPX recording (raw bytes or read_track output)
+        official_time: Official finish time (HH:MM:SS or MM:SS)
+        approx_distance_km: Approximate distance covered in km (optional)
+
+    Returns:
+        Reconstructed track (write it with iter_gpx_xml)
+
+    Raises:
+        RaceRecoveryError: If the inputs cannot be reconciled
+        ValueError: If the official time or the GPX has an invalid format
+    """
+    # Parse official time
+    official_duration = parse_time_duration(official_time)
+
+    if not isinstance(recording, TrackArrays):
+        recording = read_track(recording)
+
+    if not len(recording):
+        raise RaceRecoveryError("GPX files must contain valid tracks")
+
+    has_time = recording.has_time
+    if not (has_time[0] and has_time[-1]):
+        raise RaceRecoveryError("Le GPX incomplet doit contenir des timestamps")
+    if not has_time.all():
+        recording = recording.take(np.flatnonzero(has_time))
+
+    # Assess elevation data quality of the recording (the course was assessed once)
+    incomplete_quality = assess_elevation_array(recording.elevation)
+    complete_quality = course.quality
+
+    logger.info(f"Incomplete GPX elevation quality: {incomplete_quality['quality_score']:.1f}/100 ({incomplete_quality['source']})")
+
+    # Parse approximate distance if provided
+    approx_km = None
+    if approx_distance_km:
+        try:
+            approx_km = float(approx_distance_km.strip())
+        except (ValueError, AttributeError):
+            pass  # Ignore invalid input, will use fallback method
+
+    recorded_time = (recording.time[-1] - recording.time[0]) / 1e6
+
+    # Calculate remaining time for the missing end of the course
+    remaining_time_seconds = official_duration.total_seconds() - recorded_time
+
+    if remaining_time_seconds <= 0:
+        raise RaceRecoveryError("Le temps officiel doit être supérieur au temps enregistré")
+
+    progress = project_recording(course.index, recording, approx_distance_km=approx_km)
+
+    # Use elevation interpolated from the recording if the course has poor quality
+    use_interpolated_elevation = (incomplete_quality['quality_score'] > complete_quality['quality_score'] + 20)
+    if use_interpolated_elevation:
+        logger.info("Using interpolated elevation based on incomplete GPX (better quality)")
+
+    # Mid-race gaps, timed by the recorded points on either side
+    entries = np.flatnonzero(np.diff(progress) > MIN_GAP_M).tolist()
+    durations = (np.diff(recording.time) / 1e6).tolist()
+    fills = [
+        fill_gap(course, recording, entry, progress, durations[entry], use_interpolated_elevation)
+        for entry in entries
+        if durations[entry] > 0
+    ]
+    # Then the end of the course, timed by the official time
+    fills.append(fill_gap(
+        course, recording, len(recording) - 1, progress, remaining_time_seconds, use_interpolated_elevation
+    ))
+    fills = [fill for fill in fills if fill is not None]
+    if fills:
+        logger.info(f"Recovered {len(fills)} gap(s), {sum(len(fill.lat) for fill in fills)} course points")
+
+    # Recorded runs interleaved with the fills
+    cuts = [fill.after + 1 for fill in fills]
+    pieces = {column: [] for column in ("lat", "lon", "elevation", "time", "tz_offset")}
+    for (start, stop), fill in zip(zip([0] + cuts, cuts + [len(recording)]), fills + [None]):
+        pieces["lat"].append(recording.lat[start:stop])
+        pieces["lon"].append(recording.lon[start:stop])
+        pieces["elevation"].append(recording.elevation[start:stop])
+        pieces["time"].append(recording.time[start:stop])
+        pieces["tz_offset"].append(recording.tz_offset[start:stop])
+        if fill is not None:
+            pieces["lat"].append(fill.lat)
+            pieces["lon"].append(fill.lon)
+            pieces["elevation"].append(fill.elevation)
+            pieces["time"].append(recording.time[fill.after] + fill.offset_us)
+            pieces["tz_offset"].append(np.full(len(fill.lat), recording.tz_offset[fill.after], dtype=np.int16))
+
+    lat = np.concatenate(pieces["lat"])
+    lon = np.concatenate(pieces["lon"])
+    return TrackArrays(
+        lat=lat,
+        lon=lon,
+        elevation=np.concatenate(pieces["elevation"]),
+        distance=DistanceCalculator.cumulative_distance(lat, lon),
+        time=np.concatenate(pieces["time"]),
+        tz_offset=np.concatenate(pieces["tz_offset"]),
+    )
+
+
+class RunnerRecovery(NamedTuple):
+    """
+    Outcome of one runner in a batch recovery
+
+    Attributes:
+        name: Runner label (the uploaded file name)
+        gpx: Reconstructed GPX document, encoded, or None if the recovery failed
+        error: Why the recovery failed (None on success)
+    """
+    name: str
+    gpx: Optional[bytes]
+    error: Optional[str]
+
+
+def recover_runners(
+    course: PreparedCourse,
+    runners: List[Tuple[str, bytes, str, Optional[str]]],
+) -> List[RunnerRecovery]:
+    """
+    Recover several runners against one prepared course
+
+    A runner whose inputs cannot be reconciled is reported and does not
+    stop the others. The GPX text is formatted here, in the worker, so the
+    event loop only has to archive it.
+
+    Args:
+        course: Course from prepare_course / prepare_course_gpx
+        runners: (name, partial GPX, official time, approximate km or None) per runner
+
+    Returns:
+        One RunnerRecovery per runner, in order
+    """
+    results = []
+    for name, content, official_time, approx_distance_km in runners:
+        try:
+            track = recover_against_course(course, content, official_time, approx_distance_km)
+            gpx = "".join(iter_gpx_xml(track, RECOVERY_CREATOR)).encode()
+            results.append(RunnerRecovery(name, gpx, None))
+        except Exception as e:
+            error = _recovery_error_detail(e)
+            if error is None:
+                raise
+            results.append(RunnerRecovery(name, None, error))
+    return results
+
+
+def _recovery_error_detail(error: Exception) -> Optional[str]:
+    """Client-facing message of a recovery error (None if unexpected)"""
+    if isinstance(error, RaceRecoveryError):
+        return str(error)
+    if isinstance(error, gpxpy.gpx.GPXException):
+        return f"Erreur de parsing GPX: {str(error)}"
+    if isinstance(error, ValueError):
+        return f"Erreur de format: {str(error)}"
+    if isinstance(error, (AttributeError, TypeError)):
+        # Errors accessing point attributes (missing time, lat, lon, etc.)
+        return f"Données GPX invalides: {str(error)}"
+    return None
+
+
+def build_recovery_zip(results: List[RunnerRecovery]) -> bytes:
+    """
+    Zip archive of recovered GPX files plus a report.json of every runner
+
+    Files are numbered in upload order so identical names do not collide.
+    Compression is CPU-bound: call it off the event loop.
+    """
+    buffer = BytesIO()
+    report = []
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for i, result in enumerate(results, start=1):
+            entry = {"runner": result.name, "status": "ok" if result.error is None else "error"}
+            if result.error is None:
+                stem = PurePath(result.name).stem or "runner"
+                entry["file"] = f"{i:03d}_recovered_{stem}.gpx"
+                archive.writestr(entry["file"], result.gpx)
+            else:
+                entry["detail"] = result.error
+            report.append(entry)
+        archive.writestr("report.json", json.dumps(report, ensure_ascii=False, indent=2))
+    return buffer.getvalue()
+
+
+def race_track(tracks: List[AnalyzedTrack]) -> TrackArrays:
+    """
+    All tracks of a published race as one course, in order
+
+    Raises:
+        RaceRecoveryError: If the race has no track points
+    """
+    if not tracks:
+        raise RaceRecoveryError("GPX files must contain valid tracks")
+    lat = np.concatenate([t.arrays.lat for t in tracks])
+    lon = np.concatenate([t.arrays.lon for t in tracks])
+    return TrackArrays(
+        lat=lat,
+        lon=lon,
+        elevation=np.concatenate([t.arrays.elevation for t in tracks]),
+        distance=DistanceCalculator.cumulative_distance(lat, lon),
+    )
+
+
+def detect_off_course(
+    course: Union[bytes, TrackArrays],
+    recording: Union[bytes, TrackArrays],
+    threshold_m: float,
+    min_points: int = 3,
+) -> OffCourseResponse:
+    """
+    Sections of a recording farther than threshold_m from the course
+
+    The recording is map-matched onto the course (CourseMatcher), so a
+    detour next to another part of the course (an out-and-back, the next
+    lap) is still reported.
+
+    Args:
+        course: Course GPX content or track
+        recording: Recorded GPX content or track
+        threshold_m: Distance to the course beyond which a point is off course
+        min_points: Shorter runs are ignored (isolated GPS spikes)
+
+    Returns:
+        OffCourseResponse
+
+    Raises:
+        RaceRecoveryError: If a GPX has no track points
+        ValueError: If a GPX is malformed
+    """
+    course = course if isinstance(course, TrackArrays) else read_track(course)
+    recording = recording if isinstance(recording, TrackArrays) else read_track(recording)
+    if not len(course) or not len(recording):
+        raise RaceRecoveryError("GPX files must contain valid tracks")
+
+    course_index = CourseIndex(course.lat, course.lon)
+    seconds = None
+    if recording.has_time.all():
+        seconds = (recording.time - recording.time[0]) / 1e6
+    match = CourseMatcher.match(
+        course_index,
+        recording.lat,
+        recording.lon,
+        seconds=seconds,
+        settings=MatchSettings(radius_m=max(MatchSettings().radius_m, threshold_m)),
+    )
+
+    runs = off_course_sections(match, threshold_m, min_points)
+    offsets = match.offset_m.copy()
+    # Points beyond the matching radius: one bulk query up to OFF_COURSE_SEARCH_M,
+    # farther ones are reported at that bound
+    far = np.concatenate([np.arange(start, stop) for start, stop in runs] or [np.empty(0, dtype=np.int64)])
+    far = far[np.isnan(offsets[far])]
+    if len(far):
+        found = course_index.candidates(recording.lat[far], recording.lon[far], OFF_COURSE_SEARCH_M)
+        nearest = np.full(len(far), OFF_COURSE_SEARCH_M)
+        np.minimum.at(nearest, found.point, found.offset_m)
+        offsets[far] = nearest
+
+    sections = []
+    for start, stop in runs:
+        max_offset = float(offsets[start:stop].max())
+        sections.append(OffCourseSection(
+            start_index=start,
+            end_index=stop - 1,
+            start_time=recording.time_iso(start),
+            end_time=recording.time_iso(stop - 1),
+            left_at_km=round(float(match.distance_along_m[start]) / 1000, 3),
+            rejoined_at_km=round(float(match.distance_along_m[min(stop, len(recording) - 1)]) / 1000, 3),
+            max_offset_m=round(max_offset, 1),
+            beyond_search=max_offset >= OFF_COURSE_SEARCH_M,
+        ))
+
+    return OffCourseResponse(
+        threshold_m=threshold_m,
+        matched_ratio=round(float(match.matched.mean()), 4),
+        sections=sections,
+    )
+
+
 @router.post("/recover")
 async def recover_race(
     incomplete_gpx: UploadFile = File(..., description="GPX partiel avec timestamps (de la montre)"),
@@ -146,232 +708,37 @@ async def recover_race(
     - Official finish time
     - Optional: Approximate distance covered (helps find accurate cutoff point)
 
-    Calculates missing timestamps based on slope-adjusted speed.
+    Calculates missing timestamps based on slope-adjusted speed, for the
+    end of the course and for every gap where the recording dropped out.
+    The GPX is streamed as it is written.
     """
     try:
-        # Parse official time
-        official_duration = parse_time_duration(official_time)
-
-        # Parse incomplete GPX (with timestamps)
         incomplete_content = await incomplete_gpx.read()
-        incomplete_parsed = gpxpy.parse(incomplete_content)
-
-        # Parse complete GPX (without timestamps - reference track)
         complete_content = await complete_gpx.read()
-        complete_parsed = gpxpy.parse(complete_content)
-
-        # Extract points
-        incomplete_points = []
-        for track in incomplete_parsed.tracks:
-            for segment in track.segments:
-                incomplete_points.extend(segment.points)
-
-        complete_points = []
-        for track in complete_parsed.tracks:
-            for segment in track.segments:
-                complete_points.extend(segment.points)
-
-        if not incomplete_points or not complete_points:
-            raise HTTPException(status_code=400, detail="GPX files must contain valid tracks")
-
-        # Assess elevation data quality for both files
-        incomplete_quality = assess_elevation_quality(incomplete_points)
-        complete_quality = assess_elevation_quality(complete_points)
-
-        logger.info(f"Incomplete GPX elevation quality: {incomplete_quality['quality_score']:.1f}/100 ({incomplete_quality['source']})")
-        logger.info(f"Complete GPX elevation quality: {complete_quality['quality_score']:.1f}/100 ({complete_quality['source']})")
-
-        # Process complete track elevation if quality is poor
-        if complete_quality['recommended_action'] == 'smooth':
-            logger.info("Smoothing complete GPX elevation data")
-            complete_points = smooth_elevation_data(complete_points, window_size=7)
-        elif complete_quality['quality_score'] < 50:
-            logger.warning(f"Complete GPX has poor elevation quality. Issues: {complete_quality['issues']}")
-
-        # Parse approximate distance if provided
-        approx_km = None
-        if approx_distance_km:
-            try:
-                approx_km = float(approx_distance_km.strip())
-            except (ValueError, AttributeError):
-                pass  # Ignore invalid input, will use fallback method
-
-        # Find where incomplete GPX ends on complete track
-        last_incomplete_point = incomplete_points[-1]
-        cutoff_index = find_closest_point_index(
-            last_incomplete_point.latitude,
-            last_incomplete_point.longitude,
-            complete_points,
-            approx_distance_km=approx_km
-        )
-
-        # Calculate recorded distance and time
-        recorded_distance = sum(
-            haversine_distance(
-                incomplete_points[i].latitude, incomplete_points[i].longitude,
-                incomplete_points[i + 1].latitude, incomplete_points[i + 1].longitude
-            )
-            for i in range(len(incomplete_points) - 1)
-        )
-
-        first_time = incomplete_points[0].time
-        last_time = incomplete_points[-1].time
 
-        if first_time is None or last_time is None:
-            raise HTTPException(
-                status_code=400,
-                detail="Le GPX incomplet doit contenir des timestamps"
-            )
-
-        recorded_time = (last_time - first_time).total_seconds()
-
-        # Calculate remaining distance
-        # Start from cutoff_index (not cutoff_index + 1) because we need the distance
-        # from the last recorded point to the next point
-        remaining_distance = sum(
-            haversine_distance(
-                complete_points[i].latitude, complete_points[i].longitude,
-                complete_points[i + 1].latitude, complete_points[i + 1].longitude
-            )
-            for i in range(cutoff_index, len(complete_points) - 1)
+        track, timing = await process_pool.run(
+            "recover_race",
+            reconstruct_race_track,
+            incomplete_content,
+            complete_content,
+            official_time,
+            approx_distance_km,
         )
 
-        # Calculate average speed for missing section
-        remaining_time_seconds = official_duration.total_seconds() - recorded_time
-
-        if remaining_time_seconds <= 0:
-            raise HTTPException(
-                status_code=400,
-                detail="Le temps officiel doit être supérieur au temps enregistré"
-            )
-
-        # Pre-calculate all segments (distance + slope) for accurate time distribution
-        segments = []
-        prev_point = incomplete_points[-1]  # Last recorded point
-
-        for i in range(cutoff_index + 1, len(complete_points)):
-            point = complete_points[i]
-
-            distance = haversine_distance(
-                prev_point.latitude, prev_point.longitude,
-                point.latitude, point.longitude
-            )
-            slope = calculate_slope(prev_point, point)
-
-            segments.append({
-                'distance': distance,
-                'slope': slope,
-                'point': point
-            })
-
-            prev_point = point
-
-        # Use binary search to find optimal base speed that gives exact target time
-        # This ensures: Σ(distance_i / (v_base * (1 - 2 * slope_i))) = remaining_time_seconds
-        def calculate_total_time_with_base_speed(v_base: float) -> float:
-            """Calculate total time using given base speed with slope adjustments"""
-            total = 0.0
-            for seg in segments:
-                adjusted_speed = v_base * (1 - 2 * seg['slope'])
-                # Apply realistic bounds
-                adjusted_speed = max(adjusted_speed, v_base * 0.3)  # Min 30% of base
-                adjusted_speed = min(adjusted_speed, v_base * 2.0)  # Max 200% of base
-                total += seg['distance'] / adjusted_speed
-            return total
-
-        # Binary search for optimal base speed (50 iterations gives precision < 1 second)
-        v_min = 0.1  # 0.1 m/s minimum (very slow)
-        v_max = 10.0  # 10 m/s maximum (36 km/h, very fast for trail)
-        optimal_base_speed = (v_min + v_max) / 2
-
-        for _ in range(50):
-            optimal_base_speed = (v_min + v_max) / 2
-            calculated_time = calculate_total_time_with_base_speed(optimal_base_speed)
-
-            if abs(calculated_time - remaining_time_seconds) < 1.0:  # Precision: 1 second
-                break
-
-            if calculated_time > remaining_time_seconds:
-                # Too slow, increase speed
-                v_min = optimal_base_speed
-            else:
-                # Too fast, decrease speed
-                v_max = optimal_base_speed
-
-        # Create reconstructed GPX - clean and professional
-        reconstructed_gpx = gpxpy.gpx.GPX()
-        reconstructed_gpx.creator = "GPX Ninja - Race Recovery"
-
-        reconstructed_track = gpxpy.gpx.GPXTrack()
-        reconstructed_gpx.tracks.append(reconstructed_track)
-        reconstructed_segment = gpxpy.gpx.GPXTrackSegment()
-        reconstructed_track.segments.append(reconstructed_segment)
-
-        # Add recorded points with original timestamps (clean, no extensions)
-        for point in incomplete_points:
-            clean_point = gpxpy.gpx.GPXTrackPoint(
-                latitude=point.latitude,
-                longitude=point.longitude,
-                elevation=point.elevation,
-                time=point.time
-            )
-            reconstructed_segment.points.append(clean_point)
-
-        # Add missing points with calculated timestamps using optimal base speed
-        # Use interpolated elevation if complete track has poor quality
-        current_time = last_time
-        current_elevation = incomplete_points[-1].elevation if incomplete_points[-1].elevation is not None else 0
-
-        use_interpolated_elevation = (incomplete_quality['quality_score'] > complete_quality['quality_score'] + 20)
-
-        if use_interpolated_elevation:
-            logger.info("Using interpolated elevation based on incomplete GPX (better quality)")
-
-        for seg in segments:
-            # Calculate adjusted speed with slope
-            adjusted_speed = optimal_base_speed * (1 - 2 * seg['slope'])
-            # Apply realistic bounds
-            adjusted_speed = max(adjusted_speed, optimal_base_speed * 0.3)
-            adjusted_speed = min(adjusted_speed, optimal_base_speed * 2.0)
-
-            # Calculate time for this segment
-            time_delta_seconds = seg['distance'] / adjusted_speed
-            current_time += timedelta(seconds=time_delta_seconds)
-
-            # Determine elevation to use
-            if use_interpolated_elevation:
-                # Interpolate elevation based on slope and distance
-                elevation_change = seg['distance'] * seg['slope']
-                current_elevation += elevation_change
-                point_elevation = current_elevation
-            else:
-                # Use elevation from complete track (already smoothed if needed)
-                point_elevation = seg['point'].elevation
-
-            # Create point with calculated timestamp and elevation
-            new_point = gpxpy.gpx.GPXTrackPoint(
-                latitude=seg['point'].latitude,
-                longitude=seg['point'].longitude,
-                elevation=point_elevation,
-                time=current_time
-            )
-
-            reconstructed_segment.points.append(new_point)
-
-        # Generate GPX XML
-        gpx_xml = reconstructed_gpx.to_xml()
-
-        return Response(
-            content=gpx_xml,
+        response = StreamingResponse(
+            (chunk.encode() for chunk in iter_gpx_xml(track, RECOVERY_CREATOR)),
             media_type="application/gpx+xml",
             headers={
                 "Content-Disposition": "attachment; filename=recovered_race.gpx"
             }
         )
+        set_server_timing(response, timing)
+        return response
 
-    except HTTPException:
-        # Re-raise HTTP exceptions (400 errors from validation)
-        raise
+    except RaceRecoveryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except PoolSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except gpxpy.gpx.GPXException as e:
         raise HTTPException(status_code=400, detail=f"Erreur de parsing GPX: {str(e)}")
     except ValueError as e:
@@ -384,3 +751,144 @@ async def recover_race(
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Erreur interne: {str(e)}")
+
+
+@router.post("/recover-batch")
+async def recover_race_batch(
+    incomplete_gpx: List[UploadFile] = File(..., description="GPX partiels avec timestamps (un par coureur)"),
+    official_times: List[str] = Form(..., description="Temps officiel de chaque coureur, dans l'ordre des fichiers (HH:MM:SS)"),
+    approx_distances_km: Optional[List[str]] = Form(None, description="Distance approximative parcourue par coureur en km (optionnel, vide si inconnue)"),
+    complete_gpx: Optional[UploadFile] = File(None, description="GPX complet sans timestamps (tracé officiel)"),
+    race_slug: Optional[str] = Form(None, description="Course publiée à utiliser comme tracé officiel (à la place de complete_gpx)"),
+    db: Session = Depends(get_db),
+):
+    """
+    Reconstruct many runners' GPX files against one course
+
+    The course (uploaded or a published race) is parsed, elevation-corrected
+    and indexed once, then runners are recovered in parallel across the
+    process pool. Returns a zip with one GPX per recovered runner and a
+    report.json giving the status of every runner.
+    """
+    if (complete_gpx is None) == (race_slug is None):
+        raise HTTPException(status_code=400, detail="Fournir soit complete_gpx, soit race_slug")
+    if not incomplete_gpx:
+        raise HTTPException(status_code=400, detail="Aucun GPX partiel fourni")
+    if len(incomplete_gpx) > MAX_BATCH_RUNNERS:
+        raise HTTPException(status_code=400, detail=f"{MAX_BATCH_RUNNERS} coureurs maximum par lot")
+    if len(official_times) != len(incomplete_gpx):
+        raise HTTPException(status_code=400, detail="Un temps officiel est requis par GPX partiel")
+    if approx_distances_km and len(approx_distances_km) != len(incomplete_gpx):
+        raise HTTPException(status_code=400, detail="Une distance approximative (ou vide) est requise par GPX partiel")
+
+    try:
+        if race_slug is not None:
+            track = race_track(await TrackStore.get_race(db, race_slug))
+            course, course_timing = await process_pool.run(
+                "prepare_course", prepare_course, track.lat, track.lon, track.elevation
+            )
+        else:
+            course, course_timing = await process_pool.run(
+                "prepare_course", prepare_course_gpx, await complete_gpx.read()
+            )
+
+        runners = [
+            (
+                upload.filename or f"runner_{i + 1}",
+                await upload.read(),
+                official_times[i],
+                approx_distances_km[i] if approx_distances_km else None,
+            )
+            for i, upload in enumerate(incomplete_gpx)
+        ]
+
+        # One job per worker, each recovering a contiguous share of the runners
+        chunk_count = min(max(process_pool.max_workers, 1), len(runners))
+        bounds = np.linspace(0, len(runners), chunk_count + 1).astype(int)
+        outcomes = await asyncio.gather(*(
+            process_pool.run("recover_runners", recover_runners, course, runners[start:stop])
+            for start, stop in zip(bounds[:-1], bounds[1:])
+        ))
+    except TrackNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except PoolSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        detail = _recovery_error_detail(e)
+        if detail is None:
+            # Only truly unexpected errors should return 500
+            import traceback
+            traceback.print_exc()
+            raise HTTPException(status_code=500, detail=f"Erreur interne: {str(e)}")
+        raise HTTPException(status_code=400, detail=detail)
+
+    results = [result for chunk, _ in outcomes for result in chunk]
+    if all(result.error is not None for result in results):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Aucun GPX n'a pu être reconstruit: {results[0].error}",
+        )
+
+    # Deflating every runner's GPX would stall the loop (zlib releases the GIL)
+    response = Response(
+        content=await run_in_threadpool(build_recovery_zip, results),
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": "attachment; filename=recovered_races.zip"
+        }
+    )
+    # Course preparation, then the slowest share of runners
+    set_server_timing(response, JobTiming(
+        "recover_batch",
+        course_timing.queue_wait + max(timing.queue_wait for _, timing in outcomes),
+        course_timing.execution + max(timing.execution for _, timing in outcomes),
+    ))
+    return response
+
+
+@router.post("/off-course", response_model=OffCourseResponse)
+async def detect_off_course_sections(
+    response: Response,
+    recording_gpx: UploadFile = File(..., description="GPX enregistré (montre)"),
+    complete_gpx: Optional[UploadFile] = File(None, description="GPX complet du tracé officiel"),
+    race_slug: Optional[str] = Form(None, description="Course publiée à utiliser comme tracé officiel (à la place de complete_gpx)"),
+    threshold_m: float = Form(50.0, gt=0, le=500, description="Distance au tracé au-delà de laquelle un point est hors parcours (m)"),
+    db: Session = Depends(get_db),
+):
+    """
+    Find where a recording left the official course
+
+    The recording is map-matched onto the course, so detours next to
+    another part of the course (out-and-back, next lap) are still found.
+    """
+    if (complete_gpx is None) == (race_slug is None):
+        raise HTTPException(status_code=400, detail="Fournir soit complete_gpx, soit race_slug")
+
+    try:
+        if race_slug is not None:
+            course = race_track(await TrackStore.get_race(db, race_slug))
+        else:
+            course = await complete_gpx.read()
+
+        result, timing = await process_pool.run(
+            "detect_off_course",
+            detect_off_course,
+            course,
+            await recording_gpx.read(),
+            threshold_m,
+        )
+    except TrackNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except PoolSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        detail = _recovery_error_detail(e)
+        if detail is None:
+            # Only truly unexpected errors should return 500
+            import traceback
+            traceback.print_exc()
+            raise HTTPException(status_code=500, detail=f"Erreur interne: {str(e)}")
+        raise HTTPException(status_code=400, detail=detail)
+
+    set_server_timing(response, timing)
+    return result
@@ -9,6 +9,8 @@ from app.db.models import SharedState
 from app.models.gpx import SaveStateRequest, SaveStateResponse, SharedStateResponse
 from app.utils.share_id import generate_share_id
 from app.middleware.rate_limit import limiter
+from app.services.wire_format import WireFormat, columnize_points, negotiate, render
+from typing import Optional
 import json
 
 router = APIRouter()
@@ -95,12 +97,20 @@ async def save_state(request: SaveStateRequest, http_request: Request, db: Sessi
 
 
 @router.get("/{share_id}", response_model=SharedStateResponse)
-async def get_shared_state(share_id: str, db: Session = Depends(get_db)):
+async def get_shared_state(
+    share_id: str,
+    http_request: Request,
+    format: Optional[WireFormat] = None,
+    db: Session = Depends(get_db),
+):
     """
     Retrieve shared application state by ID
 
     Args:
         share_id: 8-character share identifier
+        http_request: FastAPI request object (for the Accept header)
+        format: Track point encoding (json, columnar or binary); defaults to
+            the Accept header, then json
         db: Database session
 
     Returns:
@@ -132,6 +142,16 @@ async def get_shared_state(share_id: str, db: Session = Depends(get_db)):
     shared_state.increment_view_count()
     db.commit()
 
+    fmt = negotiate(http_request, format)
+    if fmt != WireFormat.JSON:
+        return render({
+            "success": True,
+            "share_id": shared_state.share_id,
+            "state_json": columnize_points(shared_state.state_json, fmt),
+            "created_at": shared_state.created_at.isoformat(),
+            "view_count": shared_state.view_count,
+        }, fmt)
+
     return SharedStateResponse(
         success=True,
         share_id=shared_state.share_id,
@@ -56,6 +56,22 @@ class Settings(BaseSettings):
     MAX_UPLOAD_SIZE: int = 26214400  # 25MB
     UPLOAD_DIR: str = "./uploads"
 
+    # Parse cache for uploads, keyed by SHA-256 of the file bytes
+    PARSE_CACHE_MAX_BYTES: int = 268435456  # 256MB of cached track arrays in memory
+    PARSE_CACHE_DISK: bool = False  # Also keep parsed tracks under UPLOAD_DIR/parse_cache
+    PARSE_CACHE_TTL_SECONDS: int = 21600  # 6h without use before a file_id expires (0 = never)
+
+    # Climb detection results, keyed by track content and parameters
+    CLIMB_CACHE_MAX_ENTRIES: int = 4096  # (track, parameter set) results kept in memory (0 = disabled)
+
+    # Local DEM for elevation correction (directory of SRTM .hgt tiles, "" = disabled)
+    DEM_DIR: str = ""
+    DEM_MAX_OPEN_TILES: int = 16  # memory-mapped tiles kept open (LRU)
+
+    # Process pool for CPU-bound endpoints (0 workers = run in a thread, no subprocess)
+    PROCESS_POOL_WORKERS: int = 2
+    PROCESS_POOL_MAX_QUEUE: int = 8  # jobs allowed to wait for a worker before answering 503
+
     # SMTP Settings (optional - for contact form)
     SMTP_HOST: str = "smtp.gmail.com"
     SMTP_PORT: int = 587
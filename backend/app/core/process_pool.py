@@ -0,0 +1,152 @@
+"""
+Bounded process pool for CPU-bound request handlers
+
+Parsing, merging and analysis are synchronous and CPU-bound. Running them
+directly in `async def` routes blocks the event loop, so every other request
+on the worker (health checks included) waits behind one large file. Jobs are
+dispatched to worker processes instead, with pickling-cheap inputs (bytes,
+TrackArrays) and compact outputs.
+"""
+import asyncio
+import functools
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, NamedTuple, Optional, Tuple
+
+from starlette.responses import Response
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PoolSaturatedError(Exception):
+    """Raised when the job queue is full (callers should answer 503)"""
+
+
+class WorkerCrashedError(PoolSaturatedError):
+    """Raised when a worker process died during the job (the pool is restarted; answer 503)"""
+
+
+class JobTiming(NamedTuple):
+    """Timing of one pool job, in seconds"""
+    name: str
+    queue_wait: float
+    execution: float
+
+
+def _execute(func: Callable, args: tuple, kwargs: dict) -> Tuple[Any, float, float]:
+    """Worker-side wrapper: run the job and report when it started and how long it ran"""
+    started_at = time.time()
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, started_at, time.perf_counter() - start
+
+
+class ProcessPool:
+    """
+    Process pool with a bounded number of in-flight jobs
+
+    At most max_workers jobs run at once and up to max_queue more wait for a
+    worker; beyond that, run() fails fast with PoolSaturatedError instead of
+    piling up requests. With max_workers=0, jobs run in a thread of the event
+    loop's default executor (useful for tests and local development).
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._in_flight = 0
+
+    @property
+    def in_flight(self) -> int:
+        """Jobs currently running or waiting for a worker"""
+        return self._in_flight
+
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        if self.max_workers <= 0:
+            return None
+        if self._executor is None:
+            # spawn: forking a process that runs an event loop and threads is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            logger.info(f"Process pool started ({self.max_workers} workers, queue depth {self.max_queue})")
+        return self._executor
+
+    async def run(self, name: str, func: Callable, *args, **kwargs) -> Tuple[Any, JobTiming]:
+        """
+        Run func(*args, **kwargs) in the pool
+
+        func must be importable at module level (plain function or static
+        method) and its arguments and result must be picklable.
+
+        Args:
+            name: Job name used in logs and timing headers
+            func: Function to run in a worker process
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            Tuple of (result, JobTiming)
+
+        Raises:
+            PoolSaturatedError: If max_workers + max_queue jobs are already in flight
+            WorkerCrashedError: If a worker died (OOM kill, segfault); the
+                broken executor is dropped so the next job starts a new one
+            Exception: Whatever func raised in the worker
+        """
+        capacity = max(self.max_workers, 1) + self.max_queue
+        if self._in_flight >= capacity:
+            logger.warning(f"Job {name} rejected: {self._in_flight} jobs in flight (capacity {capacity})")
+            raise PoolSaturatedError("Server is busy, please retry in a few seconds")
+
+        self._in_flight += 1
+        submitted_at = time.time()
+        executor = self._get_executor()
+        try:
+            loop = asyncio.get_running_loop()
+            result, started_at, execution = await loop.run_in_executor(
+                executor,
+                functools.partial(_execute, func, args, kwargs),
+            )
+        except BrokenProcessPool:
+            logger.error(f"Job {name} failed: a worker process died, restarting the pool")
+            # Concurrent jobs of the same executor fail too: drop it only once
+            if self._executor is executor:
+                self._executor = None
+                executor.shutdown(wait=False, cancel_futures=True)
+            raise WorkerCrashedError("A worker crashed, please retry in a few seconds")
+        finally:
+            self._in_flight -= 1
+
+        timing = JobTiming(name, max(started_at - submitted_at, 0.0), execution)
+        logger.info(
+            f"Job {name}: queue wait {timing.queue_wait * 1000:.1f} ms, "
+            f"execution {timing.execution * 1000:.1f} ms"
+        )
+        return result, timing
+
+    def shutdown(self) -> None:
+        """Stop the worker processes (called on application shutdown)"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+def set_server_timing(response: Response, timing: JobTiming) -> None:
+    """Expose a job's queue wait and execution time in a Server-Timing header"""
+    response.headers["Server-Timing"] = (
+        f"queue;dur={timing.queue_wait * 1000:.1f}, exec;dur={timing.execution * 1000:.1f}"
+    )
+
+
+process_pool = ProcessPool(
+    max_workers=settings.PROCESS_POOL_WORKERS,
+    max_queue=settings.PROCESS_POOL_MAX_QUEUE,
+)
@@ -11,6 +11,7 @@ from starlette.datastructures import UploadFile as StarletteUploadFile
 # Import logging first to ensure it's configured before other imports
 from app.core.logging import get_logger
 from app.core.config import settings
+from app.core.process_pool import process_pool
 from app.api import gpx, share, race_recovery, contact, admin, races, ptp
 from app.db.database import init_db
 from app.middleware.rate_limit import limiter, rate_limit_exceeded_handler
@@ -43,6 +44,7 @@ async def lifespan(app: FastAPI):
 
     # Shutdown
     logger.info("Application shutting down...")
+    process_pool.shutdown()
 
 
 # Create FastAPI application
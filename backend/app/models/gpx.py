@@ -1,8 +1,11 @@
 """
 GPX data models (Pydantic schemas for API)
 """
+from datetime import datetime
 from enum import Enum
-from typing import List, Optional
+from itertools import product
+from math import prod
+from typing import Annotated, List, Optional
 from fastapi import HTTPException
 from pydantic import BaseModel, Field, model_validator
 
@@ -60,6 +63,18 @@ class Track(BaseModel):
     statistics: TrackStatistics
 
 
+class ElevationProfilePoint(BaseModel):
+    """Point of a downsampled elevation profile"""
+    distance_km: float
+    elevation: float
+
+
+class GradientProfilePoint(BaseModel):
+    """Point of a rolling-window gradient profile"""
+    distance_km: float
+    gradient_percent: float
+
+
 class GPXData(BaseModel):
     """Complete GPX file data"""
     filename: str
@@ -97,12 +112,103 @@ class ClimbSegment(BaseModel):
     avg_gradient: float  # percentage
 
 
-class ExportSegmentRequest(BaseModel):
+class TrackSourceRequest(BaseModel):
+    """Base for requests that analyze one track.
+
+    The track is referenced by `file_id` (returned by /upload) or by a
+    published `race_slug`, so the client does not re-send its points.
+    Inline `track_points` remain accepted as a fallback.
+    """
+    track_points: Optional[List[TrackPoint]] = None
+    file_id: Optional[str] = None
+    race_slug: Optional[str] = None
+    track_index: int = Field(default=0, ge=0)  # Which track of a multi-track file
+
+    @model_validator(mode="after")
+    def _require_track_source(self):
+        if self.track_points is None and self.file_id is None and self.race_slug is None:
+            raise ValueError("One of track_points, file_id or race_slug is required")
+        return self
+
+
+class ExportSegmentRequest(TrackSourceRequest):
     """Request to export a segment as GPX"""
-    track_points: List[TrackPoint]
     start_km: float
     end_km: float
-    track_name: str
+    track_name: Optional[str] = None  # Defaults to the stored track name
+
+
+MAX_CLIMB_PARAMETER_SETS = 500
+
+
+class ClimbParameters(BaseModel):
+    """One setting of the climb detection criteria"""
+    min_elevation_gain: Optional[float] = Field(default=None, ge=0)  # None = dynamic threshold
+    min_ratio: float = Field(default=4.0, gt=0)
+    min_gradient: float = Field(default=4.0, ge=0)
+    smoothing_window: int = Field(default=5, ge=1, le=101)
+    min_distance_km: float = Field(default=0.5, ge=0)
+
+
+class ClimbParameterGrid(BaseModel):
+    """Values to combine for each criterion (every combination is detected)"""
+    min_elevation_gain: List[Optional[Annotated[float, Field(ge=0)]]] = Field(default=[None], min_length=1)
+    min_ratio: List[Annotated[float, Field(gt=0)]] = Field(default=[4.0], min_length=1)
+    min_gradient: List[Annotated[float, Field(ge=0)]] = Field(default=[4.0], min_length=1)
+    smoothing_window: List[Annotated[int, Field(ge=1, le=101)]] = Field(default=[5], min_length=1)
+    min_distance_km: List[Annotated[float, Field(ge=0)]] = Field(default=[0.5], min_length=1)
+
+    def expand(self) -> List[ClimbParameters]:
+        """All combinations, in row-major order of the fields"""
+        return [
+            ClimbParameters(
+                min_elevation_gain=gain,
+                min_ratio=ratio,
+                min_gradient=gradient,
+                smoothing_window=window,
+                min_distance_km=distance,
+            )
+            for gain, ratio, gradient, window, distance in product(
+                self.min_elevation_gain, self.min_ratio, self.min_gradient,
+                self.smoothing_window, self.min_distance_km,
+            )
+        ]
+
+
+class ClimbSweepRequest(TrackSourceRequest):
+    """Climb detection for many parameter sets on one track.
+
+    Give explicit `parameter_sets`, a `grid` of values to combine, or both
+    (explicit sets first).
+    """
+    parameter_sets: List[ClimbParameters] = []
+    grid: Optional[ClimbParameterGrid] = None
+
+    def all_parameter_sets(self) -> List[ClimbParameters]:
+        return self.parameter_sets + (self.grid.expand() if self.grid else [])
+
+    @model_validator(mode="after")
+    def _check_parameter_count(self):
+        combinations = len(self.parameter_sets)
+        if self.grid:
+            combinations += prod(len(values) for values in self.grid.model_dump().values())
+        if not combinations:
+            raise ValueError("parameter_sets or grid is required")
+        if combinations > MAX_CLIMB_PARAMETER_SETS:
+            raise ValueError(f"At most {MAX_CLIMB_PARAMETER_SETS} parameter sets per request")
+        return self
+
+
+class ClimbSweepResult(BaseModel):
+    """Climbs detected with one parameter set"""
+    parameters: ClimbParameters
+    climbs: List[ClimbSegment]
+
+
+class ClimbSweepResponse(BaseModel):
+    """Climbs for every parameter set of a sweep"""
+    results: List[ClimbSweepResult]
+    cached: int  # Parameter sets answered from the climb cache
 
 
 class MergeOptions(BaseModel):
@@ -153,16 +259,17 @@ class AidStationSegment(BaseModel):
     avg_gradient: float  # Average gradient %
 
 
-class AidStationTableRequest(BaseModel):
-    """Request to generate aid station table.
+MAX_AID_STATION_SCENARIOS = 50
+
+
+class AidStationScenario(BaseModel):
+    """Time-estimation settings for an aid station table.
 
     Supports three time-estimation modes via `calc_mode`:
     - NAISMITH (default): modified Naismith rule for trail running
     - CONSTANT_PACE: flat km/h pace, requires `constant_pace_kmh`
     - TRAIL_PLANNER: 4 tunable parameters, requires `trail_planner_config`
     """
-    track_points: List[TrackPoint]
-    aid_stations: List[AidStation]
     calc_mode: CalcMode = CalcMode.NAISMITH
     # Parity with the frontend Zod schema (CalcConfigSchema.constant_pace_kmh)
     # and with TrailPlannerConfig.flat_pace_kmh. Prevents a crafted client
@@ -170,6 +277,25 @@ class AidStationTableRequest(BaseModel):
     constant_pace_kmh: Optional[float] = Field(default=None, gt=0, le=30)
     trail_planner_config: Optional[TrailPlannerConfig] = None
 
+    @model_validator(mode="after")
+    def _enforce_calc_mode_coherence(self):
+        if self.calc_mode == CalcMode.CONSTANT_PACE and self.constant_pace_kmh is None:
+            raise ValueError(
+                "constant_pace_kmh is required when calc_mode=constant_pace"
+            )
+        if self.calc_mode == CalcMode.TRAIL_PLANNER and self.trail_planner_config is None:
+            raise ValueError(
+                "trail_planner_config is required when calc_mode=trail_planner"
+            )
+        return self
+
+
+class AidStationTableRequest(TrackSourceRequest, AidStationScenario):
+    """Request to generate aid station table (see AidStationScenario for the modes)"""
+    aid_stations: List[AidStation]
+    # Cut segments at points interpolated at the exact station km
+    interpolate_boundaries: bool = False
+
     @model_validator(mode="before")
     @classmethod
     def _reject_deprecated_fields(cls, data):
@@ -183,17 +309,15 @@ class AidStationTableRequest(BaseModel):
             )
         return data
 
-    @model_validator(mode="after")
-    def _enforce_calc_mode_coherence(self):
-        if self.calc_mode == CalcMode.CONSTANT_PACE and self.constant_pace_kmh is None:
-            raise ValueError(
-                "constant_pace_kmh is required when calc_mode=constant_pace"
-            )
-        if self.calc_mode == CalcMode.TRAIL_PLANNER and self.trail_planner_config is None:
-            raise ValueError(
-                "trail_planner_config is required when calc_mode=trail_planner"
-            )
-        return self
+
+class AidStationScenariosRequest(TrackSourceRequest):
+    """Aid station tables for many time-estimation scenarios on one track.
+
+    Segment geometry is computed once and shared by every scenario.
+    """
+    aid_stations: List[AidStation]
+    scenarios: List[AidStationScenario] = Field(..., min_length=1, max_length=MAX_AID_STATION_SCENARIOS)
+    interpolate_boundaries: bool = False
 
 
 class AidStationTableResponse(BaseModel):
@@ -207,6 +331,117 @@ class AidStationTableResponse(BaseModel):
     total_time_minutes: Optional[float] = None
 
 
+class AidStationScenarioResult(BaseModel):
+    """Aid station table for one scenario"""
+    scenario: AidStationScenario
+    table: AidStationTableResponse
+
+
+class AidStationScenariosResponse(BaseModel):
+    """One aid station table per scenario, in request order"""
+    results: List[AidStationScenarioResult]
+
+
+MAX_SIMULATION_SAMPLES = 50_000
+
+
+class SimulationSettings(BaseModel):
+    """Monte Carlo sampling around a Trail Planner config.
+
+    Spreads are standard deviations in percent of the configured value:
+    pace, climb penalty and fatigue are drawn once per simulated runner,
+    the segment spread once per runner and segment.
+    """
+    samples: int = Field(default=10_000, ge=1, le=MAX_SIMULATION_SAMPLES)
+    pace_sd_percent: float = Field(default=8, ge=0, le=100)
+    climb_penalty_sd_percent: float = Field(default=15, ge=0, le=100)
+    fatigue_sd_percent: float = Field(default=30, ge=0, le=100)
+    segment_sd_percent: float = Field(default=5, ge=0, le=100)
+    percentiles: List[Annotated[float, Field(ge=0, le=100)]] = Field(default=[10, 50, 90], min_length=1, max_length=20)
+    seed: Optional[int] = None  # Fixed seed for reproducible results
+
+
+class SimulationStation(AidStation):
+    """Aid station with an optional cutoff"""
+    cutoff_time: Optional[str] = None  # Clock time ("HH:MM", "Wed 08:45 PM"), needs start_time
+    cutoff_minutes: Optional[float] = Field(default=None, ge=0)  # Elapsed minutes, wins over cutoff_time
+
+
+class RaceSimulationRequest(TrackSourceRequest):
+    """Finish-time and cutoff-risk simulation.
+
+    Without `aid_stations`, the stations (and cutoffs) of the race given by
+    `race_slug` are used.
+    """
+    aid_stations: Optional[List[SimulationStation]] = None
+    trail_planner_config: TrailPlannerConfig
+    settings: SimulationSettings = SimulationSettings()
+    start_time: Optional[datetime] = None  # Race start, to convert clock cutoffs
+    interpolate_boundaries: bool = False
+
+    @model_validator(mode="after")
+    def _require_stations(self):
+        if self.aid_stations is None and self.race_slug is None:
+            raise ValueError("aid_stations is required unless race_slug is given")
+        return self
+
+
+class StationSimulation(BaseModel):
+    """Simulated arrival at one aid station"""
+    name: str
+    distance_km: float
+    arrival_minutes: List[float]  # One per requested percentile
+    mean_minutes: float
+    cutoff_minutes: Optional[float] = None
+    miss_probability: Optional[float] = None  # Share of runners arriving after the cutoff
+
+
+class RaceSimulationResponse(BaseModel):
+    """Arrival-time distribution at every aid station (the last is the finish)"""
+    samples: int
+    percentiles: List[float]
+    stations: List[StationSimulation]
+
+
+class PredictedTimesRequest(TrackSourceRequest, AidStationScenario):
+    """Predicted elapsed time at every track point, plus positions at given times"""
+    at_minutes: List[float] = Field(default=[], max_length=1000)
+
+
+class PredictedPosition(BaseModel):
+    """Predicted position at an elapsed time"""
+    minutes: float
+    distance_km: float
+    lat: float
+    lon: float
+
+
+class PredictedTimesResponse(BaseModel):
+    """Cumulative predicted minutes per point and the requested positions"""
+    minutes: List[float]
+    total_minutes: float
+    positions: List[PredictedPosition]
+
+
+class OffCourseSection(BaseModel):
+    """Consecutive recorded points away from the course"""
+    start_index: int
+    end_index: int  # Inclusive
+    start_time: Optional[str] = None
+    end_time: Optional[str] = None
+    left_at_km: float  # Course distance where the runner left the course
+    rejoined_at_km: float  # Course distance where the runner came back (or last progress)
+    max_offset_m: float
+    beyond_search: bool = False  # Went beyond the search distance: max_offset_m is a lower bound
+
+
+class OffCourseResponse(BaseModel):
+    """Sections of a recording away from the reference course"""
+    threshold_m: float
+    matched_ratio: float  # Share of points with the course within the search radius
+    sections: List[OffCourseSection]
+
+
 class SaveStateRequest(BaseModel):
     """Request to save application state for sharing"""
     state_json: dict  # Complete application state
@@ -2,11 +2,14 @@
 Aid station service
 Handles generation of aid station tables with time predictions
 """
-from typing import List, Optional
+from typing import List, NamedTuple, Optional, Sequence, Union
 import logging
 
+import numpy as np
+
 from app.models.gpx import (
     AidStation,
+    AidStationScenario,
     AidStationSegment,
     AidStationTableResponse,
     CalcMode,
@@ -14,91 +17,53 @@ from app.models.gpx import (
     TrailPlannerConfig,
 )
 from app.services.time_calculator import TimeCalculator
+from app.services.track_arrays import TrackArrays
 
 logger = logging.getLogger(__name__)
 
 
+class SegmentLegs(NamedTuple):
+    """Geometry of the segments between consecutive aid stations"""
+    stations: List[AidStation]  # Sorted by distance
+    distance_km: np.ndarray
+    elevation_gain: np.ndarray
+    elevation_loss: np.ndarray
+    avg_gradient: np.ndarray
+    cumulative_distance_km: np.ndarray  # Distance run before each segment
+
+
 class AidStationService:
     """Service for aid station table generation and management"""
 
     @staticmethod
     def generate_aid_station_table(
-        points: List[TrackPoint],
+        points: Union[List[TrackPoint], TrackArrays],
         aid_stations: List[AidStation],
         calc_mode: CalcMode = CalcMode.NAISMITH,
         constant_pace_kmh: Optional[float] = None,
         trail_planner_config: Optional[TrailPlannerConfig] = None,
+        interpolate_boundaries: bool = False,
     ) -> AidStationTableResponse:
         """Generate aid station table with segment stats and time estimates.
 
         Args:
-            points: Track points with distance and elevation.
+            points: Track points (or TrackArrays) with distance and elevation.
             aid_stations: Ordered list of aid stations (at least 2).
             calc_mode: Time estimation mode (NAISMITH, CONSTANT_PACE, TRAIL_PLANNER).
             constant_pace_kmh: Required if calc_mode=CONSTANT_PACE.
             trail_planner_config: Required if calc_mode=TRAIL_PLANNER.
+            interpolate_boundaries: Cut segments at points interpolated at the
+                exact station kilometres instead of at the nearest recorded
+                points inside each segment.
 
         Returns:
             AidStationTableResponse with segments and aggregated stats.
         """
-        if len(aid_stations) < 2:
-            raise ValueError("At least 2 aid stations are required")
-
-        if not points:
-            raise ValueError("No track points provided")
-
-        sorted_stations = sorted(aid_stations, key=lambda s: s.distance_km)
+        legs = AidStationService.segment_legs(points, aid_stations, interpolate_boundaries)
 
-        segments: List[AidStationSegment] = []
-        total_distance = 0.0
-        total_d_plus = 0.0
-        total_d_minus = 0.0
-        total_time_minutes = 0.0
-        cumulative_distance_km = 0.0
-
-        for i in range(len(sorted_stations) - 1):
-            from_station = sorted_stations[i]
-            to_station = sorted_stations[i + 1]
-
-            start_km = from_station.distance_km
-            end_km = to_station.distance_km
-
-            start_m = start_km * 1000
-            end_m = end_km * 1000
-
-            segment_points = [p for p in points if start_m <= p.distance <= end_m]
-
-            if not segment_points:
-                raise ValueError(
-                    f"No points found between {from_station.name} and {to_station.name}"
-                )
-
-            segment_distance = end_km - start_km
-            d_plus = 0.0
-            d_minus = 0.0
-            total_elevation_change = 0.0
-
-            for j in range(1, len(segment_points)):
-                prev = segment_points[j - 1]
-                curr = segment_points[j]
-
-                if prev.elevation is not None and curr.elevation is not None:
-                    elev_diff = curr.elevation - prev.elevation
-                    total_elevation_change += abs(elev_diff)
-                    if elev_diff > 0:
-                        d_plus += elev_diff
-                    else:
-                        d_minus += abs(elev_diff)
-
-            avg_gradient = 0.0
-            if segment_distance > 0:
-                total_elev_change_signed = (
-                    (segment_points[-1].elevation or 0) - (segment_points[0].elevation or 0)
-                )
-                avg_gradient = (total_elev_change_signed / (segment_distance * 1000)) * 100
-
-            estimated_time_minutes = TimeCalculator.estimate_segment_time(
-                distance_km=segment_distance,
+        times = [
+            TimeCalculator.estimate_segment_time(
+                distance_km=distance_km,
                 elevation_gain=d_plus,
                 elevation_loss=d_minus,
                 avg_gradient=avg_gradient,
@@ -107,44 +72,146 @@ class AidStationService:
                 trail_planner_config=trail_planner_config,
                 cumulative_distance_km=cumulative_distance_km,
             )
+            for distance_km, d_plus, d_minus, avg_gradient, cumulative_distance_km in zip(
+                legs.distance_km.tolist(),
+                legs.elevation_gain.tolist(),
+                legs.elevation_loss.tolist(),
+                legs.avg_gradient.tolist(),
+                legs.cumulative_distance_km.tolist(),
+            )
+        ]
+        return AidStationService._build_table(legs, times)
 
-            segment = AidStationSegment(
+    @staticmethod
+    def generate_aid_station_tables(
+        points: Union[List[TrackPoint], TrackArrays],
+        aid_stations: List[AidStation],
+        scenarios: Sequence[AidStationScenario],
+        interpolate_boundaries: bool = False,
+    ) -> List[AidStationTableResponse]:
+        """Generate one aid station table per time-estimation scenario.
+
+        Segment geometry is computed once; the times of every segment under
+        every scenario come from a single TimeCalculator matrix evaluation.
+
+        Args:
+            points: Track points (or TrackArrays) with distance and elevation.
+            aid_stations: Ordered list of aid stations (at least 2).
+            scenarios: Time-estimation settings to compare.
+            interpolate_boundaries: Cut segments at the exact station kilometres.
+
+        Returns:
+            AidStationTableResponse per scenario, in scenario order.
+        """
+        legs = AidStationService.segment_legs(points, aid_stations, interpolate_boundaries)
+
+        matrix = TimeCalculator.estimate_segment_times(
+            legs.distance_km,
+            legs.elevation_gain,
+            legs.elevation_loss,
+            legs.avg_gradient,
+            legs.cumulative_distance_km,
+            scenarios,
+        )
+        return [
+            AidStationService._build_table(legs, [None if np.isnan(t) else t for t in row.tolist()])
+            for row in matrix
+        ]
+
+    @staticmethod
+    def segment_legs(
+        points: Union[List[TrackPoint], TrackArrays],
+        aid_stations: List[AidStation],
+        interpolate_boundaries: bool,
+    ) -> SegmentLegs:
+        """Distance, D+/D- and gradient of every segment between stations.
+
+        Args:
+            points: Track points (or TrackArrays) with distance and elevation.
+            aid_stations: Aid stations (at least 2), in any order.
+            interpolate_boundaries: Cut segments at the exact station kilometres.
+
+        Returns:
+            SegmentLegs with the stations sorted by distance.
+        """
+        if len(aid_stations) < 2:
+            raise ValueError("At least 2 aid stations are required")
+
+        track = TrackArrays.coerce(points)
+        if not len(track):
+            raise ValueError("No track points provided")
+
+        sorted_stations = sorted(aid_stations, key=lambda s: s.distance_km)
+        station_km = np.array([s.distance_km for s in sorted_stations], dtype=np.float64)
+
+        # All legs in one batch query against the track's prefix-sum index
+        index = track.range_index()
+        query = index.interpolated_segments if interpolate_boundaries else index.segments
+        legs = query(station_km[:-1], station_km[1:])
+
+        empty = np.flatnonzero(legs.num_points == 0)
+        if len(empty):
+            i = int(empty[0])
+            raise ValueError(
+                f"No points found between {sorted_stations[i].name} and {sorted_stations[i + 1].name}"
+            )
+
+        distance_km = np.diff(station_km)
+        # D+/D- ignore deltas with a missing elevation on either side
+        with np.errstate(invalid="ignore", divide="ignore"):
+            avg_gradient = np.where(
+                distance_km > 0, legs.elevation_change / (distance_km * 1000) * 100, 0.0
+            )
+
+        # The fatigue model uses the cumulative distance at the START of each
+        # segment, not a midpoint/end. Consequence: a segment that straddles a
+        # palier (e.g. starts at 18km with interval_km=20) will NOT get the
+        # upcoming palier bonus — only the segment after will. This is coarse
+        # but intentional: it matches the TDD specs in test_time_calculator.py
+        # (e.g. test_fatigue_one_palier uses cumul=25 and expects exactly 1
+        # palier).
+        cumulative_distance_km = np.concatenate(([0.0], np.cumsum(distance_km)[:-1]))
+
+        return SegmentLegs(
+            stations=sorted_stations,
+            distance_km=distance_km,
+            elevation_gain=np.asarray(legs.elevation_gain, dtype=np.float64),
+            elevation_loss=np.asarray(legs.elevation_loss, dtype=np.float64),
+            avg_gradient=avg_gradient,
+            cumulative_distance_km=cumulative_distance_km,
+        )
+
+    @staticmethod
+    def _build_table(legs: SegmentLegs, times: List[Optional[float]]) -> AidStationTableResponse:
+        """Assemble the table response from segment geometry and times"""
+        segments: List[AidStationSegment] = []
+        for i, (distance_km, d_plus, d_minus, avg_gradient, estimated_time_minutes) in enumerate(zip(
+            legs.distance_km.tolist(),
+            legs.elevation_gain.tolist(),
+            legs.elevation_loss.tolist(),
+            legs.avg_gradient.tolist(),
+            times,
+        )):
+            from_station = legs.stations[i]
+            to_station = legs.stations[i + 1]
+            segments.append(AidStationSegment(
                 from_station=from_station.name,
                 to_station=to_station.name,
-                start_km=start_km,
-                end_km=end_km,
-                distance_km=segment_distance,
+                start_km=from_station.distance_km,
+                end_km=to_station.distance_km,
+                distance_km=distance_km,
                 elevation_gain=d_plus,
                 elevation_loss=d_minus,
                 estimated_time_minutes=estimated_time_minutes,
                 avg_gradient=avg_gradient,
-            )
-
-            segments.append(segment)
-
-            total_distance += segment_distance
-            total_d_plus += d_plus
-            total_d_minus += d_minus
-            if estimated_time_minutes:
-                total_time_minutes += estimated_time_minutes
-
-            # Advance the cumulative distance for the fatigue model on the
-            # NEXT segment. This means the fatigue multiplier for a segment
-            # is computed from the start-of-segment cumulative distance, not
-            # a midpoint/end. Consequence: a segment that straddles a palier
-            # (e.g. starts at 18km with interval_km=20) will NOT get the
-            # upcoming palier bonus — only the segment after will. This is
-            # coarse but intentional: it matches the TDD specs in
-            # test_time_calculator.py (e.g. test_fatigue_one_palier uses
-            # cumul=25 and expects exactly 1 palier).
-            cumulative_distance_km += segment_distance
+            ))
 
         return AidStationTableResponse(
             success=True,
             message=f"Generated aid station table with {len(segments)} segments",
             segments=segments,
-            total_distance_km=total_distance,
-            total_elevation_gain=total_d_plus,
-            total_elevation_loss=total_d_minus,
-            total_time_minutes=total_time_minutes,
+            total_distance_km=sum(segment.distance_km for segment in segments),
+            total_elevation_gain=sum(segment.elevation_gain for segment in segments),
+            total_elevation_loss=sum(segment.elevation_loss for segment in segments),
+            total_time_minutes=sum(t for t in times if t),
         )
@@ -0,0 +1,90 @@
+"""
+Cache of detected climbs, keyed by track content and detection parameters
+
+Coaches sweep the detection criteria interactively: the same track comes
+back with the same handful of settings again and again. Results are kept
+in an in-memory LRU under (TrackArrays.digest(), parameters).
+"""
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.models.gpx import ClimbParameters, ClimbSegment
+
+CacheKey = Tuple[str, Tuple]
+
+
+class ClimbCache:
+    """
+    LRU of climb detection results
+
+    Attributes:
+        max_entries: Number of (track, parameters) results kept (0 disables the cache)
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[CacheKey, List[ClimbSegment]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0}
+
+    @staticmethod
+    def key(digest: str, parameters: ClimbParameters) -> CacheKey:
+        """Cache key of one parameter set on one track"""
+        return digest, tuple(parameters.model_dump().values())
+
+    def get(self, digest: str, parameters: ClimbParameters) -> Optional[List[ClimbSegment]]:
+        """
+        Look up the climbs of a track for one parameter set
+
+        Args:
+            digest: Track content digest (TrackArrays.digest())
+            parameters: Detection parameters
+
+        Returns:
+            Cached climbs, or None on a miss
+        """
+        key = self.key(digest, parameters)
+        with self._lock:
+            climbs = self._entries.get(key)
+            if climbs is None:
+                self._counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+            return climbs
+
+    def put(self, digest: str, parameters: ClimbParameters, climbs: List[ClimbSegment]) -> None:
+        """
+        Store the climbs of a track for one parameter set
+
+        Args:
+            digest: Track content digest (TrackArrays.digest())
+            parameters: Detection parameters
+            climbs: Detected climbs
+        """
+        if self.max_entries <= 0:
+            return
+        key = self.key(digest, parameters)
+        with self._lock:
+            self._entries[key] = climbs
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss/eviction counters and number of cached results"""
+        with self._lock:
+            return {**self._counters, "entries": len(self._entries), "max_entries": self.max_entries}
+
+    def clear(self) -> None:
+        """Drop all cached results and reset counters"""
+        with self._lock:
+            self._entries.clear()
+            for name in self._counters:
+                self._counters[name] = 0
+
+
+climb_cache = ClimbCache(settings.CLIMB_CACHE_MAX_ENTRIES)
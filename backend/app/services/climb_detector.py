@@ -1,9 +1,13 @@
 """
 Climb detection service for GPX processing
 """
-from typing import List, Optional
-from app.models.gpx import TrackPoint, ClimbSegment
-from app.services.elevation_service import ElevationService
+from bisect import bisect_right
+from collections import deque
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+from app.models.gpx import TrackPoint, ClimbParameters, ClimbSegment
+from app.services.range_index import RangeIndex
+from app.services.track_arrays import TrackArrays
+import numpy as np
 
 
 class ClimbDetector:
@@ -11,7 +15,7 @@ class ClimbDetector:
 
     @staticmethod
     def detect_climbs(
-        points: List[TrackPoint],
+        points: Union[List[TrackPoint], TrackArrays],
         min_elevation_gain: float = 300,  # meters minimum D+ (will be replaced by dynamic calculation)
         min_ratio: float = 4.0,           # D+ must be > min_ratio * D-
         min_gradient: float = 4.0,        # minimum average gradient %
@@ -30,14 +34,20 @@ class ClimbDetector:
         Algorithm:
         1. Calculate dynamic elevation threshold based on track elevation range
         2. Smooth elevations to reduce GPS noise
-        3. For each point, try to find a climb
-        4. Continue while D+/D- ratio > min_ratio
-        5. Refine bounds to find true local min/max
+        3. From each point, a climb continues while the D+/D- ratio stays
+           above min_ratio and the descent from its summit stays under 50m
+        4. Refine bounds to find true local min/max
+        5. Walk the track, taking the climb of the first valid start and
+           skipping past its end
         6. Keep climbs with highest D+ when overlapping
         7. Merge consecutive climbs separated by small gaps (< 1000m, < 100m D-)
 
+        Steps 3-4 are computed for every start point at once (monotonic
+        stack and sliding-window passes, prefix sums for D+/D-), so the
+        detection is linear in the number of points.
+
         Args:
-            points: List of track points with elevation data
+            points: Track points or TrackArrays with elevation data
             min_elevation_gain: Minimum D+ in meters (overridden by dynamic calculation)
             min_ratio: Minimum ratio D+/D- (default 4.0)
             min_gradient: Minimum average gradient % (default 4.0)
@@ -47,17 +57,98 @@ class ClimbDetector:
         Returns:
             List of detected climb segments
         """
-        if len(points) < 2:
-            return []
+        track = TrackArrays.coerce(points)
 
         # Step 0: Calculate dynamic elevation threshold (V2)
-        # Get all elevations from track
-        elevations = [p.elevation for p in points if p.elevation is not None]
-        if not elevations:
+        dynamic_min_elevation = ClimbDetector._dynamic_min_elevation(track)
+        if dynamic_min_elevation is None:
             return []
 
+        # Step 1: Smooth elevations, with a prefix-sum index over them for
+        # segment D+/D- queries
+        index = track.range_index(smoothing_window)
+
+        return ClimbDetector._detect(
+            index,
+            dynamic_min_elevation,  # Use dynamic threshold instead of fixed
+            min_ratio,
+            min_gradient,
+            min_distance_km,
+        )
+
+    @staticmethod
+    def detect_climbs_sweep(
+        points: Union[List[TrackPoint], TrackArrays],
+        parameter_sets: Sequence[ClimbParameters],
+    ) -> List[List[ClimbSegment]]:
+        """
+        Detect climbs once per parameter set, sharing the work between sets
+
+        The dynamic threshold, the smoothed elevations and their prefix-sum
+        index (per smoothing window) and the scan stops (per smoothing
+        window and ratio) are computed once for the whole sweep.
+
+        Args:
+            points: Track points or TrackArrays with elevation data
+            parameter_sets: Detection parameters; a None min_elevation_gain
+                uses the dynamic threshold like detect_climbs
+
+        Returns:
+            Detected climbs, one list per parameter set (same order)
+        """
+        track = TrackArrays.coerce(points)
+        dynamic_min_elevation = ClimbDetector._dynamic_min_elevation(track)
+        if dynamic_min_elevation is None:
+            return [[] for _ in parameter_sets]
+
+        descent_stops: Dict[int, np.ndarray] = {}
+        scan_stops: Dict[Tuple[int, float], np.ndarray] = {}
+        results = []
+
+        for parameters in parameter_sets:
+            window = parameters.smoothing_window
+            index = track.range_index(window)
+            if window not in descent_stops:
+                descent_stops[window] = ClimbDetector._descent_stops(index.elevation.tolist(), 50)
+            if (window, parameters.min_ratio) not in scan_stops:
+                scan_stops[window, parameters.min_ratio] = ClimbDetector._scan_stops(
+                    index, parameters.min_ratio, descent_stops=descent_stops[window]
+                )
+
+            min_elevation_gain = parameters.min_elevation_gain
+            if min_elevation_gain is None:
+                min_elevation_gain = dynamic_min_elevation
+
+            results.append(ClimbDetector._detect(
+                index,
+                min_elevation_gain,
+                parameters.min_ratio,
+                parameters.min_gradient,
+                parameters.min_distance_km,
+                stops=scan_stops[window, parameters.min_ratio],
+            ))
+
+        return results
+
+    @staticmethod
+    def _dynamic_min_elevation(track: TrackArrays) -> Optional[float]:
+        """
+        D+ threshold of a track: 5% of its elevation range, clamped to 200-500m
+
+        Returns:
+            Threshold in meters, or None when the track has fewer than two
+            points or no elevation at all
+        """
+        if len(track) < 2:
+            return None
+
+        # Get all elevations from track
+        elevations = track.elevation[~np.isnan(track.elevation)]
+        if not len(elevations):
+            return None
+
         # Calculate elevation range (max - min)
-        elevation_range = max(elevations) - min(elevations)
+        elevation_range = float(elevations.max() - elevations.min())
 
         # Dynamic threshold = 5% of elevation range, clamped between 200m and 500m
         # Examples:
@@ -66,166 +157,260 @@ class ClimbDetector:
         # - Mountainous (3000m range): 5% = 150m → 200m (min still applies)
         # - Very mountainous (5000m+ range): 5% = 250m+
         # - Extreme (10000m range): 5% = 500m → 500m (max)
-        dynamic_min_elevation = max(200.0, min(500.0, elevation_range * 0.05))
+        return max(200.0, min(500.0, elevation_range * 0.05))
 
-        # Step 1: Smooth elevations
-        smoothed_elevations = ElevationService.smooth_elevation(points, smoothing_window)
+    @staticmethod
+    def _detect(
+        index: RangeIndex,
+        min_elevation_gain: float,
+        min_ratio: float,
+        min_gradient: float,
+        min_distance_km: float,
+        stops: Optional[np.ndarray] = None,
+    ) -> List[ClimbSegment]:
+        """
+        Steps 2-4 of detect_climbs on a smoothed prefix-sum index
 
-        # Step 2: Find all candidate climbs
-        candidates = []
-        i = 0
+        Args:
+            index: Prefix-sum index over the smoothed elevations
+            min_elevation_gain: Minimum D+ in meters
+            min_ratio: Minimum ratio D+/D-
+            min_gradient: Minimum average gradient %
+            min_distance_km: Minimum climb distance in km
+            stops: Precomputed scan stops for this index and ratio (see _scan_stops)
 
-        while i < len(points) - 1:
-            # Try to find a climb starting from point i
-            candidate = ClimbDetector._find_climb_candidate(
-                points,
-                smoothed_elevations,
-                i,
-                dynamic_min_elevation,  # Use dynamic threshold instead of fixed
-                min_ratio,
-                min_gradient,
-                min_distance_km  # Add distance criterion
-            )
-
-            if candidate:
-                candidates.append(candidate)
-                # Skip past this climb
-                i = candidate["end_idx"] + 1
-            else:
-                i += 1
+        Returns:
+            List of detected climb segments
+        """
+        # Step 2: Find all candidate climbs
+        candidates = ClimbDetector._find_climb_candidates(
+            index,
+            min_elevation_gain,
+            min_ratio,
+            min_gradient,
+            min_distance_km,  # Add distance criterion
+            stops=stops,
+        )
 
         # Step 3: Remove overlapping climbs (keep highest D+)
         final_climbs = ClimbDetector._remove_overlaps(candidates)
 
         # Step 4: Merge consecutive climbs separated by small gaps (faux-plats)
-        merged_climbs = ClimbDetector._merge_consecutive_climbs(
+        return ClimbDetector._merge_consecutive_climbs(
             final_climbs,
-            points,
-            smoothed_elevations,
+            index,
             max_gap_distance=1000,  # 1000m max gap
             max_gap_descent=100,    # 100m max D- in gap
-            min_elevation_gain=dynamic_min_elevation,  # Use dynamic threshold
+            min_elevation_gain=min_elevation_gain,
             min_ratio=min_ratio,
             min_gradient=min_gradient,
             min_distance_km=min_distance_km  # Add distance criterion
         )
 
-        return merged_climbs
-
     @staticmethod
-    def _find_climb_candidate(
-        points: List[TrackPoint],
-        smoothed_elevations: List[float],
-        start_idx: int,
+    def _find_climb_candidates(
+        index: RangeIndex,
         min_elevation_gain: float,
         min_ratio: float,
         min_gradient: float,
-        min_distance_km: float = 0.5
-    ) -> Optional[dict]:
+        min_distance_km: float = 0.5,
+        max_descent_from_peak: float = 50,
+        search_distance: int = 10,
+        stops: Optional[np.ndarray] = None,
+    ) -> List[dict]:
+        """
+        Find the candidate climbs of a forward walk over the track
+
+        From a start point, a climb extends while the D+/D- ratio stays
+        above min_ratio and the descent from its highest point stays under
+        max_descent_from_peak; its end is the last point where D+ reached
+        min_elevation_gain with a good ratio. Bounds are then refined to the
+        local minimum before / maximum after, and the climb is kept if it
+        meets all criteria. The walk takes the first valid start, skips past
+        its end, and repeats.
+
+        Args:
+            index: Prefix-sum index over the smoothed elevations
+            min_elevation_gain: Minimum D+ in meters
+            min_ratio: Minimum ratio D+/D-
+            min_gradient: Minimum average gradient %
+            min_distance_km: Minimum climb distance in km
+            max_descent_from_peak: Descent from the summit that ends a climb (meters)
+            search_distance: Points searched when refining bounds
+            stops: Precomputed scan stops (see _scan_stops), computed if None
+
+        Returns:
+            List of dicts with climb, start_idx, end_idx, d_plus
         """
-        Try to find a valid climb starting from start_idx
+        n = len(index)
+        if n < 2:
+            return []
+
+        elevations = index.elevation
+        gain, loss = index.cumulative_gain, index.cumulative_loss
+        starts = np.arange(n)
+
+        # Where the scan from each start stops (n when it reaches the end)
+        if stops is None:
+            stops = ClimbDetector._scan_stops(index, min_ratio, max_descent_from_peak)
+
+        # Last point up to the stop where D+ >= min_elevation_gain and the
+        # ratio holds. Below the stop the ratio holds except on exact ties.
+        def ratio_holds(s, e):
+            d_plus = gain[e] - gain[s]
+            d_minus = loss[e] - loss[s]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                return (d_minus == 0) | (d_plus / d_minus > min_ratio)
+
+        upper = np.minimum(stops, n - 1)
+        lower = np.maximum(
+            np.searchsorted(gain, gain + min_elevation_gain, side="left"), starts + 1
+        )
+        end = np.full(n, -1)
+        at_stop = (upper >= lower) & ratio_holds(starts, upper)
+        end[at_stop] = upper[at_stop]
+        before_stop = ~at_stop & (upper - 1 >= lower)
+        before_stop[before_stop] = ratio_holds(starts[before_stop], upper[before_stop] - 1)
+        end[before_stop] = upper[before_stop] - 1
+        for s in np.flatnonzero(~at_stop & ~before_stop & (upper - 2 >= lower)).tolist():
+            for e in range(upper[s] - 2, lower[s] - 1, -1):
+                if ratio_holds(s, e):
+                    end[s] = e
+                    break
+
+        # Refine bounds: first lowest point in the search_distance points
+        # before the start, first highest in the search_distance points from the end
+        found = np.flatnonzero(end >= 0)
+        if not len(found):
+            return []
+        before = np.lib.stride_tricks.sliding_window_view(
+            np.concatenate((np.full(search_distance, np.inf), elevations)), search_distance
+        )[found]
+        lowest = before.argmin(axis=1)
+        refined_start = np.where(
+            before[np.arange(len(found)), lowest] < elevations[found],
+            found - search_distance + lowest,
+            found,
+        )
+        after = np.lib.stride_tricks.sliding_window_view(
+            np.concatenate((elevations, np.full(search_distance - 1, -np.inf))), search_distance
+        )[end[found]]
+        refined_end = end[found] + after.argmax(axis=1)
+
+        # Verify final criteria (V2: added distance check)
+        stats = index.between(refined_start, refined_end)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            avg_gradient = np.where(stats.distance > 0, stats.elevation_gain / stats.distance * 100, 0)
+        valid = (
+            (stats.distance / 1000 >= min_distance_km)
+            & (stats.elevation_gain >= min_elevation_gain)
+            & ((stats.elevation_loss == 0) | (stats.elevation_gain > min_ratio * stats.elevation_loss))
+            & (avg_gradient >= min_gradient)
+        )
+        valid_starts = found[valid]
+        valid = np.flatnonzero(valid)
+
+        # Walk: first valid start, then the first valid start past its climb
+        candidates = []
+        k = 0
+        while k < len(valid_starts) and valid_starts[k] < n - 1:
+            j = valid[k]
+            climb_start, climb_end = int(refined_start[j]), int(refined_end[j])
+            d_plus = float(stats.elevation_gain[j])
+            candidates.append({
+                "climb": ClimbSegment(
+                    start_km=float(index.distance[climb_start]) / 1000,
+                    end_km=float(index.distance[climb_end]) / 1000,
+                    distance_km=float(stats.distance[j]) / 1000,
+                    elevation_gain=d_plus,
+                    elevation_loss=float(stats.elevation_loss[j]),
+                    avg_gradient=float(avg_gradient[j]),
+                ),
+                "start_idx": climb_start,
+                "end_idx": climb_end,
+                "d_plus": d_plus,
+            })
+            k = int(np.searchsorted(valid_starts, climb_end + 1))
+
+        return candidates
 
-        NEW APPROACH: Continue climbing as long as ratio stays good,
-        then check at the end if it meets minimum criteria.
+    @staticmethod
+    def _scan_stops(
+        index: RangeIndex,
+        min_ratio: float,
+        max_descent_from_peak: float = 50,
+        descent_stops: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        For each start, the point where a climb scan stops: the D+/D- ratio
+        drops below min_ratio, or the track falls more than
+        max_descent_from_peak below the summit (len(index) if neither)
 
-        IMPROVED: Stop early if we detect a significant descent after reaching summit.
+        Args:
+            index: Prefix-sum index over the smoothed elevations
+            min_ratio: Minimum ratio D+/D-
+            max_descent_from_peak: Descent from the summit that ends a climb (meters)
+            descent_stops: Precomputed _descent_stops of the index, if any
+        """
+        if descent_stops is None:
+            descent_stops = ClimbDetector._descent_stops(index.elevation.tolist(), max_descent_from_peak)
+        balance = index.cumulative_gain - min_ratio * index.cumulative_loss
+        return np.minimum(descent_stops, ClimbDetector._next_smaller(balance.tolist()))
 
-        Returns dictionary with climb info if found, None otherwise
+    @staticmethod
+    def _descent_stops(elevations: List[float], max_descent: float) -> np.ndarray:
         """
-        prev_elevation = smoothed_elevations[start_idx]
-        current_d_plus = 0.0
-        current_d_minus = 0.0
-        best_end_idx = None
-        peak_elevation = smoothed_elevations[start_idx]
-        descent_from_peak = 0.0
-        max_descent_from_peak = 50  # Stop if we descend more than 50m from highest point
-
-        # Scan forward accumulating D+ and D-, continuing as long as ratio is good
-        for end_idx in range(start_idx + 1, len(points)):
-            current_elevation = smoothed_elevations[end_idx]
-            elev_diff = current_elevation - prev_elevation
-
-            if elev_diff > 0:
-                current_d_plus += elev_diff
-                # Update peak if we reached a new high
-                if current_elevation > peak_elevation:
-                    peak_elevation = current_elevation
-                    descent_from_peak = 0
-            else:
-                current_d_minus += abs(elev_diff)
-                # Track descent from peak
-                descent_from_peak = peak_elevation - current_elevation
-
-            prev_elevation = current_elevation
-
-            # Track the last point where we still have a good climb
-            if current_d_plus >= min_elevation_gain:
-                if current_d_minus == 0 or current_d_plus / current_d_minus > min_ratio:
-                    best_end_idx = end_idx
-
-            # STOP CONDITIONS:
-            # 1. Descended too much from peak (we're past the summit)
-            if descent_from_peak > max_descent_from_peak:
-                break
-
-            # 2. Ratio becomes bad (too much D- overall)
-            if current_d_minus > 0 and current_d_plus / current_d_minus < min_ratio:
-                break
-
-        # Check if we found a valid climb
-        if best_end_idx is not None:
-            # Refine bounds to find true local min/max
-            refined_start = ElevationService.find_local_minimum(
-                points, smoothed_elevations, start_idx, search_distance=10
-            )
-            refined_end = ElevationService.find_local_maximum(
-                points, smoothed_elevations, best_end_idx, search_distance=10
-            )
-
-            # Recalculate stats with refined bounds
-            stats = ClimbDetector._calculate_climb_stats(
-                points, smoothed_elevations, refined_start, refined_end
-            )
-
-            # Create climb segment data
-            start_km = points[refined_start].distance / 1000
-            end_km = points[refined_end].distance / 1000
-            distance_km = stats["distance"] / 1000
-
-            # Verify final criteria (V2: added distance check)
-            if (distance_km >= min_distance_km and
-                stats["d_plus"] >= min_elevation_gain and
-                (stats["d_minus"] == 0 or stats["d_plus"] > min_ratio * stats["d_minus"]) and
-                stats["avg_gradient"] >= min_gradient):
-
-                climb_segment = ClimbSegment(
-                    start_km=start_km,
-                    end_km=end_km,
-                    distance_km=distance_km,
-                    elevation_gain=stats["d_plus"],
-                    elevation_loss=stats["d_minus"],
-                    avg_gradient=stats["avg_gradient"]
-                )
+        For each start s, the first point e > s lying more than max_descent
+        below the highest point of [s, e] (len(elevations) if none)
 
-                return {
-                    "climb": climb_segment,
-                    "start_idx": refined_start,
-                    "end_idx": refined_end,
-                    "d_plus": stats["d_plus"]
-                }
+        Stops never move backwards as s advances, so one two-pointer pass
+        with a sliding-window maximum computes them all.
+        """
+        n = len(elevations)
+        stops = np.full(n, n)
+        window = deque()  # indices of [s, e], elevations decreasing
+        e = -1
+        for s in range(n):
+            while window and window[0] < s:
+                window.popleft()
+            while True:
+                if e > s and elevations[e] < elevations[window[0]] - max_descent:
+                    stops[s] = e
+                    break
+                e += 1
+                if e == n:
+                    return stops
+                while window and elevations[window[-1]] <= elevations[e]:
+                    window.pop()
+                window.append(e)
+        return stops
 
-        return None
+    @staticmethod
+    def _next_smaller(values: List[float]) -> np.ndarray:
+        """For each i, the first j > i with values[j] < values[i] (len(values) if none)"""
+        n = len(values)
+        result = np.full(n, n)
+        stack: List[int] = []
+        for j, value in enumerate(values):
+            while stack and values[stack[-1]] > value:
+                result[stack.pop()] = j
+            stack.append(j)
+        return result
 
     @staticmethod
-    def _remove_overlaps(candidates: List[dict]) -> List[ClimbSegment]:
+    def _remove_overlaps(candidates: List[dict]) -> List[dict]:
         """
         Remove overlapping climbs, keeping the one with highest D+
 
+        Kept climbs are disjoint, so their point ranges form a sorted list of
+        intervals: an overlap check is a binary search and a look at the two
+        neighbours.
+
         Args:
             candidates: List of climb candidates with start_idx, end_idx, d_plus
 
         Returns:
-            List of non-overlapping ClimbSegments
+            Non-overlapping candidates, sorted by start index
         """
         if not candidates:
             return []
@@ -233,35 +418,30 @@ class ClimbDetector:
         # Sort by D+ descending (highest first)
         sorted_candidates = sorted(candidates, key=lambda x: x["d_plus"], reverse=True)
 
-        final_climbs = []
-        used_ranges = []
+        kept_starts: List[int] = []
+        kept: List[dict] = []
 
         for candidate in sorted_candidates:
             start = candidate["start_idx"]
             end = candidate["end_idx"]
 
-            # Check if this range overlaps with any already selected
-            overlaps = False
-            for used_start, used_end in used_ranges:
-                if not (end < used_start or start > used_end):
-                    # Ranges overlap
-                    overlaps = True
-                    break
-
-            if not overlaps:
-                final_climbs.append(candidate["climb"])
-                used_ranges.append((start, end))
+            # Neighbours: the last kept interval starting at or before `start`
+            # and the first one starting after it (ends are inclusive)
+            position = bisect_right(kept_starts, start)
+            if position > 0 and kept[position - 1]["end_idx"] >= start:
+                continue
+            if position < len(kept) and kept_starts[position] <= end:
+                continue
 
-        # Sort by start position for display
-        final_climbs.sort(key=lambda x: x.start_km)
+            kept_starts.insert(position, start)
+            kept.insert(position, candidate)
 
-        return final_climbs
+        return kept
 
     @staticmethod
     def _merge_consecutive_climbs(
-        climbs: List[ClimbSegment],
-        points: List[TrackPoint],
-        smoothed_elevations: List[float],
+        climbs: List[dict],
+        index: RangeIndex,
         max_gap_distance: float = 500,  # meters
         max_gap_descent: float = 50,    # meters
         min_elevation_gain: float = 300,
@@ -272,89 +452,50 @@ class ClimbDetector:
         """
         Merge consecutive climbs that are separated by small gaps (faux-plats)
 
+        Climbs carry their point indices, so gap distance, gap D- and merged
+        statistics are prefix-sum lookups.
+
         Args:
-            climbs: List of detected climbs (sorted by start position)
-            points: Original track points
-            smoothed_elevations: Smoothed elevation data
+            climbs: Non-overlapping candidates (climb, start_idx, end_idx),
+                sorted by start index
+            index: Prefix-sum index over the smoothed elevations
             max_gap_distance: Maximum distance between climbs to consider merging (meters)
             max_gap_descent: Maximum D- in gap to allow merging (meters)
             min_elevation_gain: Minimum D+ for merged climb
             min_ratio: Minimum D+/D- ratio for merged climb
             min_gradient: Minimum gradient for merged climb
+            min_distance_km: Minimum distance for merged climb (km)
 
         Returns:
             List of climbs with consecutive ones merged
         """
-        if len(climbs) <= 1:
-            return climbs
-
         merged = []
         i = 0
 
         while i < len(climbs):
-            current_climb = climbs[i]
-
-            # Find current climb indices
-            current_start_idx = None
-            current_end_idx = None
-            for idx, point in enumerate(points):
-                if abs(point.distance / 1000 - current_climb.start_km) < 0.01:
-                    current_start_idx = idx
-                if abs(point.distance / 1000 - current_climb.end_km) < 0.01:
-                    current_end_idx = idx
-                    break
-
-            if current_start_idx is None or current_end_idx is None:
-                merged.append(current_climb)
-                i += 1
-                continue
+            current_start_idx = climbs[i]["start_idx"]
+            current_end_idx = climbs[i]["end_idx"]
 
             # Try to merge with next climb(s)
             merged_end_idx = current_end_idx
             j = i + 1
 
             while j < len(climbs):
-                next_climb = climbs[j]
-
-                # Find next climb start index
-                next_start_idx = None
-                for idx, point in enumerate(points):
-                    if abs(point.distance / 1000 - next_climb.start_km) < 0.01:
-                        next_start_idx = idx
-                        break
-
-                if next_start_idx is None:
-                    break
+                next_start_idx = climbs[j]["start_idx"]
+                next_end_idx = climbs[j]["end_idx"]
 
                 # Check gap distance
-                gap_distance = points[next_start_idx].distance - points[merged_end_idx].distance
+                gap_distance = index.distance[next_start_idx] - index.distance[merged_end_idx]
                 if gap_distance > max_gap_distance:
                     break  # Gap too large
 
                 # Check D- in gap
-                gap_d_minus = 0.0
-                for idx in range(merged_end_idx + 1, next_start_idx + 1):
-                    elev_diff = smoothed_elevations[idx] - smoothed_elevations[idx - 1]
-                    if elev_diff < 0:
-                        gap_d_minus += abs(elev_diff)
-
+                gap_d_minus = index.between(merged_end_idx, next_start_idx).elevation_loss
                 if gap_d_minus > max_gap_descent:
                     break  # Too much descent in gap
 
-                # Find next climb end index
-                next_end_idx = None
-                for idx, point in enumerate(points):
-                    if abs(point.distance / 1000 - next_climb.end_km) < 0.01:
-                        next_end_idx = idx
-                        break
-
-                if next_end_idx is None:
-                    break
-
                 # Try merging: check if merged climb meets criteria
-                merged_stats = ClimbDetector._calculate_climb_stats(
-                    points, smoothed_elevations, current_start_idx, next_end_idx
-                )
+                merged_stats = ClimbDetector._calculate_climb_stats(index, current_start_idx, next_end_idx)
 
                 # Check if merged climb is valid (V2: added distance check)
                 merged_distance_km = merged_stats["distance"] / 1000
@@ -373,13 +514,11 @@ class ClimbDetector:
             # Create final merged climb
             if merged_end_idx != current_end_idx:
                 # We merged climbs
-                final_stats = ClimbDetector._calculate_climb_stats(
-                    points, smoothed_elevations, current_start_idx, merged_end_idx
-                )
+                final_stats = ClimbDetector._calculate_climb_stats(index, current_start_idx, merged_end_idx)
 
                 merged_climb = ClimbSegment(
-                    start_km=points[current_start_idx].distance / 1000,
-                    end_km=points[merged_end_idx].distance / 1000,
+                    start_km=float(index.distance[current_start_idx]) / 1000,
+                    end_km=float(index.distance[merged_end_idx]) / 1000,
                     distance_km=final_stats["distance"] / 1000,
                     elevation_gain=final_stats["d_plus"],
                     elevation_loss=final_stats["d_minus"],
@@ -389,15 +528,14 @@ class ClimbDetector:
                 i = j  # Skip all merged climbs
             else:
                 # No merge, keep original
-                merged.append(current_climb)
+                merged.append(climbs[i]["climb"])
                 i += 1
 
         return merged
 
     @staticmethod
     def _calculate_climb_stats(
-        points: List[TrackPoint],
-        smoothed_elevations: List[float],
+        index: RangeIndex,
         start_idx: int,
         end_idx: int
     ) -> dict:
@@ -405,34 +543,22 @@ class ClimbDetector:
         Calculate D+, D-, distance, and gradient for a segment
 
         Args:
-            points: List of track points
-            smoothed_elevations: Smoothed elevation data
+            index: Prefix-sum index over the smoothed elevations
             start_idx: Start index
             end_idx: End index
 
         Returns:
-            Dictionary with elevation_gain, elevation_loss, distance, avg_gradient
+            Dictionary with d_plus, d_minus, distance, avg_gradient
         """
-        d_plus = 0.0
-        d_minus = 0.0
-
-        # Calculate D+ and D- using smoothed elevations
-        for i in range(start_idx + 1, end_idx + 1):
-            elev_diff = smoothed_elevations[i] - smoothed_elevations[i - 1]
-            if elev_diff > 0:
-                d_plus += elev_diff
-            else:
-                d_minus += abs(elev_diff)
-
-        # Calculate distance
-        distance = points[end_idx].distance - points[start_idx].distance
+        stats = index.between(start_idx, end_idx)
+        distance = stats.distance
 
-        # Calculate average gradient
-        avg_gradient = (d_plus / distance * 100) if distance > 0 else 0
+        # Average gradient from D+ only (a climb's descents do not cancel it)
+        avg_gradient = (stats.elevation_gain / distance * 100) if distance > 0 else 0
 
         return {
-            "d_plus": d_plus,
-            "d_minus": d_minus,
+            "d_plus": stats.elevation_gain,
+            "d_minus": stats.elevation_loss,
             "distance": distance,
             "avg_gradient": avg_gradient
         }
@@ -0,0 +1,351 @@
+"""
+Spatial index over a reference course
+Cumulative distance plus a uniform grid over the projected segments, so
+nearest-segment queries only look at the cells around the query instead
+of the whole course.
+"""
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from app.services.distance_calculator import DistanceCalculator
+
+# Below this many items a query window is scanned directly
+BRUTE_FORCE_LIMIT = 4096
+
+# Query points handled at once by CourseIndex.candidates (bounds its memory)
+CANDIDATE_CHUNK = 4096
+
+# Rings searched around a query before scanning the whole range instead
+# (ring cost grows with the square of the distance to the course)
+MAX_RINGS = 16
+
+# Items covering more grid cells than this (e.g. a jump to a GPS glitch at
+# 0, 0) are not put in the cells but checked by every query
+MAX_CELLS_PER_ITEM = 64
+
+
+class CourseProjection(NamedTuple):
+    """
+    Closest point of the course to a query point
+
+    Attributes:
+        segment: Index of the first vertex of the closest segment
+        fraction: Position on that segment (0 = first vertex, 1 = next vertex)
+        distance_along_m: Course distance of the projected point (meters)
+        offset_m: Distance from the query point to the course (meters)
+        lat: Latitude of the projected point
+        lon: Longitude of the projected point
+    """
+    segment: int
+    fraction: float
+    distance_along_m: float
+    offset_m: float
+    lat: float
+    lon: float
+
+
+class CourseCandidates(NamedTuple):
+    """
+    Course segments within a radius of query points, one row per (point, segment)
+
+    Rows are sorted by point, then segment.
+
+    Attributes:
+        point: Index of the query point
+        segment: Index of the first vertex of the segment
+        fraction: Position of the closest point on the segment
+        distance_along_m: Course distance of the closest point (meters)
+        offset_m: Distance from the query point to the segment (meters)
+    """
+    point: np.ndarray
+    segment: np.ndarray
+    fraction: np.ndarray
+    distance_along_m: np.ndarray
+    offset_m: np.ndarray
+
+
+class _Grid:
+    """
+    Uniform grid mapping each cell to the items whose bounding box touches it
+
+    Attributes:
+        oversized: Items spanning more than MAX_CELLS_PER_ITEM cells, kept
+            out of the cells (queries must check them separately)
+    """
+
+    __slots__ = ("cell_size", "width", "height", "keys", "starts", "items", "oversized")
+
+    def __init__(self, x0: np.ndarray, y0: np.ndarray, x1: np.ndarray, y1: np.ndarray, cell_size: float):
+        self.cell_size = cell_size
+        cx0, cy0 = self.cell(x0, y0)
+        cx1, cy1 = self.cell(x1, y1)
+        nx = cx1 - cx0 + 1
+        ny = cy1 - cy0 + 1
+        counts = nx * ny
+        oversized = counts > MAX_CELLS_PER_ITEM
+        self.oversized = np.flatnonzero(oversized)
+        counts[oversized] = 0
+        self.width = int(cx1[~oversized].max()) + 1 if (~oversized).any() else 0
+        self.height = int(cy1[~oversized].max()) + 1 if (~oversized).any() else 0
+
+        # One entry per (item, covered cell)
+        item = np.repeat(np.arange(len(counts)), counts)
+        local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        cx = cx0[item] + local // ny[item]
+        cy = cy0[item] + local % ny[item]
+
+        key = cx * self.height + cy
+        order = np.argsort(key, kind="stable")
+        self.keys, first = np.unique(key[order], return_index=True)
+        self.starts = np.append(first, len(order))
+        self.items = item[order]
+
+    def cell(self, x: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Cell coordinates of projected points (the grid origin is at 0, 0)"""
+        return (
+            np.floor(np.asarray(x) / self.cell_size).astype(np.int64),
+            np.floor(np.asarray(y) / self.cell_size).astype(np.int64),
+        )
+
+    def max_ring(self, cx: int, cy: int) -> int:
+        """Ring around (cx, cy) that reaches the farthest grid cell"""
+        return max(abs(cx), abs(cx - self.width + 1), abs(cy), abs(cy - self.height + 1), 0)
+
+    def ring(self, cx: int, cy: int, r: int) -> np.ndarray:
+        """Items in the cells at Chebyshev distance r from (cx, cy), plus the oversized items for r = 0"""
+        if r == 0:
+            xs, ys = np.array([cx]), np.array([cy])
+        else:
+            side = np.arange(-r, r + 1)
+            inner = np.arange(-r + 1, r)
+            xs = np.concatenate((cx + side, cx + side, np.full(len(inner), cx - r), np.full(len(inner), cx + r)))
+            ys = np.concatenate((np.full(len(side), cy - r), np.full(len(side), cy + r), cy + inner, cy + inner))
+        inside = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+        items = self.gather(xs[inside] * self.height + ys[inside])
+        return np.concatenate((items, self.oversized)) if r == 0 else items
+
+    def gather(self, keys: np.ndarray) -> np.ndarray:
+        """Items of the given cell keys (empty cells are skipped)"""
+        return self.gather_pairs(keys)[1]
+
+    def gather_pairs(self, keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Items of the given cell keys, with the position in keys each item came from"""
+        pos = np.searchsorted(self.keys, keys)
+        found = pos < len(self.keys)
+        found[found] = self.keys[pos[found]] == keys[found]
+        source = np.flatnonzero(found)
+        pos = pos[found]
+        if not len(pos):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        starts = self.starts[pos]
+        lengths = self.starts[pos + 1] - starts
+        offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        return np.repeat(source, lengths), self.items[np.repeat(starts, lengths) + offsets]
+
+
+class CourseIndex:
+    """
+    Reusable nearest-point index over a course polyline
+
+    Coordinates are projected to local equirectangular meters around the
+    course, which is accurate to well under a meter at race scale.
+    Segment j joins vertex j to vertex j + 1.
+
+    Attributes:
+        lat: Vertex latitudes
+        lon: Vertex longitudes
+        x: Projected vertex x (meters east of the course bounding box)
+        y: Projected vertex y (meters north of the course bounding box)
+        cumulative: Cumulative haversine distance in meters
+    """
+
+    def __init__(self, lat: np.ndarray, lon: np.ndarray, cell_size_m: Optional[float] = None):
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        if not len(self.lat):
+            raise ValueError("Course has no points")
+        self.cumulative = DistanceCalculator.cumulative_distance(self.lat, self.lon)
+
+        self._lat0 = float(self.lat.min())
+        self._lon0 = float(self.lon.min())
+        self._scale_y = np.radians(1.0) * DistanceCalculator.EARTH_RADIUS_METERS
+        self._scale_x = self._scale_y * np.cos(np.radians((self.lat.min() + self.lat.max()) / 2))
+        self.x, self.y = self.to_xy(self.lat, self.lon)
+
+        if cell_size_m is None:
+            lengths = np.diff(self.cumulative)
+            cell_size_m = max(100.0, 4 * float(np.median(lengths))) if len(lengths) else 100.0
+        a, b = self._segment_ends()
+        self._segments = _Grid(
+            np.minimum(self.x[a], self.x[b]), np.minimum(self.y[a], self.y[b]),
+            np.maximum(self.x[a], self.x[b]), np.maximum(self.y[a], self.y[b]),
+            cell_size_m,
+        )
+
+    def __len__(self) -> int:
+        return len(self.lat)
+
+    @property
+    def num_segments(self) -> int:
+        """Number of segments (a single-point course has one zero-length segment)"""
+        return max(len(self) - 1, 1)
+
+    def to_xy(self, lat, lon) -> Tuple[np.ndarray, np.ndarray]:
+        """Project coordinates to the course's local meters"""
+        return (
+            (np.asarray(lon, dtype=np.float64) - self._lon0) * self._scale_x,
+            (np.asarray(lat, dtype=np.float64) - self._lat0) * self._scale_y,
+        )
+
+    def to_latlon(self, x, y) -> Tuple[np.ndarray, np.ndarray]:
+        """Inverse of to_xy"""
+        return (
+            np.asarray(y, dtype=np.float64) / self._scale_y + self._lat0,
+            np.asarray(x, dtype=np.float64) / self._scale_x + self._lon0,
+        )
+
+    def window(self, min_km: float, max_km: float) -> Tuple[int, int]:
+        """Vertex range [start, stop) whose course distance is within [min_km, max_km]"""
+        return (
+            int(np.searchsorted(self.cumulative, min_km * 1000, side="left")),
+            int(np.searchsorted(self.cumulative, max_km * 1000, side="right")),
+        )
+
+    def project(self, lat: float, lon: float, start: int = 0, stop: Optional[int] = None) -> Optional[CourseProjection]:
+        """
+        Closest point of the course (on any segment) to a point
+
+        Args:
+            lat: Query latitude
+            lon: Query longitude
+            start: First segment allowed
+            stop: End of the allowed segment range (exclusive, default: all)
+
+        Returns:
+            CourseProjection, or None if the range is empty
+        """
+        stop = self.num_segments if stop is None else min(stop, self.num_segments)
+        x, y = self.to_xy(lat, lon)
+        x, y = float(x), float(y)
+        segment = self._nearest(self._segments, x, y, max(start, 0), stop, self._segment_distances)
+        if segment is None:
+            return None
+
+        t, px, py = self._project_on(np.array([segment]), x, y)
+        a, b = self._segment_ends(np.array([segment]))
+        along = self.cumulative[a] + t * (self.cumulative[b] - self.cumulative[a])
+        plat, plon = self.to_latlon(px, py)
+        return CourseProjection(
+            segment=segment,
+            fraction=float(t[0]),
+            distance_along_m=float(along[0]),
+            offset_m=float(np.hypot(px - x, py - y)[0]),
+            lat=float(plat[0]),
+            lon=float(plon[0]),
+        )
+
+    def candidates(self, lat: np.ndarray, lon: np.ndarray, radius_m: float) -> CourseCandidates:
+        """
+        Every segment within radius_m of each query point
+
+        Looks only at the grid cells around each point, in chunks of
+        CANDIDATE_CHUNK points, so time and memory grow linearly with the
+        number of points.
+
+        Args:
+            lat: Query latitudes
+            lon: Query longitudes
+            radius_m: Search radius in meters
+
+        Returns:
+            CourseCandidates (points with no segment in range have no row)
+        """
+        x, y = self.to_xy(np.atleast_1d(lat), np.atleast_1d(lon))
+        grid = self._segments
+        reach = int(np.ceil(radius_m / grid.cell_size))
+        ring_x, ring_y = (a.ravel() for a in np.meshgrid(np.arange(-reach, reach + 1), np.arange(-reach, reach + 1)))
+
+        chunks = []
+        for start in range(0, len(x), CANDIDATE_CHUNK):
+            stop = min(start + CANDIDATE_CHUNK, len(x))
+            cx, cy = grid.cell(x[start:stop], y[start:stop])
+            kx = cx[:, None] + ring_x
+            ky = cy[:, None] + ring_y
+            inside = (kx >= 0) & (kx < grid.width) & (ky >= 0) & (ky < grid.height)
+            owner = np.broadcast_to(np.arange(start, stop)[:, None], kx.shape)[inside]
+            source, segments = grid.gather_pairs(kx[inside] * grid.height + ky[inside])
+            owner = owner[source]
+            if len(grid.oversized):
+                owner = np.concatenate((owner, np.repeat(np.arange(start, stop), len(grid.oversized))))
+                segments = np.concatenate((segments, np.tile(grid.oversized, stop - start)))
+
+            # A segment spanning several cells is found once per cell
+            pairs = np.unique(owner * self.num_segments + segments)
+            points, segments = np.divmod(pairs, self.num_segments)
+
+            t, px, py = self._project_on(segments, x[points], y[points])
+            offset = np.hypot(px - x[points], py - y[points])
+            near = offset <= radius_m
+            a, b = self._segment_ends(segments[near])
+            t = t[near]
+            chunks.append((
+                points[near], segments[near], t,
+                self.cumulative[a] + t * (self.cumulative[b] - self.cumulative[a]),
+                offset[near],
+            ))
+
+        if not chunks:
+            return CourseCandidates(*(np.empty(0, dtype=dtype) for dtype in (np.int64, np.int64, float, float, float)))
+        return CourseCandidates(*(np.concatenate(column) for column in zip(*chunks)))
+
+    def _segment_ends(self, segments: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """First and second vertex of segments (all segments by default)"""
+        if segments is None:
+            segments = np.arange(self.num_segments)
+        return segments, np.minimum(segments + 1, len(self) - 1)
+
+    def _project_on(self, segments: np.ndarray, x, y) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Fraction along each segment of the closest point to (x, y), and that point (x, y may be per segment)"""
+        a, b = self._segment_ends(segments)
+        dx = self.x[b] - self.x[a]
+        dy = self.y[b] - self.y[a]
+        length2 = dx * dx + dy * dy
+        with np.errstate(invalid="ignore", divide="ignore"):
+            t = np.where(length2 > 0, ((x - self.x[a]) * dx + (y - self.y[a]) * dy) / length2, 0.0)
+        t = np.clip(t, 0.0, 1.0)
+        return t, self.x[a] + t * dx, self.y[a] + t * dy
+
+    def _segment_distances(self, segments: np.ndarray, x: float, y: float) -> np.ndarray:
+        _, px, py = self._project_on(segments, x, y)
+        return np.hypot(px - x, py - y)
+
+    def _nearest(self, grid: _Grid, x: float, y: float, start: int, stop: int, distances) -> Optional[int]:
+        """
+        Item in [start, stop) closest to (x, y), searching grid rings outwards
+
+        A query more than MAX_RINGS cells away from its answer scans the
+        whole range instead, so far queries cost one vectorized pass.
+        """
+        if stop <= start:
+            return None
+        if stop - start <= BRUTE_FORCE_LIMIT:
+            return start + int(np.argmin(distances(np.arange(start, stop), x, y)))
+
+        cx, cy = (int(c) for c in grid.cell(x, y))
+        best, best_distance = None, np.inf
+        for r in range(grid.max_ring(cx, cy) + 1):
+            if r > MAX_RINGS:
+                return start + int(np.argmin(distances(np.arange(start, stop), x, y)))
+            candidates = grid.ring(cx, cy, r)
+            candidates = candidates[(candidates >= start) & (candidates < stop)]
+            if len(candidates):
+                d = distances(candidates, x, y)
+                closest = float(d.min())
+                # Ties go to the lowest index, like a scan of the range
+                if closest < best_distance or (closest == best_distance and candidates[d == closest].min() < best):
+                    best, best_distance = int(candidates[d == closest].min()), closest
+            # Items not seen yet are in rings > r, at least r cells away
+            if best_distance <= r * grid.cell_size:
+                break
+        return best
@@ -0,0 +1,282 @@
+"""
+Map-matching of recordings onto a reference course
+Hidden Markov model over the course passes near each recorded point,
+decoded with Viterbi. The state window is banded: a point only has the
+passes within a search radius, and a transition only reaches the part of
+the course the runner can have covered since the previous point. Loops
+and out-and-back sections therefore keep to the right lap, and time and
+memory grow linearly with the recording.
+"""
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from app.services.course_index import CourseIndex
+from app.services.distance_calculator import DistanceCalculator
+
+# Passes of the course kept per recorded point (the nearest ones)
+MAX_CANDIDATES = 8
+
+# Viterbi steps whose transition matrices are built at once (bounds memory)
+TRANSITION_CHUNK = 4096
+
+
+class MatchSettings(NamedTuple):
+    """
+    Matching parameters
+
+    Attributes:
+        radius_m: Course segments farther than this from a point are not candidates
+        gps_sigma_m: GPS noise (emission: Gaussian on the distance to the course)
+        transition_beta_m: Tolerance between course progress and recorded distance
+        backtrack_m: Largest step back along the course between two points
+        lookahead_m: Forward reach between two points, on top of the speed bound
+        max_speed_ms: Forward reach per elapsed second (no speed bound without times)
+    """
+    radius_m: float = 60.0
+    gps_sigma_m: float = 10.0
+    transition_beta_m: float = 50.0
+    backtrack_m: float = 50.0
+    lookahead_m: float = 500.0
+    max_speed_ms: float = 8.0
+
+
+class MatchResult(NamedTuple):
+    """
+    Alignment of every recorded point to the course
+
+    Attributes:
+        matched: Whether the point had a course segment within the radius
+        segment: Course segment of the point (-1 when unmatched)
+        distance_along_m: Course distance of the point (carried over from
+            the previous matched point when unmatched, 0 before any match)
+        offset_m: Distance from the point to the course (NaN when unmatched)
+    """
+    matched: np.ndarray
+    segment: np.ndarray
+    distance_along_m: np.ndarray
+    offset_m: np.ndarray
+
+
+class CourseMatcher:
+    """Viterbi alignment of recordings to a CourseIndex"""
+
+    @staticmethod
+    def match(
+        course_index: CourseIndex,
+        lat: np.ndarray,
+        lon: np.ndarray,
+        seconds: Optional[np.ndarray] = None,
+        settings: MatchSettings = MatchSettings(),
+        first_window_m: Optional[Tuple[float, float]] = None,
+        last_window_m: Optional[Tuple[float, float]] = None,
+    ) -> MatchResult:
+        """
+        Align a recording to the course
+
+        Args:
+            course_index: Index of the course
+            lat: Recorded latitudes
+            lon: Recorded longitudes
+            seconds: Elapsed seconds per point (None: no speed bound)
+            settings: Matching parameters
+            first_window_m: Course distance range allowed for the first
+                matched point (e.g. the first half of a loop course)
+            last_window_m: Course distance range allowed for the last
+                matched point (ignored if no candidate falls inside)
+
+        Returns:
+            MatchResult
+        """
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        n = len(lat)
+        candidates = CourseMatcher._passes(course_index, lat, lon, settings.radius_m)
+        along, offset, segment, count = candidates
+        emission = -0.5 * (offset / settings.gps_sigma_m) ** 2
+
+        matched_points = np.flatnonzero(count > 0)
+        result = MatchResult(
+            matched=count > 0,
+            segment=np.full(n, -1, dtype=np.int64),
+            distance_along_m=np.zeros(n),
+            offset_m=np.full(n, np.nan),
+        )
+        if not len(matched_points):
+            return result
+
+        _restrict(emission, along, matched_points[0], first_window_m)
+        _restrict(emission, along, matched_points[-1], last_window_m)
+
+        recorded = DistanceCalculator.cumulative_distance(lat, lon)
+        states = CourseMatcher._viterbi(emission, along, matched_points, recorded, seconds, settings)
+
+        rows = matched_points
+        result.segment[rows] = segment[rows, states]
+        result.offset_m[rows] = offset[rows, states]
+        # Unmatched points keep the progress of the previous matched point
+        reached = np.zeros(n)
+        reached[rows] = along[rows, states]
+        last_matched = np.maximum.accumulate(np.where(result.matched, np.arange(n), -1))
+        result.distance_along_m[:] = np.where(last_matched >= 0, reached[np.maximum(last_matched, 0)], 0.0)
+        return result
+
+    @staticmethod
+    def _passes(
+        course_index: CourseIndex,
+        lat: np.ndarray,
+        lon: np.ndarray,
+        radius_m: float,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Candidate states of every point, padded to (points, K)
+
+        Each local minimum of the distance to the point along the course is
+        one pass of the course, represented by that segment; only the
+        MAX_CANDIDATES nearest passes are kept.
+
+        Returns:
+            Tuple of (distance_along_m, offset_m, segment, count per point);
+            padding has NaN distance and infinite offset
+        """
+        found = course_index.candidates(lat, lon, radius_m)
+        n = len(lat)
+
+        # Along each run of consecutive segments near a point, every local
+        # minimum of the offset is one pass (a hairpin gives two)
+        same_run = (np.diff(found.point) == 0) & (np.diff(found.segment) == 1)
+        offset = found.offset_m
+        from_left = np.ones(len(offset), dtype=bool)
+        from_left[1:] = ~same_run | (offset[1:] <= offset[:-1])
+        from_right = np.ones(len(offset), dtype=bool)
+        from_right[:-1] = ~same_run | (offset[:-1] < offset[1:])
+        best = np.flatnonzero(from_left & from_right)
+        # Passes of each point, nearest first
+        best = best[np.lexsort((offset[best], found.point[best]))]
+
+        points = found.point[best]
+        count = np.bincount(points, minlength=n)
+        rank = np.arange(len(points)) - np.repeat(np.cumsum(count) - count, count)
+        keep = rank < MAX_CANDIDATES
+        points, rank, best = points[keep], rank[keep], best[keep]
+        count = np.minimum(count, MAX_CANDIDATES)
+
+        width = max(int(count.max()) if n else 0, 1)
+        along = np.full((n, width), np.nan)
+        offset = np.full((n, width), np.inf)
+        segment = np.full((n, width), -1, dtype=np.int64)
+        along[points, rank] = found.distance_along_m[best]
+        offset[points, rank] = found.offset_m[best]
+        segment[points, rank] = found.segment[best]
+        return along, offset, segment, count
+
+    @staticmethod
+    def _viterbi(
+        emission: np.ndarray,
+        along: np.ndarray,
+        rows: np.ndarray,
+        recorded: np.ndarray,
+        seconds: Optional[np.ndarray],
+        settings: MatchSettings,
+    ) -> np.ndarray:
+        """
+        Most likely pass of every matched point
+
+        The transition between consecutive matched points penalises the
+        difference between course progress and recorded distance, and is
+        impossible beyond the band [-backtrack_m, reach]. When no
+        transition is possible the chain restarts at that point.
+
+        Returns:
+            State index per matched point
+        """
+        count, width = len(rows), emission.shape[1]
+        if width == 1:
+            # A single pass everywhere: nothing to decide
+            return np.zeros(count, dtype=np.int64)
+
+        emission = emission[rows]
+        along = along[rows]
+        steps = np.diff(recorded[rows])
+        if seconds is None:
+            reaches = np.full(count - 1, np.inf)
+        else:
+            elapsed = np.maximum(np.diff(np.asarray(seconds, dtype=np.float64)[rows]), 0.0)
+            reaches = settings.lookahead_m + settings.max_speed_ms * elapsed
+
+        backpointer = np.zeros((count, width), dtype=np.int64)
+        restart = np.zeros(count, dtype=bool)
+        restart[0] = True
+        scores = np.empty((count, width))
+        scores[0] = emission[0]
+        columns = np.arange(width)
+
+        for chunk in range(1, count, TRANSITION_CHUNK):
+            stop = min(chunk + TRANSITION_CHUNK, count)
+            # (step, previous state, state) transition log-probabilities, all at once
+            progress = along[chunk:stop, None, :] - along[chunk - 1:stop - 1, :, None]
+            with np.errstate(invalid="ignore"):
+                transitions = -np.abs(progress - steps[chunk - 1:stop - 1, None, None]) / settings.transition_beta_m
+                transitions[~(
+                    (progress >= -settings.backtrack_m)
+                    & (progress <= reaches[chunk - 1:stop - 1, None, None])
+                )] = -np.inf
+
+            score = scores[chunk - 1]
+            for i in range(chunk, stop):
+                total = score[:, None] + transitions[i - chunk]
+                pointer = total.argmax(axis=0)
+                best = total[pointer, columns]
+                top = best.max()
+                if top == -np.inf:
+                    # Nothing reachable (e.g. a long detour): start a new chain here
+                    restart[i] = True
+                    score = emission[i].copy()
+                else:
+                    # Keep scores near zero: only differences between states matter
+                    score = best + emission[i] - top
+                backpointer[i] = pointer
+                scores[i] = score
+
+        states = np.zeros(count, dtype=np.int64)
+        states[-1] = int(np.argmax(scores[-1]))
+        for i in range(count - 1, 0, -1):
+            states[i - 1] = int(np.argmax(scores[i - 1])) if restart[i] else backpointer[i, states[i]]
+        return states
+
+
+def off_course_sections(
+    result: MatchResult,
+    threshold_m: float,
+    min_points: int = 3,
+) -> List[Tuple[int, int]]:
+    """
+    Runs of consecutive points farther than threshold_m from the course
+
+    Unmatched points (no course segment within the search radius) count as
+    off course.
+
+    Args:
+        result: Output of CourseMatcher.match
+        threshold_m: Distance to the course beyond which a point is off course
+        min_points: Shorter runs are ignored (isolated GPS spikes)
+
+    Returns:
+        List of (start, stop) point index ranges, stop exclusive
+    """
+    with np.errstate(invalid="ignore"):
+        off = ~result.matched | (result.offset_m > threshold_m)
+    edges = np.diff(np.concatenate(([0], off.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    stops = np.flatnonzero(edges == -1)
+    return [(int(a), int(b)) for a, b in zip(starts, stops) if b - a >= min_points]
+
+
+def _restrict(emission: np.ndarray, along: np.ndarray, row: int, window_m: Optional[Tuple[float, float]]) -> None:
+    """Rule out the passes of one point outside a course distance window (unless none is inside)"""
+    if window_m is None:
+        return
+    with np.errstate(invalid="ignore"):
+        outside = ~((along[row] >= window_m[0]) & (along[row] <= window_m[1]))
+    if not outside.all():
+        emission[row, outside] = -np.inf
@@ -0,0 +1,156 @@
+"""
+Local DEM (digital elevation model) lookups from SRTM .hgt tiles
+
+Tiles are read from DEM_DIR through memory-mapped arrays, so only the pages
+around the track are actually loaded. A tile named N45E006.hgt covers
+latitudes 45..46 and longitudes 6..7; it holds a square grid of big-endian
+int16 elevations (1201x1201 for SRTM3, 3601x3601 for SRTM1), first row at
+the north edge, -32768 for voids.
+"""
+import logging
+import math
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+HGT_VOID = -32768
+
+
+def tile_name(lat_floor: int, lon_floor: int) -> str:
+    """SRTM file name of the tile whose south-west corner is (lat_floor, lon_floor)"""
+    ns = "N" if lat_floor >= 0 else "S"
+    ew = "E" if lon_floor >= 0 else "W"
+    return f"{ns}{abs(lat_floor):02d}{ew}{abs(lon_floor):03d}.hgt"
+
+
+class DEMService:
+    """
+    Vectorized elevation lookups over memory-mapped SRTM tiles
+
+    Attributes:
+        directory: Directory holding the .hgt files ("" disables lookups)
+        max_open_tiles: Number of memory-mapped tiles kept open (LRU)
+    """
+
+    def __init__(self, directory: str, max_open_tiles: int = 16):
+        self.directory = directory
+        self.max_open_tiles = max(1, max_open_tiles)
+        # (lat_floor, lon_floor) -> memory-mapped grid, or None if the tile is missing
+        self._tiles: "OrderedDict[Tuple[int, int], Optional[np.memmap]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        """True when a DEM directory is configured and exists"""
+        return bool(self.directory) and os.path.isdir(self.directory)
+
+    def elevations(self, lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+        """
+        Bilinear DEM elevation for every point
+
+        Points are grouped by tile, and each tile is sampled once for all
+        its points with array indexing.
+
+        Args:
+            lat: Latitudes in degrees
+            lon: Longitudes in degrees
+
+        Returns:
+            float64 elevations in meters (NaN where no tile or only voids)
+        """
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        result = np.full(len(lat), np.nan)
+        if not len(lat) or not self.available:
+            return result
+
+        lat_floor = np.floor(lat).astype(np.int64)
+        lon_floor = np.floor(lon).astype(np.int64)
+        keys, inverse = np.unique(np.stack([lat_floor, lon_floor], axis=1), axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+
+        for k, (tile_lat, tile_lon) in enumerate(keys.tolist()):
+            grid = self._tile(tile_lat, tile_lon)
+            if grid is None:
+                continue
+            in_tile = np.flatnonzero(inverse == k)
+            result[in_tile] = _bilinear(grid, lat[in_tile] - tile_lat, lon[in_tile] - tile_lon)
+
+        return result
+
+    def _tile(self, lat_floor: int, lon_floor: int) -> Optional[np.memmap]:
+        """Memory-mapped grid of a tile (LRU of open maps), None if not on disk"""
+        key = (lat_floor, lon_floor)
+        with self._lock:
+            if key in self._tiles:
+                self._tiles.move_to_end(key)
+                return self._tiles[key]
+
+        grid = self._open(lat_floor, lon_floor)
+
+        with self._lock:
+            self._tiles[key] = grid
+            self._tiles.move_to_end(key)
+            while len(self._tiles) > self.max_open_tiles:
+                self._tiles.popitem(last=False)
+        return grid
+
+    def _open(self, lat_floor: int, lon_floor: int) -> Optional[np.memmap]:
+        path = os.path.join(self.directory, tile_name(lat_floor, lon_floor))
+        if not os.path.exists(path):
+            return None
+
+        samples = os.path.getsize(path) // 2
+        side = math.isqrt(samples)
+        if side * side != samples or side < 2:
+            logger.warning(f"Ignoring DEM tile {path}: not a square int16 grid")
+            return None
+
+        logger.debug(f"Mapping DEM tile {path} ({side}x{side})")
+        return np.memmap(path, dtype=">i2", mode="r", shape=(side, side))
+
+
+def _bilinear(grid: np.ndarray, lat_offset: np.ndarray, lon_offset: np.ndarray) -> np.ndarray:
+    """
+    Bilinear interpolation inside one tile
+
+    Void corners are left out and the remaining weights renormalized; the
+    result is NaN only when all four corners are voids.
+
+    Args:
+        grid: Square elevation grid, first row at the north edge
+        lat_offset: Latitude minus the tile's south edge (0..1)
+        lon_offset: Longitude minus the tile's west edge (0..1)
+
+    Returns:
+        float64 elevations
+    """
+    last = grid.shape[0] - 1
+    row = (1.0 - lat_offset) * last
+    col = lon_offset * last
+    r0 = np.clip(np.floor(row).astype(np.int64), 0, last - 1)
+    c0 = np.clip(np.floor(col).astype(np.int64), 0, last - 1)
+    fr = row - r0
+    fc = col - c0
+
+    corners = np.stack([
+        grid[r0, c0], grid[r0, c0 + 1], grid[r0 + 1, c0], grid[r0 + 1, c0 + 1],
+    ]).astype(np.float64)
+    weights = np.stack([
+        (1 - fr) * (1 - fc), (1 - fr) * fc, fr * (1 - fc), fr * fc,
+    ])
+
+    weights = np.where(corners == HGT_VOID, 0.0, weights)
+    total = weights.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(total > 0, (weights * corners).sum(axis=0) / total, np.nan)
+
+
+dem_service = DEMService(settings.DEM_DIR, settings.DEM_MAX_OPEN_TILES)
@@ -2,14 +2,19 @@
 Distance calculation utilities for GPX processing
 """
 import math
-from typing import Optional
+from typing import Optional, Sequence
 import gpxpy.gpx
+import numpy as np
+
+ArrayLike = Sequence[float] | np.ndarray
 
 
 class DistanceCalculator:
     """Utility class for distance calculations"""
 
     EARTH_RADIUS_METERS = 6371000  # Earth radius in meters
+    GPXPY_EARTH_RADIUS_METERS = 6378137.0  # gpxpy.geo.EARTH_RADIUS
+    GPXPY_ONE_DEGREE_METERS = (2 * math.pi * GPXPY_EARTH_RADIUS_METERS) / 360
 
     @staticmethod
     def haversine_distance(
@@ -75,6 +80,220 @@ class DistanceCalculator:
 
         return horizontal
 
+    @staticmethod
+    def gpxpy_distance(
+        lat1: float,
+        lon1: float,
+        ele1: Optional[float],
+        lat2: float,
+        lon2: float,
+        ele2: Optional[float],
+    ) -> float:
+        """
+        Distance between two points using gpxpy's formula (Location.distance_3d)
+
+        gpxpy uses a flat-earth approximation for close points and falls back
+        to haversine when points are more than 0.2 degrees apart. Reproducing it
+        lets array-based statistics match the gpxpy helpers exactly.
+
+        Args:
+            lat1: Latitude of first point in degrees
+            lon1: Longitude of first point in degrees
+            ele1: Elevation of first point in meters (None for 2D distance)
+            lat2: Latitude of second point in degrees
+            lon2: Longitude of second point in degrees
+            ele2: Elevation of second point in meters (None for 2D distance)
+
+        Returns:
+            Distance in meters
+        """
+        if abs(lat1 - lat2) > 0.2 or abs(lon1 - lon2) > 0.2:
+            lat1_rad = math.radians(lat1)
+            lat2_rad = math.radians(lat2)
+            a = (
+                math.sin((lat1_rad - lat2_rad) / 2) ** 2
+                + math.sin(math.radians(lon1 - lon2) / 2) ** 2
+                * math.cos(lat1_rad) * math.cos(lat2_rad)
+            )
+            return DistanceCalculator.GPXPY_EARTH_RADIUS_METERS * 2 * math.asin(math.sqrt(a))
+
+        coef = math.cos(math.radians(lat1))
+        x = lat1 - lat2
+        y = (lon1 - lon2) * coef
+        distance_2d = math.sqrt(x * x + y * y) * DistanceCalculator.GPXPY_ONE_DEGREE_METERS
+
+        if ele1 is None or ele2 is None or ele1 == ele2:
+            return distance_2d
+
+        return math.sqrt(distance_2d**2 + (ele1 - ele2) ** 2)
+
+    @staticmethod
+    def haversine_many(
+        lat1: ArrayLike, lon1: ArrayLike, lat2: ArrayLike, lon2: ArrayLike
+    ) -> np.ndarray:
+        """
+        Vectorized haversine_distance
+
+        Arguments are broadcast against each other, so any of them may be a
+        scalar (e.g. one point against a whole track).
+
+        Args:
+            lat1: Latitudes of first points in degrees
+            lon1: Longitudes of first points in degrees
+            lat2: Latitudes of second points in degrees
+            lon2: Longitudes of second points in degrees
+
+        Returns:
+            Array of distances in meters
+        """
+        lat1_rad = np.radians(lat1)
+        lat2_rad = np.radians(lat2)
+        delta_lat = np.radians(np.subtract(lat2, lat1))
+        delta_lon = np.radians(np.subtract(lon2, lon1))
+
+        a = (
+            np.sin(delta_lat / 2) ** 2
+            + np.cos(lat1_rad) * np.cos(lat2_rad) * np.sin(delta_lon / 2) ** 2
+        )
+        c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+        return DistanceCalculator.EARTH_RADIUS_METERS * c
+
+    @staticmethod
+    def segment_lengths(
+        lat: ArrayLike, lon: ArrayLike, ele: Optional[ArrayLike] = None
+    ) -> np.ndarray:
+        """
+        Length of every consecutive pair of points of a polyline
+
+        Args:
+            lat: Latitudes in degrees
+            lon: Longitudes in degrees
+            ele: Elevations in meters (NaN when missing). When given, pairs
+                with both elevations use the 3D distance, like distance_3d.
+
+        Returns:
+            Array of n - 1 distances in meters
+        """
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        lengths = DistanceCalculator.haversine_many(lat[:-1], lon[:-1], lat[1:], lon[1:])
+
+        if ele is not None:
+            vertical = np.diff(np.asarray(ele, dtype=np.float64))
+            has_ele = ~np.isnan(vertical)
+            lengths[has_ele] = np.hypot(lengths[has_ele], vertical[has_ele])
+
+        return lengths
+
+    @staticmethod
+    def cumulative_distance(
+        lat: ArrayLike,
+        lon: ArrayLike,
+        ele: Optional[ArrayLike] = None,
+        start: float = 0.0,
+    ) -> np.ndarray:
+        """
+        Cumulative distance along a polyline
+
+        Accumulates in point order, so the result is identical to summing
+        haversine_distance point by point.
+
+        Args:
+            lat: Latitudes in degrees
+            lon: Longitudes in degrees
+            ele: Optional elevations in meters (see segment_lengths)
+            start: Distance already covered at the first point (to chain segments)
+
+        Returns:
+            Array of n cumulative distances in meters
+        """
+        if len(lat) == 0:
+            return np.empty(0, dtype=np.float64)
+
+        lengths = DistanceCalculator.segment_lengths(lat, lon, ele)
+        return np.cumsum(np.concatenate(([start], lengths)))
+
+    @staticmethod
+    def distances_to_point(
+        lat: float, lon: float, track_lat: ArrayLike, track_lon: ArrayLike
+    ) -> np.ndarray:
+        """
+        Distance from one point to every vertex of a track
+
+        Args:
+            lat: Latitude of the point in degrees
+            lon: Longitude of the point in degrees
+            track_lat: Track latitudes in degrees
+            track_lon: Track longitudes in degrees
+
+        Returns:
+            Array of distances in meters, one per track vertex
+        """
+        return DistanceCalculator.haversine_many(lat, lon, track_lat, track_lon)
+
+    @staticmethod
+    def gpxpy_segment_lengths(
+        lat: ArrayLike, lon: ArrayLike, ele: Optional[ArrayLike] = None
+    ) -> np.ndarray:
+        """
+        Vectorized gpxpy_distance between consecutive points
+
+        Follows gpxpy's point.distance_3d(previous_point) argument order, so
+        the flat-earth correction uses the latitude of the later point.
+
+        Args:
+            lat: Latitudes in degrees
+            lon: Longitudes in degrees
+            ele: Elevations in meters (NaN when missing), or None for 2D
+
+        Returns:
+            Array of n - 1 distances in meters
+        """
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        lat1, lat2 = lat[1:], lat[:-1]
+        lon1, lon2 = lon[1:], lon[:-1]
+
+        coef = np.cos(np.radians(lat1))
+        x = lat1 - lat2
+        y = (lon1 - lon2) * coef
+        lengths = np.sqrt(x * x + y * y) * DistanceCalculator.GPXPY_ONE_DEGREE_METERS
+
+        if ele is not None:
+            ele = np.asarray(ele, dtype=np.float64)
+            vertical = ele[1:] - ele[:-1]
+            has_ele = ~np.isnan(vertical) & (vertical != 0)
+            lengths[has_ele] = np.sqrt(lengths[has_ele] ** 2 + vertical[has_ele] ** 2)
+
+        far = (np.abs(x) > 0.2) | (np.abs(lon1 - lon2) > 0.2)
+        if far.any():
+            lat1_rad = np.radians(lat1[far])
+            lat2_rad = np.radians(lat2[far])
+            a = (
+                np.sin((lat1_rad - lat2_rad) / 2) ** 2
+                + np.sin(np.radians(lon1[far] - lon2[far]) / 2) ** 2
+                * np.cos(lat1_rad) * np.cos(lat2_rad)
+            )
+            lengths[far] = DistanceCalculator.GPXPY_EARTH_RADIUS_METERS * 2 * np.arcsin(np.sqrt(a))
+
+        return lengths
+
+    @staticmethod
+    def _gpx_point_arrays(
+        points: list[gpxpy.gpx.GPXTrackPoint],
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Latitude, longitude and elevation (NaN when missing) arrays of gpxpy points"""
+        n = len(points)
+        lat = np.fromiter((p.latitude for p in points), dtype=np.float64, count=n)
+        lon = np.fromiter((p.longitude for p in points), dtype=np.float64, count=n)
+        ele = np.fromiter(
+            (np.nan if p.elevation is None else p.elevation for p in points),
+            dtype=np.float64,
+            count=n,
+        )
+        return lat, lon, ele
+
     @staticmethod
     def calculate_cumulative_distances(
         points: list[gpxpy.gpx.GPXTrackPoint],
@@ -88,18 +307,13 @@ class DistanceCalculator:
         Returns:
             List of cumulative distances in meters
         """
-        distances = []
-        cumulative = 0.0
+        if not points:
+            return []
 
-        for i, point in enumerate(points):
-            if i > 0:
-                prev_point = points[i - 1]
-                delta = point.distance_3d(prev_point) or 0
-                cumulative += delta
-
-            distances.append(cumulative)
-
-        return distances
+        lengths = DistanceCalculator.gpxpy_segment_lengths(
+            *DistanceCalculator._gpx_point_arrays(points)
+        )
+        return np.cumsum(np.concatenate(([0.0], lengths))).tolist()
 
     @staticmethod
     def total_distance(points: list[gpxpy.gpx.GPXTrackPoint]) -> float:
@@ -112,10 +326,10 @@ class DistanceCalculator:
         Returns:
             Total distance in meters
         """
-        total = 0.0
+        if len(points) < 2:
+            return 0.0
 
-        for i in range(1, len(points)):
-            delta = points[i].distance_3d(points[i - 1]) or 0
-            total += delta
-
-        return total
+        lengths = DistanceCalculator.gpxpy_segment_lengths(
+            *DistanceCalculator._gpx_point_arrays(points)
+        )
+        return float(lengths.sum())
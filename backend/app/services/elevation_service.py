@@ -1,9 +1,12 @@
 """
 Elevation analysis and smoothing utilities for GPX processing
 """
-from typing import List, Optional
+from typing import List, Optional, Sequence, Union
 from app.models.gpx import TrackPoint
+from app.services.track_arrays import TrackArrays
+from app.utils.elevation_quality import smooth_elevation_array
 import gpxpy.gpx
+import numpy as np
 
 
 class ElevationService:
@@ -11,41 +14,21 @@ class ElevationService:
 
     @staticmethod
     def smooth_elevation(
-        points: List[TrackPoint], window_size: int = 5
-    ) -> List[float]:
+        points: Union[List[TrackPoint], TrackArrays], window_size: int = 5
+    ) -> np.ndarray:
         """
         Smooth elevation data using moving average to reduce GPS noise
 
         Args:
-            points: List of track points
+            points: Track points or TrackArrays
             window_size: Size of the moving average window (default: 5)
 
         Returns:
-            List of smoothed elevation values
+            Array of smoothed elevation values (missing elevations are
+            skipped; 0.0 where a window has none)
         """
-        if not points:
-            return []
-
-        smoothed = []
-        half_window = window_size // 2
-
-        for i in range(len(points)):
-            # Define window bounds
-            start = max(0, i - half_window)
-            end = min(len(points), i + half_window + 1)
-
-            # Calculate average elevation in window
-            elevations = [
-                p.elevation for p in points[start:end] if p.elevation is not None
-            ]
-            if elevations:
-                avg_elev = sum(elevations) / len(elevations)
-            else:
-                avg_elev = points[i].elevation or 0
-
-            smoothed.append(avg_elev)
-
-        return smoothed
+        track = TrackArrays.coerce(points)
+        return np.nan_to_num(smooth_elevation_array(track.elevation, window_size), nan=0.0)
 
     @staticmethod
     def calculate_elevation_gain_loss(
@@ -78,8 +61,8 @@ class ElevationService:
 
     @staticmethod
     def find_local_minimum(
-        points: List[TrackPoint],
-        smoothed_elevations: List[float],
+        points: Union[List[TrackPoint], TrackArrays],
+        smoothed_elevations: Sequence[float],
         start_idx: int,
         search_distance: int = 10,
     ) -> int:
@@ -87,7 +70,7 @@ class ElevationService:
         Find local minimum by looking backward from start_idx
 
         Args:
-            points: List of track points
+            points: Track points or TrackArrays (only the length is used)
             smoothed_elevations: Smoothed elevation data
             start_idx: Starting index
             search_distance: How many points to look back
@@ -108,8 +91,8 @@ class ElevationService:
 
     @staticmethod
     def find_local_maximum(
-        points: List[TrackPoint],
-        smoothed_elevations: List[float],
+        points: Union[List[TrackPoint], TrackArrays],
+        smoothed_elevations: Sequence[float],
         end_idx: int,
         search_distance: int = 10,
     ) -> int:
@@ -117,7 +100,7 @@ class ElevationService:
         Find local maximum by looking forward from end_idx
 
         Args:
-            points: List of track points
+            points: Track points or TrackArrays (only the length is used)
             smoothed_elevations: Smoothed elevation data
             end_idx: Starting index
             search_distance: How many points to look forward
@@ -4,12 +4,12 @@ Handles generation of GPX files from track data
 """
 import gpxpy
 import gpxpy.gpx
-from typing import List
-from datetime import datetime
+from typing import List, Union
 import logging
 
 from app.models.gpx import TrackPoint
-from app.utils.elevation_quality import process_elevation_data
+from app.services.track_arrays import TrackArrays
+from app.utils.elevation_quality import process_elevation_array
 
 logger = logging.getLogger(__name__)
 
@@ -19,7 +19,7 @@ class GPXExportService:
 
     @staticmethod
     def generate_gpx_from_segment(
-        points: List[TrackPoint],
+        points: Union[List[TrackPoint], TrackArrays],
         start_km: float,
         end_km: float,
         track_name: str
@@ -28,7 +28,7 @@ class GPXExportService:
         Generate GPX XML string from a segment of track points
 
         Args:
-            points: List of all track points
+            points: All track points (list or TrackArrays)
             start_km: Start of segment in kilometers
             end_km: End of segment in kilometers
             track_name: Name for the exported track
@@ -36,34 +36,19 @@ class GPXExportService:
         Returns:
             GPX XML string
         """
-        # Filter points within segment range
-        start_m = start_km * 1000
-        end_m = end_km * 1000
-        segment_points = [p for p in points if start_m <= p.distance <= end_m]
+        track = TrackArrays.coerce(points)
 
-        if not segment_points:
+        # Points within segment range: a contiguous run found by binary search
+        bounds = track.range_index().segment(start_km, end_km)
+
+        if not bounds.num_points:
             raise ValueError("No points found in the specified segment range")
 
-        # Convert TrackPoint objects to gpxpy points for elevation quality assessment
-        gpx_points_for_assessment = []
-        for point in segment_points:
-            point_time = None
-            if point.time:
-                try:
-                    point_time = datetime.fromisoformat(point.time.replace('Z', '+00:00'))
-                except:
-                    pass
-
-            gpx_point = gpxpy.gpx.GPXTrackPoint(
-                latitude=point.lat,
-                longitude=point.lon,
-                elevation=point.elevation,
-                time=point_time
-            )
-            gpx_points_for_assessment.append(gpx_point)
+        segment = track.slice(bounds.first, bounds.last + 1)
 
         # Assess and process elevation quality for extracted segment
-        processed_gpx_points, quality_report = process_elevation_data(gpx_points_for_assessment)
+        processed, quality_report = process_elevation_array(segment.elevation, lat=segment.lat, lon=segment.lon)
+        processed_elevations = [None if e != e else e for e in processed.tolist()]
         logger.info(
             f"Extract segment {start_km:.1f}-{end_km:.1f}km from '{track_name}': "
             f"Elevation quality {quality_report['quality_score']:.1f}/100 ({quality_report['source']}), "
@@ -87,8 +72,15 @@ class GPXExportService:
         gpx_track.segments.append(gpx_segment)
 
         # Add processed points to segment (with improved elevation quality)
-        for gpx_point in processed_gpx_points:
-            gpx_segment.points.append(gpx_point)
+        for i, (lat, lon, elevation) in enumerate(
+            zip(segment.lat.tolist(), segment.lon.tolist(), processed_elevations)
+        ):
+            gpx_segment.points.append(gpxpy.gpx.GPXTrackPoint(
+                latitude=lat,
+                longitude=lon,
+                elevation=elevation,
+                time=segment.datetime_at(i)
+            ))
 
         # Convert to XML string
         return gpx.to_xml()
@@ -8,7 +8,9 @@ from typing import List, Tuple
 from datetime import datetime
 import logging
 
-from app.utils.elevation_quality import process_elevation_data
+import numpy as np
+
+from app.utils.elevation_quality import process_elevation_array
 
 logger = logging.getLogger(__name__)
 
@@ -47,8 +49,12 @@ class GPXMergeService:
                 for track in gpx.tracks:
                     for segment in track.segments:
                         if segment.points:
-                            # Process elevation quality for this segment
-                            processed_points, quality_report = process_elevation_data(segment.points)
+                            # Assess elevation quality for this segment. The merged
+                            # file is re-parsed (and its elevations processed) by
+                            # the caller, so points are copied with raw elevations.
+                            _, quality_report = process_elevation_array(
+                                np.array([p.elevation for p in segment.points], dtype=np.float64)
+                            )
                             logger.info(
                                 f"Merge - {filename}: Elevation quality {quality_report['quality_score']:.1f}/100, "
                                 f"action: {quality_report['processing_applied']}"
@@ -56,7 +62,7 @@ class GPXMergeService:
 
                             # Get start time for sorting
                             start_time = None
-                            for point in processed_points:
+                            for point in segment.points:
                                 if point.time:
                                     start_time = point.time
                                     break
@@ -65,7 +71,6 @@ class GPXMergeService:
                                 'filename': filename,
                                 'segment': segment,
                                 'start_time': start_time,
-                                'points': processed_points  # Use processed points with improved elevation
                             })
             except Exception as e:
                 warnings.append(f"Error parsing {filename}: {str(e)}")
@@ -4,13 +4,18 @@ Handles parsing of GPX files and extracting track data
 """
 import gpxpy
 import gpxpy.gpx
-from typing import List
+from typing import BinaryIO, List, Union
 import logging
 
+import numpy as np
+
 from app.models.gpx import GPXData, Track, TrackPoint, Coordinate
 from app.services.distance_calculator import DistanceCalculator
+from app.services.gpx_stream_parser import GPXStreamParser
+from app.services.simplification import TrackSimplifier
 from app.services.statistics_calculator import StatisticsCalculator
-from app.utils.elevation_quality import process_elevation_data
+from app.services.track_arrays import AnalyzedTrack, TrackArrays
+from app.utils.elevation_quality import process_elevation_array
 
 logger = logging.getLogger(__name__)
 
@@ -42,32 +47,36 @@ class GPXParseService:
                 if not segment_points:
                     continue
 
-                # Process elevation data (quality assessment + smoothing if needed)
-                processed_points, quality_report = process_elevation_data(segment_points)
+                # Process elevation data (quality assessment + smoothing if needed).
+                # Only the elevation values are processed: the gpxpy points keep
+                # their raw elevations, which the statistics are computed from.
+                processed, quality_report = process_elevation_array(
+                    np.array([p.elevation for p in segment_points], dtype=np.float64),
+                    lat=np.array([p.latitude for p in segment_points]),
+                    lon=np.array([p.longitude for p in segment_points]),
+                )
                 logger.info(
                     f"Track '{track.name}': Elevation quality {quality_report['quality_score']:.1f}/100 "
                     f"({quality_report['source']}), action: {quality_report['processing_applied']}"
                 )
-                segment_points = processed_points
-
-                for i, point in enumerate(segment_points):
-                    # Calculate distance from previous point
-                    if i > 0:
-                        prev_point = segment_points[i - 1]
-                        distance = DistanceCalculator.haversine_distance(
-                            prev_point.latitude,
-                            prev_point.longitude,
-                            point.latitude,
-                            point.longitude,
-                        )
-                        accumulated_distance += distance
 
+                # Cumulative distance from previous points (continues across segments)
+                segment_distances = DistanceCalculator.cumulative_distance(
+                    [p.latitude for p in segment_points],
+                    [p.longitude for p in segment_points],
+                    start=accumulated_distance,
+                ).tolist()
+                accumulated_distance = segment_distances[-1]
+
+                for point, elevation, distance in zip(
+                    segment_points, np.nan_to_num(processed, nan=0.0).tolist(), segment_distances
+                ):
                     track_point = TrackPoint(
                         lat=point.latitude,
                         lon=point.longitude,
-                        elevation=point.elevation if point.elevation is not None else 0.0,
+                        elevation=elevation,
                         time=point.time.isoformat() if point.time else None,
-                        distance=accumulated_distance,
+                        distance=distance,
                     )
                     track_points.append(track_point)
 
@@ -97,3 +106,99 @@ class GPXParseService:
             tracks.append(track_obj)
 
         return GPXData(filename=filename, tracks=tracks)
+
+    @staticmethod
+    def parse_gpx_bytes(source: Union[bytes, BinaryIO], filename: str) -> GPXData:
+        """
+        Parse raw GPX bytes with the streaming parser
+
+        Produces the same GPXData as parse_gpx_file, but never decodes the
+        whole file to a string nor builds the gpxpy object tree: points are
+        read incrementally into compact per-segment arrays.
+
+        Args:
+            source: GPX content as bytes, or a binary file-like object
+            filename: Original filename
+
+        Returns:
+            GPXData object with tracks and statistics
+        """
+        tracks = GPXParseService.analyze_gpx_bytes(source)
+        return GPXData(filename=filename, tracks=[t.to_track() for t in tracks])
+
+    @staticmethod
+    def analyze_gpx_bytes(source: Union[bytes, BinaryIO]) -> List[AnalyzedTrack]:
+        """
+        Parse raw GPX bytes into columnar tracks with statistics
+
+        Same processing as parse_gpx_bytes, but the points stay in
+        TrackArrays so services can work on them without pydantic objects.
+        Map levels of detail are precomputed for each track.
+
+        Args:
+            source: GPX content as bytes, or a binary file-like object
+
+        Returns:
+            List of AnalyzedTrack (tracks without points are skipped)
+        """
+        parsed_tracks = GPXStreamParser.parse(source)
+
+        tracks = []
+        for parsed_track in parsed_tracks:
+            segments = [s for s in parsed_track.segments if len(s)]
+            if not segments:
+                continue
+
+            elevations = []
+            distances = []
+            accumulated_distance = 0.0
+
+            for segment in segments:
+                # Process elevation data (quality assessment + smoothing if needed)
+                processed, quality_report = process_elevation_array(
+                    np.frombuffer(segment.elevation, dtype=np.float64),
+                    lat=np.frombuffer(segment.lat, dtype=np.float64),
+                    lon=np.frombuffer(segment.lon, dtype=np.float64),
+                )
+                logger.info(
+                    f"Track '{parsed_track.name}': Elevation quality {quality_report['quality_score']:.1f}/100 "
+                    f"({quality_report['source']}), action: {quality_report['processing_applied']}"
+                )
+                elevations.append(np.nan_to_num(processed, nan=0.0))
+
+                segment_distances = DistanceCalculator.cumulative_distance(
+                    np.frombuffer(segment.lat, dtype=np.float64),
+                    np.frombuffer(segment.lon, dtype=np.float64),
+                    start=accumulated_distance,
+                )
+                accumulated_distance = float(segment_distances[-1])
+                distances.append(segment_distances)
+
+            arrays = TrackArrays(
+                lat=np.concatenate([np.frombuffer(s.lat, dtype=np.float64) for s in segments]),
+                lon=np.concatenate([np.frombuffer(s.lon, dtype=np.float64) for s in segments]),
+                elevation=np.concatenate(elevations),
+                distance=np.concatenate(distances),
+                time=np.concatenate([np.frombuffer(s.time_us, dtype=np.int64) for s in segments]),
+                tz_offset=np.concatenate([np.frombuffer(s.tz_offset, dtype=np.int16) for s in segments]),
+            )
+
+            # Statistics are computed on the raw (unprocessed) elevations, as in parse_gpx_file
+            statistics = StatisticsCalculator.calculate_statistics_from_arrays(
+                lat=arrays.lat,
+                lon=arrays.lon,
+                elevation=np.concatenate([np.frombuffer(s.elevation, dtype=np.float64) for s in segments]),
+                time=arrays.time,
+                tz_offset=arrays.tz_offset,
+                segment_starts=np.cumsum([0] + [len(s) for s in segments[:-1]]),
+                average_elevations=arrays.elevation,
+            )
+
+            tracks.append(AnalyzedTrack(
+                name=parsed_track.name or "Sans nom",
+                arrays=arrays,
+                statistics=statistics,
+                levels=TrackSimplifier.build_levels(arrays),
+            ))
+
+        return tracks
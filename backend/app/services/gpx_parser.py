@@ -6,10 +6,11 @@ All actual implementations have been moved to specialized service modules.
 """
 import gpxpy
 import gpxpy.gpx
-from typing import List, Optional, Tuple
+from typing import BinaryIO, List, Optional, Sequence, Tuple, Union
 
 from app.models.gpx import (
     AidStation,
+    AidStationScenario,
     AidStationTableResponse,
     CalcMode,
     GPXData,
@@ -22,6 +23,7 @@ from app.services.gpx_merge_service import GPXMergeService
 from app.services.aid_station_service import AidStationService
 from app.services.statistics_calculator import StatisticsCalculator
 from app.services.climb_detector import ClimbDetector
+from app.services.track_arrays import AnalyzedTrack, TrackArrays
 
 
 class GPXParser:
@@ -49,6 +51,33 @@ class GPXParser:
         """
         return GPXParseService.parse_gpx_file(file_content, filename)
 
+    @staticmethod
+    def parse_gpx_bytes(source: Union[bytes, BinaryIO], filename: str) -> GPXData:
+        """
+        Parse raw GPX bytes (or a binary file object) with the streaming parser
+
+        Args:
+            source: GPX content as bytes, or a binary file-like object
+            filename: Original filename
+
+        Returns:
+            GPXData object with tracks and statistics
+        """
+        return GPXParseService.parse_gpx_bytes(source, filename)
+
+    @staticmethod
+    def analyze_gpx_bytes(source: Union[bytes, BinaryIO]) -> List[AnalyzedTrack]:
+        """
+        Parse raw GPX bytes into columnar tracks (delegated to GPXParseService)
+
+        Args:
+            source: GPX content as bytes, or a binary file-like object
+
+        Returns:
+            List of AnalyzedTrack
+        """
+        return GPXParseService.analyze_gpx_bytes(source)
+
     @staticmethod
     def _calculate_statistics(points: List[TrackPoint]):
         """
@@ -59,7 +88,7 @@ class GPXParser:
         return StatisticsCalculator.calculate_statistics(points)
 
     @staticmethod
-    def analyze_segment(points: List[TrackPoint], start_km: float, end_km: float):
+    def analyze_segment(points: Union[List[TrackPoint], TrackArrays], start_km: float, end_km: float):
         """
         Analyze a segment of the track (delegated to StatisticsCalculator)
 
@@ -69,7 +98,7 @@ class GPXParser:
 
     @staticmethod
     def generate_gpx_from_segment(
-        points: List[TrackPoint],
+        points: Union[List[TrackPoint], TrackArrays],
         start_km: float,
         end_km: float,
         track_name: str
@@ -92,7 +121,7 @@ class GPXParser:
 
     @staticmethod
     def detect_climbs(
-        points: List[TrackPoint],
+        points: Union[List[TrackPoint], TrackArrays],
         min_elevation_gain: float = 300,
         min_ratio: float = 4.0,
         min_gradient: float = 4.0,
@@ -142,13 +171,48 @@ class GPXParser:
             merged_track_name
         )
 
+    @staticmethod
+    def merge_and_analyze(
+        files_content: List[Tuple[str, str]],
+        gap_threshold_seconds: int = 300,
+        interpolate_gaps: bool = False,
+        sort_by_time: bool = True,
+        merged_track_name: str = "Merged Track"
+    ) -> Tuple[str, List[str], List[AnalyzedTrack]]:
+        """
+        Merge GPX files and parse the result for preview, in one call
+
+        Returns only picklable, compact values so the whole operation can run
+        in a worker process.
+
+        Args:
+            files_content: List of tuples (filename, gpx_xml_content)
+            gap_threshold_seconds: Time gap threshold to detect breaks
+            interpolate_gaps: If True, interpolate missing points; if False, create new segment
+            sort_by_time: Auto-sort by timestamp or keep manual order
+            merged_track_name: Name for the merged track
+
+        Returns:
+            Tuple of (merged GPX XML, list of warnings, analyzed merged tracks)
+        """
+        merged_gpx, warnings = GPXParser.merge_gpx_files(
+            files_content,
+            gap_threshold_seconds,
+            interpolate_gaps,
+            sort_by_time,
+            merged_track_name
+        )
+        merged_gpx_xml = merged_gpx.to_xml()
+        return merged_gpx_xml, warnings, GPXParseService.analyze_gpx_bytes(merged_gpx_xml.encode())
+
     @staticmethod
     def generate_aid_station_table(
-        points: List[TrackPoint],
+        points: Union[List[TrackPoint], TrackArrays],
         aid_stations: List[AidStation],
         calc_mode: CalcMode = CalcMode.NAISMITH,
         constant_pace_kmh: Optional[float] = None,
         trail_planner_config: Optional[TrailPlannerConfig] = None,
+        interpolate_boundaries: bool = False,
     ) -> AidStationTableResponse:
         """Generate aid station table with segment statistics and time estimates.
 
@@ -158,6 +222,7 @@ class GPXParser:
             calc_mode: Time estimation mode. Defaults to NAISMITH.
             constant_pace_kmh: Required when calc_mode=CONSTANT_PACE.
             trail_planner_config: Required when calc_mode=TRAIL_PLANNER.
+            interpolate_boundaries: Cut segments at the exact station kilometres.
         """
         return AidStationService.generate_aid_station_table(
             points=points,
@@ -165,4 +230,27 @@ class GPXParser:
             calc_mode=calc_mode,
             constant_pace_kmh=constant_pace_kmh,
             trail_planner_config=trail_planner_config,
+            interpolate_boundaries=interpolate_boundaries,
+        )
+
+    @staticmethod
+    def generate_aid_station_tables(
+        points: Union[List[TrackPoint], TrackArrays],
+        aid_stations: List[AidStation],
+        scenarios: Sequence[AidStationScenario],
+        interpolate_boundaries: bool = False,
+    ) -> List[AidStationTableResponse]:
+        """Generate one aid station table per time-estimation scenario.
+
+        Args:
+            points: Track points with distance and elevation.
+            aid_stations: Ordered list of aid stations (at least 2).
+            scenarios: Time-estimation settings to compare.
+            interpolate_boundaries: Cut segments at the exact station kilometres.
+        """
+        return AidStationService.generate_aid_station_tables(
+            points=points,
+            aid_stations=aid_stations,
+            scenarios=scenarios,
+            interpolate_boundaries=interpolate_boundaries,
         )
@@ -0,0 +1,251 @@
+"""
+Streaming GPX parser
+Reads GPX bytes incrementally with iterparse and emits track points into
+compact per-segment arrays, without building the gpxpy object tree
+"""
+from array import array
+from datetime import date, datetime, timedelta, timezone
+import io
+import math
+import re
+import xml.etree.ElementTree as ET
+from typing import BinaryIO, List, Optional, Union
+
+# Same timestamp grammar as gpxpy.gpxfield.RE_TIMESTAMP
+RE_TIMESTAMP = re.compile(
+    r'^([0-9]{4})-([0-9]{1,2})-([0-9]{1,2})[T ]([0-9]{1,2}):([0-9]{1,2}):([0-9]{1,2})'
+    r'(\.[0-9]{1,15})?(Z|[+-−][0-9]{2}:?(?:[0-9]{2})?)?$'
+)
+
+TIME_MISSING = -(2 ** 63)  # time_us sentinel for points without <time>
+NAIVE_TZ = -32768  # tz_offset sentinel for timestamps without timezone
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_UTC = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _local_name(tag: str) -> str:
+    """Strip the '{namespace}' prefix from an element tag"""
+    return tag.rpartition("}")[2]
+
+
+def _parse_tz_offset(tz: str) -> int:
+    """Convert a timestamp suffix ('Z', '+02:00', '-0130') to minutes (gpxpy.SimpleTZ rules)"""
+    offset = 0
+    if tz and len(tz) >= 2:
+        if tz[0] in ("−", "-"):
+            mult = -1
+            tz = tz[1:]
+        else:
+            if tz[0] == "+":
+                tz = tz[1:]
+            mult = 1
+        hour = int(tz[:2]) if tz[:2].isdigit() else 0
+        minute = 0
+        if len(tz) >= 4:
+            minute = int(tz[-2:]) if tz[-2:].isdigit() else 0
+        offset = mult * (hour * 60 + minute)
+    return offset
+
+
+def parse_timestamp(value: Optional[str]) -> tuple[int, int]:
+    """
+    Parse a GPX timestamp into epoch microseconds and a timezone offset
+
+    Invalid or missing timestamps are treated like gpxpy does (no time).
+    Naive timestamps are stored as if they were UTC, flagged with NAIVE_TZ.
+
+    Args:
+        value: Text content of a <time> element
+
+    Returns:
+        Tuple of (epoch_microseconds, tz_offset_minutes)
+    """
+    if not value:
+        return TIME_MISSING, NAIVE_TZ
+
+    m = RE_TIMESTAMP.match(value)
+    if not m:
+        return TIME_MISSING, NAIVE_TZ
+
+    try:
+        year, month, day, hour, minute, second = (int(m.group(i)) for i in range(1, 7))
+        days = date(year, month, day).toordinal() - _EPOCH_ORDINAL
+        if not (0 <= hour < 24 and 0 <= minute < 60 and 0 <= second < 60):
+            return TIME_MISSING, NAIVE_TZ
+    except ValueError:
+        return TIME_MISSING, NAIVE_TZ
+
+    micros = 0
+    if m.group(7):
+        fraction = m.group(7)[1:7]
+        micros = int(fraction + "0" * (6 - len(fraction)))
+
+    tz_offset = NAIVE_TZ
+    offset_seconds = 0
+    if m.group(8):
+        tz_offset = _parse_tz_offset(m.group(8))
+        offset_seconds = tz_offset * 60
+
+    seconds = days * 86400 + hour * 3600 + minute * 60 + second - offset_seconds
+    return seconds * 1_000_000 + micros, tz_offset
+
+
+def format_timestamp(time_us: int, tz_offset: int) -> Optional[str]:
+    """
+    Format epoch microseconds back to the ISO string gpxpy's datetime would produce
+
+    Args:
+        time_us: Epoch microseconds (TIME_MISSING for no time)
+        tz_offset: Offset in minutes, or NAIVE_TZ for naive timestamps
+
+    Returns:
+        ISO 8601 string or None
+    """
+    if time_us == TIME_MISSING:
+        return None
+
+    if tz_offset == NAIVE_TZ:
+        return (_EPOCH + timedelta(microseconds=time_us)).isoformat()
+
+    tz = timezone(timedelta(minutes=tz_offset))
+    return (_EPOCH_UTC + timedelta(microseconds=time_us)).astimezone(tz).isoformat()
+
+
+class ParsedSegment:
+    """Compact columnar storage for the points of one <trkseg>"""
+
+    __slots__ = ("lat", "lon", "elevation", "time_us", "tz_offset")
+
+    def __init__(self):
+        self.lat = array("d")
+        self.lon = array("d")
+        self.elevation = array("d")  # NaN when <ele> is missing
+        self.time_us = array("q")  # TIME_MISSING when <time> is missing
+        self.tz_offset = array("h")  # minutes, NAIVE_TZ when naive
+
+    def __len__(self) -> int:
+        return len(self.lat)
+
+    def append(
+        self,
+        lat: float,
+        lon: float,
+        elevation: Optional[float],
+        time_us: int,
+        tz_offset: int,
+    ) -> None:
+        self.lat.append(lat)
+        self.lon.append(lon)
+        self.elevation.append(math.nan if elevation is None else elevation)
+        self.time_us.append(time_us)
+        self.tz_offset.append(tz_offset)
+
+    def elevation_list(self) -> List[Optional[float]]:
+        """Elevations as a list with None for missing values"""
+        return [None if math.isnan(e) else e for e in self.elevation]
+
+    def time_iso(self, index: int) -> Optional[str]:
+        """ISO timestamp of one point, or None"""
+        return format_timestamp(self.time_us[index], self.tz_offset[index])
+
+
+class ParsedTrack:
+    """A <trk> element: its name and its segments"""
+
+    __slots__ = ("name", "segments")
+
+    def __init__(self, name: Optional[str] = None):
+        self.name = name
+        self.segments: List[ParsedSegment] = []
+
+
+class GPXStreamParser:
+    """Incremental GPX parser built on xml.etree.ElementTree.iterparse"""
+
+    @staticmethod
+    def parse(source: Union[bytes, BinaryIO]) -> List[ParsedTrack]:
+        """
+        Parse GPX tracks from raw bytes or a binary file object
+
+        Only <trk>/<trkseg>/<trkpt> data is kept. Each completed element is
+        cleared as soon as it has been consumed so memory stays proportional
+        to the compact arrays, not to the XML document.
+
+        Args:
+            source: GPX content as bytes, or a binary file-like object
+
+        Returns:
+            List of ParsedTrack objects
+
+        Raises:
+            ValueError: If the XML is malformed or a point has invalid coordinates
+        """
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            source = io.BytesIO(source)
+
+        tracks: List[ParsedTrack] = []
+        stack: List[str] = []
+        root = None
+        track: Optional[ParsedTrack] = None
+        segment: Optional[ParsedSegment] = None
+        segment_elem = None
+
+        try:
+            for event, elem in ET.iterparse(source, events=("start", "end")):
+                if event == "start":
+                    name = _local_name(elem.tag)
+                    if root is None:
+                        root = elem
+                    elif name == "trk" and len(stack) == 1:
+                        track = ParsedTrack()
+                    elif name == "trkseg" and track is not None and stack[-1] == "trk":
+                        segment = ParsedSegment()
+                        segment_elem = elem
+                    stack.append(name)
+                    continue
+
+                name = stack.pop()
+
+                if name == "trkpt" and segment is not None and stack[-1] == "trkseg":
+                    GPXStreamParser._append_point(segment, elem)
+                    segment_elem.clear()
+                elif name == "name" and track is not None and stack[-1] == "trk":
+                    track.name = elem.text
+                elif name == "trkseg" and segment is not None:
+                    track.segments.append(segment)
+                    segment = None
+                    segment_elem = None
+                elif name == "trk" and track is not None:
+                    tracks.append(track)
+                    track = None
+
+                if len(stack) == 1:
+                    # Drop fully consumed top-level elements (trk, wpt, rte, metadata)
+                    root.clear()
+        except ET.ParseError as e:
+            raise ValueError(f"Invalid GPX XML: {e}") from e
+
+        return tracks
+
+    @staticmethod
+    def _append_point(segment: ParsedSegment, elem: ET.Element) -> None:
+        """Read one <trkpt> element into the segment arrays"""
+        try:
+            lat = float(elem.get("lat"))
+            lon = float(elem.get("lon"))
+        except (TypeError, ValueError):
+            raise ValueError("Track point with missing or invalid lat/lon")
+
+        elevation = None
+        time_text = None
+        for child in elem:
+            child_name = _local_name(child.tag)
+            if child_name == "ele" and child.text is not None:
+                elevation = float(child.text.strip())
+            elif child_name == "time":
+                time_text = child.text
+
+        time_us, tz_offset = parse_timestamp(time_text)
+        segment.append(lat, lon, elevation, time_us, tz_offset)
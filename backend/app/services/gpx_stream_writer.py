@@ -0,0 +1,73 @@
+"""
+Streaming GPX writer
+Formats TrackArrays as GPX 1.1 text in chunks of track points, without
+building the gpxpy object tree, so large tracks can be sent as they are
+written
+"""
+from typing import Iterator, Optional
+from xml.sax.saxutils import escape, quoteattr
+
+import numpy as np
+
+from app.services.track_arrays import TrackArrays
+
+GPX_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<gpx xmlns="http://www.topografix.com/GPX/1/1" '
+    'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
+    'xsi:schemaLocation="http://www.topografix.com/GPX/1/1 http://www.topografix.com/GPX/1/1/gpx.xsd" '
+    'version="1.1" creator={creator}>\n'
+)
+
+CHUNK_POINTS = 2000  # Track points per yielded chunk
+
+
+def iter_gpx_xml(
+    track: TrackArrays,
+    creator: str,
+    name: Optional[str] = None,
+    chunk_points: int = CHUNK_POINTS,
+) -> Iterator[str]:
+    """
+    GPX document of one track, one segment, as successive text chunks
+
+    Points are written like gpxpy's to_xml: coordinates round-trip exactly,
+    <ele> and <time> are omitted when missing, UTC times end with "Z".
+
+    Args:
+        track: Points to write (distance is not written)
+        creator: Value of the creator attribute
+        name: Track name (no <name> element when None)
+        chunk_points: Track points per chunk
+
+    Yields:
+        Consecutive pieces of the GPX document
+    """
+    yield GPX_HEADER.format(creator=quoteattr(creator))
+    yield "  <trk>\n"
+    if name is not None:
+        yield f"    <name>{escape(name)}</name>\n"
+    yield "    <trkseg>\n"
+
+    times = track.times_iso()
+    for start in range(0, len(track), chunk_points):
+        stop = min(start + chunk_points, len(track))
+        elevations = track.elevation[start:stop]
+        lines = []
+        for lat, lon, ele, time in zip(
+            track.lat[start:stop].tolist(),
+            track.lon[start:stop].tolist(),
+            np.where(np.isnan(elevations), None, elevations).tolist(),
+            times[start:stop],
+        ):
+            lines.append(f'      <trkpt lat="{lat!r}" lon="{lon!r}">\n')
+            if ele is not None:
+                lines.append(f"        <ele>{ele!r}</ele>\n")
+            if time is not None:
+                if time.endswith("+00:00"):
+                    time = time[:-6] + "Z"
+                lines.append(f"        <time>{time}</time>\n")
+            lines.append("      </trkpt>\n")
+        yield "".join(lines)
+
+    yield "    </trkseg>\n  </trk>\n</gpx>\n"
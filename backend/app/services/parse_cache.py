@@ -0,0 +1,260 @@
+"""
+Content-addressed cache of parsed GPX uploads
+
+The same race GPX gets uploaded again and again. Parsed tracks are cached
+under the SHA-256 of the raw file bytes: an in-memory LRU tier bounded by
+the size of the cached arrays, and an optional on-disk tier (.npz files
+under UPLOAD_DIR) that survives restarts and is shared by worker processes.
+Entries idle for longer than the TTL expire from both tiers.
+
+The digest is also the file_id returned by /gpx/upload, so analysis
+endpoints can refer to an uploaded track instead of re-sending its points.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from fastapi import UploadFile
+
+from app.core.config import settings
+from app.models.gpx import TrackStatistics
+from app.services.track_arrays import AnalyzedTrack, TrackArrays
+
+logger = logging.getLogger(__name__)
+
+HASH_CHUNK_SIZE = 1024 * 1024  # bytes read (and hashed) at a time
+ENTRY_OVERHEAD_BYTES = 1024  # rough size of names, statistics and bookkeeping per track
+
+_ARRAY_FIELDS = ("lat", "lon", "elevation", "distance", "time", "tz_offset")
+
+
+async def hash_upload(upload: UploadFile, chunk_size: int = HASH_CHUNK_SIZE) -> str:
+    """
+    SHA-256 of an upload, read chunk by chunk from its spooled file
+
+    Only one chunk is held at a time; the file is rewound afterwards so it
+    can be read again (only on a cache miss).
+
+    Args:
+        upload: Uploaded file
+        chunk_size: Bytes per read
+
+    Returns:
+        SHA-256 hex digest
+    """
+    digest = hashlib.sha256()
+    await upload.seek(0)
+    while True:
+        chunk = await upload.read(chunk_size)
+        if not chunk:
+            break
+        digest.update(chunk)
+    await upload.seek(0)
+    return digest.hexdigest()
+
+
+def _entry_size(tracks: List[AnalyzedTrack]) -> int:
+    """Approximate memory held by a cache entry, in bytes"""
+    return sum(track.nbytes + ENTRY_OVERHEAD_BYTES for track in tracks)
+
+
+class ParseCache:
+    """
+    Two-tier cache: SHA-256 of the GPX bytes -> parsed tracks
+
+    Attributes:
+        max_bytes: Memory budget of the LRU tier (sum of cached array sizes)
+        disk_dir: Directory of the on-disk tier, or None to disable it
+        ttl_seconds: Entries not used for this long expire (0 = never)
+    """
+
+    def __init__(self, max_bytes: int, disk_dir: Optional[str] = None, ttl_seconds: float = 0):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.ttl_seconds = ttl_seconds
+        # key -> (tracks, size in bytes, last access time); ordered by last access
+        self._entries: "OrderedDict[str, Tuple[List[AnalyzedTrack], int, float]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._counters = {
+            "hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "disk_writes": 0,
+        }
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def get(self, key: str) -> Optional[List[AnalyzedTrack]]:
+        """
+        Look up parsed tracks by content hash (memory first, then disk)
+
+        Args:
+            key: SHA-256 hex digest of the GPX bytes
+
+        Returns:
+            Cached tracks, or None on a miss
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            entry = self._entries.get(key)
+            if entry is not None:
+                tracks, size, _ = entry
+                self._entries[key] = (tracks, size, now)
+                self._entries.move_to_end(key)
+                self._counters["hits"] += 1
+                return tracks
+
+        tracks = self._load(key)
+        with self._lock:
+            if tracks is None:
+                self._counters["misses"] += 1
+                return None
+            self._counters["disk_hits"] += 1
+        self._remember(key, tracks)
+        return tracks
+
+    def put(self, key: str, tracks: List[AnalyzedTrack]) -> None:
+        """
+        Store parsed tracks under their content hash
+
+        Args:
+            key: SHA-256 hex digest of the GPX bytes
+            tracks: Parsed tracks
+        """
+        self._remember(key, tracks)
+        if self.disk_dir and not os.path.exists(self._path(key)):
+            self._save(key, tracks)
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss/eviction counters and current memory usage"""
+        with self._lock:
+            return {
+                **self._counters,
+                "entries": len(self._entries),
+                "size_bytes": self._size,
+                "max_bytes": self.max_bytes,
+            }
+
+    def clear(self) -> None:
+        """Drop the memory tier and reset counters (disk files are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            for name in self._counters:
+                self._counters[name] = 0
+
+    def _remember(self, key: str, tracks: List[AnalyzedTrack]) -> None:
+        """Insert into the LRU tier, evicting least recently used entries to fit"""
+        size = _entry_size(tracks)
+        if size > self.max_bytes:
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous[1]
+
+            while self._entries and self._size + size > self.max_bytes:
+                evicted_key, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+                self._counters["evictions"] += 1
+                logger.debug(f"Parse cache evicted {evicted_key[:12]} ({evicted_size} bytes)")
+
+            self._entries[key] = (tracks, size, now)
+            self._size += size
+
+    def _expire(self, now: float) -> None:
+        """Drop memory entries idle for longer than the TTL (caller holds the lock)"""
+        if not self.ttl_seconds:
+            return
+        # Entries are ordered by last access, so expired ones are at the front
+        while self._entries:
+            key, (_, size, last_access) = next(iter(self._entries.items()))
+            if now - last_access <= self.ttl_seconds:
+                break
+            del self._entries[key]
+            self._size -= size
+            self._counters["expirations"] += 1
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.npz")
+
+    def _save(self, key: str, tracks: List[AnalyzedTrack]) -> None:
+        """Write tracks to the disk tier (atomically, via a temporary file)"""
+        arrays = {}
+        meta = []
+        for i, track in enumerate(tracks):
+            for field in _ARRAY_FIELDS:
+                arrays[f"{i}_{field}"] = getattr(track.arrays, field)
+            for zoom, indices in track.levels.items():
+                arrays[f"{i}_level_{zoom}"] = indices
+            meta.append({
+                "name": track.name,
+                "statistics": track.statistics.model_dump(),
+                "levels": sorted(track.levels),
+            })
+        arrays["meta"] = np.array(json.dumps(meta))
+
+        tmp_path = f"{self._path(key)}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            logger.warning(f"Parse cache could not write {key[:12]}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        with self._lock:
+            self._counters["disk_writes"] += 1
+
+    def _load(self, key: str) -> Optional[List[AnalyzedTrack]]:
+        """Read tracks from the disk tier, or None if absent or unreadable"""
+        if not self.disk_dir or not os.path.exists(self._path(key)):
+            return None
+
+        if self.ttl_seconds and time.time() - os.path.getmtime(self._path(key)) > self.ttl_seconds:
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            with self._lock:
+                self._counters["expirations"] += 1
+            return None
+
+        try:
+            os.utime(self._path(key))  # idle TTL: reading refreshes the file
+            with np.load(self._path(key), allow_pickle=False) as data:
+                meta = json.loads(str(data["meta"]))
+                return [
+                    AnalyzedTrack(
+                        name=entry["name"],
+                        arrays=TrackArrays(*(data[f"{i}_{field}"] for field in _ARRAY_FIELDS)),
+                        statistics=TrackStatistics(**entry["statistics"]),
+                        levels={zoom: data[f"{i}_level_{zoom}"] for zoom in entry.get("levels", [])},
+                    )
+                    for i, entry in enumerate(meta)
+                ]
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Parse cache could not read {key[:12]}: {e}")
+            return None
+
+
+parse_cache = ParseCache(
+    max_bytes=settings.PARSE_CACHE_MAX_BYTES,
+    disk_dir=os.path.join(settings.UPLOAD_DIR, "parse_cache") if settings.PARSE_CACHE_DISK else None,
+    ttl_seconds=settings.PARSE_CACHE_TTL_SECONDS,
+)
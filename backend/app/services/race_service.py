@@ -6,31 +6,18 @@ from typing import List, Optional, Tuple
 from uuid import UUID
 import logging
 import re
-import math
 import gpxpy
+import numpy as np
 from sqlalchemy.orm import Session
 
 from app.db.models import Race, RaceAidStation
 from app.models.race import RaceCreate, RaceUpdate, RaceAidStationCreate, RavitoType
+from app.services.distance_calculator import DistanceCalculator
 from app.services.gpx_parser import GPXParser
 
 logger = logging.getLogger(__name__)
 
 
-def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    """Calculate distance between two points in meters using Haversine formula"""
-    R = 6371000  # Earth radius in meters
-    phi1 = math.radians(lat1)
-    phi2 = math.radians(lat2)
-    delta_phi = math.radians(lat2 - lat1)
-    delta_lambda = math.radians(lon2 - lon1)
-
-    a = math.sin(delta_phi/2)**2 + math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda/2)**2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-
-    return R * c
-
-
 def extract_waypoints_from_gpx(gpx_content: str) -> List[dict]:
     """
     Extract waypoints from GPX content and calculate their distance along the track.
@@ -42,43 +29,45 @@ def extract_waypoints_from_gpx(gpx_content: str) -> List[dict]:
     if not gpx.waypoints:
         return []
 
-    # Build track points list for distance calculation
-    track_points = []
-    cumulative_distances = []
+    # Build track arrays for distance calculation
+    lat_parts, lon_parts, cumulative_parts = [], [], []
+    elevations = []
     cumulative_distance = 0.0
 
     for track in gpx.tracks:
         for segment in track.segments:
-            for i, point in enumerate(segment.points):
-                track_points.append((point.latitude, point.longitude, point.elevation))
-                if i > 0:
-                    prev = segment.points[i-1]
-                    cumulative_distance += haversine_distance(
-                        prev.latitude, prev.longitude,
-                        point.latitude, point.longitude
-                    )
-                cumulative_distances.append(cumulative_distance)
-
-    if not track_points:
+            if not segment.points:
+                continue
+            lat = np.array([p.latitude for p in segment.points], dtype=np.float64)
+            lon = np.array([p.longitude for p in segment.points], dtype=np.float64)
+            segment_cumulative = DistanceCalculator.cumulative_distance(lat, lon, start=cumulative_distance)
+            cumulative_distance = float(segment_cumulative[-1])
+
+            lat_parts.append(lat)
+            lon_parts.append(lon)
+            cumulative_parts.append(segment_cumulative)
+            elevations.extend(p.elevation for p in segment.points)
+
+    if not elevations:
         return []
 
+    track_lat = np.concatenate(lat_parts)
+    track_lon = np.concatenate(lon_parts)
+    cumulative_distances = np.concatenate(cumulative_parts)
+
     waypoints = []
     for wpt in gpx.waypoints:
         # Skip non-aid station waypoints (like "Start", "Finish" without AS prefix)
         name = wpt.name or wpt.description or ""
 
         # Find closest track point to calculate distance
-        min_dist = float('inf')
-        closest_idx = 0
-        for i, (lat, lon, ele) in enumerate(track_points):
-            dist = haversine_distance(wpt.latitude, wpt.longitude, lat, lon)
-            if dist < min_dist:
-                min_dist = dist
-                closest_idx = i
+        closest_idx = int(np.argmin(
+            DistanceCalculator.distances_to_point(wpt.latitude, wpt.longitude, track_lat, track_lon)
+        ))
 
         # Get distance along track and elevation
-        distance_km = cumulative_distances[closest_idx] / 1000 if cumulative_distances else 0
-        elevation = track_points[closest_idx][2] if track_points[closest_idx][2] else None
+        distance_km = float(cumulative_distances[closest_idx]) / 1000
+        elevation = elevations[closest_idx] if elevations[closest_idx] else None
 
         waypoints.append({
             'name': wpt.description or wpt.name or "Unknown",
@@ -0,0 +1,211 @@
+"""
+Monte Carlo finish-time and cutoff-risk simulation
+Samples runner-level pace, climb-penalty and fatigue perturbations around a
+TrailPlannerConfig, plus per-segment day-to-day noise, and evaluates every
+sample over every aid-station segment in one TimeCalculator matrix.
+"""
+import re
+from datetime import datetime, timedelta
+from typing import List, NamedTuple, Optional, Sequence, Union
+
+import numpy as np
+
+from app.models.gpx import (
+    AidStation,
+    AidStationScenario,
+    CalcMode,
+    SimulationSettings,
+    TrackPoint,
+    TrailPlannerConfig,
+)
+from app.services.aid_station_service import AidStationService
+from app.services.time_calculator import TimeCalculator
+from app.services.track_arrays import TrackArrays
+
+# "HH:MM" or "HH:MM AM/PM", optionally after a weekday ("Wed 08:45 PM", "sam. 14:30")
+CUTOFF_PATTERN = re.compile(
+    r"^\s*(?:(?P<day>[^\W\d_]+)\.?\s+)?(?P<hour>\d{1,2})[:hH](?P<minute>\d{2})\s*(?P<ampm>[AaPp][Mm])?\s*$"
+)
+
+WEEKDAYS = {
+    "mon": 0, "monday": 0, "lun": 0, "lundi": 0,
+    "tue": 1, "tuesday": 1, "mar": 1, "mardi": 1,
+    "wed": 2, "wednesday": 2, "mer": 2, "mercredi": 2,
+    "thu": 3, "thursday": 3, "jeu": 3, "jeudi": 3,
+    "fri": 4, "friday": 4, "ven": 4, "vendredi": 4,
+    "sat": 5, "saturday": 5, "sam": 5, "samedi": 5,
+    "sun": 6, "sunday": 6, "dim": 6, "dimanche": 6,
+}
+
+
+class SimulationResult(NamedTuple):
+    """
+    Simulated arrivals at every aid station
+
+    Attributes:
+        stations: Aid stations sorted by distance (the first is the start)
+        percentiles: Requested percentiles
+        arrival_minutes: (len(percentiles), len(stations)) elapsed minutes
+        mean_minutes: Mean arrival per station
+        cutoff_minutes: Cutoff per station in elapsed minutes (NaN if none)
+        miss_probability: Share of samples arriving after the cutoff (NaN if none)
+    """
+    stations: List[AidStation]
+    percentiles: np.ndarray
+    arrival_minutes: np.ndarray
+    mean_minutes: np.ndarray
+    cutoff_minutes: np.ndarray
+    miss_probability: np.ndarray
+
+
+def parse_cutoff_minutes(
+    cutoff_times: Sequence[Optional[str]],
+    start_time: datetime,
+) -> np.ndarray:
+    """
+    Convert clock cutoffs of consecutive stations to elapsed minutes
+
+    A cutoff without a weekday is the first occurrence of that clock time
+    at or after the previous station's cutoff (or the start), so multi-day
+    races resolve without dates. With a weekday it is the first matching
+    day at or after the start.
+
+    Args:
+        cutoff_times: Cutoff per station in race order ("HH:MM", "08:45 PM",
+            "Wed 08:45 PM"); None or unparseable entries have no cutoff
+        start_time: Race start
+
+    Returns:
+        float64 array of minutes after the start (NaN where there is no cutoff)
+    """
+    minutes = np.full(len(cutoff_times), np.nan)
+    previous = start_time
+    for i, cutoff in enumerate(cutoff_times):
+        match = CUTOFF_PATTERN.match(cutoff) if cutoff else None
+        if match is None:
+            continue
+        hour, minute = int(match["hour"]), int(match["minute"])
+        if match["ampm"]:
+            if not 1 <= hour <= 12:
+                continue
+            hour = hour % 12 + (12 if match["ampm"].lower() == "pm" else 0)
+        if hour > 23 or minute > 59:
+            continue
+
+        day = match["day"]
+        if day is not None:
+            weekday = WEEKDAYS.get(day.lower())
+            if weekday is None:
+                continue
+            when = start_time.replace(hour=hour, minute=minute, second=0, microsecond=0)
+            when += timedelta(days=(weekday - when.weekday()) % 7)
+            if when < start_time:
+                when += timedelta(days=7)
+        else:
+            when = previous.replace(hour=hour, minute=minute, second=0, microsecond=0)
+            if when < previous:
+                when += timedelta(days=1)
+
+        minutes[i] = (when - start_time).total_seconds() / 60
+        previous = when
+    return minutes
+
+
+class RaceSimulator:
+    """Monte Carlo arrival-time distributions along aid stations"""
+
+    @staticmethod
+    def sample_coefficients(
+        config: TrailPlannerConfig,
+        settings: SimulationSettings,
+        rng: np.random.Generator,
+    ) -> np.ndarray:
+        """
+        TimeCalculator coefficient rows perturbed around a Trail Planner config
+
+        Pace, climb penalty and fatigue get independent mean-one log-normal
+        factors, so they stay positive and average to the configured values.
+
+        Args:
+            config: Central Trail Planner configuration
+            settings: Number of samples and perturbation spreads
+            rng: Random generator
+
+        Returns:
+            (samples, 6) array, see TimeCalculator.evaluate_coefficients
+        """
+        n = settings.samples
+        base = TimeCalculator.scenario_coefficients(
+            [AidStationScenario(calc_mode=CalcMode.TRAIL_PLANNER, trail_planner_config=config)]
+        )
+        coefficients = np.repeat(base, n, axis=0)
+        coefficients[:, 0] /= _lognormal(rng, settings.pace_sd_percent, n)
+        coefficients[:, 1] *= _lognormal(rng, settings.climb_penalty_sd_percent, n)
+        coefficients[:, 4] *= _lognormal(rng, settings.fatigue_sd_percent, n)
+        return coefficients
+
+    @staticmethod
+    def simulate(
+        points: Union[List[TrackPoint], TrackArrays],
+        aid_stations: List[AidStation],
+        config: TrailPlannerConfig,
+        settings: SimulationSettings,
+        cutoff_minutes: Optional[Sequence[float]] = None,
+        interpolate_boundaries: bool = False,
+    ) -> SimulationResult:
+        """
+        Simulate arrival times at every aid station
+
+        Args:
+            points: Track points (or TrackArrays) with distance and elevation
+            aid_stations: Aid stations (at least 2, the first is the start)
+            config: Central Trail Planner configuration
+            settings: Samples, perturbation spreads, percentiles and seed
+            cutoff_minutes: Cutoff per station in elapsed minutes, in the
+                order of aid_stations (NaN or None for no cutoff)
+            interpolate_boundaries: Cut segments at the exact station kilometres
+
+        Returns:
+            SimulationResult with stations sorted by distance
+        """
+        legs = AidStationService.segment_legs(points, aid_stations, interpolate_boundaries)
+        rng = np.random.default_rng(settings.seed)
+
+        coefficients = RaceSimulator.sample_coefficients(config, settings, rng)
+        segment_minutes = TimeCalculator.evaluate_coefficients(
+            legs.distance_km,
+            legs.elevation_gain,
+            legs.elevation_loss,
+            legs.avg_gradient,
+            legs.cumulative_distance_km,
+            coefficients,
+        )
+        segment_minutes *= _lognormal(rng, settings.segment_sd_percent, segment_minutes.shape)
+
+        arrivals = np.zeros((len(coefficients), len(legs.stations)))
+        np.cumsum(segment_minutes, axis=1, out=arrivals[:, 1:])
+
+        cutoffs = np.full(len(aid_stations), np.nan)
+        if cutoff_minutes is not None:
+            cutoffs[:] = [np.nan if c is None else c for c in cutoff_minutes]
+        # Follow the stations into distance order (stable, like the legs)
+        order = sorted(range(len(aid_stations)), key=lambda i: aid_stations[i].distance_km)
+        cutoffs = cutoffs[order]
+
+        percentiles = np.asarray(settings.percentiles, dtype=np.float64)
+        with np.errstate(invalid="ignore"):
+            missed = (arrivals > cutoffs).mean(axis=0)
+        return SimulationResult(
+            stations=legs.stations,
+            percentiles=percentiles,
+            arrival_minutes=np.percentile(arrivals, percentiles, axis=0).reshape(len(percentiles), -1),
+            mean_minutes=arrivals.mean(axis=0),
+            cutoff_minutes=cutoffs,
+            miss_probability=np.where(np.isnan(cutoffs), np.nan, missed),
+        )
+
+
+def _lognormal(rng: np.random.Generator, sd_percent: float, size) -> np.ndarray:
+    """Mean-one log-normal factors with the given spread (1 when sd_percent is 0)"""
+    sigma = np.sqrt(np.log1p((sd_percent / 100) ** 2))
+    return np.exp(rng.standard_normal(size) * sigma - sigma ** 2 / 2)
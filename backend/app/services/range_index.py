@@ -0,0 +1,249 @@
+"""
+Prefix-sum index for distance-range statistics
+Built once per track; D+/D-/distance/gradient of any km range then costs two
+binary searches and a few subtractions instead of a scan over the points.
+"""
+from typing import NamedTuple, Tuple, Union
+
+import numpy as np
+
+ArrayLike = Union[float, int, np.ndarray]
+
+
+class RangeStats(NamedTuple):
+    """
+    Statistics of one or many point ranges
+
+    Fields are scalars for a single range and arrays for a batch. A range
+    without points has num_points == 0 and zero statistics.
+
+    Attributes:
+        first: Index of the first point in the range
+        last: Index of the last point in the range
+        num_points: Number of points in the range
+        distance: Distance between the first and last point (meters)
+        elevation_gain: Sum of positive elevation deltas (meters)
+        elevation_loss: Sum of negative elevation deltas, as a positive number
+        elevation_change: Last minus first elevation (missing elevations count as 0)
+    """
+    first: ArrayLike
+    last: ArrayLike
+    num_points: ArrayLike
+    distance: ArrayLike
+    elevation_gain: ArrayLike
+    elevation_loss: ArrayLike
+    elevation_change: ArrayLike
+
+    @property
+    def avg_gradient(self) -> ArrayLike:
+        """Net gradient in percent over the point distance (0 for zero-length ranges)"""
+        distance = np.asarray(self.distance, dtype=np.float64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            gradient = np.where(distance > 0, np.asarray(self.elevation_change) / distance * 100, 0.0)
+        return gradient if gradient.ndim else float(gradient)
+
+
+class RangeIndex:
+    """
+    Cumulative distance plus prefix sums of positive and negative elevation deltas
+
+    Deltas involving a missing elevation (NaN) count as zero, like the
+    np.diff-based segment statistics. Distances must be non-decreasing
+    (cumulative track distance).
+
+    Attributes:
+        distance: float64 cumulative distance in meters
+        elevation: float64 elevations the sums are built from
+        cumulative_gain: cumulative_gain[i] is D+ from point 0 to point i
+        cumulative_loss: cumulative_loss[i] is D- from point 0 to point i
+    """
+
+    __slots__ = ("distance", "elevation", "cumulative_gain", "cumulative_loss")
+
+    def __init__(self, distance: np.ndarray, elevation: np.ndarray):
+        self.distance = np.asarray(distance, dtype=np.float64)
+        self.elevation = np.asarray(elevation, dtype=np.float64)
+        if len(self.distance) != len(self.elevation):
+            raise ValueError("Distance and elevation must have the same length")
+
+        deltas = np.diff(self.elevation)
+        self.cumulative_gain = np.concatenate(([0.0], np.cumsum(np.where(deltas > 0, deltas, 0.0))))
+        self.cumulative_loss = np.concatenate(([0.0], np.cumsum(np.where(deltas < 0, -deltas, 0.0))))
+
+    def __len__(self) -> int:
+        return len(self.distance)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the index arrays, in bytes"""
+        return sum(getattr(self, name).nbytes for name in self.__slots__)
+
+    def bounds(self, start_m: ArrayLike, end_m: ArrayLike) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        First and last point with start_m <= distance <= end_m
+
+        Args:
+            start_m: Range start(s) in meters
+            end_m: Range end(s) in meters
+
+        Returns:
+            (first, last) index arrays; last < first where a range has no point
+        """
+        first = np.searchsorted(self.distance, start_m, side="left")
+        last = np.searchsorted(self.distance, end_m, side="right") - 1
+        return first, last
+
+    def between(self, first: ArrayLike, last: ArrayLike) -> RangeStats:
+        """
+        Statistics of the point ranges [first, last] (inclusive, first <= last)
+
+        Args:
+            first: Index (or indices) of the first point
+            last: Index (or indices) of the last point
+
+        Returns:
+            RangeStats (arrays when given arrays)
+        """
+        first = np.asarray(first, dtype=np.int64)
+        last = np.asarray(last, dtype=np.int64)
+        stats = RangeStats(
+            first=first,
+            last=last,
+            num_points=last - first + 1,
+            distance=self.distance[last] - self.distance[first],
+            elevation_gain=self.cumulative_gain[last] - self.cumulative_gain[first],
+            elevation_loss=self.cumulative_loss[last] - self.cumulative_loss[first],
+            elevation_change=(
+                np.nan_to_num(self.elevation[last], nan=0.0) - np.nan_to_num(self.elevation[first], nan=0.0)
+            ),
+        )
+        return _scalars(stats) if not first.ndim else stats
+
+    def segments(self, start_km: ArrayLike, end_km: ArrayLike) -> RangeStats:
+        """
+        Statistics of many km ranges at once
+
+        Args:
+            start_km: Range starts in kilometers
+            end_km: Range ends in kilometers
+
+        Returns:
+            RangeStats of arrays, one entry per range
+        """
+        start_m = np.atleast_1d(np.asarray(start_km, dtype=np.float64)) * 1000
+        end_m = np.atleast_1d(np.asarray(end_km, dtype=np.float64)) * 1000
+        first, last = self.bounds(start_m, end_m)
+
+        empty = last < first
+        if not len(self):
+            zeros = np.zeros(len(first))
+            return RangeStats(first, last, np.zeros(len(first), dtype=np.int64), zeros, zeros, zeros, zeros)
+        safe_first = np.where(empty, 0, first)
+        safe_last = np.where(empty, 0, last)
+        stats = self.between(safe_first, safe_last)
+        return RangeStats(
+            first=first,
+            last=last,
+            num_points=np.where(empty, 0, stats.num_points),
+            distance=np.where(empty, 0.0, stats.distance),
+            elevation_gain=np.where(empty, 0.0, stats.elevation_gain),
+            elevation_loss=np.where(empty, 0.0, stats.elevation_loss),
+            elevation_change=np.where(empty, 0.0, stats.elevation_change),
+        )
+
+    def elevation_at(self, distance_m: ArrayLike) -> np.ndarray:
+        """
+        Elevation linearly interpolated at arbitrary distances
+
+        Distances are clamped to the track. The result is NaN where a
+        neighbouring point has no elevation.
+
+        Args:
+            distance_m: Distance(s) in meters
+
+        Returns:
+            float64 array of elevations
+        """
+        k, t = self._locate(np.atleast_1d(np.asarray(distance_m, dtype=np.float64)))
+        return self.elevation[k] + self._partial_delta(k, t)
+
+    def interpolated_segments(self, start_km: ArrayLike, end_km: ArrayLike) -> RangeStats:
+        """
+        Statistics of many km ranges with interpolated boundary points
+
+        Each range starts and ends at a point interpolated at the exact
+        distance instead of at the nearest recorded point inside it, so the
+        statistics do not depend on point density. first/last still refer to
+        the recorded points inside the range.
+
+        Args:
+            start_km: Range starts in kilometers (clamped to the track)
+            end_km: Range ends in kilometers (clamped to the track)
+
+        Returns:
+            RangeStats of arrays; num_points == 0 for ranges outside the track
+        """
+        start_m = np.atleast_1d(np.asarray(start_km, dtype=np.float64)) * 1000
+        end_m = np.atleast_1d(np.asarray(end_km, dtype=np.float64)) * 1000
+        first, last = self.bounds(start_m, end_m)
+        if not len(self):
+            zeros = np.zeros(len(first))
+            return RangeStats(first, last, np.zeros(len(first), dtype=np.int64), zeros, zeros, zeros, zeros)
+
+        outside = (end_m < start_m) | (start_m > self.distance[-1]) | (end_m < self.distance[0])
+        start_m = np.clip(start_m, self.distance[0], self.distance[-1])
+        end_m = np.clip(end_m, self.distance[0], self.distance[-1])
+
+        start_k, start_t = self._locate(start_m)
+        end_k, end_t = self._locate(end_m)
+        start_delta = self._partial_delta(start_k, start_t)
+        end_delta = self._partial_delta(end_k, end_t)
+
+        # D+/D- up to an interpolated point: prefix sum at the point before it
+        # plus the partial delta (same sign as the whole delta)
+        gain = (
+            self.cumulative_gain[end_k] + np.where(end_delta > 0, end_delta, 0.0)
+            - self.cumulative_gain[start_k] - np.where(start_delta > 0, start_delta, 0.0)
+        )
+        loss = (
+            self.cumulative_loss[end_k] + np.where(end_delta < 0, -end_delta, 0.0)
+            - self.cumulative_loss[start_k] - np.where(start_delta < 0, -start_delta, 0.0)
+        )
+        change = (
+            np.nan_to_num(self.elevation[end_k] + end_delta, nan=0.0)
+            - np.nan_to_num(self.elevation[start_k] + start_delta, nan=0.0)
+        )
+        # Interpolated boundaries plus the recorded points strictly between them
+        inner = np.searchsorted(self.distance, end_m, side="left") - np.searchsorted(self.distance, start_m, side="right")
+        return RangeStats(
+            first=first,
+            last=last,
+            num_points=np.where(outside, 0, np.maximum(inner, 0) + 2),
+            distance=np.where(outside, 0.0, end_m - start_m),
+            elevation_gain=np.where(outside, 0.0, gain),
+            elevation_loss=np.where(outside, 0.0, loss),
+            elevation_change=np.where(outside, 0.0, change),
+        )
+
+    def _locate(self, distance_m: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Index k of the last point at or before each distance, and the fraction t towards point k+1"""
+        k = np.clip(np.searchsorted(self.distance, distance_m, side="right") - 1, 0, len(self) - 1)
+        following = np.minimum(k + 1, len(self) - 1)
+        span = self.distance[following] - self.distance[k]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            t = np.where(span > 0, (distance_m - self.distance[k]) / span, 0.0)
+        return k, np.clip(t, 0.0, 1.0)
+
+    def _partial_delta(self, k: np.ndarray, t: np.ndarray) -> np.ndarray:
+        """Fraction t of the elevation delta from point k to point k+1 (exactly 0 when t == 0)"""
+        delta = self.elevation[np.minimum(k + 1, len(self) - 1)] - self.elevation[k]
+        return np.where(t > 0, t * delta, 0.0)
+
+    def segment(self, start_km: float, end_km: float) -> RangeStats:
+        """Statistics of a single km range (plain Python numbers)"""
+        return _scalars(RangeStats(*(field[0] for field in self.segments(start_km, end_km))))
+
+
+def _scalars(stats: RangeStats) -> RangeStats:
+    """Convert the fields of a single-range RangeStats to Python numbers"""
+    return RangeStats(*(value.item() for value in map(np.asarray, stats)))
@@ -0,0 +1,218 @@
+"""
+Track simplification (level of detail)
+
+The map and the elevation chart cannot use more than a few thousand points,
+while recorded tracks often have 100k+. Two reductions are provided:
+
+- Douglas-Peucker for the map geometry, run once per zoom level with a
+  tolerance of about one screen pixel at that zoom. Levels are precomputed
+  when a file is parsed and stored as index arrays into the full track.
+- Largest-Triangle-Three-Buckets (LTTB) for the elevation profile, which
+  keeps the visual shape (peaks, cols) for a target number of points.
+
+Both return sorted indices that always include the first and last point.
+"""
+import math
+from typing import Dict, Optional
+
+import numpy as np
+
+from app.services.track_arrays import TrackArrays
+
+EARTH_RADIUS = 6371000  # meters, as in DistanceCalculator
+WEB_MERCATOR_METERS_PER_PIXEL = 156543.03392  # at the equator, zoom 0, 256px tiles
+ZOOM_LEVELS = (6, 8, 10, 12, 14, 16)  # precomputed map levels; deeper zooms use every point
+TOLERANCE_PIXELS = 1.0
+
+
+class TrackSimplifier:
+    """Vectorized line simplification for map and profile rendering"""
+
+    @staticmethod
+    def douglas_peucker(x: np.ndarray, y: np.ndarray, tolerance: float) -> np.ndarray:
+        """
+        Douglas-Peucker simplification of a polyline
+
+        Instead of recursing segment by segment, every pass handles all open
+        segments at once: each point's distance to its segment chord is
+        computed in one array operation, and every segment whose farthest
+        point exceeds the tolerance is split there. Passes are bounded by
+        the recursion depth (about log2(n) for GPS tracks).
+
+        Args:
+            x: Projected x coordinates (meters)
+            y: Projected y coordinates (meters)
+            tolerance: Maximum distance between the original and simplified line (meters)
+
+        Returns:
+            Sorted indices of the kept points
+        """
+        n = len(x)
+        if n <= 2:
+            return np.arange(n)
+
+        keep = np.zeros(n, dtype=bool)
+        keep[0] = keep[-1] = True
+        active = np.arange(1, n - 1)  # points in segments that may still split
+
+        while active.size:
+            kept = np.flatnonzero(keep)
+            segment = np.searchsorted(kept, active) - 1
+            start = kept[segment]
+            end = kept[segment + 1]
+            distance = _distance_to_chord(x, y, active, start, end)
+
+            # active is sorted, so each segment is a contiguous run
+            run_starts = np.flatnonzero(np.r_[True, segment[1:] != segment[:-1]])
+            run_lengths = np.diff(np.r_[run_starts, active.size])
+            run_max = np.maximum.reduceat(distance, run_starts)
+
+            # First farthest point of each run
+            is_max = distance == np.repeat(run_max, run_lengths)
+            max_positions = np.flatnonzero(is_max)
+            _, first = np.unique(segment[max_positions], return_index=True)
+            farthest = max_positions[first]
+
+            split = run_max > tolerance
+            if not split.any():
+                break
+            keep[active[farthest[split]]] = True
+
+            still_open = np.repeat(split, run_lengths)
+            active = active[still_open & ~keep[active]]
+
+        return np.flatnonzero(keep)
+
+    @staticmethod
+    def largest_triangle_three_buckets(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+        """
+        Downsample a series to max_points, keeping its visual shape (LTTB)
+
+        The first and last points are kept. The others are split into
+        max_points - 2 buckets, and each bucket keeps the point forming the
+        largest triangle with the previously kept point and the average of
+        the next bucket.
+
+        Args:
+            x: Abscissa, increasing (e.g. distance)
+            y: Values (e.g. elevation), without NaN
+            max_points: Number of points to keep (at least 3)
+
+        Returns:
+            Sorted indices of the kept points
+        """
+        n = len(x)
+        if max_points >= n or max_points < 3:
+            return np.arange(n)
+
+        edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+        selected = np.empty(max_points, dtype=np.int64)
+        selected[0] = 0
+        selected[-1] = n - 1
+
+        previous = 0
+        for bucket in range(max_points - 2):
+            lo, hi = edges[bucket], edges[bucket + 1]
+            if bucket + 2 < len(edges):
+                next_lo, next_hi = edges[bucket + 1], edges[bucket + 2]
+                next_x = x[next_lo:next_hi].mean()
+                next_y = y[next_lo:next_hi].mean()
+            else:
+                next_x, next_y = x[-1], y[-1]
+
+            area = np.abs(
+                (x[previous] - next_x) * (y[lo:hi] - y[previous])
+                - (x[previous] - x[lo:hi]) * (next_y - y[previous])
+            )
+            previous = lo + int(np.argmax(area))
+            selected[bucket + 1] = previous
+
+        return selected
+
+    @staticmethod
+    def project(lat: np.ndarray, lon: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Equirectangular projection to meters around the track's mean latitude
+
+        Args:
+            lat: Latitudes in degrees
+            lon: Longitudes in degrees
+
+        Returns:
+            Tuple of (x, y) in meters
+        """
+        mean_lat = math.radians(float(np.mean(lat))) if len(lat) else 0.0
+        x = EARTH_RADIUS * np.radians(lon) * math.cos(mean_lat)
+        y = EARTH_RADIUS * np.radians(lat)
+        return x, y
+
+    @staticmethod
+    def zoom_tolerance(zoom: int, latitude: float) -> float:
+        """Ground size of TOLERANCE_PIXELS at a web map zoom level, in meters"""
+        meters_per_pixel = WEB_MERCATOR_METERS_PER_PIXEL * math.cos(math.radians(latitude)) / 2 ** zoom
+        return TOLERANCE_PIXELS * meters_per_pixel
+
+    @staticmethod
+    def build_levels(arrays: TrackArrays) -> Dict[int, np.ndarray]:
+        """
+        Precompute map geometry for every zoom in ZOOM_LEVELS
+
+        Args:
+            arrays: Full resolution track
+
+        Returns:
+            Dict of zoom -> sorted indices into the track (int32)
+        """
+        if not len(arrays):
+            return {}
+
+        # Finest level first, then each coarser level simplifies the previous
+        # one instead of the full track. Errors add up geometrically (zooms
+        # are 2 apart, tolerances a factor 4), staying under 4/3 of a pixel.
+        x, y = TrackSimplifier.project(arrays.lat, arrays.lon)
+        latitude = float(np.mean(arrays.lat))
+        levels = {}
+        indices = np.arange(len(arrays))
+        for zoom in sorted(ZOOM_LEVELS, reverse=True):
+            tolerance = TrackSimplifier.zoom_tolerance(zoom, latitude)
+            indices = indices[TrackSimplifier.douglas_peucker(x[indices], y[indices], tolerance)]
+            levels[zoom] = indices.astype(np.int32)
+        return dict(sorted(levels.items()))
+
+    @staticmethod
+    def level_indices(levels: Dict[int, np.ndarray], zoom: int) -> Optional[np.ndarray]:
+        """
+        Indices to render at a zoom level
+
+        Uses the closest precomputed level at least as detailed as requested.
+
+        Args:
+            levels: Output of build_levels
+            zoom: Requested map zoom
+
+        Returns:
+            Sorted indices, or None when the full track should be used
+        """
+        candidates = [z for z in levels if z >= zoom]
+        if not candidates:
+            return None
+        return levels[min(candidates)]
+
+
+def _distance_to_chord(
+    x: np.ndarray,
+    y: np.ndarray,
+    points: np.ndarray,
+    start: np.ndarray,
+    end: np.ndarray,
+) -> np.ndarray:
+    """Distance from each point to the segment [start, end] (to start when they coincide)"""
+    ax, ay = x[start], y[start]
+    dx, dy = x[end] - ax, y[end] - ay
+    px, py = x[points] - ax, y[points] - ay
+
+    length_sq = dx * dx + dy * dy
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t = np.where(length_sq > 0, (px * dx + py * dy) / length_sq, 0.0)
+    t = np.clip(t, 0.0, 1.0)
+    return np.hypot(px - t * dx, py - t * dy)
@@ -1,14 +1,35 @@
 """
 Statistics calculation utilities for GPX processing
 """
-from typing import List, Optional
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Sequence, Union
 from app.models.gpx import TrackPoint, TrackStatistics
+from app.services.distance_calculator import DistanceCalculator
+from app.services.gpx_stream_parser import NAIVE_TZ, TIME_MISSING, format_timestamp
+from app.services.simplification import TrackSimplifier
+from app.services.track_arrays import TrackArrays
 import gpxpy.gpx
+import numpy as np
+
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_UTC = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def _datetime_to_timestamp(value: datetime) -> tuple[int, int]:
+    """Convert a gpxpy datetime to (epoch_microseconds, tz_offset_minutes)"""
+    offset = value.utcoffset()
+    if offset is None:
+        return (value - _EPOCH) // _MICROSECOND, NAIVE_TZ
+    return (value - _EPOCH_UTC) // _MICROSECOND, int(offset.total_seconds() // 60)
 
 
 class StatisticsCalculator:
     """Service for calculating track and segment statistics"""
 
+    # Same default as gpxpy.gpx.DEFAULT_STOPPED_SPEED_THRESHOLD (km/h)
+    STOPPED_SPEED_THRESHOLD_KMH = 1.0
+
     @staticmethod
     def calculate_track_statistics(
         track: gpxpy.gpx.GPXTrack,
@@ -17,57 +38,158 @@ class StatisticsCalculator:
         """
         Calculate comprehensive statistics for a GPX track
 
+        Reads the gpxpy points once into arrays and runs the fused
+        statistics kernel instead of the separate gpxpy helpers.
+
         Args:
-            track: GPXTrack object with built-in methods
-            track_points: List of track points for additional calculations
+            track: GPXTrack object
+            track_points: List of track points for the average elevation
 
         Returns:
             TrackStatistics object with all calculated metrics
         """
-        # Use gpxpy built-in methods for efficiency
-        uphill, downhill = track.get_uphill_downhill()
-        moving_data = track.get_moving_data()
-        elevation_extremes = track.get_elevation_extremes()
+        points = [point for segment in track.segments for point in segment.points]
+        segment_starts = np.cumsum([0] + [len(segment.points) for segment in track.segments[:-1]])
+
+        n = len(points)
+        time = np.full(n, TIME_MISSING, dtype=np.int64)
+        tz_offset = np.full(n, NAIVE_TZ, dtype=np.int16)
+        for i, point in enumerate(points):
+            if point.time is not None:
+                time[i], tz_offset[i] = _datetime_to_timestamp(point.time)
+
+        average_elevations = np.fromiter(
+            (np.nan if p.elevation is None else p.elevation for p in track_points),
+            dtype=np.float64,
+            count=len(track_points),
+        )
 
-        # Total distance
-        total_distance = track.length_3d() or 0.0
+        return StatisticsCalculator.calculate_statistics_from_arrays(
+            lat=np.fromiter((p.latitude for p in points), dtype=np.float64, count=n),
+            lon=np.fromiter((p.longitude for p in points), dtype=np.float64, count=n),
+            elevation=np.fromiter(
+                (np.nan if p.elevation is None else p.elevation for p in points),
+                dtype=np.float64,
+                count=n,
+            ),
+            time=time,
+            tz_offset=tz_offset,
+            segment_starts=segment_starts,
+            average_elevations=average_elevations,
+        )
 
-        # Duration
-        duration = None
-        start_time = None
-        end_time = None
+    @staticmethod
+    def calculate_statistics_from_arrays(
+        lat: np.ndarray,
+        lon: np.ndarray,
+        elevation: np.ndarray,
+        time: np.ndarray,
+        tz_offset: np.ndarray,
+        segment_starts: Sequence[int],
+        average_elevations: Optional[np.ndarray] = None,
+    ) -> TrackStatistics:
+        """
+        Fused statistics kernel: all of TrackStatistics in one vectorized pass
+
+        Reproduces the gpxpy helpers previously used here (get_uphill_downhill,
+        get_moving_data, get_elevation_extremes, length_3d, get_time_bounds):
+        nothing is computed across segment boundaries. Results agree with
+        gpxpy up to floating-point summation order.
 
-        if moving_data and moving_data.moving_time:
-            duration = moving_data.moving_time
+        Args:
+            lat: Latitudes of all points of the track, segments concatenated
+            lon: Longitudes
+            elevation: Raw elevations (NaN when missing)
+            time: Epoch microseconds (TIME_MISSING when missing)
+            tz_offset: Timezone offsets in minutes (NAIVE_TZ when naive)
+            segment_starts: Index of the first point of each segment
+            average_elevations: Elevations used for avg_elevation (defaults
+                to elevation), e.g. after quality processing
 
-        time_bounds = track.get_time_bounds()
-        if time_bounds.start_time:
-            start_time = time_bounds.start_time.isoformat()
-        if time_bounds.end_time:
-            end_time = time_bounds.end_time.isoformat()
+        Returns:
+            TrackStatistics object with all calculated metrics
+        """
+        n = len(lat)
+        if average_elevations is None:
+            average_elevations = elevation
+
+        # Segment id of every point; a pair (i - 1, i) counts only within a segment
+        segment_id = np.zeros(n, dtype=np.int64)
+        boundaries = np.asarray(segment_starts, dtype=np.int64)
+        segment_id[boundaries[(boundaries > 0) & (boundaries < n)]] = 1
+        segment_id = np.cumsum(segment_id)
+        same_segment = segment_id[1:] == segment_id[:-1]
+
+        has_elevation = ~np.isnan(elevation)
+
+        # Uphill/downhill: gpxpy drops missing elevations, then smooths each
+        # segment with a 0.3/0.4/0.3 kernel (end points unchanged)
+        values = elevation[has_elevation]
+        values_segment = segment_id[has_elevation]
+        smoothed = values.copy()
+        if len(values) > 2:
+            interior = (
+                (values_segment[:-2] == values_segment[1:-1])
+                & (values_segment[1:-1] == values_segment[2:])
+            )
+            kernel = values[:-2] * .3 + values[1:-1] * .4 + values[2:] * .3
+            smoothed[1:-1][interior] = kernel[interior]
+        deltas = np.diff(smoothed)[values_segment[1:] == values_segment[:-1]]
+        uphill = float(deltas[deltas > 0].sum())
+        downhill = float(np.abs(deltas[deltas <= 0]).sum())
+
+        # 3D length (2D where an elevation is missing or unchanged)
+        distance_3d = DistanceCalculator.gpxpy_segment_lengths(lat, lon, elevation)
+        total_distance = float(distance_3d[same_segment].sum())
+
+        # Moving time: gpxpy uses the 3D distance only when both elevations
+        # are truthy (non-zero), and counts pairs faster than the threshold
+        has_time = time != TIME_MISSING
+        timed = same_segment & has_time[1:] & has_time[:-1]
+        truthy_elevation = has_elevation & (elevation != 0)
+        distance = np.where(
+            truthy_elevation[1:] & truthy_elevation[:-1],
+            distance_3d,
+            DistanceCalculator.gpxpy_segment_lengths(lat, lon),
+        )
+        seconds = np.diff(time) / 1_000_000
+        with np.errstate(divide="ignore", invalid="ignore"):
+            speed_kmh = (distance / 1000) / (seconds / 60 ** 2)
+        moving = (
+            timed & (seconds > 0) & (distance != 0)
+            & (speed_kmh > StatisticsCalculator.STOPPED_SPEED_THRESHOLD_KMH)
+        )
+        moving_time = float(seconds[moving].sum())
+
+        # Time bounds: first and last timed point
+        start_time = None
+        end_time = None
+        timed_indices = np.flatnonzero(has_time)
+        if len(timed_indices):
+            first, last = timed_indices[0], timed_indices[-1]
+            start_time = format_timestamp(int(time[first]), int(tz_offset[first]))
+            end_time = format_timestamp(int(time[last]), int(tz_offset[last]))
 
-        # Average elevation
         avg_elevation = None
-        if track_points:
-            elevations = [p.elevation for p in track_points if p.elevation is not None]
-            if elevations:
-                avg_elevation = sum(elevations) / len(elevations)
+        present = average_elevations[~np.isnan(average_elevations)]
+        if len(present):
+            avg_elevation = float(present.mean())
 
         return TrackStatistics(
             total_distance=total_distance,
-            total_elevation_gain=uphill or 0.0,
-            total_elevation_loss=downhill or 0.0,
-            max_elevation=elevation_extremes.maximum if elevation_extremes else None,
-            min_elevation=elevation_extremes.minimum if elevation_extremes else None,
+            total_elevation_gain=uphill,
+            total_elevation_loss=downhill,
+            max_elevation=float(values.max()) if len(values) else None,
+            min_elevation=float(values.min()) if len(values) else None,
             avg_elevation=avg_elevation,
-            duration=duration,
+            duration=moving_time or None,
             start_time=start_time,
             end_time=end_time,
         )
 
     @staticmethod
     def analyze_segment(
-        track_points: List[TrackPoint],
+        track_points: Union[List[TrackPoint], TrackArrays],
         start_km: float,
         end_km: float
     ) -> dict:
@@ -75,7 +197,7 @@ class StatisticsCalculator:
         Analyze a specific segment of the track
 
         Args:
-            track_points: List of track points
+            track_points: Track points or TrackArrays
             start_km: Start distance in kilometers
             end_km: End distance in kilometers
 
@@ -88,16 +210,10 @@ class StatisticsCalculator:
             - elevation_loss: Total D- in meters
             - num_points: Number of GPS points in segment
         """
-        # Convert km to meters
-        start_m = start_km * 1000
-        end_m = end_km * 1000
+        track = TrackArrays.coerce(track_points)
+        segment = track.range_index().segment(start_km, end_km)
 
-        # Filter points in segment
-        segment_points = [
-            p for p in track_points if start_m <= p.distance <= end_m
-        ]
-
-        if len(segment_points) < 2:
+        if segment.num_points < 2:
             return {
                 "error": "Segment too short or no points found",
                 "distance": 0,
@@ -105,147 +221,134 @@ class StatisticsCalculator:
                 "elevation_loss": 0,
             }
 
-        # Calculate segment statistics
-        elevation_gain = 0.0
-        elevation_loss = 0.0
-
-        for i in range(1, len(segment_points)):
-            prev = segment_points[i - 1]
-            curr = segment_points[i]
-
-            if prev.elevation is not None and curr.elevation is not None:
-                ele_diff = curr.elevation - prev.elevation
-                if ele_diff > 0:
-                    elevation_gain += ele_diff
-                else:
-                    elevation_loss += abs(ele_diff)
-
-        distance = segment_points[-1].distance - segment_points[0].distance
-
+        # Prefix sums skip NaN deltas (missing elevations), like np.diff over the segment
         return {
             "start_km": start_km,
             "end_km": end_km,
-            "distance": distance,
-            "elevation_gain": elevation_gain,
-            "elevation_loss": elevation_loss,
-            "num_points": len(segment_points),
+            "distance": segment.distance,
+            "elevation_gain": segment.elevation_gain,
+            "elevation_loss": segment.elevation_loss,
+            "num_points": segment.num_points,
         }
 
     @staticmethod
     def get_elevation_profile(
-        track_points: List[TrackPoint],
-        sample_rate: int = 100
+        track_points: Union[List[TrackPoint], TrackArrays],
+        max_points: int = 1000
     ) -> List[dict]:
         """
         Generate elevation profile data points for visualization
 
+        The profile is downsampled with Largest-Triangle-Three-Buckets, which
+        keeps summits and cols that fixed-step sampling would skip.
+
         Args:
-            track_points: List of track points
-            sample_rate: Take every Nth point (default 100)
+            track_points: Track points or TrackArrays
+            max_points: Maximum number of profile points (default 1000)
 
         Returns:
             List of dicts with distance_km and elevation
         """
-        if not track_points:
+        track = TrackArrays.coerce(track_points)
+        if not len(track):
             return []
 
-        profile = []
-        for i, point in enumerate(track_points):
-            if i % sample_rate == 0 or i == len(track_points) - 1:
-                profile.append({
-                    "distance_km": point.distance / 1000,
-                    "elevation": point.elevation or 0
-                })
+        elevations = np.nan_to_num(track.elevation, nan=0.0)
+        indices = TrackSimplifier.largest_triangle_three_buckets(track.distance, elevations, max_points)
 
-        return profile
+        distances_km = track.distance[indices] / 1000
+        return [
+            {"distance_km": d, "elevation": e}
+            for d, e in zip(distances_km.tolist(), elevations[indices].tolist())
+        ]
 
     @staticmethod
     def calculate_gradient_profile(
-        track_points: List[TrackPoint],
-        window_distance: float = 500  # meters
+        track_points: Union[List[TrackPoint], TrackArrays],
+        window_distance: float = 500,  # meters
+        resolution: Optional[float] = None  # meters
     ) -> List[dict]:
         """
         Calculate gradient profile using a rolling window
 
+        The gradient at a distance d is taken between the first and last
+        points with an elevation inside [d - window/2, d + window/2]. Window
+        bounds are found with binary searches over the cumulative distance,
+        so the whole profile costs O(n log n).
+
         Args:
-            track_points: List of track points
+            track_points: Track points or TrackArrays
             window_distance: Distance window for gradient calculation (meters)
+            resolution: Spacing of the output samples in meters (default: one
+                sample per track point)
 
         Returns:
             List of dicts with distance_km and gradient_percent
         """
-        if len(track_points) < 2:
+        track = TrackArrays.coerce(track_points)
+        if len(track) < 2:
             return []
 
-        gradients = []
-
-        for i, point in enumerate(track_points):
-            # Find points within window
-            window_start = point.distance - window_distance / 2
-            window_end = point.distance + window_distance / 2
-
-            window_points = [
-                p for p in track_points
-                if window_start <= p.distance <= window_end and p.elevation is not None
-            ]
-
-            if len(window_points) >= 2:
-                # Calculate gradient over window
-                elevation_diff = window_points[-1].elevation - window_points[0].elevation
-                distance_diff = window_points[-1].distance - window_points[0].distance
-
-                if distance_diff > 0:
-                    gradient = (elevation_diff / distance_diff) * 100
-                    gradients.append({
-                        "distance_km": point.distance / 1000,
-                        "gradient_percent": gradient
-                    })
+        has_elevation = ~np.isnan(track.elevation)
+        distances = track.distance[has_elevation]
+        elevations = track.elevation[has_elevation]
+        if len(distances) < 2:
+            return []
 
-        return gradients
+        if resolution:
+            start, end = track.distance[0], track.distance[-1]
+            centers = start + np.arange(int((end - start) // resolution) + 1) * resolution
+        else:
+            centers = track.distance
+
+        first = np.searchsorted(distances, centers - window_distance / 2, side="left")
+        last = np.searchsorted(distances, centers + window_distance / 2, side="right") - 1
+
+        # At least two points in the window, spanning some distance
+        valid = last > first
+        first, last, centers = first[valid], last[valid], centers[valid]
+        distance_diff = distances[last] - distances[first]
+        moving = distance_diff > 0
+        gradients = (elevations[last[moving]] - elevations[first[moving]]) / distance_diff[moving] * 100
+
+        return [
+            {"distance_km": d, "gradient_percent": g}
+            for d, g in zip((centers[moving] / 1000).tolist(), gradients.tolist())
+        ]
 
     @staticmethod
     def get_speed_profile(
-        track_points: List[TrackPoint],
+        track_points: Union[List[TrackPoint], TrackArrays],
         time_window: int = 300  # seconds (5 minutes)
     ) -> List[dict]:
         """
         Calculate speed profile from track points with time data
 
         Args:
-            track_points: List of track points with time
+            track_points: Track points or TrackArrays with time
             time_window: Time window for speed averaging (seconds)
 
         Returns:
             List of dicts with distance_km and speed_kmh
         """
-        from datetime import datetime
-
-        speeds = []
-
-        for i in range(1, len(track_points)):
-            prev = track_points[i - 1]
-            curr = track_points[i]
-
-            if prev.time and curr.time:
-                try:
-                    # Parse timestamps
-                    prev_time = datetime.fromisoformat(prev.time.replace('Z', '+00:00'))
-                    curr_time = datetime.fromisoformat(curr.time.replace('Z', '+00:00'))
-
-                    time_diff = (curr_time - prev_time).total_seconds()
-                    distance_diff = curr.distance - prev.distance
+        track = TrackArrays.coerce(track_points)
+        if len(track) < 2:
+            return []
 
-                    if time_diff > 0:
-                        # Calculate speed in km/h
-                        speed_mps = distance_diff / time_diff
-                        speed_kmh = speed_mps * 3.6
+        # Consecutive pairs where both points are timed and time moves forward
+        timed = track.has_time
+        valid = timed[1:] & timed[:-1]
+        time_diff = np.where(valid, np.diff(track.time), 0) / 1_000_000
+        valid &= time_diff > 0
 
-                        speeds.append({
-                            "distance_km": curr.distance / 1000,
-                            "speed_kmh": speed_kmh,
-                            "time": curr.time
-                        })
-                except:
-                    pass  # Skip points with invalid time data
+        indices = np.flatnonzero(valid) + 1
+        speeds_kmh = np.diff(track.distance)[valid] / time_diff[valid] * 3.6
 
-        return speeds
+        return [
+            {
+                "distance_km": track.distance[i] / 1000,
+                "speed_kmh": speed,
+                "time": track.time_iso(i),
+            }
+            for i, speed in zip(indices.tolist(), speeds_kmh.tolist())
+        ]
@@ -6,11 +6,18 @@ Supports three calculation modes via CalcMode:
 - CONSTANT_PACE: single flat km/h pace
 - TRAIL_PLANNER: tunable 4-parameter model (flat pace + climb penalty +
   descent bonus + linear fatigue)
+
+Besides the scalar per-segment estimate, every mode reduces to a row of
+coefficients, so many scenarios (or Monte Carlo samples) and many segments
+(or every track interval) are evaluated as one NumPy matrix.
 """
 import math
-from typing import List, Optional
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
 
-from app.models.gpx import CalcMode, TrailPlannerConfig
+from app.models.gpx import AidStationScenario, CalcMode, TrailPlannerConfig
+from app.services.track_arrays import TrackArrays
 
 
 class TimeCalculator:
@@ -118,6 +125,180 @@ class TimeCalculator:
 
         return max(0, raw * multiplier)
 
+    @staticmethod
+    def estimate_segment_times(
+        distance_km: np.ndarray,
+        elevation_gain: np.ndarray,
+        elevation_loss: np.ndarray,
+        avg_gradient: np.ndarray,
+        cumulative_distance_km: np.ndarray,
+        scenarios: Sequence[AidStationScenario],
+    ) -> np.ndarray:
+        """Estimate every segment under every scenario at once.
+
+        Same formulas as estimate_segment_time: each mode reduces to
+        max(0, (distance*min_per_km + D+/100*climb - D-/100*descent) * fatigue),
+        with per-scenario coefficients broadcast over the segments.
+
+        Args:
+            distance_km: Segment distances in kilometers.
+            elevation_gain: Segment D+ in meters.
+            elevation_loss: Segment D- in meters.
+            avg_gradient: Segment average gradients as percentage.
+            cumulative_distance_km: Distance run before each segment (>= 0).
+            scenarios: Time-estimation settings, one row each.
+
+        Returns:
+            (len(scenarios), len(segments)) array of minutes; NaN for a
+            scenario missing its mode parameter.
+        """
+        distance_km = np.asarray(distance_km, dtype=np.float64)
+        elevation_gain = np.asarray(elevation_gain, dtype=np.float64)
+        elevation_loss = np.asarray(elevation_loss, dtype=np.float64)
+        avg_gradient = np.asarray(avg_gradient, dtype=np.float64)
+        cumulative_distance_km = np.asarray(cumulative_distance_km, dtype=np.float64)
+        if np.any(cumulative_distance_km < 0):
+            raise ValueError("cumulative_distance_km must be >= 0")
+
+        coefficients = TimeCalculator.scenario_coefficients(scenarios)
+        return TimeCalculator.evaluate_coefficients(
+            distance_km, elevation_gain, elevation_loss, avg_gradient, cumulative_distance_km, coefficients
+        )
+
+    @staticmethod
+    def scenario_coefficients(scenarios: Sequence[AidStationScenario]) -> np.ndarray:
+        """(len(scenarios), 6) coefficient rows, see evaluate_coefficients"""
+        return np.array(
+            [TimeCalculator._scenario_coefficients(scenario) for scenario in scenarios],
+            dtype=np.float64,
+        ).reshape(-1, 6)
+
+    @staticmethod
+    def evaluate_coefficients(
+        distance_km: np.ndarray,
+        elevation_gain: np.ndarray,
+        elevation_loss: np.ndarray,
+        avg_gradient: np.ndarray,
+        cumulative_distance_km: np.ndarray,
+        coefficients: np.ndarray,
+    ) -> np.ndarray:
+        """Segment times for rows of time-model coefficients.
+
+        Columns of `coefficients` are (min_per_km, climb_min_per_100m,
+        descent_min_per_100m, steep_descent_only, fatigue_fraction,
+        fatigue_interval_km). Rows can come from scenarios or be sampled
+        around one (Monte Carlo simulation).
+
+        Returns:
+            (len(coefficients), len(segments)) array of minutes.
+        """
+        min_per_km, climb, descent, steep_only, fatigue, interval = (
+            column[:, None] for column in np.asarray(coefficients, dtype=np.float64).T
+        )
+
+        applies_descent = np.where(steep_only > 0, avg_gradient < TimeCalculator.STEEP_DESCENT_THRESHOLD, True)
+        raw = (
+            distance_km * min_per_km
+            + elevation_gain / 100 * climb
+            - np.where(applies_descent, elevation_loss / 100 * descent, 0.0)
+        )
+        paliers = np.floor(cumulative_distance_km / interval)
+        return np.maximum(0, raw * (1 + paliers * fatigue))
+
+    @staticmethod
+    def predict_point_times(track: TrackArrays, scenario: AidStationScenario) -> np.ndarray:
+        """Predicted elapsed time at every point of a track.
+
+        Every interval between consecutive points is a segment of its own:
+        D+/D- and gradient come from its elevation delta (0 when an
+        elevation is missing) and the fatigue paliers from the distance at
+        its start.
+
+        Args:
+            track: Track arrays with cumulative distance and elevation.
+            scenario: Time-estimation settings.
+
+        Returns:
+            float64 array of cumulative minutes, 0 at the first point.
+        """
+        if not len(track):
+            return np.zeros(0)
+        distance_km = np.diff(track.distance) / 1000
+        deltas = np.nan_to_num(np.diff(track.elevation), nan=0.0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            gradient = np.where(distance_km > 0, deltas / (distance_km * 1000) * 100, 0.0)
+
+        minutes = TimeCalculator.evaluate_coefficients(
+            distance_km,
+            np.maximum(deltas, 0.0),
+            np.maximum(-deltas, 0.0),
+            gradient,
+            track.distance[:-1] / 1000,
+            TimeCalculator.scenario_coefficients([scenario]),
+        )[0]
+        return np.concatenate(([0.0], np.cumsum(minutes)))
+
+    @staticmethod
+    def locate_at_times(
+        track: TrackArrays,
+        point_minutes: np.ndarray,
+        minutes: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Where the runner is at given elapsed times (inverse of predict_point_times).
+
+        Binary search in the cumulative times, then linear interpolation
+        between the two surrounding points. Times outside the race clamp to
+        the start or finish.
+
+        Args:
+            track: Track arrays the times were predicted for.
+            point_minutes: Cumulative minutes per point (non-decreasing).
+            minutes: Elapsed times to locate.
+
+        Returns:
+            (distance_km, lat, lon) arrays, one entry per time.
+        """
+        minutes = np.atleast_1d(np.asarray(minutes, dtype=np.float64))
+        if not len(track):
+            empty = np.full(len(minutes), np.nan)
+            return empty, empty, empty
+        last = len(track) - 1
+        k = np.clip(np.searchsorted(point_minutes, minutes, side="right") - 1, 0, last)
+        following = np.minimum(k + 1, last)
+        span = point_minutes[following] - point_minutes[k]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            t = np.clip(np.where(span > 0, (minutes - point_minutes[k]) / span, 0.0), 0.0, 1.0)
+
+        def interpolate(values: np.ndarray) -> np.ndarray:
+            return values[k] + t * (values[following] - values[k])
+
+        return interpolate(track.distance) / 1000, interpolate(track.lat), interpolate(track.lon)
+
+    @staticmethod
+    def _scenario_coefficients(scenario: AidStationScenario) -> tuple:
+        """(min_per_km, climb, descent, steep_only, fatigue, interval_km) of one scenario"""
+        if scenario.calc_mode == CalcMode.NAISMITH:
+            return (
+                60 / TimeCalculator.BASE_SPEED_KMH,
+                TimeCalculator.CLIMB_PENALTY_MIN_PER_100M,
+                TimeCalculator.DESCENT_PENALTY_MIN_PER_100M,
+                1.0, 0.0, math.inf,
+            )
+        if scenario.calc_mode == CalcMode.CONSTANT_PACE and scenario.constant_pace_kmh is not None:
+            pace = scenario.constant_pace_kmh
+            return (60 / pace if pace > 0 else 0.0, 0.0, 0.0, 0.0, 0.0, math.inf)
+        if scenario.calc_mode == CalcMode.TRAIL_PLANNER and scenario.trail_planner_config is not None:
+            config = scenario.trail_planner_config
+            return (
+                60 / config.flat_pace_kmh,
+                config.climb_penalty_min_per_100m,
+                config.descent_bonus_min_per_100m,
+                0.0,
+                config.fatigue_percent_per_interval / 100,
+                config.fatigue_interval_km,
+            )
+        return (math.nan,) * 6
+
     @staticmethod
     def format_time(minutes: float) -> str:
         """Format minutes to 'XhYYmin' or 'YYmin'."""
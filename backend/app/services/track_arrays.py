@@ -0,0 +1,305 @@
+"""
+Columnar track representation
+NumPy arrays shared by the analysis services. Pydantic TrackPoint objects
+are only built at the API boundary.
+"""
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from app.models.gpx import Track, TrackPoint, TrackStatistics
+from app.services.range_index import RangeIndex
+from app.utils.elevation_quality import smooth_elevation_array
+from app.services.gpx_stream_parser import (
+    NAIVE_TZ,
+    TIME_MISSING,
+    format_timestamp,
+    parse_timestamp,
+)
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+class TrackArrays:
+    """
+    One track as parallel NumPy arrays
+
+    Attributes:
+        lat: float64 latitudes in degrees
+        lon: float64 longitudes in degrees
+        elevation: float64 elevations in meters (NaN when missing)
+        distance: float64 cumulative distance in meters
+        time: int64 epoch microseconds (TIME_MISSING when missing)
+        tz_offset: int16 timezone offset in minutes (NAIVE_TZ when naive),
+            kept so timestamps round-trip to the same ISO strings
+    """
+
+    COLUMNS = ("lat", "lon", "elevation", "distance", "time", "tz_offset")
+    __slots__ = COLUMNS + ("_range_indexes",)
+
+    def __init__(
+        self,
+        lat,
+        lon,
+        elevation,
+        distance,
+        time=None,
+        tz_offset=None,
+    ):
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.elevation = np.asarray(elevation, dtype=np.float64)
+        self.distance = np.asarray(distance, dtype=np.float64)
+
+        n = len(self.lat)
+        if time is None:
+            time = np.full(n, TIME_MISSING, dtype=np.int64)
+        if tz_offset is None:
+            tz_offset = np.full(n, NAIVE_TZ, dtype=np.int16)
+        self.time = np.asarray(time, dtype=np.int64)
+        self.tz_offset = np.asarray(tz_offset, dtype=np.int16)
+
+        if not (
+            len(self.lon) == len(self.elevation) == len(self.distance)
+            == len(self.time) == len(self.tz_offset) == n
+        ):
+            raise ValueError("All track arrays must have the same length")
+
+        # smoothing window (None for raw elevations) -> RangeIndex, built on first use
+        self._range_indexes: Dict[Optional[int], RangeIndex] = {}
+
+    def __len__(self) -> int:
+        return len(self.lat)
+
+    def __getstate__(self):
+        # Derived indexes are not sent to worker processes: rebuilt on demand
+        return tuple(getattr(self, name) for name in self.COLUMNS)
+
+    def __setstate__(self, state) -> None:
+        for name, column in zip(self.COLUMNS, state):
+            setattr(self, name, column)
+        self._range_indexes = {}
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the arrays, in bytes"""
+        return sum(getattr(self, name).nbytes for name in self.COLUMNS)
+
+    @property
+    def has_time(self) -> np.ndarray:
+        """Boolean mask of points carrying a timestamp"""
+        return self.time != TIME_MISSING
+
+    def digest(self) -> str:
+        """BLAKE2b digest of the point arrays, a content key for derived results"""
+        digest = hashlib.blake2b(digest_size=16)
+        for name in self.COLUMNS:
+            digest.update(np.ascontiguousarray(getattr(self, name)).data)
+        return digest.hexdigest()
+
+    def range_index(self, smoothing_window: Optional[int] = None) -> RangeIndex:
+        """
+        Prefix-sum index for km-range statistics, built once per track
+
+        Args:
+            smoothing_window: Build it over elevations smoothed with this
+                moving-average window (missing windows as 0, like
+                ElevationService.smooth_elevation); raw elevations when None
+
+        Returns:
+            RangeIndex over this track's cumulative distance
+        """
+        index = self._range_indexes.get(smoothing_window)
+        if index is None:
+            elevation = self.elevation
+            if smoothing_window is not None:
+                elevation = np.nan_to_num(smooth_elevation_array(elevation, smoothing_window), nan=0.0)
+            index = RangeIndex(self.distance, elevation)
+            self._range_indexes[smoothing_window] = index
+        return index
+
+    @classmethod
+    def from_track_points(cls, points: Sequence[TrackPoint]) -> "TrackArrays":
+        """
+        Build arrays from pydantic track points (API request boundary)
+
+        Args:
+            points: Track points with cumulative distance
+
+        Returns:
+            TrackArrays with the same data
+        """
+        n = len(points)
+        time = np.full(n, TIME_MISSING, dtype=np.int64)
+        tz_offset = np.full(n, NAIVE_TZ, dtype=np.int16)
+        for i, p in enumerate(points):
+            if p.time:
+                time[i], tz_offset[i] = parse_timestamp(p.time)
+
+        return cls(
+            lat=np.fromiter((p.lat for p in points), dtype=np.float64, count=n),
+            lon=np.fromiter((p.lon for p in points), dtype=np.float64, count=n),
+            elevation=np.fromiter(
+                (np.nan if p.elevation is None else p.elevation for p in points),
+                dtype=np.float64,
+                count=n,
+            ),
+            distance=np.fromiter((p.distance for p in points), dtype=np.float64, count=n),
+            time=time,
+            tz_offset=tz_offset,
+        )
+
+    @classmethod
+    def coerce(cls, points: Union["TrackArrays", Sequence[TrackPoint]]) -> "TrackArrays":
+        """Return points as TrackArrays, converting a TrackPoint list if needed"""
+        if isinstance(points, cls):
+            return points
+        return cls.from_track_points(points)
+
+    def to_track_points(self) -> List[TrackPoint]:
+        """
+        Build pydantic track points (API response boundary)
+
+        Returns:
+            List of TrackPoint objects
+        """
+        elevations = self.elevation.tolist()
+
+        return [
+            TrackPoint(
+                lat=lat,
+                lon=lon,
+                elevation=None if ele != ele else ele,  # NaN -> None
+                distance=distance,
+                time=time,
+            )
+            for lat, lon, ele, distance, time in zip(
+                self.lat.tolist(), self.lon.tolist(), elevations,
+                self.distance.tolist(), self.times_iso(),
+            )
+        ]
+
+    def slice(self, start: int, stop: int) -> "TrackArrays":
+        """Points [start, stop) as a new TrackArrays sharing the same memory"""
+        return TrackArrays(
+            self.lat[start:stop],
+            self.lon[start:stop],
+            self.elevation[start:stop],
+            self.distance[start:stop],
+            self.time[start:stop],
+            self.tz_offset[start:stop],
+        )
+
+    def view(self) -> "TrackArrays":
+        """
+        Same points, sharing the arrays, with an empty index cache
+
+        Long-lived instances (the parse cache) hand out views so range
+        indexes built by a request are not held beyond it.
+        """
+        return self.slice(0, len(self))
+
+    def take(self, indices: np.ndarray) -> "TrackArrays":
+        """Points selected by an index array or boolean mask"""
+        return TrackArrays(
+            self.lat[indices],
+            self.lon[indices],
+            self.elevation[indices],
+            self.distance[indices],
+            self.time[indices],
+            self.tz_offset[indices],
+        )
+
+    def times_iso(self) -> List[Optional[str]]:
+        """
+        ISO timestamps of all points (None where missing), formatted in bulk
+
+        Same strings as format_timestamp, built with NumPy datetime64 per
+        distinct timezone offset instead of one datetime per point.
+        """
+        result: List[Optional[str]] = [None] * len(self)
+        has_time = self.has_time
+        if not has_time.any():
+            return result
+
+        for tz_offset in np.unique(self.tz_offset[has_time]).tolist():
+            indices = np.flatnonzero(has_time & (self.tz_offset == tz_offset))
+            local_us = self.time[indices]
+            suffix = ""
+            if tz_offset != NAIVE_TZ:
+                local_us = local_us + tz_offset * 60_000_000
+                sign = "-" if tz_offset < 0 else "+"
+                suffix = f"{sign}{abs(tz_offset) // 60:02d}:{abs(tz_offset) % 60:02d}"
+
+            stamps = local_us.astype("datetime64[us]")
+            # isoformat() drops the fraction when microseconds are zero
+            whole = local_us % 1_000_000 == 0
+            strings = np.where(
+                whole,
+                np.datetime_as_string(stamps, unit="s"),
+                np.datetime_as_string(stamps, unit="us"),
+            )
+            for i, text in zip(indices.tolist(), strings.tolist()):
+                result[i] = text + suffix
+        return result
+
+    def time_iso(self, index: int) -> Optional[str]:
+        """ISO timestamp of one point, or None"""
+        return format_timestamp(int(self.time[index]), int(self.tz_offset[index]))
+
+    def datetime_at(self, index: int) -> Optional[datetime]:
+        """Timestamp of one point as a datetime (aware unless the source was naive)"""
+        time_us = int(self.time[index])
+        if time_us == TIME_MISSING:
+            return None
+        naive = _EPOCH + timedelta(microseconds=time_us)
+        tz_offset = int(self.tz_offset[index])
+        if tz_offset == NAIVE_TZ:
+            return naive
+        tz = timezone(timedelta(minutes=tz_offset))
+        return naive.replace(tzinfo=timezone.utc).astimezone(tz)
+
+
+class AnalyzedTrack:
+    """
+    A parsed track kept in columnar form, with its statistics
+
+    Attributes:
+        levels: Precomputed map levels of detail, zoom -> sorted point
+            indices (see TrackSimplifier.build_levels)
+    """
+
+    __slots__ = ("name", "arrays", "statistics", "levels")
+
+    def __init__(
+        self,
+        name: str,
+        arrays: TrackArrays,
+        statistics: TrackStatistics,
+        levels: Optional[Dict[int, np.ndarray]] = None,
+    ):
+        self.name = name
+        self.arrays = arrays
+        self.statistics = statistics
+        self.levels = levels or {}
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the point and level arrays, in bytes"""
+        return self.arrays.nbytes + sum(indices.nbytes for indices in self.levels.values())
+
+    def to_track(self, indices: Optional[np.ndarray] = None) -> Track:
+        """
+        Build the pydantic Track returned by the API
+
+        Args:
+            indices: Points to include (e.g. a level of detail); all by default
+        """
+        arrays = self.arrays if indices is None else self.arrays.take(indices)
+        return Track(
+            name=self.name,
+            points=arrays.to_track_points(),
+            statistics=self.statistics,
+        )
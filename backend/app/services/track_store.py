@@ -0,0 +1,143 @@
+"""
+Server-side track handles
+
+Analysis endpoints can refer to a track by the file_id returned from
+/gpx/upload or by a published race slug instead of re-sending every point.
+Handles resolve against the parse cache (TTL + memory-bounded LRU); inline
+track points remain supported as a fallback.
+"""
+import hashlib
+import logging
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.process_pool import process_pool
+from app.models.gpx import TrackPoint
+from app.services.gpx_parse_service import GPXParseService
+from app.services.parse_cache import parse_cache
+from app.services.race_service import RaceService
+from app.services.track_arrays import AnalyzedTrack, TrackArrays
+
+logger = logging.getLogger(__name__)
+
+FILE_ID_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+class TrackNotFoundError(LookupError):
+    """Raised when a track handle is unknown or has expired (answered with 404)"""
+
+
+class TrackStore:
+    """Resolve track handles (file_id, race slug) or inline points to TrackArrays"""
+
+    @staticmethod
+    async def resolve(
+        track_points: Optional[List[TrackPoint]] = None,
+        file_id: Optional[str] = None,
+        race_slug: Optional[str] = None,
+        track_index: int = 0,
+        db: Optional[Session] = None,
+    ) -> Tuple[TrackArrays, Optional[str]]:
+        """
+        Get the track an analysis request refers to
+
+        Handles take precedence over inline points: file_id, then race_slug,
+        then track_points.
+
+        Args:
+            track_points: Inline track points (fallback)
+            file_id: Content hash returned by /gpx/upload
+            race_slug: Slug of a published race
+            track_index: Track to use when the file has several
+            db: Database session (needed for race_slug)
+
+        Returns:
+            Tuple of (track arrays, track name or None for inline points);
+            cached tracks come back as a view, so the cache entry is unchanged
+
+        Raises:
+            TrackNotFoundError: If the handle is unknown, expired or has no such track
+            ValueError: If no track source is given
+        """
+        if file_id is not None:
+            tracks = TrackStore.get_uploaded(file_id)
+        elif race_slug is not None:
+            tracks = await TrackStore.get_race(db, race_slug)
+        elif track_points is not None:
+            return TrackArrays.from_track_points(track_points), None
+        else:
+            raise ValueError("Provide track_points, file_id or race_slug")
+
+        track = TrackStore.pick(tracks, track_index)
+        return track.arrays.view(), track.name
+
+    @staticmethod
+    def pick(tracks: List[AnalyzedTrack], track_index: int) -> AnalyzedTrack:
+        """
+        One track of a parsed file
+
+        Args:
+            tracks: Parsed tracks of the file
+            track_index: Track to use
+
+        Returns:
+            The AnalyzedTrack
+
+        Raises:
+            TrackNotFoundError: If the file has no such track
+        """
+        if not 0 <= track_index < len(tracks):
+            raise TrackNotFoundError(f"Track index {track_index} not found ({len(tracks)} tracks)")
+        return tracks[track_index]
+
+    @staticmethod
+    def get_uploaded(file_id: str) -> List[AnalyzedTrack]:
+        """
+        Parsed tracks of a previously uploaded file
+
+        Args:
+            file_id: Content hash returned by /gpx/upload
+
+        Returns:
+            List of AnalyzedTrack
+
+        Raises:
+            TrackNotFoundError: If the file_id is unknown or has expired
+        """
+        tracks = parse_cache.get(file_id) if FILE_ID_PATTERN.match(file_id) else None
+        if tracks is None:
+            raise TrackNotFoundError("Unknown or expired file_id, please upload the file again")
+        return tracks
+
+    @staticmethod
+    async def get_race(db: Session, slug: str) -> List[AnalyzedTrack]:
+        """
+        Parsed tracks of a published race (parsed on first use, then cached)
+
+        The race GPX is cached under the hash of its content, so editing the
+        race GPX naturally invalidates the previous entry.
+
+        Args:
+            db: Database session
+            slug: Race slug
+
+        Returns:
+            List of AnalyzedTrack
+
+        Raises:
+            TrackNotFoundError: If the race does not exist or is not published
+        """
+        race = RaceService.get_race_by_slug(db, slug)
+        if not race or not race.is_published:
+            raise TrackNotFoundError("Race not found")
+
+        content = race.gpx_content.encode()
+        key = hashlib.sha256(content).hexdigest()
+        tracks = parse_cache.get(key)
+        if tracks is None:
+            tracks, _ = await process_pool.run("parse_race_gpx", GPXParseService.analyze_gpx_bytes, content)
+            parse_cache.put(key, tracks)
+            logger.info(f"Race '{slug}' parsed and cached ({sum(len(t.arrays) for t in tracks)} points)")
+        return tracks
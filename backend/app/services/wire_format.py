@@ -0,0 +1,305 @@
+"""
+Compact wire formats for track points
+
+By default track points are returned as JSON objects (one per point, keys
+repeated). Clients can negotiate a columnar representation instead, with
+the `format` query parameter or the Accept header:
+
+- json: the default, one {"lat", "lon", "elevation", "distance", "time"} object per point
+- columnar: JSON where each track carries `columns` (one array per field)
+  instead of `points`
+- binary: little-endian buffer, a JSON header followed by raw column arrays
+
+Binary layout (all integers little-endian):
+
+    0   4 bytes   magic b"GPXC"
+    4   uint16    version (1)
+    6   uint16    reserved (0)
+    8   uint32    header length in bytes
+    12  header    UTF-8 JSON, padded with spaces up to the first buffer
+    ..  buffers   raw arrays, each starting on an 8-byte boundary
+
+The header is the response payload in which every column is replaced by a
+reference {"$buffer": {"offset", "dtype", "length"}}; offset counts from
+the start of the body, so a browser can view it directly with
+`new Float64Array(body, offset, length)`. Binary columns are lat, lon,
+elevation, distance, time (<f8, NaN when missing; time in epoch seconds)
+and tz_offset (<i2 minutes, -32768 for naive timestamps).
+"""
+import json
+import struct
+from enum import Enum
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+from pydantic import ValidationError
+
+from app.models.gpx import TrackPoint
+from app.services.simplification import TrackSimplifier
+from app.services.track_arrays import AnalyzedTrack, TrackArrays
+
+COLUMNAR_MEDIA_TYPE = "application/vnd.gpx-columnar+json"
+BINARY_MEDIA_TYPE = "application/vnd.gpx-columnar"
+
+BINARY_MAGIC = b"GPXC"
+BINARY_VERSION = 1
+_PREFIX = struct.Struct("<4sHHI")
+_ALIGNMENT = 8
+
+
+class WireFormat(str, Enum):
+    """Representation of track points in API responses"""
+    JSON = "json"
+    COLUMNAR = "columnar"
+    BINARY = "binary"
+
+
+def negotiate(request: Request, requested: Optional[WireFormat] = None) -> WireFormat:
+    """
+    Pick the response format: explicit query parameter first, then Accept header
+
+    Args:
+        request: Incoming request
+        requested: Value of the `format` query parameter, if any
+
+    Returns:
+        Negotiated WireFormat (JSON when nothing else was asked for)
+    """
+    if requested is not None:
+        return requested
+    media_types = {
+        part.split(";")[0].strip().lower()
+        for part in request.headers.get("accept", "").split(",")
+    }
+    if BINARY_MEDIA_TYPE in media_types:
+        return WireFormat.BINARY
+    if COLUMNAR_MEDIA_TYPE in media_types:
+        return WireFormat.COLUMNAR
+    return WireFormat.JSON
+
+
+def track_columns(arrays: TrackArrays, fmt: WireFormat) -> Dict[str, Any]:
+    """
+    Columns of one track in the given format
+
+    Args:
+        arrays: Track arrays
+        fmt: COLUMNAR (JSON lists) or BINARY (NumPy arrays, turned into buffers)
+
+    Returns:
+        Dict of column name -> values
+    """
+    if fmt == WireFormat.BINARY:
+        time = np.where(arrays.has_time, arrays.time / 1e6, np.nan)
+        return {
+            "lat": arrays.lat,
+            "lon": arrays.lon,
+            "elevation": arrays.elevation,
+            "distance": arrays.distance,
+            "time": time,
+            "tz_offset": arrays.tz_offset,
+        }
+
+    elevation = arrays.elevation.tolist()
+    return {
+        "lat": arrays.lat.tolist(),
+        "lon": arrays.lon.tolist(),
+        "elevation": [None if e != e else e for e in elevation],  # NaN -> null
+        "distance": arrays.distance.tolist(),
+        "time": arrays.times_iso(),
+    }
+
+
+def encode_tracks(
+    tracks: List[AnalyzedTrack],
+    fmt: WireFormat,
+    zoom: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Tracks with `columns` in place of `points` (COLUMNAR or BINARY)
+
+    Args:
+        tracks: Analyzed tracks
+        fmt: Target format
+        zoom: Map zoom whose level of detail to return (all points if None)
+
+    Returns:
+        List of track dicts ready for render()
+    """
+    encoded = []
+    for track in tracks:
+        indices = None if zoom is None else TrackSimplifier.level_indices(track.levels, zoom)
+        arrays = track.arrays if indices is None else track.arrays.take(indices)
+        encoded.append({
+            "name": track.name,
+            "length": len(arrays),
+            "columns": track_columns(arrays, fmt),
+            "statistics": track.statistics.model_dump(),
+        })
+    return encoded
+
+
+def columnize_points(state: Any, fmt: WireFormat) -> Any:
+    """
+    Replace track point lists found anywhere in a JSON document by columns
+
+    Used for shared states, which embed the upload responses the client
+    received. A list is converted when it sits under a "points" key and all
+    its items look like TrackPoint objects (lat, lon and distance); a list
+    whose items do not validate as TrackPoint is left as it is.
+
+    Args:
+        state: Decoded JSON document
+        fmt: COLUMNAR or BINARY
+
+    Returns:
+        Copy of the document with {"length", "columns"} in place of "points"
+    """
+    if isinstance(state, list):
+        return [columnize_points(item, fmt) for item in state]
+    if not isinstance(state, dict):
+        return state
+
+    result = {}
+    for key, value in state.items():
+        if key == "points" and _is_point_list(value):
+            try:
+                arrays = TrackArrays.from_track_points([TrackPoint(**p) for p in value])
+            except (ValidationError, ValueError):
+                # Shared states are client-supplied: serve odd points unconverted
+                result[key] = value
+                continue
+            result["length"] = len(arrays)
+            result["columns"] = track_columns(arrays, fmt)
+        else:
+            result[key] = columnize_points(value, fmt)
+    return result
+
+
+def _is_point_list(value: Any) -> bool:
+    return (
+        isinstance(value, list)
+        and len(value) > 0
+        and all(isinstance(p, dict) and "lat" in p and "lon" in p and "distance" in p for p in value)
+    )
+
+
+def render(payload: Dict[str, Any], fmt: WireFormat, headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Build the HTTP response for a payload prepared with encode_tracks()
+
+    Args:
+        payload: Response body; columns are lists (COLUMNAR) or arrays (BINARY)
+        fmt: COLUMNAR or BINARY
+        headers: Extra response headers (e.g. Server-Timing)
+
+    Returns:
+        Response with the negotiated media type
+    """
+    if fmt == WireFormat.BINARY:
+        return Response(content=encode_binary(payload), media_type=BINARY_MEDIA_TYPE, headers=headers)
+    return JSONResponse(content=payload, media_type=COLUMNAR_MEDIA_TYPE, headers=headers)
+
+
+def encode_binary(payload: Dict[str, Any]) -> bytes:
+    """
+    Serialize a payload whose columns are NumPy arrays to the binary format
+
+    Args:
+        payload: JSON-compatible dict, NumPy arrays anywhere inside
+
+    Returns:
+        Encoded body
+    """
+    arrays: List[np.ndarray] = []
+
+    def extract(value: Any) -> Any:
+        if isinstance(value, np.ndarray):
+            arrays.append(value)
+            return {"$buffer": len(arrays) - 1}
+        if isinstance(value, dict):
+            return {k: extract(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [extract(v) for v in value]
+        return value
+
+    skeleton = extract(payload)
+
+    # Buffer offsets depend on the header length and vice versa: lay out
+    # buffers after a header sized with placeholder offsets, growing the
+    # reserved header space until the real header fits.
+    buffers = [np.ascontiguousarray(a, dtype=a.dtype.newbyteorder("<")) for a in arrays]
+    header_space = 0
+    while True:
+        offsets = []
+        offset = _align(_PREFIX.size + header_space)
+        for buffer in buffers:
+            offsets.append(offset)
+            offset = _align(offset + buffer.nbytes)
+
+        refs = [
+            {"offset": o, "dtype": b.dtype.str, "length": len(b)}
+            for o, b in zip(offsets, buffers)
+        ]
+        header = json.dumps(_resolve_refs(skeleton, refs), separators=(",", ":")).encode()
+        if len(header) <= header_space:
+            break
+        header_space = _align(_PREFIX.size + len(header)) - _PREFIX.size
+
+    body = bytearray(offset)
+    _PREFIX.pack_into(body, 0, BINARY_MAGIC, BINARY_VERSION, 0, header_space)
+    body[_PREFIX.size:_PREFIX.size + header_space] = header.ljust(header_space, b" ")
+    for o, buffer in zip(offsets, buffers):
+        body[o:o + buffer.nbytes] = buffer.tobytes()
+    return bytes(body)
+
+
+def decode_binary(body: bytes) -> Dict[str, Any]:
+    """
+    Decode the binary format (reference implementation for clients and tests)
+
+    Args:
+        body: Encoded body
+
+    Returns:
+        Payload with columns as NumPy arrays
+
+    Raises:
+        ValueError: If the body is not in the binary format
+    """
+    if len(body) < _PREFIX.size:
+        raise ValueError("Body too short for the binary track format")
+    magic, version, _, header_length = _PREFIX.unpack_from(body, 0)
+    if magic != BINARY_MAGIC or version != BINARY_VERSION:
+        raise ValueError("Not a binary track payload (bad magic or version)")
+
+    header = json.loads(bytes(body[_PREFIX.size:_PREFIX.size + header_length]))
+
+    def load(value: Any) -> Any:
+        if isinstance(value, dict):
+            if set(value) == {"$buffer"}:
+                ref = value["$buffer"]
+                return np.frombuffer(body, dtype=np.dtype(ref["dtype"]), count=ref["length"], offset=ref["offset"])
+            return {k: load(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [load(v) for v in value]
+        return value
+
+    return load(header)
+
+
+def _resolve_refs(value: Any, refs: List[Dict[str, Any]]) -> Any:
+    """Swap buffer indices for their {"offset", "dtype", "length"} references"""
+    if isinstance(value, dict):
+        if set(value) == {"$buffer"} and isinstance(value["$buffer"], int):
+            return {"$buffer": refs[value["$buffer"]]}
+        return {k: _resolve_refs(v, refs) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_resolve_refs(v, refs) for v in value]
+    return value
+
+
+def _align(offset: int) -> int:
+    return (offset + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
@@ -2,9 +2,13 @@
 Elevation data quality assessment and processing utilities
 """
 import gpxpy.gpx
-from typing import List, Dict
+from typing import List, Dict, Optional
 import math
 
+import numpy as np
+
+from app.services.dem_service import dem_service
+
 
 def assess_elevation_quality(points: List[gpxpy.gpx.GPXTrackPoint]) -> Dict:
     """
@@ -13,6 +17,39 @@ def assess_elevation_quality(points: List[gpxpy.gpx.GPXTrackPoint]) -> Dict:
     Args:
         points: List of GPX track points
 
+    Returns:
+        Quality report (see assess_elevation_array)
+    """
+    return assess_elevation_array(np.array([p.elevation for p in points], dtype=np.float64))
+
+
+def assess_elevation_series(elevation_values: List[Optional[float]]) -> Dict:
+    """
+    Assess the quality of a raw elevation series (None for missing values)
+
+    Args:
+        elevation_values: Elevation of each point in meters
+
+    Returns:
+        Quality report (see assess_elevation_array)
+    """
+    return assess_elevation_array(
+        np.array([np.nan if e is None else e for e in elevation_values], dtype=np.float64)
+    )
+
+
+def assess_elevation_array(elevation_values: np.ndarray) -> Dict:
+    """
+    Assess the quality of an elevation array (NaN for missing values)
+
+    Every check is derived from one array of differences between
+    consecutive known elevations: big jumps, identical values, and the
+    longest run of identical values (run-length encoding of the zero
+    differences).
+
+    Args:
+        elevation_values: Elevation of each point in meters
+
     Returns:
         Dictionary containing:
         - quality_score: 0-100 score
@@ -22,9 +59,10 @@ def assess_elevation_quality(points: List[gpxpy.gpx.GPXTrackPoint]) -> Dict:
         - statistics: Detailed statistics
     """
     # Check if we have elevation data
-    elevations = [p.elevation for p in points if p.elevation is not None]
+    elevation_values = np.asarray(elevation_values, dtype=np.float64)
+    elevations = elevation_values[~np.isnan(elevation_values)]
 
-    if not elevations:
+    if not len(elevations):
         return {
             'quality_score': 0,
             'source': 'missing',
@@ -43,40 +81,34 @@ def assess_elevation_quality(points: List[gpxpy.gpx.GPXTrackPoint]) -> Dict:
         }
 
     issues = []
+    point_count = len(elevations)
+    steps = np.diff(elevations)
+    abs_steps = np.abs(steps)
 
     # 1. Detect big jumps (>20m between consecutive points)
-    big_jumps = 0
-    max_jump = 0
-    for i in range(1, len(elevations)):
-        jump = abs(elevations[i] - elevations[i-1])
-        if jump > 20:
-            big_jumps += 1
-            max_jump = max(max_jump, jump)
-
-    jump_ratio = big_jumps / len(elevations) if elevations else 0
+    is_jump = abs_steps > 20
+    big_jumps = int(np.count_nonzero(is_jump))
+    max_jump = float(abs_steps[is_jump].max()) if big_jumps else 0
+
+    jump_ratio = big_jumps / point_count
     if jump_ratio > 0.05:  # More than 5% of points have big jumps
         issues.append(f'frequent_jumps ({big_jumps} jumps, max {max_jump:.1f}m)')
 
     # 2. Detect identical consecutive values (low-resolution GPS)
-    identical_count = 0
-    for i in range(1, len(elevations)):
-        if elevations[i] == elevations[i-1]:
-            identical_count += 1
+    is_identical = steps == 0
+    identical_count = int(np.count_nonzero(is_identical))
 
-    identical_ratio = identical_count / len(elevations) if elevations else 0
+    identical_ratio = identical_count / point_count
     if identical_ratio > 0.3:  # More than 30% identical
         issues.append(f'low_resolution ({identical_ratio:.1%} identical values)')
 
     # 3. Detect unrealistic patterns (constant elevation over long distance)
-    # Check for sequences of 10+ identical values
+    # Longest run of zero differences; a run of k zero steps is k+1 identical values
     max_identical_sequence = 0
-    current_sequence = 1
-    for i in range(1, len(elevations)):
-        if elevations[i] == elevations[i-1]:
-            current_sequence += 1
-            max_identical_sequence = max(max_identical_sequence, current_sequence)
-        else:
-            current_sequence = 1
+    if identical_count:
+        edges = np.diff(np.concatenate(([0], is_identical.view(np.int8), [0])))
+        run_lengths = np.flatnonzero(edges == -1) - np.flatnonzero(edges == 1)
+        max_identical_sequence = int(run_lengths.max()) + 1
 
     if max_identical_sequence > 10:
         issues.append(f'flat_sections ({max_identical_sequence} consecutive identical values)')
@@ -118,11 +150,13 @@ def assess_elevation_quality(points: List[gpxpy.gpx.GPXTrackPoint]) -> Dict:
         action = 'interpolate'  # Need better data
 
     # 7. Collect statistics
+    min_elevation = float(elevations.min())
+    max_elevation = float(elevations.max())
     statistics = {
-        'point_count': len(elevations),
-        'min_elevation': min(elevations),
-        'max_elevation': max(elevations),
-        'elevation_range': max(elevations) - min(elevations),
+        'point_count': point_count,
+        'min_elevation': min_elevation,
+        'max_elevation': max_elevation,
+        'elevation_range': max_elevation - min_elevation,
         'big_jumps': big_jumps,
         'jump_ratio': jump_ratio,
         'max_jump': max_jump,
@@ -140,47 +174,100 @@ def assess_elevation_quality(points: List[gpxpy.gpx.GPXTrackPoint]) -> Dict:
 
 
 def smooth_elevation_data(points: List[gpxpy.gpx.GPXTrackPoint],
-                          window_size: int = 5) -> List[gpxpy.gpx.GPXTrackPoint]:
+                          window_size: int = 5,
+                          in_place: bool = False) -> List[gpxpy.gpx.GPXTrackPoint]:
     """
     Smooth elevation data using a moving average filter
 
     Args:
         points: List of GPX track points
         window_size: Size of the moving average window (must be odd)
+        in_place: Update the elevation of the given points instead of
+            building new ones (cheaper when the originals are not reused)
 
     Returns:
-        New list of points with smoothed elevations
+        List of points with smoothed elevations (the input list if in_place)
     """
-    if window_size % 2 == 0:
-        window_size += 1  # Ensure window size is odd
-
-    elevations = [p.elevation if p.elevation is not None else 0 for p in points]
-    smoothed = []
-
-    half_window = window_size // 2
-
-    for i in range(len(elevations)):
-        # Define window boundaries
-        start = max(0, i - half_window)
-        end = min(len(elevations), i + half_window + 1)
-
-        # Calculate average in window
-        window_values = elevations[start:end]
-        avg_elevation = sum(window_values) / len(window_values)
-        smoothed.append(avg_elevation)
-
-    # Create new points with smoothed elevations
-    smoothed_points = []
-    for point, new_ele in zip(points, smoothed):
+    smoothed = smooth_elevation_series([p.elevation for p in points], window_size)
+    return _with_elevations(points, smoothed, in_place)
+
+
+def _with_elevations(points: List[gpxpy.gpx.GPXTrackPoint],
+                     elevations: List[Optional[float]],
+                     in_place: bool) -> List[gpxpy.gpx.GPXTrackPoint]:
+    """Points carrying the given elevations (updated in place, or new points)"""
+    if in_place:
+        for point, new_ele in zip(points, elevations):
+            point.elevation = new_ele
+        return points
+
+    # Create new points with the new elevations
+    new_points = []
+    for point, new_ele in zip(points, elevations):
         new_point = gpxpy.gpx.GPXTrackPoint(
             latitude=point.latitude,
             longitude=point.longitude,
             elevation=new_ele,
             time=point.time
         )
-        smoothed_points.append(new_point)
+        new_points.append(new_point)
+
+    return new_points
+
+
+def smooth_elevation_series(elevation_values: List[Optional[float]],
+                            window_size: int = 5) -> List[Optional[float]]:
+    """
+    Smooth a raw elevation series using a moving average filter
+
+    Args:
+        elevation_values: Elevation of each point in meters (None for missing)
+        window_size: Size of the moving average window (must be odd)
+
+    Returns:
+        List of smoothed elevations (None where the window has no elevation)
+    """
+    elevations = np.array(
+        [np.nan if e is None else e for e in elevation_values], dtype=np.float64
+    )
+    smoothed = smooth_elevation_array(elevations, window_size)
+    return [None if e != e else e for e in smoothed.tolist()]
+
+
+def smooth_elevation_array(elevations: np.ndarray, window_size: int = 5) -> np.ndarray:
+    """
+    Centered moving average of an elevation array, ignoring missing values
+
+    Window sums and counts of valid values come from two convolutions, so
+    the cost is a few array passes instead of one Python slice per point.
+    Windows are truncated at both ends of the series; a missing elevation
+    neither counts as 0 nor shifts the average of its neighbours.
+
+    Args:
+        elevations: Elevations in meters (NaN for missing)
+        window_size: Size of the moving average window (even sizes are
+            rounded up to the next odd size)
+
+    Returns:
+        float64 array of smoothed elevations (NaN where the window has none)
+    """
+    elevations = np.asarray(elevations, dtype=np.float64)
+    if not len(elevations):
+        return np.empty(0, dtype=np.float64)
+
+    half_window = max(window_size, 1) // 2
+    kernel = np.ones(2 * half_window + 1)
+
+    valid = ~np.isnan(elevations)
+    sums = np.convolve(np.where(valid, elevations, 0.0), kernel)
+    counts = np.convolve(valid.astype(np.float64), kernel)
 
-    return smoothed_points
+    # Full convolution is offset by half a window: realign on the input
+    sums = sums[half_window:half_window + len(elevations)]
+    counts = counts[half_window:half_window + len(elevations)]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, sums / counts, np.nan)
 
 
 def interpolate_elevation_linear(points: List[gpxpy.gpx.GPXTrackPoint],
@@ -219,14 +306,43 @@ def interpolate_elevation_linear(points: List[gpxpy.gpx.GPXTrackPoint],
     return interpolated_points
 
 
+def correct_elevation_array(elevations: np.ndarray,
+                            lat: Optional[np.ndarray],
+                            lon: Optional[np.ndarray]) -> tuple[np.ndarray, float]:
+    """
+    Replace unusable elevations with the local DEM
+
+    Points outside the DEM coverage (or all points, when no DEM is
+    configured or no coordinates are given) fall back to a wide moving
+    average of the recorded values.
+
+    Args:
+        elevations: Recorded elevations in meters (NaN for missing)
+        lat: Latitudes in degrees
+        lon: Longitudes in degrees
+
+    Returns:
+        Tuple of (corrected float64 array, fraction of points taken from the DEM)
+    """
+    smoothed = smooth_elevation_array(elevations, window_size=7)
+    if lat is None or lon is None or not len(smoothed) or not dem_service.available:
+        return smoothed, 0.0
+
+    dem = dem_service.elevations(lat, lon)
+    covered = ~np.isnan(dem)
+    return np.where(covered, dem, smoothed), float(covered.mean())
+
+
 def process_elevation_data(points: List[gpxpy.gpx.GPXTrackPoint],
-                           force_action: str = None) -> tuple[List[gpxpy.gpx.GPXTrackPoint], Dict]:
+                           force_action: str = None,
+                           in_place: bool = False) -> tuple[List[gpxpy.gpx.GPXTrackPoint], Dict]:
     """
     Process elevation data based on quality assessment
 
     Args:
         points: List of GPX track points
         force_action: Override automatic action ('use'|'smooth'|'interpolate')
+        in_place: Update the given points instead of building new ones
 
     Returns:
         Tuple of (processed_points, quality_report)
@@ -241,13 +357,74 @@ def process_elevation_data(points: List[gpxpy.gpx.GPXTrackPoint],
     if action == 'use':
         processed_points = points
     elif action == 'smooth':
-        processed_points = smooth_elevation_data(points, window_size=5)
+        processed_points = smooth_elevation_data(points, window_size=5, in_place=in_place)
     else:  # interpolate or any other case
-        # Cannot interpolate without additional context
-        # Return smoothed data as fallback
-        processed_points = smooth_elevation_data(points, window_size=7)
+        corrected, quality['dem_coverage'] = correct_elevation_array(
+            np.array([p.elevation for p in points], dtype=np.float64),
+            np.array([p.latitude for p in points], dtype=np.float64),
+            np.array([p.longitude for p in points], dtype=np.float64),
+        )
+        processed_points = _with_elevations(
+            points, [None if e != e else e for e in corrected.tolist()], in_place
+        )
 
     # Add processing info to quality report
     quality['processing_applied'] = action
 
     return processed_points, quality
+
+
+def process_elevation_series(elevations: List[Optional[float]],
+                             force_action: str = None) -> tuple[List[Optional[float]], Dict]:
+    """
+    Process a raw elevation series based on quality assessment
+
+    Same decisions as process_elevation_data, for callers that hold
+    elevations as plain values instead of gpxpy points. Without
+    coordinates, 'interpolate' falls back to smoothing.
+
+    Args:
+        elevations: Elevation of each point in meters (None for missing)
+        force_action: Override automatic action ('use'|'smooth'|'interpolate')
+
+    Returns:
+        Tuple of (processed_elevations, quality_report)
+    """
+    processed, quality = process_elevation_array(
+        np.array([np.nan if e is None else e for e in elevations], dtype=np.float64),
+        force_action,
+    )
+    return [None if e != e else e for e in processed.tolist()], quality
+
+
+def process_elevation_array(elevations: np.ndarray,
+                            force_action: str = None,
+                            lat: Optional[np.ndarray] = None,
+                            lon: Optional[np.ndarray] = None) -> tuple[np.ndarray, Dict]:
+    """
+    Process an elevation array based on quality assessment
+
+    Args:
+        elevations: Elevation of each point in meters (NaN for missing)
+        force_action: Override automatic action ('use'|'smooth'|'interpolate')
+        lat: Latitudes in degrees (enables DEM correction for 'interpolate')
+        lon: Longitudes in degrees
+
+    Returns:
+        Tuple of (processed float64 array, quality_report); the input array
+        is returned unchanged when no processing is needed
+    """
+    elevations = np.asarray(elevations, dtype=np.float64)
+    quality = assess_elevation_array(elevations)
+    action = force_action or quality['recommended_action']
+
+    if action == 'use':
+        processed = elevations
+    elif action == 'smooth':
+        processed = smooth_elevation_array(elevations, window_size=5)
+    else:  # interpolate or any other case
+        processed, quality['dem_coverage'] = correct_elevation_array(elevations, lat, lon)
+
+    quality['processing_applied'] = action
+
+    return processed, quality
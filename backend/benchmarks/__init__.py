@@ -0,0 +1,6 @@
+"""
+Performance benchmarks for the GPX processing services
+
+Run from the backend directory, e.g.:
+    python -m benchmarks.bench_parse --points 100000
+"""
@@ -0,0 +1,67 @@
+"""
+Benchmark: per-start forward scans vs the linear climb candidate search
+
+"scan" is the previous candidate search: from every start point it scans
+forward until the D+/D- ratio or the descent from the summit stops it, which
+turns quadratic on long gentle ascents. "linear" is
+ClimbDetector._find_climb_candidates. "match" counts the scan's candidates
+found identically by the linear search; on quantized elevations a climb can
+end one point apart where D+/D- equals the ratio exactly, a tie that float
+rounding decides differently for running sums and prefix sums.
+
+Usage (from backend/):
+    python -m benchmarks.bench_climbs --sizes 20000 100000
+    python -m benchmarks.bench_climbs --gpx track1.gpx track2.gpx
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.services.climb_detector import ClimbDetector
+from app.services.gpx_parse_service import GPXParseService
+from app.services.track_arrays import TrackArrays
+from tests.reference import dynamic_threshold, matching, scan_candidates
+from tests.synthetic import PROFILES
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def _compare(label: str, track: TrackArrays, scan_limit: int) -> None:
+    index = track.range_index(5)
+    args = (index, dynamic_threshold(track), 4.0, 4.0, 0.5)
+    linear, linear_s = _timed(ClimbDetector._find_climb_candidates, *args)
+    if len(track) <= scan_limit:
+        scanned, scan_s = _timed(scan_candidates, *args)
+        match = matching(linear, scanned)
+        print(f"{label:>24} {len(track):>8} {scan_s * 1000:>10.0f} {linear_s * 1000:>12.1f} "
+              f"{scan_s / linear_s:>7.0f}x {len(linear):>6} {match:>9}")
+    else:
+        print(f"{label:>24} {len(track):>8} {'-':>10} {linear_s * 1000:>12.1f} {'-':>8} {len(linear):>6} {'-':>9}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20_000, 100_000])
+    parser.add_argument("--gpx", nargs="*", default=[], help="GPX files to validate and time")
+    parser.add_argument("--scan-limit", type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(f"{'track':>24} {'points':>8} {'scan (ms)':>10} {'linear (ms)':>12} {'speedup':>8} {'climbs':>6} {'match':>9}")
+    for path in args.gpx:
+        with open(path, "rb") as f:
+            for analyzed in GPXParseService.analyze_gpx_bytes(f.read()):
+                _compare(path[-24:], analyzed.arrays, args.scan_limit)
+
+    rng = np.random.default_rng(42)
+    for size in args.sizes:
+        for name, generate in PROFILES.items():
+            _compare(name, generate(size, rng), args.scan_limit)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Benchmark: per-point window scan vs binary-searched rolling gradient
+
+The "scan" column is the previous calculate_gradient_profile, which masks
+the whole track for every point (O(n^2)); it is skipped above --scan-limit
+points.
+
+Usage (from backend/):
+    python -m benchmarks.bench_gradient --sizes 5000 20000 50000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.services.statistics_calculator import StatisticsCalculator
+from tests.reference import gradient_with_scan
+from tests.synthetic import mountain_track
+
+
+def _timed(func, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5_000, 20_000, 50_000])
+    parser.add_argument("--window", type=float, default=500)
+    parser.add_argument("--scan-limit", type=int, default=50_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    print(f"window {args.window:g} m, one sample per point")
+    print(f"{'points':>9} {'scan (ms)':>10} {'search (ms)':>12} {'speedup':>8}")
+    for size in args.sizes:
+        track = mountain_track(size, rng)
+        search = _timed(StatisticsCalculator.calculate_gradient_profile, track, args.window)
+        if size <= args.scan_limit:
+            scan = _timed(gradient_with_scan, track, args.window)
+            print(f"{size:>9} {scan * 1000:>10.0f} {search * 1000:>12.1f} {scan / search:>7.0f}x")
+        else:
+            print(f"{size:>9} {'-':>10} {search * 1000:>12.1f} {'-':>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Benchmark: map-matching recordings onto an out-and-back course
+
+The course goes out and back on the same path (the return 3 m to the
+side), so every recorded point has two passes of the course nearby.
+"matched" is CourseMatcher.match; "nearest" snaps each point to the
+closest course segment independently (CourseIndex.project), which is
+what picks the wrong leg. Errors are the course distance error in meters.
+
+Usage (from backend/):
+    python -m benchmarks.bench_matching --points 5000 20000 80000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.services.course_index import CourseIndex
+from app.services.course_matcher import CourseMatcher
+from tests.synthetic import generate_points
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--points", type=int, nargs="+", default=[5_000, 20_000, 80_000])
+    parser.add_argument("--noise", type=float, default=5.0, help="GPS noise in meters")
+    parser.add_argument("--nearest-sample", type=int, default=2_000, help="Points snapped by 'nearest'")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'points':>8} {'matched (ms)':>13} {'us/point':>9} {'p99 err':>8} {'max err':>8} {'nearest max err':>16}")
+    for size in args.points:
+        trail = np.array([p[:2] for p in generate_points(size // 2 + 1, seed=3)])
+        course = np.concatenate((trail, trail[::-1][1:] + [0.0, 3 / 78_000]))
+        index = CourseIndex(course[:, 0], course[:, 1])
+        lat = course[:, 0] + rng.normal(0, args.noise / 111_320, len(course))
+        lon = course[:, 1] + rng.normal(0, args.noise / 78_000, len(course))
+
+        start = time.perf_counter()
+        result = CourseMatcher.match(index, lat, lon, seconds=np.arange(len(course)) * 5.0)
+        elapsed = time.perf_counter() - start
+        error = np.abs(result.distance_along_m - index.cumulative)
+
+        sample = rng.choice(len(course), min(args.nearest_sample, len(course)), replace=False)
+        nearest = np.array([index.project(lat[i], lon[i]).distance_along_m for i in sample])
+        nearest_error = np.abs(nearest - index.cumulative[sample])
+
+        print(f"{len(course):>8} {elapsed * 1000:>13.1f} {elapsed / len(course) * 1e6:>9.1f} "
+              f"{np.percentile(error, 99):>8.1f} {error.max():>8.1f} {nearest_error.max():>16.0f}")
+
+
+if __name__ == "__main__":
+    main()
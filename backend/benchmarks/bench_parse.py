@@ -0,0 +1,73 @@
+"""
+Benchmark: gpxpy parse path vs streaming parse path
+
+Each path runs in its own subprocess so peak RSS is measured independently.
+
+Usage (from backend/):
+    python -m benchmarks.bench_parse --points 100000
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from tests.synthetic import generate_points, to_gpx_xml
+
+
+def _run_path(path: str, gpx_file: str) -> None:
+    """Child process: parse the file once with the given path and print metrics"""
+    from app.services.gpx_parse_service import GPXParseService
+
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+
+    if path == "gpxpy":
+        with open(gpx_file, "rb") as f:
+            content = f.read()
+        data = GPXParseService.parse_gpx_file(content.decode("utf-8"), "bench.gpx")
+    else:
+        with open(gpx_file, "rb") as f:
+            data = GPXParseService.parse_gpx_bytes(f, "bench.gpx")
+
+    elapsed = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    points = sum(len(t.points) for t in data.tracks)
+    print(f"{elapsed:.3f} {peak_kb} {peak_kb - baseline_kb} {points}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--points", type=int, default=100_000)
+    parser.add_argument("--child", choices=["gpxpy", "stream"])
+    parser.add_argument("--file")
+    args = parser.parse_args()
+
+    if args.child:
+        _run_path(args.child, args.file)
+        return
+
+    xml = to_gpx_xml(generate_points(args.points))
+    with tempfile.NamedTemporaryFile("w", suffix=".gpx", delete=False) as f:
+        f.write(xml)
+        gpx_file = f.name
+
+    try:
+        size_mb = os.path.getsize(gpx_file) / 1024 / 1024
+        print(f"{args.points} points, {size_mb:.1f} MB GPX")
+        print(f"{'path':<8} {'wall (s)':>9} {'peak RSS (MB)':>14} {'parse RSS (MB)':>15}")
+        for path in ("gpxpy", "stream"):
+            out = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_parse", "--child", path, "--file", gpx_file],
+                capture_output=True, text=True, check=True,
+            ).stdout.split()
+            elapsed, peak_kb, delta_kb, _ = out[-4:]
+            print(f"{path:<8} {float(elapsed):>9.3f} {int(peak_kb) / 1024:>14.1f} {int(delta_kb) / 1024:>15.1f}")
+    finally:
+        os.unlink(gpx_file)
+
+
+if __name__ == "__main__":
+    main()
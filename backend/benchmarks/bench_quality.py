@@ -0,0 +1,53 @@
+"""
+Benchmark: loop-based vs vectorized elevation quality assessment
+
+assess_with_loops (tests/reference.py) is the previous implementation (three
+Python passes plus min/max), the reference the vectorized version must match.
+
+Usage (from backend/):
+    python -m benchmarks.bench_quality --sizes 100000 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.utils.elevation_quality import assess_elevation_array
+from tests.reference import assess_with_loops
+from tests.synthetic import barometric_series, gps_series
+
+
+def _best_of(repeat: int, func, *args) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    print(f"best of {args.repeat}")
+    print(f"{'track':<11} {'points':>9} {'loops (ms)':>11} {'array (ms)':>11} {'speedup':>8} {'identical':>10}")
+    for size in args.sizes:
+        for name, generate in (("barometric", barometric_series), ("gps", gps_series)):
+            elevations = generate(size, rng)
+            as_list = [None if e != e else e for e in elevations.tolist()]
+
+            loops = _best_of(args.repeat, assess_with_loops, as_list)
+            array = _best_of(args.repeat, assess_elevation_array, elevations)
+            identical = assess_with_loops(as_list) == assess_elevation_array(elevations)
+            print(
+                f"{name:<11} {size:>9} {loops * 1000:>11.1f} {array * 1000:>11.2f} "
+                f"{loops / array:>7.0f}x {str(identical):>10}"
+            )
+
+
+if __name__ == "__main__":
+    main()
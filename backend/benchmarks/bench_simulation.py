@@ -0,0 +1,64 @@
+"""
+Benchmark: Monte Carlo race simulation and per-point predicted times
+
+"simulate" is RaceSimulator.simulate (samples x aid-station segments in one
+matrix, percentiles and cutoff-miss rates included). "points" is
+TimeCalculator.predict_point_times over every track interval.
+
+Usage (from backend/):
+    python -m benchmarks.bench_simulation --samples 10000 --stations 30
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.models.gpx import AidStation, AidStationScenario, CalcMode, SimulationSettings, TrailPlannerConfig
+from app.services.aid_station_service import AidStationService
+from app.services.race_simulator import RaceSimulator
+from app.services.time_calculator import TimeCalculator
+from benchmarks.bench_gradient import mountain_track
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--points", type=int, default=20_000)
+    parser.add_argument("--samples", type=int, nargs="+", default=[1_000, 10_000, 50_000])
+    parser.add_argument("--stations", type=int, default=30)
+    args = parser.parse_args()
+
+    track = mountain_track(args.points, np.random.default_rng(42))
+    total_km = track.distance[-1] / 1000
+    stations = [
+        AidStation(name=f"AS{i}", distance_km=km)
+        for i, km in enumerate(np.linspace(0, total_km, args.stations + 1))
+    ]
+    config = TrailPlannerConfig(
+        flat_pace_kmh=9, climb_penalty_min_per_100m=8, descent_bonus_min_per_100m=2,
+        fatigue_percent_per_interval=5, fatigue_interval_km=20,
+    )
+    # Cutoffs 5% behind the deterministic Trail Planner table
+    table = AidStationService.generate_aid_station_table(
+        track, stations, calc_mode=CalcMode.TRAIL_PLANNER, trail_planner_config=config
+    )
+    cutoffs = 1.05 * np.concatenate(([0.0], np.cumsum([s.estimated_time_minutes for s in table.segments])))
+
+    print(f"{args.points} points, {total_km:.0f} km, {args.stations} segments")
+    print(f"{'samples':>9} {'simulate (ms)':>14} {'finish p50 (h)':>15} {'miss finish':>12}")
+    for samples in args.samples:
+        settings = SimulationSettings(samples=samples, seed=1)
+        start = time.perf_counter()
+        result = RaceSimulator.simulate(track, stations, config, settings, cutoff_minutes=cutoffs)
+        elapsed = time.perf_counter() - start
+        print(f"{samples:>9} {elapsed * 1000:>14.1f} {result.arrival_minutes[1, -1] / 60:>15.2f} "
+              f"{result.miss_probability[-1]:>12.1%}")
+
+    scenario = AidStationScenario(calc_mode=CalcMode.TRAIL_PLANNER, trail_planner_config=config)
+    start = time.perf_counter()
+    minutes = TimeCalculator.predict_point_times(track, scenario)
+    TimeCalculator.locate_at_times(track, minutes, np.arange(0, minutes[-1], 15))
+    print(f"points: {(time.perf_counter() - start) * 1000:.1f} ms for {len(track)} points")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark: per-point window slicing vs convolution-based elevation smoothing
+
+The "loop" column is the previous implementation (one Python list slice per
+point); "array" is smooth_elevation_array. Both skip missing elevations.
+
+Usage (from backend/):
+    python -m benchmarks.bench_smoothing --sizes 10000 100000 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.utils.elevation_quality import smooth_elevation_array
+
+
+def _loop_smoothing(elevations: list, window_size: int) -> list:
+    """Previous ElevationService.smooth_elevation loop"""
+    smoothed = []
+    half_window = window_size // 2
+    for i in range(len(elevations)):
+        start = max(0, i - half_window)
+        end = min(len(elevations), i + half_window + 1)
+        window = [e for e in elevations[start:end] if e == e]
+        smoothed.append(sum(window) / len(window) if window else 0.0)
+    return smoothed
+
+
+def _best_of(repeat: int, func, *args) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--window", type=int, default=7)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    print(f"window {args.window}, best of {args.repeat}, 1% missing elevations")
+    print(f"{'points':>9} {'loop (ms)':>10} {'array (ms)':>11} {'speedup':>8} {'max diff (m)':>13}")
+    for size in args.sizes:
+        elevations = 1000 + np.cumsum(rng.normal(0, 1, size))
+        elevations[rng.random(size) < 0.01] = np.nan
+        as_list = elevations.tolist()
+
+        loop = _best_of(args.repeat, _loop_smoothing, as_list, args.window)
+        array = _best_of(args.repeat, smooth_elevation_array, elevations, args.window)
+
+        deviation = np.max(np.abs(
+            np.array(_loop_smoothing(as_list, args.window))
+            - np.nan_to_num(smooth_elevation_array(elevations, args.window), nan=0.0)
+        ))
+        print(f"{size:>9} {loop * 1000:>10.1f} {array * 1000:>11.2f} {loop / array:>7.0f}x {deviation:>13.1e}")
+
+
+if __name__ == "__main__":
+    main()
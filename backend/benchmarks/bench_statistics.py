@@ -0,0 +1,80 @@
+"""
+Benchmark: gpxpy statistics helpers vs the fused statistics kernel
+
+Also reports the largest relative deviation between both, per field.
+
+Usage (from backend/):
+    python -m benchmarks.bench_statistics --points 100000
+"""
+import argparse
+import time
+
+import gpxpy
+import numpy as np
+
+from app.services.statistics_calculator import StatisticsCalculator
+from tests.synthetic import generate_points, to_gpx_xml
+
+
+def _gpxpy_statistics(track: gpxpy.gpx.GPXTrack) -> dict:
+    """The gpxpy helper calls the kernel replaces"""
+    uphill, downhill = track.get_uphill_downhill()
+    moving_data = track.get_moving_data()
+    extremes = track.get_elevation_extremes()
+    track.get_time_bounds()
+    return {
+        "total_distance": track.length_3d(),
+        "total_elevation_gain": uphill,
+        "total_elevation_loss": downhill,
+        "max_elevation": extremes.maximum,
+        "min_elevation": extremes.minimum,
+        "duration": moving_data.moving_time,
+    }
+
+
+def _kernel_statistics(track: gpxpy.gpx.GPXTrack) -> dict:
+    points = [p for s in track.segments for p in s.points]
+    statistics = StatisticsCalculator.calculate_statistics_from_arrays(
+        lat=np.array([p.latitude for p in points]),
+        lon=np.array([p.longitude for p in points]),
+        elevation=np.array([p.elevation for p in points], dtype=np.float64),
+        time=np.array([int(p.time.timestamp() * 1_000_000) for p in points], dtype=np.int64),
+        tz_offset=np.zeros(len(points), dtype=np.int16),
+        segment_starts=np.cumsum([0] + [len(s.points) for s in track.segments[:-1]]),
+    )
+    return statistics.model_dump()
+
+
+def _best_of(func, track, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(track)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--points", type=int, default=100_000)
+    parser.add_argument("--segments", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    gpx = gpxpy.parse(to_gpx_xml(generate_points(args.points, elevation_noise_m=5), segments=args.segments))
+    track = gpx.tracks[0]
+
+    gpxpy_time, expected = _best_of(_gpxpy_statistics, track, args.repeat)
+    kernel_time, actual = _best_of(_kernel_statistics, track, args.repeat)
+
+    print(f"{args.points} points, {args.segments} segments")
+    print(f"gpxpy helpers: {gpxpy_time:.3f} s")
+    print(f"fused kernel:  {kernel_time:.3f} s (including array extraction)")
+    print(f"speedup:       {gpxpy_time / kernel_time:.1f}x")
+    for key, value in expected.items():
+        deviation = abs(actual[key] - value) / abs(value) if value else abs(actual[key])
+        print(f"  {key:<22} rel. deviation {deviation:.2e}")
+
+
+if __name__ == "__main__":
+    main()
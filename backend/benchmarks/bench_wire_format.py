@@ -0,0 +1,72 @@
+"""
+Benchmark: encode time and payload size of the track point wire formats
+
+Compares the default pydantic JSON response (one object per point) with the
+columnar JSON and binary encodings, raw and gzip-compressed.
+
+Usage (from backend/):
+    python -m benchmarks.bench_wire_format --points 100000
+"""
+import argparse
+import gzip
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.models.gpx import GPXData, GPXUploadResponse
+from app.services.gpx_parse_service import GPXParseService
+from app.services.wire_format import WireFormat, encode_tracks, render
+from tests.synthetic import generate_points, to_gpx_xml
+
+
+def _encode_json(tracks) -> bytes:
+    """What FastAPI does for a response_model=GPXUploadResponse route"""
+    payload = GPXUploadResponse(
+        success=True,
+        message="",
+        data=GPXData(filename="bench.gpx", tracks=[t.to_track() for t in tracks]),
+        file_id="0" * 64,
+    )
+    return JSONResponse(content=jsonable_encoder(payload)).body
+
+
+def _encode_compact(tracks, fmt: WireFormat) -> bytes:
+    payload = {
+        "success": True,
+        "message": "",
+        "data": {"filename": "bench.gpx", "tracks": encode_tracks(tracks, fmt), "waypoints": []},
+        "file_id": "0" * 64,
+    }
+    return render(payload, fmt).body
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--points", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    xml = to_gpx_xml(generate_points(args.points))
+    tracks = GPXParseService.analyze_gpx_bytes(xml.encode())
+
+    encoders = {
+        "json": _encode_json,
+        "columnar": lambda t: _encode_compact(t, WireFormat.COLUMNAR),
+        "binary": lambda t: _encode_compact(t, WireFormat.BINARY),
+    }
+
+    print(f"{args.points} points (best of {args.repeat})")
+    print(f"{'format':<9} {'encode (ms)':>12} {'size (MB)':>10} {'gzip (MB)':>10}")
+    for name, encode in encoders.items():
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            body = encode(tracks)
+            best = min(best, time.perf_counter() - start)
+        compressed = len(gzip.compress(body, compresslevel=6))
+        print(f"{name:<9} {best * 1000:>12.1f} {len(body) / 1e6:>10.2f} {compressed / 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""
+Reference implementations the optimized code is checked against
+
+Each function is the straightforward version an optimized service replaced,
+kept as the oracle for equivalence tests (and the baseline of benchmarks).
+"""
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.models.gpx import ClimbSegment
+from app.services.climb_detector import ClimbDetector
+from app.services.elevation_service import ElevationService
+from app.services.range_index import RangeIndex
+from app.services.track_arrays import TrackArrays
+
+
+def _scan_from(
+    index: RangeIndex,
+    distances: List[float],
+    smoothed_elevations: List[float],
+    start_idx: int,
+    min_elevation_gain: float,
+    min_ratio: float,
+    min_gradient: float,
+    min_distance_km: float,
+) -> Optional[dict]:
+    """Previous ClimbDetector._find_climb_candidate"""
+    prev_elevation = smoothed_elevations[start_idx]
+    current_d_plus = 0.0
+    current_d_minus = 0.0
+    best_end_idx = None
+    peak_elevation = smoothed_elevations[start_idx]
+    descent_from_peak = 0.0
+
+    for end_idx in range(start_idx + 1, len(distances)):
+        current_elevation = smoothed_elevations[end_idx]
+        elev_diff = current_elevation - prev_elevation
+        if elev_diff > 0:
+            current_d_plus += elev_diff
+            if current_elevation > peak_elevation:
+                peak_elevation = current_elevation
+                descent_from_peak = 0
+        else:
+            current_d_minus += abs(elev_diff)
+            descent_from_peak = peak_elevation - current_elevation
+        prev_elevation = current_elevation
+
+        if current_d_plus >= min_elevation_gain:
+            if current_d_minus == 0 or current_d_plus / current_d_minus > min_ratio:
+                best_end_idx = end_idx
+        if descent_from_peak > 50:
+            break
+        if current_d_minus > 0 and current_d_plus / current_d_minus < min_ratio:
+            break
+
+    if best_end_idx is None:
+        return None
+
+    refined_start = ElevationService.find_local_minimum(distances, smoothed_elevations, start_idx, 10)
+    refined_end = ElevationService.find_local_maximum(distances, smoothed_elevations, best_end_idx, 10)
+    stats = ClimbDetector._calculate_climb_stats(index, refined_start, refined_end)
+    distance_km = stats["distance"] / 1000
+    if (distance_km >= min_distance_km and
+            stats["d_plus"] >= min_elevation_gain and
+            (stats["d_minus"] == 0 or stats["d_plus"] > min_ratio * stats["d_minus"]) and
+            stats["avg_gradient"] >= min_gradient):
+        return {
+            "climb": ClimbSegment(
+                start_km=distances[refined_start] / 1000,
+                end_km=distances[refined_end] / 1000,
+                distance_km=distance_km,
+                elevation_gain=stats["d_plus"],
+                elevation_loss=stats["d_minus"],
+                avg_gradient=stats["avg_gradient"],
+            ),
+            "start_idx": refined_start,
+            "end_idx": refined_end,
+            "d_plus": stats["d_plus"],
+        }
+    return None
+
+
+def scan_candidates(
+    index: RangeIndex,
+    min_elevation_gain: float,
+    min_ratio: float,
+    min_gradient: float,
+    min_distance_km: float = 0.5,
+) -> List[dict]:
+    """Previous candidate search: one forward scan per start point"""
+    distances = index.distance.tolist()
+    smoothed_elevations = index.elevation.tolist()
+    candidates = []
+    i = 0
+    while i < len(distances) - 1:
+        candidate = _scan_from(
+            index, distances, smoothed_elevations, i,
+            min_elevation_gain, min_ratio, min_gradient, min_distance_km,
+        )
+        if candidate:
+            candidates.append(candidate)
+            i = candidate["end_idx"] + 1
+        else:
+            i += 1
+    return candidates
+
+
+def dynamic_threshold(track: TrackArrays) -> float:
+    """ClimbDetector's D+ threshold for a track"""
+    elevations = track.elevation[~np.isnan(track.elevation)]
+    return max(200.0, min(500.0, float(elevations.max() - elevations.min()) * 0.05))
+
+
+def _same_climb(x: dict, y: dict) -> bool:
+    return (x["start_idx"], x["end_idx"]) == (y["start_idx"], y["end_idx"]) and np.allclose(
+        list(x["climb"].model_dump().values()), list(y["climb"].model_dump().values())
+    )
+
+
+def same_candidates(a: List[dict], b: List[dict]) -> bool:
+    """Same bounds, and statistics equal up to float rounding"""
+    return len(a) == len(b) and all(_same_climb(x, y) for x, y in zip(a, b))
+
+
+def matching(a: List[dict], b: List[dict]) -> str:
+    """How many candidates of b are found identically in a"""
+    found = {(c["start_idx"], c["end_idx"]): c for c in a}
+    same = sum(1 for y in b if (y["start_idx"], y["end_idx"]) in found
+               and _same_climb(found[(y["start_idx"], y["end_idx"])], y))
+    return f"{same}/{len(b)}"
+
+
+def gradient_with_scan(track: TrackArrays, window_distance: float = 500) -> list:
+    """Previous implementation: one full-track mask per point"""
+    has_elevation = ~np.isnan(track.elevation)
+    distances = track.distance[has_elevation]
+    elevations = track.elevation[has_elevation]
+
+    gradients = []
+    for point_distance in track.distance.tolist():
+        window_start = point_distance - window_distance / 2
+        window_end = point_distance + window_distance / 2
+        window = np.flatnonzero((distances >= window_start) & (distances <= window_end))
+        if len(window) >= 2:
+            first, last = window[0], window[-1]
+            distance_diff = distances[last] - distances[first]
+            if distance_diff > 0:
+                gradients.append({
+                    "distance_km": point_distance / 1000,
+                    "gradient_percent": float((elevations[last] - elevations[first]) / distance_diff * 100),
+                })
+    return gradients
+
+
+def assess_with_loops(elevation_values: List[Optional[float]]) -> Dict:
+    """Previous assess_elevation_series (reference implementation)"""
+    # Check if we have elevation data
+    elevations = [e for e in elevation_values if e is not None]
+
+    if not elevations:
+        return {
+            'quality_score': 0,
+            'source': 'missing',
+            'issues': ['no_elevation_data'],
+            'recommended_action': 'interpolate',
+            'statistics': {}
+        }
+
+    if len(elevations) < 10:
+        return {
+            'quality_score': 20,
+            'source': 'insufficient',
+            'issues': ['too_few_points'],
+            'recommended_action': 'interpolate',
+            'statistics': {'point_count': len(elevations)}
+        }
+
+    issues = []
+
+    # 1. Detect big jumps (>20m between consecutive points)
+    big_jumps = 0
+    max_jump = 0
+    for i in range(1, len(elevations)):
+        jump = abs(elevations[i] - elevations[i-1])
+        if jump > 20:
+            big_jumps += 1
+            max_jump = max(max_jump, jump)
+
+    jump_ratio = big_jumps / len(elevations) if elevations else 0
+    if jump_ratio > 0.05:  # More than 5% of points have big jumps
+        issues.append(f'frequent_jumps ({big_jumps} jumps, max {max_jump:.1f}m)')
+
+    # 2. Detect identical consecutive values (low-resolution GPS)
+    identical_count = 0
+    for i in range(1, len(elevations)):
+        if elevations[i] == elevations[i-1]:
+            identical_count += 1
+
+    identical_ratio = identical_count / len(elevations) if elevations else 0
+    if identical_ratio > 0.3:  # More than 30% identical
+        issues.append(f'low_resolution ({identical_ratio:.1%} identical values)')
+
+    # 3. Detect unrealistic patterns (constant elevation over long distance)
+    # Check for sequences of 10+ identical values
+    max_identical_sequence = 0
+    current_sequence = 1
+    for i in range(1, len(elevations)):
+        if elevations[i] == elevations[i-1]:
+            current_sequence += 1
+            max_identical_sequence = max(max_identical_sequence, current_sequence)
+        else:
+            current_sequence = 1
+
+    if max_identical_sequence > 10:
+        issues.append(f'flat_sections ({max_identical_sequence} consecutive identical values)')
+
+    # 4. Calculate quality score
+    quality_score = 100.0
+
+    # Penalize for jumps (0-40 points penalty)
+    quality_score -= min(jump_ratio * 100, 40)
+
+    # Penalize for low resolution (0-30 points penalty)
+    quality_score -= min(identical_ratio * 50, 30)
+
+    # Penalize for long flat sections (0-20 points penalty)
+    if max_identical_sequence > 10:
+        quality_score -= min((max_identical_sequence - 10) * 2, 20)
+
+    quality_score = max(0, quality_score)
+
+    # 5. Determine source type
+    # Barometric: smooth, few jumps, good resolution
+    # GPS: more variation, can have jumps, lower resolution
+    if jump_ratio < 0.02 and identical_ratio < 0.1:
+        source = 'barometric'
+    elif jump_ratio < 0.1:
+        source = 'gps'
+    else:
+        source = 'unknown'
+
+    if quality_score < 40:
+        source = 'unknown'
+
+    # 6. Determine recommended action
+    if quality_score >= 80:
+        action = 'use'  # Use as-is
+    elif quality_score >= 50:
+        action = 'smooth'  # Apply smoothing
+    else:
+        action = 'interpolate'  # Need better data
+
+    # 7. Collect statistics
+    statistics = {
+        'point_count': len(elevations),
+        'min_elevation': min(elevations),
+        'max_elevation': max(elevations),
+        'elevation_range': max(elevations) - min(elevations),
+        'big_jumps': big_jumps,
+        'jump_ratio': jump_ratio,
+        'max_jump': max_jump,
+        'identical_ratio': identical_ratio,
+        'max_identical_sequence': max_identical_sequence
+    }
+
+    return {
+        'quality_score': quality_score,
+        'source': source,
+        'issues': issues,
+        'recommended_action': action,
+        'statistics': statistics
+    }
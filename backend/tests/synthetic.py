@@ -0,0 +1,151 @@
+"""
+Synthetic mountain tracks and elevation profiles for tests and benchmarks
+"""
+from datetime import datetime, timedelta, timezone
+import math
+import random
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.track_arrays import TrackArrays
+
+Point = Tuple[float, float, Optional[float], Optional[datetime]]
+
+
+def generate_points(
+    num_points: int,
+    seed: int = 42,
+    step_m: float = 10.0,
+    elevation_noise_m: float = 1.5,
+    with_time: bool = True,
+) -> List[Point]:
+    """
+    Generate a wandering trail with several climbs and GPS-like elevation noise
+
+    Args:
+        num_points: Number of points to generate
+        seed: Random seed (same seed gives the same track)
+        step_m: Approximate distance between consecutive points in meters
+        elevation_noise_m: Standard deviation of the elevation noise
+        with_time: Add one timestamp every ~5 seconds
+
+    Returns:
+        List of (lat, lon, elevation, time) tuples
+    """
+    rng = random.Random(seed)
+    lat, lon = 45.9, 6.87
+    heading = 0.0
+    start = datetime(2024, 8, 30, 18, 0, 0, tzinfo=timezone.utc)
+    seconds = 0.0
+    points: List[Point] = []
+
+    for i in range(num_points):
+        heading += rng.gauss(0, 0.15)
+        lat += (step_m / 111_320) * math.cos(heading)
+        lon += (step_m / (111_320 * math.cos(math.radians(lat)))) * math.sin(heading)
+
+        distance_km = i * step_m / 1000
+        elevation = (
+            1500
+            + 700 * math.sin(distance_km / 6.0)
+            + 250 * math.sin(distance_km / 1.7)
+            + rng.gauss(0, elevation_noise_m)
+        )
+        seconds += rng.uniform(3.0, 7.0)
+        time = start + timedelta(seconds=seconds) if with_time else None
+        points.append((lat, lon, elevation, time))
+
+    return points
+
+
+def to_gpx_xml(points: List[Point], name: str = "Synthetic Trail", segments: int = 1) -> str:
+    """
+    Serialize points as a GPX 1.1 document
+
+    Args:
+        points: Points from generate_points
+        name: Track name
+        segments: Number of <trkseg> the points are split into
+
+    Returns:
+        GPX XML string
+    """
+    chunk = max(1, math.ceil(len(points) / segments))
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<gpx version="1.1" creator="synthetic" xmlns="http://www.topografix.com/GPX/1/1">',
+        "<trk>",
+        f"<name>{name}</name>",
+    ]
+    for start in range(0, len(points), chunk):
+        lines.append("<trkseg>")
+        for lat, lon, ele, time in points[start:start + chunk]:
+            parts = [f'<trkpt lat="{lat:.7f}" lon="{lon:.7f}">']
+            if ele is not None:
+                parts.append(f"<ele>{ele:.1f}</ele>")
+            if time is not None:
+                parts.append(f"<time>{time.strftime('%Y-%m-%dT%H:%M:%SZ')}</time>")
+            parts.append("</trkpt>")
+            lines.append("".join(parts))
+        lines.append("</trkseg>")
+    lines.extend(["</trk>", "</gpx>"])
+    return "\n".join(lines)
+
+
+def _track(distance: np.ndarray, elevation: np.ndarray) -> TrackArrays:
+    n = len(distance)
+    return TrackArrays(np.zeros(n), np.zeros(n), elevation, distance)
+
+
+def alpine(size: int, rng: np.random.Generator) -> TrackArrays:
+    """Big cols and short steep walls, 5-15 m spacing, GPS noise"""
+    distance = np.concatenate([[0.0], np.cumsum(rng.uniform(5, 15, size - 1))])
+    km = distance / 1000
+    elevation = 1500 + 700 * np.sin(km / 6.0) + 250 * np.sin(km / 1.7) + rng.normal(0, 1.5, size)
+    return _track(distance, elevation)
+
+
+def gentle_ascents(size: int, rng: np.random.Generator) -> TrackArrays:
+    """Long 2-3% ascents with barometric noise: climbs that fail the gradient test"""
+    distance = np.arange(size) * 10.0
+    elevation = 500 + 0.025 * (distance % 40_000) + np.cumsum(rng.normal(0, 0.05, size))
+    return _track(distance, elevation)
+
+
+def rolling(size: int, rng: np.random.Generator) -> TrackArrays:
+    """Short hills, faux-plats and a random walk, quantized to 1 m like many GPS units"""
+    distance = np.concatenate([[0.0], np.cumsum(rng.uniform(3, 30, size - 1))])
+    km = distance / 1000
+    elevation = 800 + 120 * np.sin(km * 1.3) + 60 * np.sin(km * 4.1) + np.cumsum(rng.normal(0, 0.8, size))
+    return _track(distance, np.round(elevation))
+
+
+PROFILES: Dict[str, Callable[[int, np.random.Generator], TrackArrays]] = {
+    "alpine": alpine,
+    "gentle": gentle_ascents,
+    "rolling": rolling,
+}
+
+
+def mountain_track(size: int, rng: np.random.Generator) -> TrackArrays:
+    """Irregular 2-20 m spacing, rolling elevation, 1% missing elevations"""
+    distance = np.concatenate([[0.0], np.cumsum(rng.uniform(2, 20, size - 1))])
+    elevation = 1500 + 300 * np.sin(distance / 2000) + np.cumsum(rng.normal(0, 0.5, size))
+    elevation[rng.random(size) < 0.01] = np.nan
+    return TrackArrays(np.zeros(size), np.zeros(size), elevation, distance)
+
+
+def barometric_series(size: int, rng: np.random.Generator) -> np.ndarray:
+    """Smooth 0.1 m resolution altimeter trace"""
+    return np.round(1000 + np.cumsum(rng.normal(0, 0.3, size)), 1)
+
+
+def gps_series(size: int, rng: np.random.Generator) -> np.ndarray:
+    """Noisy 1 m resolution GPS elevations with occasional spikes and dropouts"""
+    elevations = 1000 + np.cumsum(rng.normal(0, 0.3, size)) + rng.normal(0, 3, size)
+    spikes = rng.random(size) < 0.03
+    elevations[spikes] += rng.choice([-40.0, 40.0], spikes.sum())
+    elevations = np.round(elevations)
+    elevations[rng.random(size) < 0.005] = np.nan
+    return elevations
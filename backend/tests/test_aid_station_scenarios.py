@@ -0,0 +1,155 @@
+"""
+Tests for batched aid station tables (one geometry pass, many time scenarios)
+"""
+import hashlib
+
+import numpy as np
+import pytest
+
+from app.models.gpx import AidStation, AidStationScenario, CalcMode, TrailPlannerConfig
+from app.services.aid_station_service import AidStationService
+from app.services.gpx_parse_service import GPXParseService
+from app.services.parse_cache import parse_cache
+from app.services.time_calculator import TimeCalculator
+from tests.synthetic import generate_points, mountain_track, to_gpx_xml
+
+
+SCENARIOS = [
+    AidStationScenario(),
+    AidStationScenario(calc_mode=CalcMode.CONSTANT_PACE, constant_pace_kmh=8),
+    AidStationScenario(
+        calc_mode=CalcMode.TRAIL_PLANNER,
+        trail_planner_config=TrailPlannerConfig(
+            flat_pace_kmh=10, climb_penalty_min_per_100m=6, descent_bonus_min_per_100m=2,
+        ),
+    ),
+    AidStationScenario(
+        calc_mode=CalcMode.TRAIL_PLANNER,
+        trail_planner_config=TrailPlannerConfig(
+            flat_pace_kmh=9,
+            climb_penalty_min_per_100m=8,
+            descent_bonus_min_per_100m=20,
+            fatigue_percent_per_interval=10,
+            fatigue_interval_km=5,
+        ),
+    ),
+]
+
+
+@pytest.fixture
+def track():
+    return mountain_track(5000, np.random.default_rng(3))
+
+
+@pytest.fixture
+def stations(track):
+    total_km = track.distance[-1] / 1000
+    return [AidStation(name=f"AS{i}", distance_km=km) for i, km in enumerate(np.linspace(0, total_km, 8))]
+
+
+class TestEstimateSegmentTimes:
+    """The scenario matrix reproduces estimate_segment_time"""
+
+    def test_matches_scalar_estimates(self):
+        rng = np.random.default_rng(0)
+        distance = rng.uniform(0, 15, 40)
+        gain = rng.uniform(0, 1500, 40)
+        loss = rng.uniform(0, 1500, 40)
+        gradient = rng.uniform(-30, 30, 40)
+        cumulative = np.concatenate(([0.0], np.cumsum(distance)[:-1]))
+
+        matrix = TimeCalculator.estimate_segment_times(distance, gain, loss, gradient, cumulative, SCENARIOS)
+
+        assert matrix.shape == (len(SCENARIOS), 40)
+        for row, scenario in zip(matrix, SCENARIOS):
+            expected = [
+                TimeCalculator.estimate_segment_time(
+                    d, g, l, a,
+                    calc_mode=scenario.calc_mode,
+                    constant_pace_kmh=scenario.constant_pace_kmh,
+                    trail_planner_config=scenario.trail_planner_config,
+                    cumulative_distance_km=c,
+                )
+                for d, g, l, a, c in zip(distance, gain, loss, gradient, cumulative)
+            ]
+            np.testing.assert_allclose(row, expected, rtol=1e-12, atol=1e-12)
+
+    def test_missing_mode_parameter_gives_nan(self):
+        scenario = AidStationScenario.model_construct(calc_mode=CalcMode.CONSTANT_PACE, constant_pace_kmh=None)
+
+        matrix = TimeCalculator.estimate_segment_times([5.0], [0.0], [0.0], [0.0], [0.0], [scenario])
+
+        assert np.isnan(matrix).all()
+
+    def test_negative_cumulative_raises(self):
+        with pytest.raises(ValueError):
+            TimeCalculator.estimate_segment_times([1.0], [0.0], [0.0], [0.0], [-1.0], SCENARIOS)
+
+
+class TestGenerateAidStationTables:
+    """One table per scenario, identical to separate single-table requests"""
+
+    def test_matches_single_tables(self, track, stations):
+        tables = AidStationService.generate_aid_station_tables(track, stations, SCENARIOS)
+
+        assert len(tables) == len(SCENARIOS)
+        for table, scenario in zip(tables, SCENARIOS):
+            single = AidStationService.generate_aid_station_table(
+                track,
+                stations,
+                calc_mode=scenario.calc_mode,
+                constant_pace_kmh=scenario.constant_pace_kmh,
+                trail_planner_config=scenario.trail_planner_config,
+            )
+            assert table.total_time_minutes == pytest.approx(single.total_time_minutes)
+            assert table.total_elevation_gain == pytest.approx(single.total_elevation_gain)
+            for leg, expected in zip(table.segments, single.segments):
+                assert leg.estimated_time_minutes == pytest.approx(expected.estimated_time_minutes)
+                assert leg.avg_gradient == pytest.approx(expected.avg_gradient)
+
+    def test_requires_two_stations(self, track):
+        with pytest.raises(ValueError, match="At least 2"):
+            AidStationService.generate_aid_station_tables(track, [AidStation(name="A", distance_km=0)], SCENARIOS)
+
+
+class TestScenariosEndpoint:
+    """POST /gpx/aid-station-scenarios"""
+
+    @pytest.fixture
+    def file_id(self):
+        content = to_gpx_xml(generate_points(2000)).encode()
+        file_id = hashlib.sha256(content).hexdigest()
+        parse_cache.put(file_id, GPXParseService.analyze_gpx_bytes(content))
+        return file_id
+
+    def test_one_table_per_scenario(self, client, file_id):
+        body = {
+            'file_id': file_id,
+            'aid_stations': [
+                {'name': 'Start', 'distance_km': 0},
+                {'name': 'Mid', 'distance_km': 2},
+                {'name': 'End', 'distance_km': 4},
+            ],
+            'scenarios': [scenario.model_dump() for scenario in SCENARIOS],
+        }
+
+        response = client.post('/api/v1/gpx/aid-station-scenarios', json=body)
+
+        assert response.status_code == 200
+        results = response.json()['results']
+        assert [r['scenario']['calc_mode'] for r in results] == [s.calc_mode.value for s in SCENARIOS]
+        assert all(len(r['table']['segments']) == 2 for r in results)
+
+    @pytest.mark.parametrize("scenarios", [
+        [],
+        [{'calc_mode': 'constant_pace'}],
+        [{'calc_mode': 'naismith'}] * 51,
+    ])
+    def test_invalid_scenarios(self, client, file_id, scenarios):
+        body = {
+            'file_id': file_id,
+            'aid_stations': [{'name': 'Start', 'distance_km': 0}, {'name': 'End', 'distance_km': 4}],
+            'scenarios': scenarios,
+        }
+
+        assert client.post('/api/v1/gpx/aid-station-scenarios', json=body).status_code == 422
@@ -0,0 +1,162 @@
+"""
+Tests for the linear-time climb candidate search
+"""
+import numpy as np
+import pytest
+
+from app.api.race_recovery import read_track
+from app.models.gpx import ClimbSegment
+from app.services.climb_detector import ClimbDetector
+from app.services.range_index import RangeIndex
+from tests.reference import dynamic_threshold, same_candidates, scan_candidates
+from tests.synthetic import PROFILES, alpine
+
+
+@pytest.fixture(scope="function", autouse=True)
+def setup_database():
+    # Pure unit tests here — no DB needed.
+    yield
+
+
+class TestCandidateSearch:
+    """Same candidates as the per-start forward scans"""
+
+    @pytest.mark.parametrize("seed", range(4))
+    @pytest.mark.parametrize("profile", sorted(PROFILES))
+    def test_default_criteria(self, profile, seed):
+        track = PROFILES[profile](1500 if profile == "gentle" else 5000, np.random.default_rng(seed))
+        args = (track.range_index(5), dynamic_threshold(track), 4.0, 4.0, 0.5)
+
+        assert same_candidates(ClimbDetector._find_climb_candidates(*args), scan_candidates(*args))
+
+    @pytest.mark.parametrize("smoothing_window", [1, 5, 9])
+    @pytest.mark.parametrize("criteria", [(50.0, 2.0, 2.0, 0.2), (20.0, 1.5, 1.0, 0.1)])
+    def test_loose_criteria(self, smoothing_window, criteria):
+        # Unquantized elevations: no exact D+/D- ties for float rounding to decide
+        track = alpine(5000, np.random.default_rng(1))
+        args = (track.range_index(smoothing_window), *criteria)
+
+        linear = ClimbDetector._find_climb_candidates(*args)
+
+        assert linear
+        assert same_candidates(linear, scan_candidates(*args))
+
+    @pytest.mark.parametrize("gpx_fixture", ["sample_gpx_with_climb", "sample_gpx_simple"])
+    @pytest.mark.parametrize("smoothing_window", [1, 5])
+    def test_repo_gpx_files(self, gpx_fixture, smoothing_window, request):
+        # Raw elevations of the GPX (upload analysis would flatten these
+        # short files as insufficient elevation data)
+        track = read_track(request.getfixturevalue(gpx_fixture).encode())
+        found = 0
+        for criteria in [(dynamic_threshold(track), 4.0, 4.0, 0.5), (50.0, 1.5, 1.0, 0.1)]:
+            args = (track.range_index(smoothing_window), *criteria)
+            linear = ClimbDetector._find_climb_candidates(*args)
+
+            assert same_candidates(linear, scan_candidates(*args))
+            found += len(linear)
+        assert found or gpx_fixture == "sample_gpx_simple"
+
+    def test_descent_stops(self):
+        elevations = [100.0, 160.0, 150.0, 120.0, 108.0, 170.0, 100.0]
+        stops = ClimbDetector._descent_stops(elevations, 50)
+        # From 0 and 1 the summit is 160: 108 is the first point 50m+ below it
+        assert stops.tolist() == [4, 4, 6, 6, 6, 6, 7]
+
+    def test_next_smaller(self):
+        assert ClimbDetector._next_smaller([3.0, 1.0, 2.0, 2.0, 0.0]).tolist() == [1, 4, 4, 4, 5]
+
+    def test_short_and_flat_tracks(self):
+        track = alpine(2, np.random.default_rng(0))
+        assert ClimbDetector._find_climb_candidates(track.range_index(5), 200, 4, 4) == []
+        assert ClimbDetector.detect_climbs(track) == []
+
+
+class TestDetectClimbs:
+    """End-to-end detection on a mountain profile"""
+
+    def test_finds_the_big_climbs(self):
+        track = alpine(20_000, np.random.default_rng(3))
+
+        climbs = ClimbDetector.detect_climbs(track)
+
+        assert climbs
+        for climb in climbs:
+            assert climb.elevation_gain >= dynamic_threshold(track)
+            assert climb.avg_gradient >= 4.0
+            assert climb.distance_km >= 0.5
+        starts = [c.start_km for c in climbs]
+        assert starts == sorted(starts)
+
+
+def pairwise_overlap_removal(candidates):
+    """Previous _remove_overlaps: each candidate checked against every kept range"""
+    kept = []
+    for candidate in sorted(candidates, key=lambda x: x["d_plus"], reverse=True):
+        if all(candidate["end_idx"] < k["start_idx"] or candidate["start_idx"] > k["end_idx"] for k in kept):
+            kept.append(candidate)
+    return sorted(kept, key=lambda x: x["start_idx"])
+
+
+def candidate(start_idx, end_idx, d_plus=100.0):
+    climb = ClimbSegment(
+        start_km=start_idx, end_km=end_idx, distance_km=0, elevation_gain=d_plus, elevation_loss=0, avg_gradient=0
+    )
+    return {"climb": climb, "start_idx": start_idx, "end_idx": end_idx, "d_plus": d_plus}
+
+
+class TestOverlapsAndMerging:
+    """Climbs carry their point indices through overlap removal and merging"""
+
+    def test_overlap_removal_matches_pairwise(self):
+        rng = np.random.default_rng(5)
+        starts = rng.integers(0, 10_000, 500)
+        candidates = [
+            candidate(int(s), int(s + length), float(d))
+            for s, length, d in zip(starts, rng.integers(0, 400, 500), rng.uniform(0, 1000, 500))
+        ]
+
+        kept = ClimbDetector._remove_overlaps(candidates)
+
+        assert kept == pairwise_overlap_removal(candidates)
+
+    def test_touching_ranges_overlap(self):
+        kept = ClimbDetector._remove_overlaps([candidate(0, 10, 50.0), candidate(10, 20, 80.0), candidate(11, 30, 10.0)])
+        assert [(c["start_idx"], c["end_idx"]) for c in kept] == [(10, 20)]
+
+    def test_merge_uses_climb_indices_on_dense_tracks(self):
+        # 1 m spacing: a 10 m km-tolerance lookup would land 10 points early
+        distance = np.arange(3001, dtype=float)
+        elevation = np.concatenate([
+            np.linspace(0, 100, 1001),            # climb 1: points 0-1000
+            np.linspace(100, 95, 201)[1:],        # faux-plat: 1000-1200
+            np.linspace(95, 200, 1801)[1:],       # climb 2: 1200-3000
+        ])
+        index = RangeIndex(distance, elevation)
+
+        merged = ClimbDetector._merge_consecutive_climbs(
+            [candidate(0, 1000), candidate(1200, 3000)],
+            index,
+            max_gap_distance=500,
+            max_gap_descent=10,
+            min_elevation_gain=100,
+            min_ratio=4.0,
+            min_gradient=4.0,
+            min_distance_km=0.5,
+        )
+
+        assert len(merged) == 1
+        assert merged[0].start_km == 0.0
+        assert merged[0].end_km == 3.0
+        assert merged[0].elevation_gain == pytest.approx(205.0)
+        assert merged[0].elevation_loss == pytest.approx(5.0)
+
+    def test_gap_descent_blocks_merge(self):
+        distance = np.arange(301, dtype=float) * 10
+        elevation = np.concatenate([np.linspace(0, 100, 101), np.linspace(100, 0, 101)[1:], np.linspace(0, 100, 101)[1:]])
+        climbs = [candidate(0, 100), candidate(200, 300)]
+
+        merged = ClimbDetector._merge_consecutive_climbs(
+            climbs, RangeIndex(distance, elevation), max_gap_distance=2000, max_gap_descent=50
+        )
+
+        assert merged == [c["climb"] for c in climbs]
@@ -0,0 +1,153 @@
+"""
+Tests for multi-parameter climb detection and the climb result cache
+"""
+import hashlib
+
+import numpy as np
+import pytest
+
+from app.models.gpx import ClimbParameters, ClimbSegment
+from app.services.climb_cache import ClimbCache, climb_cache
+from app.services.climb_detector import ClimbDetector
+from app.services.gpx_parse_service import GPXParseService
+from app.services.parse_cache import parse_cache
+from tests.synthetic import alpine, generate_points, rolling, to_gpx_xml
+
+
+@pytest.fixture(autouse=True)
+def empty_climb_cache():
+    climb_cache.clear()
+    yield
+    climb_cache.clear()
+
+
+@pytest.fixture
+def track():
+    return alpine(8000, np.random.default_rng(2))
+
+
+class TestDetectClimbsSweep:
+    """One sweep gives the same climbs as separate detections"""
+
+    def test_matches_separate_detections(self, track):
+        parameter_sets = [
+            ClimbParameters(),
+            ClimbParameters(min_ratio=2.5, min_gradient=3.0),
+            ClimbParameters(smoothing_window=9, min_distance_km=1.0),
+            ClimbParameters(min_ratio=2.5, min_gradient=6.0, smoothing_window=9),
+        ]
+
+        sweep = ClimbDetector.detect_climbs_sweep(track, parameter_sets)
+
+        for parameters, climbs in zip(parameter_sets, sweep):
+            assert climbs == ClimbDetector.detect_climbs(
+                track,
+                min_ratio=parameters.min_ratio,
+                min_gradient=parameters.min_gradient,
+                smoothing_window=parameters.smoothing_window,
+                min_distance_km=parameters.min_distance_km,
+            )
+
+    def test_explicit_elevation_threshold(self, track):
+        hills = rolling(8000, np.random.default_rng(2))
+        low, dynamic = ClimbDetector.detect_climbs_sweep(
+            hills, [ClimbParameters(min_elevation_gain=50), ClimbParameters()]
+        )
+        (high,) = ClimbDetector.detect_climbs_sweep(track, [ClimbParameters(min_elevation_gain=1000)])
+
+        # The dynamic threshold is at least 200m
+        assert len(low) > len(dynamic)
+        assert any(climb.elevation_gain < 200 for climb in low)
+        assert high and all(climb.elevation_gain >= 1000 for climb in high)
+
+    def test_track_without_elevation(self):
+        track = alpine(10, np.random.default_rng(0))
+        track.elevation[:] = np.nan
+        assert ClimbDetector.detect_climbs_sweep(track, [ClimbParameters()] * 2) == [[], []]
+
+
+class TestClimbCache:
+    """LRU keyed by track digest and parameters"""
+
+    def test_hit_miss_and_eviction(self):
+        cache = ClimbCache(max_entries=2)
+        climbs = [ClimbSegment(start_km=0, end_km=1, distance_km=1, elevation_gain=300,
+                               elevation_loss=0, avg_gradient=30)]
+
+        assert cache.get("a", ClimbParameters()) is None
+        cache.put("a", ClimbParameters(), climbs)
+        cache.put("a", ClimbParameters(min_ratio=3), [])
+        assert cache.get("a", ClimbParameters()) == climbs
+        cache.put("b", ClimbParameters(), [])
+
+        assert cache.get("a", ClimbParameters(min_ratio=3)) is None  # least recently used
+        assert cache.stats() == {"hits": 1, "misses": 2, "evictions": 1, "entries": 2, "max_entries": 2}
+
+    def test_digest_follows_content(self, track):
+        other = alpine(8000, np.random.default_rng(2))
+        assert track.digest() == other.digest()
+        other.elevation[100] += 1
+        assert track.digest() != other.digest()
+
+
+class TestSweepEndpoint:
+    """POST /gpx/detect-climbs-sweep"""
+
+    @pytest.fixture
+    def file_id(self):
+        # Stored like /gpx/upload does, without spending the upload rate limit
+        content = to_gpx_xml(generate_points(4000)).encode()
+        file_id = hashlib.sha256(content).hexdigest()
+        parse_cache.put(file_id, GPXParseService.analyze_gpx_bytes(content))
+        return file_id
+
+    def test_grid_results_in_order_then_cached(self, client, file_id):
+        request = {'file_id': file_id, 'grid': {'min_ratio': [2.0, 4.0], 'min_gradient': [3.0, 5.0]}}
+
+        first = client.post('/api/v1/gpx/detect-climbs-sweep', json=request)
+        second = client.post('/api/v1/gpx/detect-climbs-sweep', json=request)
+
+        assert first.status_code == 200
+        results = first.json()['results']
+        assert [(r['parameters']['min_ratio'], r['parameters']['min_gradient']) for r in results] == [
+            (2.0, 3.0), (2.0, 5.0), (4.0, 3.0), (4.0, 5.0)
+        ]
+        assert first.json()['cached'] == 0
+        assert second.json() == {**first.json(), 'cached': 4}
+
+    def test_default_set_shares_the_detect_climbs_cache(self, client, file_id):
+        climbs = client.post(
+            '/api/v1/gpx/detect-climbs', json={'file_id': file_id, 'start_km': 0, 'end_km': 0}
+        ).json()
+
+        sweep = client.post(
+            '/api/v1/gpx/detect-climbs-sweep', json={'file_id': file_id, 'parameter_sets': [{}, {}]}
+        ).json()
+
+        assert sweep['cached'] == 2
+        assert [r['climbs'] for r in sweep['results']] == [climbs, climbs]
+
+    def test_repeated_parameter_sets_are_detected_once(self, client, file_id):
+        sweep = client.post(
+            '/api/v1/gpx/detect-climbs-sweep',
+            json={'file_id': file_id, 'parameter_sets': [{'min_ratio': 3}, {'min_ratio': 3}]},
+        ).json()
+
+        assert sweep['results'][0] == sweep['results'][1]
+        assert climb_cache.stats()['entries'] == 1
+
+    @pytest.mark.parametrize("body", [
+        {},
+        {'grid': {'min_ratio': []}},
+        {'grid': {'min_ratio': [0]}},
+        {'grid': {'min_ratio': list(range(1, 30)), 'min_gradient': list(range(1, 30))}},
+    ])
+    def test_invalid_requests(self, client, file_id, body):
+        response = client.post('/api/v1/gpx/detect-climbs-sweep', json={'file_id': file_id, **body})
+        assert response.status_code == 422
+
+    def test_unknown_file_id(self, client):
+        response = client.post(
+            '/api/v1/gpx/detect-climbs-sweep', json={'file_id': '0' * 64, 'parameter_sets': [{}]}
+        )
+        assert response.status_code == 404
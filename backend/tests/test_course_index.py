@@ -0,0 +1,160 @@
+"""
+Tests for the nearest-point course index
+"""
+import numpy as np
+import pytest
+
+from app.services.course_index import MAX_CELLS_PER_ITEM, CourseIndex
+from tests.synthetic import generate_points
+
+
+@pytest.fixture(scope="function", autouse=True)
+def setup_database():
+    # Pure unit tests here — no DB needed.
+    yield
+
+
+@pytest.fixture(scope="module")
+def course():
+    points = generate_points(20000, seed=4)
+    lat = np.array([p[0] for p in points])
+    lon = np.array([p[1] for p in points])
+    return CourseIndex(lat, lon)
+
+
+def queries(course, count, spread_m=300, seed=0):
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, len(course), count)
+    return (
+        course.lat[picks] + rng.normal(0, spread_m / 111_320, count),
+        course.lon[picks] + rng.normal(0, spread_m / 78_000, count),
+    )
+
+
+def brute_force_segment(course, x, y, start=0, stop=None):
+    stop = course.num_segments if stop is None else stop
+    segments = np.arange(start, stop)
+    return course._segment_distances(segments, x, y).min()
+
+
+class TestProject:
+    """Nearest-segment projection"""
+
+    def test_matches_brute_force(self, course):
+        for lat, lon in zip(*queries(course, 200, seed=1)):
+            x, y = course.to_xy(lat, lon)
+
+            projection = course.project(lat, lon)
+
+            assert projection.offset_m == pytest.approx(brute_force_segment(course, x, y), abs=1e-6)
+
+    def test_window(self, course):
+        start, stop = course.window(50, 60)
+        lat, lon = course.lat[1000], course.lon[1000]  # Far outside the window
+
+        projection = course.project(lat, lon, start, stop)
+
+        assert start <= projection.segment < stop
+        x, y = course.to_xy(lat, lon)
+        assert projection.offset_m == pytest.approx(brute_force_segment(course, x, y, start, stop), abs=1e-6)
+        assert 50_000 <= course.cumulative[projection.segment] <= 60_000
+
+    def test_empty_range(self, course):
+        assert course.project(45.9, 6.87, 10, 10) is None
+
+    def test_point_far_from_the_course(self, course, monkeypatch):
+        from app.services import course_index
+
+        rings = []
+        ring = course_index._Grid.ring
+        monkeypatch.setattr(course_index._Grid, "ring", lambda grid, *args: rings.append(args) or ring(grid, *args))
+        lat, lon = course.lat.max() + 5.0, course.lon.min() - 5.0  # ~600 km away
+
+        projection = course.project(lat, lon)
+
+        x, y = course.to_xy(lat, lon)
+        assert projection.offset_m == pytest.approx(brute_force_segment(course, float(x), float(y)), abs=1e-6)
+        assert len(rings) == course_index.MAX_RINGS + 1
+
+    def test_point_between_two_vertices(self):
+        course = CourseIndex([45.0, 45.0, 45.0], [6.0, 6.01, 6.02])
+
+        projection = course.project(45.0001, 6.005)
+
+        assert projection.segment == 0
+        assert projection.fraction == pytest.approx(0.5)
+        assert projection.distance_along_m == pytest.approx(course.cumulative[1] / 2)
+        assert projection.offset_m == pytest.approx(11.1, abs=0.1)
+        assert projection.lat == pytest.approx(45.0) and projection.lon == pytest.approx(6.005)
+
+    def test_single_point_course(self):
+        course = CourseIndex([45.0], [6.0])
+
+        assert course.project(45.001, 6.0).segment == 0
+
+
+class TestOutlierVertex:
+    """A GPS glitch at (0, 0) does not blow up the grid"""
+
+    @pytest.fixture(scope="class")
+    def glitched(self):
+        points = generate_points(5000, seed=5)
+        lat = np.array([p[0] for p in points])
+        lon = np.array([p[1] for p in points])
+        lat[2500], lon[2500] = 0.0, 0.0
+        return CourseIndex(lat, lon)
+
+    def test_grid_stays_small(self, glitched):
+        grid = glitched._segments
+
+        assert grid.oversized.tolist() == [2499, 2500]
+        assert len(grid.items) <= MAX_CELLS_PER_ITEM * glitched.num_segments
+
+    def test_queries_still_match_brute_force(self, glitched):
+        lat, lon = queries(glitched, 100, spread_m=60, seed=6)
+        # One query on the line to the glitch, far from the rest of the course
+        lat = np.append(lat, glitched.lat[2499] / 2)
+        lon = np.append(lon, glitched.lon[2499] / 2)
+
+        found = glitched.candidates(lat, lon, 40.0)
+
+        for i in range(len(lat)):
+            x, y = glitched.to_xy(lat[i], lon[i])
+            x, y = float(x), float(y)
+            assert glitched.project(lat[i], lon[i]).offset_m == pytest.approx(
+                brute_force_segment(glitched, x, y), abs=1e-6
+            )
+            distances = glitched._segment_distances(np.arange(glitched.num_segments), x, y)
+            assert found.segment[found.point == i].tolist() == np.flatnonzero(distances <= 40.0).tolist()
+
+
+class TestCandidates:
+    """Segments within a radius of many points at once"""
+
+    def test_matches_brute_force(self, course):
+        lat, lon = queries(course, 300, spread_m=60, seed=2)
+
+        found = course.candidates(lat, lon, 40.0)
+
+        assert np.all(np.diff(found.point) >= 0)
+        for i in range(len(lat)):
+            x, y = course.to_xy(lat[i], lon[i])
+            distances = course._segment_distances(np.arange(course.num_segments), float(x), float(y))
+            rows = found.point == i
+            assert found.segment[rows].tolist() == np.flatnonzero(distances <= 40.0).tolist()
+            assert found.offset_m[rows] == pytest.approx(distances[found.segment[rows]], abs=1e-6)
+
+    def test_distance_along_matches_project(self, course):
+        lat, lon = queries(course, 50, spread_m=20, seed=3)
+        found = course.candidates(lat, lon, 200.0)
+
+        for i in range(len(lat)):
+            rows = np.flatnonzero(found.point == i)
+            nearest = rows[np.argmin(found.offset_m[rows])]
+            projection = course.project(lat[i], lon[i])
+            assert found.distance_along_m[nearest] == pytest.approx(projection.distance_along_m, abs=1e-6)
+
+    def test_points_far_from_the_course_have_none(self, course):
+        found = course.candidates(np.array([course.lat[0] + 1.0]), np.array([course.lon[0]]), 100.0)
+
+        assert len(found.point) == 0
@@ -0,0 +1,121 @@
+"""
+Tests for map-matching recordings onto a course
+"""
+import numpy as np
+import pytest
+
+from app.services.course_index import CourseIndex
+from app.services.course_matcher import CourseMatcher, MatchSettings, off_course_sections
+from tests.synthetic import generate_points
+
+
+@pytest.fixture(scope="function", autouse=True)
+def setup_database():
+    # Pure unit tests here — no DB needed.
+    yield
+
+
+def out_and_back(points=400):
+    """A trail run out and back on the same path (the return 3 m to the side)"""
+    trail = np.array([p[:2] for p in generate_points(points, seed=7)])
+    back = trail[::-1][1:] + [0.0, 3 / 78_000]
+    return np.concatenate((trail, back))
+
+
+def noisy(course, sigma_m=4.0, seed=0):
+    rng = np.random.default_rng(seed)
+    return (
+        course[:, 0] + rng.normal(0, sigma_m / 111_320, len(course)),
+        course[:, 1] + rng.normal(0, sigma_m / 78_000, len(course)),
+    )
+
+
+class TestCourseMatcher:
+    """Viterbi alignment keeps to the right lap"""
+
+    def test_out_and_back_keeps_to_the_right_leg(self):
+        course = out_and_back()
+        index = CourseIndex(course[:, 0], course[:, 1])
+        lat, lon = noisy(course)
+
+        result = CourseMatcher.match(index, lat, lon, seconds=np.arange(len(lat)) * 4.0)
+
+        assert result.matched.all()
+        assert np.abs(result.distance_along_m - index.cumulative).max() < 30
+        # Nearest-segment snapping alone puts part of the return on the way out
+        nearest = np.array([index.project(a, b).distance_along_m for a, b in zip(lat, lon)])
+        assert np.abs(nearest - index.cumulative).max() > 1000
+
+    def test_second_lap_of_a_loop(self):
+        # Two laps of a 1 km radius loop, one point every ~21 m
+        angle = np.linspace(0, 2 * np.pi, 301)
+        loop = np.column_stack((45.0 + 1000 * np.sin(angle) / 111_320, 6.0 + 1000 * (1 - np.cos(angle)) / 78_000))
+        course = np.concatenate((loop, loop[1:]))
+        index = CourseIndex(course[:, 0], course[:, 1])
+        lat, lon = noisy(course, seed=1)
+
+        # The start and the second lap's start are the same place
+        result = CourseMatcher.match(
+            index, lat, lon, seconds=np.arange(len(lat)) * 4.0, first_window_m=(0, index.cumulative[-1] / 2)
+        )
+
+        assert np.abs(result.distance_along_m - index.cumulative).max() < 30
+
+    def test_windows_pick_the_lap(self):
+        course = out_and_back()
+        index = CourseIndex(course[:, 0], course[:, 1])
+        total = index.cumulative[-1]
+
+        # One point at the turnaround side of the course, matched on each leg
+        lat, lon = course[100:101, 0], course[100:101, 1]
+        way_out = CourseMatcher.match(index, lat, lon, first_window_m=(0, total / 2))
+        way_back = CourseMatcher.match(index, lat, lon, first_window_m=(total / 2, total))
+
+        assert way_out.distance_along_m[0] < total / 2 < way_back.distance_along_m[0]
+
+    def test_works_without_times(self):
+        course = out_and_back()
+        index = CourseIndex(course[:, 0], course[:, 1])
+
+        result = CourseMatcher.match(index, *noisy(course, seed=2))
+
+        assert np.abs(result.distance_along_m - index.cumulative).max() < 30
+
+    def test_far_recording_is_unmatched(self):
+        course = out_and_back()
+        index = CourseIndex(course[:, 0], course[:, 1])
+
+        result = CourseMatcher.match(index, course[:10, 0] + 1.0, course[:10, 1])
+
+        assert not result.matched.any()
+        assert np.isnan(result.offset_m).all()
+        assert (result.segment == -1).all()
+        assert (result.distance_along_m == 0).all()
+
+
+class TestOffCourseSections:
+    """Detours show up as runs of points away from the course"""
+
+    def test_detour_is_found_and_matching_resumes(self):
+        course = out_and_back()
+        index = CourseIndex(course[:, 0], course[:, 1])
+        lat, lon = noisy(course, seed=3)
+        # 30 points 300 m away from the course
+        lat[240:270] += 300 / 111_320
+
+        result = CourseMatcher.match(index, lat, lon, seconds=np.arange(len(lat)) * 4.0)
+
+        assert off_course_sections(result, 50.0) == [(240, 270)]
+        assert not result.matched[240:270].any()
+        assert abs(result.distance_along_m[300] - index.cumulative[300]) < 30
+
+    def test_isolated_spikes_are_ignored(self):
+        course = out_and_back()
+        index = CourseIndex(course[:, 0], course[:, 1])
+        lat, lon = noisy(course, seed=4)
+        lat[[50, 51, 300]] += 500 / 111_320
+
+        result = CourseMatcher.match(index, lat, lon, settings=MatchSettings(radius_m=60.0))
+
+        assert off_course_sections(result, 50.0) == []
+        assert off_course_sections(result, 50.0, min_points=1) == [(50, 52), (300, 301)]
@@ -0,0 +1,131 @@
+"""
+Tests for DEM elevation lookups and DEM-based elevation correction
+"""
+import numpy as np
+import pytest
+
+from app.services.dem_service import HGT_VOID, DEMService, tile_name
+from app.utils import elevation_quality
+from app.utils.elevation_quality import process_elevation_array
+
+SIDE = 11  # tiny tiles: 0.1 degree spacing
+
+
+@pytest.fixture(scope="function", autouse=True)
+def setup_database():
+    # Pure unit tests here — no DB needed.
+    yield
+
+
+def plane(lat, lon):
+    """Elevation surface that bilinear interpolation reproduces exactly"""
+    return 1000 + 100 * (lon - 6) - 50 * (lat - 45)
+
+
+def write_tile(directory, lat_floor, lon_floor, grid=None):
+    if grid is None:
+        rows = np.arange(SIDE)[:, None]
+        cols = np.arange(SIDE)[None, :]
+        lat = lat_floor + 1 - rows / (SIDE - 1)
+        lon = lon_floor + cols / (SIDE - 1)
+        grid = np.rint(plane(lat, lon)).astype(np.int64)
+    np.asarray(grid, dtype=">i2").tofile(directory / tile_name(lat_floor, lon_floor))
+
+
+def blocky_gps_elevations():
+    """Coarse GPS elevations: 4 identical readings then a 200 m jump (quality < 50)"""
+    return np.where((np.arange(50) // 4) % 2, 900.0, 1100.0)
+
+
+@pytest.fixture
+def dem(tmp_path):
+    write_tile(tmp_path, 45, 6)
+    write_tile(tmp_path, 45, 7)
+    return DEMService(str(tmp_path), max_open_tiles=4)
+
+
+class TestDEMService:
+    """Memory-mapped tiles and bilinear lookups"""
+
+    def test_tile_names(self):
+        assert tile_name(45, 6) == "N45E006.hgt"
+        assert tile_name(-12, -77) == "S12W077.hgt"
+
+    def test_bilinear_lookup_across_tiles(self, dem):
+        rng = np.random.default_rng(1)
+        lat = rng.uniform(45, 46, 500)
+        lon = rng.uniform(6, 8, 500)
+
+        np.testing.assert_allclose(dem.elevations(lat, lon), plane(lat, lon), atol=1e-9)
+
+    def test_points_without_tile_are_nan(self, dem):
+        elevations = dem.elevations(np.array([45.5, 47.5]), np.array([6.5, 6.5]))
+        assert elevations[0] == pytest.approx(plane(45.5, 6.5))
+        assert np.isnan(elevations[1])
+
+    def test_void_corners_are_left_out(self, tmp_path):
+        grid = np.full((SIDE, SIDE), 500)
+        grid[0, 1] = HGT_VOID
+        grid[5:7, 5:7] = HGT_VOID
+        write_tile(tmp_path, 45, 6, grid)
+        dem = DEMService(str(tmp_path))
+
+        # Next to a single void: the three other corners are all 500
+        assert dem.elevations(np.array([45.95]), np.array([6.05]))[0] == pytest.approx(500)
+        # Surrounded by voids only
+        assert np.isnan(dem.elevations(np.array([45.45]), np.array([6.55]))[0])
+
+    def test_open_tiles_are_bounded(self, tmp_path):
+        write_tile(tmp_path, 45, 6)
+        write_tile(tmp_path, 45, 7)
+        dem = DEMService(str(tmp_path), max_open_tiles=1)
+
+        for lon in (6.5, 7.5, 6.5):
+            assert not np.isnan(dem.elevations(np.array([45.5]), np.array([lon]))[0])
+            assert len(dem._tiles) == 1
+
+    def test_unconfigured_service_returns_nan(self):
+        dem = DEMService("")
+        assert not dem.available
+        assert np.isnan(dem.elevations(np.array([45.5]), np.array([6.5]))).all()
+
+
+class TestDEMCorrection:
+    """'interpolate' uses the DEM instead of a wider smoothing window"""
+
+    def test_interpolate_takes_dem_elevations(self, dem, monkeypatch):
+        monkeypatch.setattr(elevation_quality, "dem_service", dem)
+        lat = np.linspace(45.1, 45.9, 50)
+        lon = np.linspace(6.1, 8.5, 50)  # leaves the DEM coverage past 8°E
+        recorded = blocky_gps_elevations()
+
+        processed, quality = process_elevation_array(recorded, lat=lat, lon=lon)
+
+        assert quality['processing_applied'] == 'interpolate'
+        covered = lon < 8
+        assert quality['dem_coverage'] == pytest.approx(covered.mean())
+        np.testing.assert_allclose(processed[covered], plane(lat, lon)[covered])
+        smoothed = elevation_quality.smooth_elevation_array(recorded, window_size=7)
+        np.testing.assert_allclose(processed[~covered], smoothed[~covered])
+
+    def test_without_coordinates_falls_back_to_smoothing(self, dem, monkeypatch):
+        monkeypatch.setattr(elevation_quality, "dem_service", dem)
+        recorded = blocky_gps_elevations()
+
+        processed, quality = process_elevation_array(recorded)
+
+        assert quality['dem_coverage'] == 0.0
+        np.testing.assert_allclose(
+            processed, elevation_quality.smooth_elevation_array(recorded, window_size=7)
+        )
+
+    def test_good_tracks_are_not_touched(self, dem, monkeypatch):
+        monkeypatch.setattr(elevation_quality, "dem_service", dem)
+        recorded = 1000 + np.arange(50) * 0.5
+
+        processed, quality = process_elevation_array(
+            recorded, lat=np.full(50, 45.5), lon=np.full(50, 6.5)
+        )
+
+        assert quality['processing_applied'] == 'use'
+        assert processed is recorded
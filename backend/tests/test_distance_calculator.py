@@ -0,0 +1,95 @@
+"""
+Tests for the vectorized distance kernels
+
+Array APIs must agree with the scalar functions (and with gpxpy for the
+gpxpy-compatible variants).
+"""
+import gpxpy.gpx
+import numpy as np
+import pytest
+
+from app.services.distance_calculator import DistanceCalculator
+from tests.synthetic import generate_points
+
+
+@pytest.fixture(scope="function", autouse=True)
+def setup_database():
+    # Pure unit tests here — no DB needed.
+    yield
+
+
+@pytest.fixture
+def track():
+    points = generate_points(500, elevation_noise_m=5)
+    lat = np.array([p[0] for p in points])
+    lon = np.array([p[1] for p in points])
+    ele = np.array([p[2] for p in points])
+    return lat, lon, ele
+
+
+class TestVectorizedKernels:
+    """Array APIs vs scalar functions"""
+
+    def test_haversine_many_matches_scalar(self, track):
+        lat, lon, _ = track
+        expected = [
+            DistanceCalculator.haversine_distance(lat[i], lon[i], lat[i + 1], lon[i + 1])
+            for i in range(len(lat) - 1)
+        ]
+        assert DistanceCalculator.haversine_many(lat[:-1], lon[:-1], lat[1:], lon[1:]) == \
+            pytest.approx(expected)
+
+    def test_segment_lengths_3d_skips_missing_elevation(self, track):
+        lat, lon, ele = track
+        ele = ele.copy()
+        ele[10] = np.nan
+
+        lengths = DistanceCalculator.segment_lengths(lat, lon, ele)
+
+        for i in (5, 9, 10, 11):
+            e1 = None if np.isnan(ele[i]) else ele[i]
+            e2 = None if np.isnan(ele[i + 1]) else ele[i + 1]
+            assert lengths[i] == pytest.approx(
+                DistanceCalculator.distance_3d(lat[i], lon[i], e1, lat[i + 1], lon[i + 1], e2)
+            )
+
+    def test_cumulative_distance_matches_sequential_sum(self, track):
+        lat, lon, _ = track
+        expected = [100.0]
+        for i in range(1, len(lat)):
+            expected.append(expected[-1] + DistanceCalculator.haversine_distance(
+                lat[i - 1], lon[i - 1], lat[i], lon[i]
+            ))
+
+        cumulative = DistanceCalculator.cumulative_distance(lat, lon, start=100.0)
+
+        assert cumulative[0] == 100.0
+        assert cumulative == pytest.approx(expected)
+        assert len(DistanceCalculator.cumulative_distance([], [])) == 0
+
+    def test_distances_to_point(self, track):
+        lat, lon, _ = track
+        distances = DistanceCalculator.distances_to_point(lat[42], lon[42], lat, lon)
+
+        assert distances.shape == lat.shape
+        assert distances[42] == 0.0
+        assert int(np.argmin(distances)) == 42
+
+    def test_gpxpy_compatible_lengths(self, track):
+        lat, lon, ele = track
+        # Include a missing elevation, a flat pair and a far jump (haversine branch)
+        ele = ele.copy()
+        ele[3] = np.nan
+        ele[8] = ele[7]
+        lat = lat.copy()
+        lat[20:] += 0.5
+
+        points = [
+            gpxpy.gpx.GPXTrackPoint(a, b, elevation=None if np.isnan(e) else e)
+            for a, b, e in zip(lat, lon, ele)
+        ]
+        expected = [points[i].distance_3d(points[i - 1]) for i in range(1, len(points))]
+
+        assert DistanceCalculator.gpxpy_segment_lengths(lat, lon, ele) == pytest.approx(expected)
+        assert DistanceCalculator.calculate_cumulative_distances(points)[-1] == pytest.approx(sum(expected))
+        assert DistanceCalculator.total_distance(points) == pytest.approx(sum(expected))
@@ -0,0 +1,60 @@
+"""
+Tests for the vectorized elevation quality assessment
+"""
+import gpxpy.gpx
+import numpy as np
+import pytest
+
+from app.utils.elevation_quality import (
+    assess_elevation_array,
+    assess_elevation_quality,
+    assess_elevation_series,
+)
+from tests.reference import assess_with_loops
+from tests.synthetic import barometric_series, gps_series
+
+
+@pytest.fixture(scope="function", autouse=True)
+def setup_database():
+    # Pure unit tests here — no DB needed.
+    yield
+
+
+EDGE_CASES = {
+    "empty": [],
+    "all_missing": [None, None, None],
+    "too_few": [100.0, 101.0, None, 102.0],
+    "all_identical": [500.0] * 30,
+    "no_identical": [float(i) for i in range(30)],
+    "flat_run_at_start": [10.0] * 15 + [float(i) for i in range(20)],
+    "flat_run_at_end": [float(i) for i in range(20)] + [10.0] * 15,
+    "missing_inside_flat_run": [7.0] * 6 + [None] * 3 + [7.0] * 6 + [8.0, 9.0],
+    "spiky": [100.0, 150.0, 100.0, 130.0, 100.0, 100.0, 121.0, 100.0, 100.0, 80.0, 100.0, 100.0],
+    "integers": [100, 100, 101, 125, 125, 125, 124, 100, 99, 99, 98],
+}
+
+
+class TestAssessElevationArray:
+    """Same report as the loop-based implementation"""
+
+    @pytest.mark.parametrize("name", sorted(EDGE_CASES))
+    def test_edge_cases(self, name):
+        values = EDGE_CASES[name]
+        assert assess_elevation_series(values) == assess_with_loops(values)
+
+    @pytest.mark.parametrize("seed", range(5))
+    @pytest.mark.parametrize("generate", [barometric_series, gps_series])
+    def test_random_tracks(self, generate, seed):
+        elevations = generate(5000, np.random.default_rng(seed))
+        as_list = [None if e != e else e for e in elevations.tolist()]
+
+        assert assess_elevation_array(elevations) == assess_with_loops(as_list)
+
+    def test_gps_track_is_flagged(self):
+        report = assess_elevation_array(gps_series(5000, np.random.default_rng(0)))
+        assert report['source'] != 'barometric'
+        assert report['statistics']['big_jumps'] > 0
+
+    def test_gpxpy_points(self):
+        points = [gpxpy.gpx.GPXTrackPoint(45.0, 6.0, elevation=e) for e in EDGE_CASES["spiky"]]
+        assert assess_elevation_quality(points) == assess_with_loops(EDGE_CASES["spiky"])
@@ -0,0 +1,108 @@
+"""
+Tests for the vectorized elevation smoothing
+"""
+import gpxpy.gpx
+import numpy as np
+import pytest
+
+from app.services.elevation_service import ElevationService
+from app.services.track_arrays import TrackArrays
+from app.utils.elevation_quality import (
+    process_elevation_array,
+    smooth_elevation_array,
+    smooth_elevation_data,
+    smooth_elevation_series,
+)
+
+
+@pytest.fixture(scope="function", autouse=True)
+def setup_database():
+    # Pure unit tests here — no DB needed.
+    yield
+
+
+def reference_smoothing(elevations, window_size):
+    """Per-point window slices, skipping missing values (NaN where none)"""
+    half_window = window_size // 2
+    result = []
+    for i in range(len(elevations)):
+        window = elevations[max(0, i - half_window):i + half_window + 1]
+        valid = [e for e in window if e == e]
+        result.append(sum(valid) / len(valid) if valid else float("nan"))
+    return np.array(result)
+
+
+@pytest.fixture
+def noisy_elevations():
+    rng = np.random.default_rng(7)
+    elevations = 1500 + np.cumsum(rng.normal(0, 2, 2000))
+    elevations[rng.choice(2000, 200, replace=False)] = np.nan
+    elevations[500:520] = np.nan  # a gap longer than any window
+    return elevations
+
+
+class TestSmoothElevationArray:
+    """Convolution-based moving average"""
+
+    @pytest.mark.parametrize("window_size", [1, 3, 4, 5, 7, 21])
+    def test_matches_reference(self, noisy_elevations, window_size):
+        np.testing.assert_allclose(
+            smooth_elevation_array(noisy_elevations, window_size),
+            reference_smoothing(noisy_elevations.tolist(), window_size),
+            rtol=1e-12,
+            equal_nan=True,
+        )
+
+    def test_missing_values_do_not_pull_towards_zero(self):
+        smoothed = smooth_elevation_array(np.array([1000.0, np.nan, 1000.0, 1000.0]), 3)
+        np.testing.assert_array_equal(smoothed, [1000.0, 1000.0, 1000.0, 1000.0])
+
+    def test_window_without_elevation_stays_missing(self):
+        smoothed = smooth_elevation_array(np.array([np.nan, np.nan, np.nan, 10.0]), 3)
+        assert np.isnan(smoothed[:2]).all()
+        assert smoothed[2:].tolist() == [10.0, 10.0]
+
+    def test_empty(self):
+        assert len(smooth_elevation_array(np.array([]))) == 0
+
+
+class TestCallers:
+    """Services share the array kernel"""
+
+    def test_series_keeps_none_for_missing(self):
+        assert smooth_elevation_series([None, None, None, 10.0], 3) == [None, None, 10.0, 10.0]
+
+    def test_elevation_service_fills_missing_windows_with_zero(self, noisy_elevations):
+        n = len(noisy_elevations)
+        track = TrackArrays(np.zeros(n), np.zeros(n), noisy_elevations, np.zeros(n))
+        expected = np.nan_to_num(reference_smoothing(noisy_elevations.tolist(), 5), nan=0.0)
+        np.testing.assert_allclose(ElevationService.smooth_elevation(track, 5), expected, rtol=1e-12)
+
+    def test_gpxpy_points_in_place(self):
+        points = [gpxpy.gpx.GPXTrackPoint(45.0, 6.0, elevation=e) for e in (100.0, 200.0, 300.0)]
+        result = smooth_elevation_data(points, window_size=3, in_place=True)
+
+        assert result is points
+        assert [p.elevation for p in points] == [150.0, 200.0, 250.0]
+
+    def test_gpxpy_points_copy_by_default(self):
+        points = [gpxpy.gpx.GPXTrackPoint(45.0, 6.0, elevation=e) for e in (100.0, 200.0, 300.0)]
+        result = smooth_elevation_data(points, window_size=3)
+
+        assert [p.elevation for p in points] == [100.0, 200.0, 300.0]
+        assert [p.elevation for p in result] == [150.0, 200.0, 250.0]
+
+    def test_process_array_returns_input_when_quality_is_good(self):
+        elevations = 1000 + np.arange(100, dtype=np.float64) * 0.5
+        processed, quality = process_elevation_array(elevations)
+
+        assert quality['processing_applied'] == 'use'
+        assert processed is elevations
+
+    def test_process_array_smooths_on_request(self, noisy_elevations):
+        processed, quality = process_elevation_array(noisy_elevations, force_action='smooth')
+
+        assert quality['processing_applied'] == 'smooth'
+        np.testing.assert_allclose(
+            processed, reference_smoothing(noisy_elevations.tolist(), 5), rtol=1e-12, equal_nan=True
+        )
@@ -0,0 +1,142 @@
+"""
+Tests for the streaming GPX parser
+
+The streaming path must produce the same GPXData as the gpxpy path.
+"""
+import pytest
+
+from app.services.gpx_parse_service import GPXParseService
+from app.services.gpx_stream_parser import (
+    GPXStreamParser,
+    NAIVE_TZ,
+    TIME_MISSING,
+    format_timestamp,
+    parse_timestamp,
+)
+from tests.synthetic import generate_points, to_gpx_xml
+
+
+@pytest.fixture(scope="function", autouse=True)
+def setup_database():
+    # Pure unit tests here — no DB needed.
+    yield
+
+
+def assert_same_gpx_data(stream_data, gpxpy_data):
+    """Compare both parse outputs field by field (floats approximately)"""
+    assert stream_data.filename == gpxpy_data.filename
+    assert len(stream_data.tracks) == len(gpxpy_data.tracks)
+
+    for stream_track, gpxpy_track in zip(stream_data.tracks, gpxpy_data.tracks):
+        assert stream_track.name == gpxpy_track.name
+        assert len(stream_track.points) == len(gpxpy_track.points)
+
+        for a, b in zip(stream_track.points, gpxpy_track.points):
+            assert a.lat == b.lat
+            assert a.lon == b.lon
+            assert a.elevation == pytest.approx(b.elevation)
+            assert a.distance == pytest.approx(b.distance)
+            assert a.time == b.time
+
+        stream_stats = stream_track.statistics.model_dump()
+        gpxpy_stats = gpxpy_track.statistics.model_dump()
+        for key, value in gpxpy_stats.items():
+            if isinstance(value, float):
+                assert stream_stats[key] == pytest.approx(value), key
+            else:
+                assert stream_stats[key] == value, key
+
+
+class TestStreamParserParity:
+    """Streaming path vs gpxpy path"""
+
+    def test_simple_fixture(self, sample_gpx_simple):
+        assert_same_gpx_data(
+            GPXParseService.parse_gpx_bytes(sample_gpx_simple.encode(), "test.gpx"),
+            GPXParseService.parse_gpx_file(sample_gpx_simple, "test.gpx"),
+        )
+
+    def test_climb_fixture(self, sample_gpx_with_climb):
+        assert_same_gpx_data(
+            GPXParseService.parse_gpx_bytes(sample_gpx_with_climb.encode(), "climb.gpx"),
+            GPXParseService.parse_gpx_file(sample_gpx_with_climb, "climb.gpx"),
+        )
+
+    def test_synthetic_multi_segment_track(self):
+        xml = to_gpx_xml(generate_points(2000, elevation_noise_m=15), segments=3)
+        assert_same_gpx_data(
+            GPXParseService.parse_gpx_bytes(xml.encode(), "synthetic.gpx"),
+            GPXParseService.parse_gpx_file(xml, "synthetic.gpx"),
+        )
+
+    def test_missing_elevation_time_and_timezones(self):
+        xml = """<?xml version="1.0"?>
+<gpx version="1.0" xmlns="http://www.topografix.com/GPX/1/0">
+  <metadata><name>Not the track name</name></metadata>
+  <wpt lat="45.1" lon="6.1"><name>Water</name></wpt>
+  <trk>
+    <trkseg>
+      <trkpt lat="45.0" lon="6.0"><time>2024-01-01T10:00:00.250+02:00</time></trkpt>
+      <trkpt lat="45.001" lon="6.001"><ele>1010</ele></trkpt>
+      <trkpt lat="45.002" lon="6.002"><ele>1020</ele><time>2024-01-01T08:05:00Z</time></trkpt>
+      <trkpt lat="45.003" lon="6.003"><ele>1000</ele><time>not a time</time></trkpt>
+    </trkseg>
+    <trkseg></trkseg>
+  </trk>
+  <trk><name>Naive</name><trkseg>
+      <trkpt lat="45.0" lon="6.0"><ele>0</ele><time>2024-01-01T10:00:00</time></trkpt>
+      <trkpt lat="45.01" lon="6.0"><ele>5</ele><time>2024-01-01T10:30:00</time></trkpt>
+  </trkseg></trk>
+</gpx>"""
+        assert_same_gpx_data(
+            GPXParseService.parse_gpx_bytes(xml.encode(), "edge.gpx"),
+            GPXParseService.parse_gpx_file(xml, "edge.gpx"),
+        )
+
+
+class TestStreamParser:
+    """Low-level parser behaviour"""
+
+    def test_segments_are_compact_arrays(self, sample_gpx_simple):
+        tracks = GPXStreamParser.parse(sample_gpx_simple.encode())
+
+        assert len(tracks) == 1
+        segment = tracks[0].segments[0]
+        assert len(segment) == 3
+        assert segment.lat.typecode == "d"
+        assert segment.time_us.typecode == "q"
+        assert segment.elevation_list() == [1000.0, 1100.0, 1050.0]
+
+    def test_malformed_xml_raises_value_error(self):
+        with pytest.raises(ValueError, match="Invalid GPX XML"):
+            GPXStreamParser.parse(b'<?xml version="1.0"?><gpx><invalid>content</invalid>')
+
+    def test_point_without_coordinates_raises(self):
+        with pytest.raises(ValueError, match="lat/lon"):
+            GPXStreamParser.parse(b'<gpx><trk><trkseg><trkpt lat="45"/></trkseg></trk></gpx>')
+
+    def test_timestamp_round_trip(self):
+        for value, expected in [
+            ("2024-01-01T10:00:00Z", "2024-01-01T10:00:00+00:00"),
+            ("2024-01-01T10:00:00.5-05:30", "2024-01-01T10:00:00.500000-05:30"),
+            ("2024-01-01 10:00:00", "2024-01-01T10:00:00"),
+        ]:
+            assert format_timestamp(*parse_timestamp(value)) == expected
+
+    def test_invalid_timestamp_is_missing(self):
+        assert parse_timestamp("2024-13-01T10:00:00Z") == (TIME_MISSING, NAIVE_TZ)
+        assert parse_timestamp(None) == (TIME_MISSING, NAIVE_TZ)
+
+
+class TestUploadUsesStreamParser:
+    """Upload endpoint goes through the streaming path"""
+
+    def test_upload_matches_gpxpy_path(self, client, sample_gpx_simple):
+        from io import BytesIO
+
+        files = {'file': ('test.gpx', BytesIO(sample_gpx_simple.encode()), 'application/gpx+xml')}
+        response = client.post('/api/v1/gpx/upload', files=files)
+
+        assert response.status_code == 200
+        expected = GPXParseService.parse_gpx_file(sample_gpx_simple, "test.gpx")
+        assert response.json()['data'] == expected.model_dump(mode="json")
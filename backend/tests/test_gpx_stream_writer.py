@@ -0,0 +1,70 @@
+"""
+Tests for the streaming GPX writer
+
+Written documents must read back to the same points with gpxpy.
+"""
+from datetime import datetime, timedelta, timezone
+
+import gpxpy
+import gpxpy.gpx
+import pytest
+
+from app.services.gpx_parse_service import GPXParseService
+from app.services.gpx_stream_writer import iter_gpx_xml
+from tests.synthetic import generate_points, to_gpx_xml
+
+
+@pytest.fixture(scope="function", autouse=True)
+def setup_database():
+    # Pure unit tests here — no DB needed.
+    yield
+
+
+def written_points(track, **kwargs):
+    parsed = gpxpy.parse("".join(iter_gpx_xml(track, "Test & <Writer>", **kwargs)))
+    assert parsed.creator == "Test & <Writer>"
+    return parsed, parsed.tracks[0].segments[0].points
+
+
+class TestStreamWriter:
+    """iter_gpx_xml round-trips TrackArrays through gpxpy"""
+
+    def test_synthetic_track_round_trip(self):
+        content = to_gpx_xml(generate_points(5000)).encode()
+        track = GPXParseService.analyze_gpx_bytes(content)[0].arrays
+        source = gpxpy.parse(content).tracks[0].segments[0].points
+
+        _, points = written_points(track, chunk_points=333)
+
+        assert len(points) == len(source)
+        for a, b in zip(points, source):
+            assert (a.latitude, a.longitude) == (b.latitude, b.longitude)
+            assert a.time == b.time
+
+    def test_missing_values_timezones_and_name(self):
+        gpx = gpxpy.gpx.GPX()
+        track = gpxpy.gpx.GPXTrack()
+        gpx.tracks.append(track)
+        segment = gpxpy.gpx.GPXTrackSegment()
+        track.segments.append(segment)
+        base = datetime(2024, 6, 1, 6, 0, 0, tzinfo=timezone.utc)
+        segment.points.extend([
+            gpxpy.gpx.GPXTrackPoint(45.123456789, 6.1, elevation=1000.25, time=base),
+            gpxpy.gpx.GPXTrackPoint(45.2, 6.2, time=base + timedelta(seconds=1.5)),
+            gpxpy.gpx.GPXTrackPoint(45.3, 6.3, elevation=990),
+            gpxpy.gpx.GPXTrackPoint(
+                45.4, 6.4, time=datetime(2024, 6, 1, 8, 0, 3, tzinfo=timezone(timedelta(hours=2)))
+            ),
+        ])
+        arrays = GPXParseService.analyze_gpx_bytes(gpx.to_xml().encode())[0].arrays
+        arrays.elevation[1] = float("nan")
+
+        parsed, points = written_points(arrays, name="Boucle <A>")
+        xml = "".join(iter_gpx_xml(arrays, "x"))
+
+        assert parsed.tracks[0].name == "Boucle <A>"
+        assert points[0].latitude == 45.123456789
+        assert [p.elevation is None for p in points] == [False, True, False, False]
+        assert [p.time for p in points] == [s.time for s in segment.points]
+        assert "<time>2024-06-01T06:00:00Z</time>" in xml
+        assert "<time>2024-06-01T08:00:03+02:00</time>" in xml
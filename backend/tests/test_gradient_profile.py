@@ -0,0 +1,76 @@
+"""
+Tests for the rolling-window gradient profile
+"""
+from io import BytesIO
+
+import numpy as np
+import pytest
+
+from app.services.statistics_calculator import StatisticsCalculator
+from app.services.track_arrays import TrackArrays
+from tests.reference import gradient_with_scan
+from tests.synthetic import generate_points, mountain_track, to_gpx_xml
+
+
+class TestGradientProfile:
+    """Binary-searched windows give the same profile as the full scan"""
+
+    @pytest.mark.parametrize("window", [20.0, 100.0, 500.0, 5000.0])
+    def test_matches_scan(self, window):
+        track = mountain_track(3000, np.random.default_rng(3))
+
+        fast = StatisticsCalculator.calculate_gradient_profile(track, window)
+        slow = gradient_with_scan(track, window)
+
+        assert [p["distance_km"] for p in fast] == [p["distance_km"] for p in slow]
+        np.testing.assert_allclose(
+            [p["gradient_percent"] for p in fast], [p["gradient_percent"] for p in slow], rtol=1e-12
+        )
+
+    def test_resolution_samples_regular_distances(self):
+        distance = np.arange(0, 10_001, 10, dtype=float)
+        track = TrackArrays(np.zeros(len(distance)), np.zeros(len(distance)), distance * 0.08, distance)
+
+        profile = StatisticsCalculator.calculate_gradient_profile(track, 200, resolution=250)
+
+        assert [p["distance_km"] for p in profile] == pytest.approx(np.arange(0, 10.001, 0.25))
+        assert all(p["gradient_percent"] == pytest.approx(8.0) for p in profile)
+
+    def test_windows_without_two_elevations_are_skipped(self):
+        distance = np.array([0.0, 100.0, 1000.0, 1100.0])
+        elevation = np.array([10.0, 20.0, np.nan, 30.0])
+        track = TrackArrays(np.zeros(4), np.zeros(4), elevation, distance)
+
+        profile = StatisticsCalculator.calculate_gradient_profile(track, 200)
+
+        assert [p["distance_km"] for p in profile] == [0.0, 0.1]
+
+    def test_flat_positions_are_skipped(self):
+        # Repeated distances (stopped GPS) give a zero-length window
+        track = TrackArrays(np.zeros(3), np.zeros(3), np.array([1.0, 2.0, 3.0]), np.zeros(3))
+        assert StatisticsCalculator.calculate_gradient_profile(track) == []
+
+
+class TestGradientEndpoint:
+    """GET /gpx/tracks/{file_id}/gradient"""
+
+    def test_gradient_by_file_id(self, client):
+        content = to_gpx_xml(generate_points(2000))
+        files = {'file': ('long.gpx', BytesIO(content.encode()), 'application/gpx+xml')}
+        file_id = client.post('/api/v1/gpx/upload', files=files).json()['file_id']
+
+        response = client.get(
+            f'/api/v1/gpx/tracks/{file_id}/gradient', params={'window': 300, 'resolution': 100}
+        )
+
+        assert response.status_code == 200
+        profile = response.json()
+        steps = np.diff([p['distance_km'] for p in profile])
+        np.testing.assert_allclose(steps, 0.1)
+        assert set(profile[0]) == {'distance_km', 'gradient_percent'}
+
+    def test_unknown_file_id_returns_404(self, client):
+        assert client.get(f'/api/v1/gpx/tracks/{"0" * 64}/gradient').status_code == 404
+
+    def test_invalid_window_is_rejected(self, client):
+        assert client.get(f'/api/v1/gpx/tracks/{"0" * 64}/gradient', params={'window': 0}).status_code == 422
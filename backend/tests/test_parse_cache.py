@@ -0,0 +1,113 @@
+"""
+Tests for the content-addressed parse cache
+"""
+import asyncio
+import hashlib
+from io import BytesIO
+
+import numpy as np
+import pytest
+
+from app.services.gpx_parse_service import GPXParseService
+from app.services.parse_cache import ENTRY_OVERHEAD_BYTES, ParseCache, hash_upload, parse_cache
+
+
+@pytest.fixture(scope="function", autouse=True)
+def setup_database():
+    # Pure unit tests here — no DB needed.
+    yield
+
+
+@pytest.fixture
+def parsed(sample_gpx_simple):
+    return GPXParseService.analyze_gpx_bytes(sample_gpx_simple.encode())
+
+
+def entry_size(tracks):
+    return sum(t.nbytes + ENTRY_OVERHEAD_BYTES for t in tracks)
+
+
+class TestParseCache:
+    """Memory and disk tiers"""
+
+    def test_hit_and_miss_counters(self, parsed):
+        cache = ParseCache(max_bytes=10 * entry_size(parsed))
+
+        assert cache.get("a") is None
+        cache.put("a", parsed)
+
+        assert cache.get("a") is parsed
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+        assert stats["size_bytes"] == entry_size(parsed)
+
+    def test_lru_eviction_by_size(self, parsed):
+        cache = ParseCache(max_bytes=2 * entry_size(parsed))
+        cache.put("a", parsed)
+        cache.put("b", parsed)
+        cache.get("a")  # "b" is now least recently used
+        cache.put("c", parsed)
+
+        assert cache.get("b") is None
+        assert cache.get("a") is parsed
+        assert cache.get("c") is parsed
+        assert cache.stats()["evictions"] == 1
+        assert cache.stats()["size_bytes"] <= cache.max_bytes
+
+    def test_entry_larger_than_budget_is_not_kept(self, parsed):
+        cache = ParseCache(max_bytes=10)
+        cache.put("a", parsed)
+        assert cache.stats()["entries"] == 0
+
+    def test_disk_tier_round_trip(self, parsed, tmp_path):
+        ParseCache(max_bytes=10 ** 6, disk_dir=str(tmp_path)).put("abc", parsed)
+
+        # Fresh cache (e.g. after a restart or in another worker)
+        cache = ParseCache(max_bytes=10 ** 6, disk_dir=str(tmp_path))
+        tracks = cache.get("abc")
+
+        assert cache.stats()["disk_hits"] == 1
+        assert tracks[0].name == parsed[0].name
+        assert tracks[0].statistics == parsed[0].statistics
+        for field in ("lat", "lon", "elevation", "distance", "time", "tz_offset"):
+            np.testing.assert_array_equal(getattr(tracks[0].arrays, field), getattr(parsed[0].arrays, field))
+        assert tracks[0].to_track() == parsed[0].to_track()
+        assert tracks[0].levels.keys() == parsed[0].levels.keys()
+        for zoom, indices in parsed[0].levels.items():
+            np.testing.assert_array_equal(tracks[0].levels[zoom], indices)
+
+        # Now served from memory
+        assert cache.get("abc") is tracks
+        assert cache.stats()["hits"] == 1
+
+
+class TestUploadUsesCache:
+    """/gpx/upload is keyed by the content hash"""
+
+    def test_file_id_is_content_hash_and_reupload_hits(self, client, sample_gpx_simple):
+        content = sample_gpx_simple.encode()
+        parse_cache.clear()
+
+        first = client.post('/api/v1/gpx/upload', files={'file': ('a.gpx', BytesIO(content), 'application/gpx+xml')})
+        second = client.post('/api/v1/gpx/upload', files={'file': ('b.gpx', BytesIO(content), 'application/gpx+xml')})
+
+        assert first.status_code == second.status_code == 200
+        assert first.json()['file_id'] == hashlib.sha256(content).hexdigest()
+        assert second.json()['file_id'] == first.json()['file_id']
+        assert second.json()['data']['filename'] == 'b.gpx'
+        assert second.json()['data']['tracks'] == first.json()['data']['tracks']
+
+        stats = client.get('/api/v1/gpx/cache-stats').json()
+        assert stats['misses'] == 1
+        assert stats['hits'] == 1
+
+    def test_hash_upload_reads_in_chunks_and_rewinds(self):
+        from fastapi import UploadFile
+
+        content = b"<gpx>" + b"x" * 10_000 + b"</gpx>"
+        upload = UploadFile(BytesIO(content), filename="big.gpx")
+
+        digest = asyncio.run(hash_upload(upload, chunk_size=1024))
+
+        assert digest == hashlib.sha256(content).hexdigest()
+        assert upload.file.tell() == 0
@@ -0,0 +1,114 @@
+"""
+Tests for the bounded process pool used by CPU-bound endpoints
+"""
+import asyncio
+import os
+import threading
+from io import BytesIO
+
+import pytest
+
+from app.core.process_pool import PoolSaturatedError, ProcessPool, WorkerCrashedError
+from app.services.gpx_parse_service import GPXParseService
+from app.services.parse_cache import parse_cache
+
+
+@pytest.fixture(scope="function", autouse=True)
+def setup_database():
+    # Pure unit tests here — no DB needed.
+    yield
+
+
+def _wait_for(event: threading.Event) -> str:
+    event.wait(timeout=5)
+    return "done"
+
+
+class TestProcessPool:
+    """Dispatch, timing and back-pressure"""
+
+    def test_runs_job_in_worker_process(self, sample_gpx_simple):
+        pool = ProcessPool(max_workers=1, max_queue=1)
+        try:
+            tracks, timing = asyncio.run(
+                pool.run("parse_gpx", GPXParseService.analyze_gpx_bytes, sample_gpx_simple.encode())
+            )
+        finally:
+            pool.shutdown()
+
+        assert len(tracks) == 1
+        assert len(tracks[0].arrays) == 3
+        assert timing.name == "parse_gpx"
+        assert timing.queue_wait >= 0
+        assert timing.execution > 0
+        assert pool.in_flight == 0
+
+    def test_worker_exceptions_propagate(self):
+        pool = ProcessPool(max_workers=1, max_queue=0)
+        try:
+            with pytest.raises(ValueError, match="Invalid GPX XML"):
+                asyncio.run(pool.run("parse_gpx", GPXParseService.analyze_gpx_bytes, b"<gpx><trk>"))
+        finally:
+            pool.shutdown()
+
+        assert pool.in_flight == 0
+
+    def test_recovers_from_a_dead_worker(self, sample_gpx_simple):
+        pool = ProcessPool(max_workers=1, max_queue=0)
+        try:
+            with pytest.raises(WorkerCrashedError):
+                asyncio.run(pool.run("crash", os._exit, 1))
+            tracks, _ = asyncio.run(
+                pool.run("parse_gpx", GPXParseService.analyze_gpx_bytes, sample_gpx_simple.encode())
+            )
+        finally:
+            pool.shutdown()
+
+        assert len(tracks) == 1
+        assert pool.in_flight == 0
+
+    def test_rejects_jobs_beyond_queue_depth(self):
+        # No worker processes: jobs run in a thread, one at a time
+        pool = ProcessPool(max_workers=0, max_queue=0)
+        release = threading.Event()
+
+        async def scenario():
+            first = asyncio.create_task(pool.run("blocking", _wait_for, release))
+            await asyncio.sleep(0.05)
+            assert pool.in_flight == 1
+            with pytest.raises(PoolSaturatedError):
+                await pool.run("rejected", _wait_for, release)
+            release.set()
+            return await first
+
+        result, _ = asyncio.run(scenario())
+
+        assert result == "done"
+        assert pool.in_flight == 0
+
+
+class TestEndpointsUsePool:
+    """Routes report pool timings"""
+
+    def test_upload_reports_server_timing(self, client, sample_gpx_simple):
+        parse_cache.clear()
+        files = {'file': ('test.gpx', BytesIO(sample_gpx_simple.encode()), 'application/gpx+xml')}
+        response = client.post('/api/v1/gpx/upload', files=files)
+
+        assert response.status_code == 200
+        assert response.headers['Server-Timing'].startswith('queue;dur=')
+        assert 'exec;dur=' in response.headers['Server-Timing']
+
+    def test_saturated_pool_returns_503(self, client, sample_gpx_simple, monkeypatch):
+        from app.core import process_pool as process_pool_module
+
+        async def saturated(*args, **kwargs):
+            raise PoolSaturatedError("Server is busy, please retry in a few seconds")
+
+        monkeypatch.setattr(process_pool_module.process_pool, "run", saturated)
+        parse_cache.clear()
+
+        files = {'file': ('test.gpx', BytesIO(sample_gpx_simple.encode()), 'application/gpx+xml')}
+        response = client.post('/api/v1/gpx/upload', files=files)
+
+        assert response.status_code == 503
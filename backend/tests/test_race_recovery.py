@@ -335,3 +335,256 @@ def test_recover_race_invalid_gpx_format(client):
 
     assert response.status_code in [status.HTTP_400_BAD_REQUEST, status.HTTP_500_INTERNAL_SERVER_ERROR]
     assert "detail" in response.json()
+
+
+def test_solve_base_speed_is_exact():
+    """The solved base speed covers the segments in exactly the target time"""
+    import numpy as np
+    from app.api.race_recovery import calculate_slopes, solve_base_speed, speed_factors
+
+    rng = np.random.default_rng(0)
+    distances = rng.uniform(2, 20, 5000)
+    elevations = 1000 + np.cumsum(rng.normal(0, 2, 5001))
+    elevations[rng.random(5001) < 0.01] = np.nan
+    slopes = calculate_slopes(distances, elevations)
+
+    speed = solve_base_speed(distances, slopes, 7200)
+
+    assert np.all(np.abs(slopes) <= 0.4)
+    assert np.sum(distances / (speed * speed_factors(slopes))) == pytest.approx(7200, rel=1e-12)
+
+
+def test_calculate_slopes_edge_cases():
+    """Zero-length segments and missing elevations are flat, steep ones are capped"""
+    import numpy as np
+    from app.api.race_recovery import calculate_slopes, speed_factors
+
+    slopes = calculate_slopes(np.array([100.0, 0.0, 100.0, 100.0]), np.array([0.0, 80.0, 90.0, np.nan, 50.0]))
+
+    assert slopes.tolist() == [0.4, 0.0, 0.0, 0.0]
+    assert speed_factors(np.array([0.4, -0.4, 0.0])).tolist() == pytest.approx([0.3, 1.8, 1.0])
+
+
+def _batch_files(complete_gpx, partials):
+    files = [("complete_gpx", ("complete.gpx", BytesIO(complete_gpx.encode()), "application/gpx+xml"))]
+    for name, content in partials:
+        files.append(("incomplete_gpx", (name, BytesIO(content.encode()), "application/gpx+xml")))
+    return files
+
+
+def test_recover_batch_returns_zip(client, incomplete_gpx_with_time, incomplete_gpx_without_time, complete_gpx_track):
+    """Every runner is recovered against the same course, failures are reported"""
+    import json
+    import zipfile
+
+    response = client.post(
+        "/api/v1/race/recover-batch",
+        files=_batch_files(complete_gpx_track, [
+            ("alice.gpx", incomplete_gpx_with_time),
+            ("bob.gpx", incomplete_gpx_without_time),
+            ("carol.gpx", incomplete_gpx_with_time),
+        ]),
+        data={"official_times": ["01:00:00", "01:00:00", "45:30"]},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "application/zip"
+    archive = zipfile.ZipFile(BytesIO(response.content))
+    report = json.loads(archive.read("report.json"))
+    assert [entry["status"] for entry in report] == ["ok", "error", "ok"]
+    assert "timestamps" in report[1]["detail"]
+    assert sorted(archive.namelist()) == ["001_recovered_alice.gpx", "003_recovered_carol.gpx", "report.json"]
+
+    # Same output as recovering each runner on its own
+    single = client.post(
+        "/api/v1/race/recover",
+        files={
+            "incomplete_gpx": ("carol.gpx", BytesIO(incomplete_gpx_with_time.encode()), "application/gpx+xml"),
+            "complete_gpx": ("complete.gpx", BytesIO(complete_gpx_track.encode()), "application/gpx+xml"),
+        },
+        data={"official_time": "45:30"},
+    )
+    assert archive.read("003_recovered_carol.gpx").decode() == single.text
+
+
+def test_recover_batch_by_race_slug(client, incomplete_gpx_with_time, complete_gpx_track):
+    """A published race can serve as the course"""
+    import zipfile
+    from app.db.models import Race
+    from tests.conftest import TestingSessionLocal
+
+    db = TestingSessionLocal()
+    try:
+        db.add(Race(name="Test Race", slug="recover-race", gpx_content=complete_gpx_track, is_published=True))
+        db.commit()
+    finally:
+        db.close()
+
+    files = [("incomplete_gpx", ("runner.gpx", BytesIO(incomplete_gpx_with_time.encode()), "application/gpx+xml"))]
+    response = client.post(
+        "/api/v1/race/recover-batch",
+        files=files,
+        data={"official_times": ["01:00:00"], "race_slug": "recover-race"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert "001_recovered_runner.gpx" in zipfile.ZipFile(BytesIO(response.content)).namelist()
+
+    missing = client.post(
+        "/api/v1/race/recover-batch",
+        files=files,
+        data={"official_times": ["01:00:00"], "race_slug": "no-such-race"},
+    )
+    assert missing.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_recover_batch_rejects_bad_input(client, incomplete_gpx_with_time, incomplete_gpx_without_time, complete_gpx_track):
+    """Mismatched counts and batches where nobody can be recovered are rejected"""
+    mismatch = client.post(
+        "/api/v1/race/recover-batch",
+        files=_batch_files(complete_gpx_track, [("a.gpx", incomplete_gpx_with_time)]),
+        data={"official_times": ["01:00:00", "02:00:00"]},
+    )
+    assert mismatch.status_code == status.HTTP_400_BAD_REQUEST
+
+    all_failed = client.post(
+        "/api/v1/race/recover-batch",
+        files=_batch_files(complete_gpx_track, [("a.gpx", incomplete_gpx_without_time)]),
+        data={"official_times": ["01:00:00"]},
+    )
+    assert all_failed.status_code == status.HTTP_400_BAD_REQUEST
+    assert "timestamps" in all_failed.json()["detail"]
+
+
+def test_recover_race_fills_mid_race_gaps(client):
+    """A recording that drops out mid-race and stops early is filled on both gaps"""
+    base_time = datetime(2024, 1, 1, 8, 0, 0)
+    course = gpxpy.gpx.GPX()
+    course.tracks.append(gpxpy.gpx.GPXTrack())
+    course.tracks[0].segments.append(gpxpy.gpx.GPXTrackSegment())
+    recording = gpxpy.gpx.GPX()
+    recording.tracks.append(gpxpy.gpx.GPXTrack())
+    recording.tracks[0].segments.append(gpxpy.gpx.GPXTrackSegment())
+
+    # 40 points ~111 m apart; the watch misses points 10-19 and stops after 29
+    for i in range(40):
+        lat, ele = 45.0 + i * 0.001, 1000 + 5 * i
+        course.tracks[0].segments[0].points.append(gpxpy.gpx.GPXTrackPoint(lat, 6.0, elevation=ele))
+        if i < 10 or 20 <= i < 30:
+            recording.tracks[0].segments[0].points.append(
+                gpxpy.gpx.GPXTrackPoint(lat, 6.0, elevation=ele, time=base_time + timedelta(minutes=i))
+            )
+
+    response = client.post(
+        "/api/v1/race/recover",
+        files={
+            "incomplete_gpx": ("incomplete.gpx", BytesIO(recording.to_xml().encode()), "application/gpx+xml"),
+            "complete_gpx": ("complete.gpx", BytesIO(course.to_xml().encode()), "application/gpx+xml"),
+        },
+        data={"official_time": "00:39:00"},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    points = gpxpy.parse(response.text).tracks[0].segments[0].points
+    assert [round(p.latitude, 6) for p in points] == [round(45.0 + i * 0.001, 6) for i in range(40)]
+
+    times = [p.time.replace(tzinfo=None) for p in points]
+    recorded = [i for i in range(40) if i < 10 or 20 <= i < 30]
+    assert [times[i] for i in recorded] == [base_time + timedelta(minutes=i) for i in recorded]
+    # Inserted points are timed between the recorded points around each gap
+    assert all(a < b for a, b in zip(times, times[1:]))
+    assert times[-1] == base_time + timedelta(minutes=39)
+    assert (times[15] - times[9]).total_seconds() == pytest.approx(360, abs=30)
+
+
+def _out_and_back_gpx(stop_at=None, detour=None):
+    """Course out 30 points north and back; optionally a timed recording of it"""
+    base_time = datetime(2024, 1, 1, 8, 0, 0)
+    gpx = gpxpy.gpx.GPX()
+    gpx.tracks.append(gpxpy.gpx.GPXTrack())
+    gpx.tracks[0].segments.append(gpxpy.gpx.GPXTrackSegment())
+    coordinates = [(45.0 + i * 0.001, 6.0) for i in range(30)] + [(45.0 + i * 0.001, 6.00004) for i in range(28, -1, -1)]
+    for i, (lat, lon) in enumerate(coordinates[:stop_at]):
+        if detour and detour[0] <= i < detour[1]:
+            lon += 0.01  # ~790 m to the east
+        gpx.tracks[0].segments[0].points.append(gpxpy.gpx.GPXTrackPoint(
+            lat, lon, elevation=1000, time=None if stop_at is None else base_time + timedelta(minutes=i)
+        ))
+    return gpx.to_xml()
+
+
+def test_recover_race_stopped_on_the_way_back(client):
+    """The recording stops on the return leg: only the rest of the return is added"""
+    response = client.post(
+        "/api/v1/race/recover",
+        files={
+            "incomplete_gpx": ("incomplete.gpx", BytesIO(_out_and_back_gpx(stop_at=45).encode()), "application/gpx+xml"),
+            "complete_gpx": ("complete.gpx", BytesIO(_out_and_back_gpx().encode()), "application/gpx+xml"),
+        },
+        data={"official_time": "01:00:00"},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    points = gpxpy.parse(response.text).tracks[0].segments[0].points
+    # 45 recorded points, then the 14 course points left on the way back
+    assert len(points) == 59
+    assert [round(p.latitude, 6) for p in points[45:]] == [round(45.0 + i * 0.001, 6) for i in range(13, -1, -1)]
+
+
+def test_off_course_detection(client):
+    """A detour is reported with where the runner left and rejoined the course"""
+    response = client.post(
+        "/api/v1/race/off-course",
+        files={
+            "recording_gpx": ("run.gpx", BytesIO(_out_and_back_gpx(stop_at=59, detour=(35, 40)).encode()), "application/gpx+xml"),
+            "complete_gpx": ("complete.gpx", BytesIO(_out_and_back_gpx().encode()), "application/gpx+xml"),
+        },
+        data={"threshold_m": "100"},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    body = response.json()
+    assert body["matched_ratio"] == pytest.approx(54 / 59, abs=1e-4)
+    assert len(body["sections"]) == 1
+    section = body["sections"][0]
+    assert (section["start_index"], section["end_index"]) == (35, 39)
+    assert section["start_time"] == "2024-01-01T08:35:00"
+    assert section["max_offset_m"] == pytest.approx(790, abs=10)
+    # Left on the way back (course km ~3.4), rejoined 5 points further
+    assert 3.2 < section["left_at_km"] < section["rejoined_at_km"] < 5.0
+
+    clean = client.post(
+        "/api/v1/race/off-course",
+        files={
+            "recording_gpx": ("run.gpx", BytesIO(_out_and_back_gpx(stop_at=59).encode()), "application/gpx+xml"),
+            "complete_gpx": ("complete.gpx", BytesIO(_out_and_back_gpx().encode()), "application/gpx+xml"),
+        },
+    )
+    assert clean.status_code == status.HTTP_200_OK
+    assert clean.json()["sections"] == []
+
+    neither = client.post(
+        "/api/v1/race/off-course",
+        files={"recording_gpx": ("run.gpx", BytesIO(_out_and_back_gpx(stop_at=59).encode()), "application/gpx+xml")},
+    )
+    assert neither.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_off_course_far_detour_is_bounded():
+    """Points beyond the search distance are reported at that bound"""
+    import numpy as np
+    from app.api.race_recovery import OFF_COURSE_SEARCH_M, detect_off_course
+    from app.services.track_arrays import TrackArrays
+
+    lat = 45.0 + np.arange(200) * 0.0005
+    lon = np.full(200, 6.0)
+    recorded_lon = lon.copy()
+    recorded_lon[80:120] += 0.1  # ~7.9 km to the east
+    flat = np.zeros(200)
+
+    result = detect_off_course(TrackArrays(lat, lon, flat, flat), TrackArrays(lat, recorded_lon, flat, flat), 100.0)
+
+    assert len(result.sections) == 1
+    section = result.sections[0]
+    assert (section.start_index, section.end_index) == (80, 119)
+    assert section.beyond_search
+    assert section.max_offset_m == OFF_COURSE_SEARCH_M
@@ -0,0 +1,169 @@
+"""
+Tests for the Monte Carlo finish-time and cutoff-risk simulator
+"""
+import hashlib
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from app.models.gpx import AidStation, CalcMode, SimulationSettings, TrailPlannerConfig
+from app.services.aid_station_service import AidStationService
+from app.services.gpx_parse_service import GPXParseService
+from app.services.parse_cache import parse_cache
+from app.services.race_simulator import RaceSimulator, parse_cutoff_minutes
+from tests.synthetic import generate_points, mountain_track, to_gpx_xml
+
+
+CONFIG = TrailPlannerConfig(
+    flat_pace_kmh=9,
+    climb_penalty_min_per_100m=8,
+    descent_bonus_min_per_100m=2,
+    fatigue_percent_per_interval=10,
+    fatigue_interval_km=10,
+)
+
+NO_SPREAD = dict(pace_sd_percent=0, climb_penalty_sd_percent=0, fatigue_sd_percent=0, segment_sd_percent=0)
+
+
+@pytest.fixture(scope="function", autouse=True)
+def setup_database():
+    # Pure unit tests here — no DB needed.
+    yield
+
+
+@pytest.fixture
+def track():
+    return mountain_track(8000, np.random.default_rng(5))
+
+
+@pytest.fixture
+def stations(track):
+    total_km = track.distance[-1] / 1000
+    return [AidStation(name=f"AS{i}", distance_km=km) for i, km in enumerate(np.linspace(0, total_km, 9))]
+
+
+def table_arrivals(track, stations):
+    table = AidStationService.generate_aid_station_table(
+        track, stations, calc_mode=CalcMode.TRAIL_PLANNER, trail_planner_config=CONFIG
+    )
+    return np.concatenate(([0.0], np.cumsum([leg.estimated_time_minutes for leg in table.segments])))
+
+
+class TestSimulate:
+    """Sampling around the config, percentiles and cutoff risk"""
+
+    def test_without_spread_matches_the_table(self, track, stations):
+        result = RaceSimulator.simulate(track, stations, CONFIG, SimulationSettings(samples=10, **NO_SPREAD))
+
+        expected = table_arrivals(track, stations)
+        for row in result.arrival_minutes:
+            np.testing.assert_allclose(row, expected)
+        np.testing.assert_allclose(result.mean_minutes, expected)
+
+    def test_percentiles_are_ordered_around_the_table(self, track, stations):
+        settings = SimulationSettings(samples=5000, percentiles=[5, 50, 95], seed=3)
+
+        result = RaceSimulator.simulate(track, stations, CONFIG, settings)
+
+        p5, p50, p95 = result.arrival_minutes[:, -1]
+        assert p5 < p50 < p95
+        assert p50 == pytest.approx(table_arrivals(track, stations)[-1], rel=0.1)
+        assert np.all(np.diff(result.arrival_minutes, axis=1) >= 0)
+
+    def test_seed_makes_results_reproducible(self, track, stations):
+        settings = SimulationSettings(samples=500, seed=7)
+
+        first = RaceSimulator.simulate(track, stations, CONFIG, settings)
+        second = RaceSimulator.simulate(track, stations, CONFIG, settings)
+
+        np.testing.assert_array_equal(first.arrival_minutes, second.arrival_minutes)
+
+    def test_miss_probability(self, track, stations):
+        expected = table_arrivals(track, stations)
+        cutoffs = [None] * len(stations)
+        cutoffs[3] = expected[3] * 0.5  # Nobody makes it
+        cutoffs[5] = expected[5] * 2.0  # Everybody makes it
+        cutoffs[-1] = float(np.median(
+            RaceSimulator.simulate(track, stations, CONFIG, SimulationSettings(samples=4000, seed=1)).arrival_minutes[1, -1]
+        ))
+
+        result = RaceSimulator.simulate(
+            track, stations, CONFIG, SimulationSettings(samples=4000, seed=1), cutoff_minutes=cutoffs
+        )
+
+        assert result.miss_probability[3] == 1.0
+        assert result.miss_probability[5] == 0.0
+        assert result.miss_probability[-1] == pytest.approx(0.5, abs=0.01)
+        assert np.isnan(result.miss_probability[1]) and np.isnan(result.cutoff_minutes[1])
+
+    def test_cutoffs_follow_unsorted_stations(self, track, stations):
+        shuffled = stations[::-1]
+        cutoffs = [None] * len(stations)
+        cutoffs[0] = 0.0  # The finish, given first
+
+        result = RaceSimulator.simulate(
+            track, shuffled, CONFIG, SimulationSettings(samples=100, seed=1), cutoff_minutes=cutoffs
+        )
+
+        assert result.stations[-1].name == stations[-1].name
+        assert result.miss_probability[-1] == 1.0
+
+
+class TestParseCutoffMinutes:
+    """Clock cutoffs to elapsed minutes"""
+
+    START = datetime(2026, 8, 28, 18, 0)  # Friday 18:00
+
+    def test_formats(self):
+        minutes = parse_cutoff_minutes(["20:30", "11:15 PM", "Sat 08:45 AM", "sam. 14h30", None, "soon"], self.START)
+
+        assert minutes[:4].tolist() == [150, 315, 885, 1230]
+        assert np.isnan(minutes[4:]).all()
+
+    def test_clock_times_roll_over_midnight_in_race_order(self):
+        minutes = parse_cutoff_minutes(["23:00", "03:00", "16:00", "02:00"], self.START)
+
+        assert minutes.tolist() == [300, 540, 1320, 1920]
+
+    def test_weekday_before_start_is_next_week(self):
+        assert parse_cutoff_minutes(["Fri 17:00"], self.START).tolist() == [7 * 1440 - 60]
+
+
+class TestSimulateEndpoint:
+    """POST /gpx/simulate-race"""
+
+    @pytest.fixture
+    def file_id(self):
+        content = to_gpx_xml(generate_points(2000)).encode()
+        file_id = hashlib.sha256(content).hexdigest()
+        parse_cache.put(file_id, GPXParseService.analyze_gpx_bytes(content))
+        return file_id
+
+    def test_simulation(self, client, file_id):
+        body = {
+            'file_id': file_id,
+            'aid_stations': [
+                {'name': 'Start', 'distance_km': 0},
+                {'name': 'Mid', 'distance_km': 2, 'cutoff_time': '08:20'},
+                {'name': 'End', 'distance_km': 4, 'cutoff_minutes': 1},
+            ],
+            'trail_planner_config': CONFIG.model_dump(),
+            'settings': {'samples': 1000, 'seed': 1},
+            'start_time': '2026-08-28T08:00:00',
+        }
+
+        response = client.post('/api/v1/gpx/simulate-race', json=body)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data['percentiles'] == [10, 50, 90]
+        mid, end = data['stations'][1:]
+        assert mid['cutoff_minutes'] == 20
+        assert end['miss_probability'] == 1.0
+        assert data['stations'][0]['cutoff_minutes'] is None
+
+    def test_requires_stations_or_race(self, client, file_id):
+        body = {'file_id': file_id, 'trail_planner_config': CONFIG.model_dump()}
+
+        assert client.post('/api/v1/gpx/simulate-race', json=body).status_code == 422
@@ -0,0 +1,207 @@
+"""
+Tests for the prefix-sum range-statistics index
+"""
+import numpy as np
+import pytest
+
+from app.models.gpx import AidStation
+from app.services.aid_station_service import AidStationService
+from app.services.range_index import RangeIndex
+from app.services.statistics_calculator import StatisticsCalculator
+from app.services.track_arrays import TrackArrays
+from tests.synthetic import mountain_track
+
+
+@pytest.fixture(scope="function", autouse=True)
+def setup_database():
+    # Pure unit tests here — no DB needed.
+    yield
+
+
+def scan_segment(track, start_km, end_km):
+    """Mask the km range and sum np.diff deltas (the previous per-query scan)"""
+    in_segment = (track.distance >= start_km * 1000) & (track.distance <= end_km * 1000)
+    elevations = track.elevation[in_segment]
+    deltas = np.diff(elevations)
+    distances = track.distance[in_segment]
+    return {
+        "num_points": int(in_segment.sum()),
+        "distance": float(distances[-1] - distances[0]) if len(distances) else 0.0,
+        "elevation_gain": float(deltas[deltas > 0].sum()),
+        "elevation_loss": float(-deltas[deltas < 0].sum()),
+    }
+
+
+@pytest.fixture
+def track():
+    return mountain_track(5000, np.random.default_rng(11))
+
+
+class TestRangeIndex:
+    """Binary search plus prefix sums match a scan of the range"""
+
+    def test_random_ranges_match_scan(self, track):
+        rng = np.random.default_rng(0)
+        total_km = track.distance[-1] / 1000
+        starts = rng.uniform(-1, total_km, 200)
+        ends = starts + rng.uniform(0, 10, 200)
+
+        batch = track.range_index().segments(starts, ends)
+
+        for i, (start, end) in enumerate(zip(starts, ends)):
+            expected = scan_segment(track, start, end)
+            assert batch.num_points[i] == expected["num_points"]
+            assert batch.distance[i] == pytest.approx(expected["distance"])
+            assert batch.elevation_gain[i] == pytest.approx(expected["elevation_gain"], abs=1e-6)
+            assert batch.elevation_loss[i] == pytest.approx(expected["elevation_loss"], abs=1e-6)
+
+    def test_single_segment_returns_python_numbers(self, track):
+        segment = track.range_index().segment(2, 5)
+        batch = track.range_index().segments([2], [5])
+
+        assert isinstance(segment.elevation_gain, float)
+        assert isinstance(segment.num_points, int)
+        assert segment.elevation_gain == batch.elevation_gain[0]
+        assert segment.first == batch.first[0] and segment.last == batch.last[0]
+
+    def test_empty_range(self):
+        index = RangeIndex([0.0, 1000.0, 2000.0], [10.0, 20.0, 15.0])
+
+        segment = index.segment(0.2, 0.8)
+
+        assert segment.num_points == 0
+        assert segment.elevation_gain == segment.distance == 0.0
+        assert RangeIndex([], []).segment(0, 1).num_points == 0
+
+    def test_missing_elevations_skip_their_deltas(self):
+        index = RangeIndex([0.0, 100.0, 200.0, 300.0], [10.0, np.nan, 30.0, 25.0])
+
+        segment = index.segment(0, 0.3)
+
+        assert segment.elevation_gain == 0.0
+        assert segment.elevation_loss == 5.0
+        assert segment.elevation_change == 15.0
+        assert segment.avg_gradient == pytest.approx(5.0)
+
+    def test_between_points(self):
+        index = RangeIndex([0.0, 100.0, 200.0, 300.0], [10.0, 30.0, 20.0, 40.0])
+
+        stats = index.between(np.array([0, 1]), np.array([3, 2]))
+
+        assert stats.elevation_gain.tolist() == [40.0, 0.0]
+        assert stats.elevation_loss.tolist() == [10.0, 10.0]
+        assert stats.distance.tolist() == [300.0, 100.0]
+
+    def test_index_is_built_once_per_track(self, track):
+        assert track.range_index() is track.range_index()
+        assert track.range_index(5) is track.range_index(5)
+        assert track.range_index(5) is not track.range_index()
+
+
+class TestCallers:
+    """Services answer their range queries from the index"""
+
+    def test_analyze_segment(self, track):
+        result = StatisticsCalculator.analyze_segment(track, 3, 9)
+        expected = scan_segment(track, 3, 9)
+
+        assert result["num_points"] == expected["num_points"]
+        assert result["elevation_gain"] == pytest.approx(expected["elevation_gain"], abs=1e-6)
+        assert result["elevation_loss"] == pytest.approx(expected["elevation_loss"], abs=1e-6)
+
+    def test_aid_station_table(self, track):
+        total_km = track.distance[-1] / 1000
+        stations = [AidStation(name=f"AS{i}", distance_km=km) for i, km in enumerate(np.linspace(0, total_km, 6))]
+
+        table = AidStationService.generate_aid_station_table(track, stations)
+
+        for leg in table.segments:
+            expected = scan_segment(track, leg.start_km, leg.end_km)
+            assert leg.elevation_gain == pytest.approx(expected["elevation_gain"], abs=1e-6)
+            assert leg.elevation_loss == pytest.approx(expected["elevation_loss"], abs=1e-6)
+
+    def test_aid_station_leg_without_points(self):
+        track = TrackArrays(np.zeros(3), np.zeros(3), [10.0, 20.0, 30.0], [0.0, 5000.0, 10000.0])
+        stations = [
+            AidStation(name="Start", distance_km=0),
+            AidStation(name="A", distance_km=1),
+            AidStation(name="B", distance_km=2),
+        ]
+
+        with pytest.raises(ValueError, match="between A and B"):
+            AidStationService.generate_aid_station_table(track, stations)
+
+
+class TestInterpolatedSegments:
+    """Ranges cut at points interpolated at the exact distances"""
+
+    def test_partial_deltas_at_boundaries(self):
+        index = RangeIndex([0.0, 100.0, 200.0, 300.0], [10.0, 30.0, 20.0, 40.0])
+
+        segment = index.interpolated_segments([0.05], [0.25])
+
+        # 20 -> 30 (+10), 30 -> 20 (-10), 20 -> 30 (+10)
+        assert segment.elevation_gain[0] == pytest.approx(20.0)
+        assert segment.elevation_loss[0] == pytest.approx(10.0)
+        assert segment.elevation_change[0] == pytest.approx(10.0)
+        assert segment.distance[0] == pytest.approx(200.0)
+        assert segment.num_points[0] == 4
+
+    def test_matches_recorded_points_on_vertices(self, track):
+        first = np.array([0, 100, 2500])
+        last = np.array([99, 2500, len(track) - 1])
+        index = track.range_index()
+
+        exact = index.between(first, last)
+        interpolated = index.interpolated_segments(track.distance[first] / 1000, track.distance[last] / 1000)
+
+        np.testing.assert_allclose(interpolated.elevation_gain, exact.elevation_gain, atol=1e-6)
+        np.testing.assert_allclose(interpolated.elevation_loss, exact.elevation_loss, atol=1e-6)
+
+    def test_legs_add_up_to_the_whole_range(self, track):
+        index = track.range_index()
+        cuts = np.linspace(0.3, track.distance[-1] / 1000 - 0.3, 12)
+
+        legs = index.interpolated_segments(cuts[:-1], cuts[1:])
+        whole = index.interpolated_segments(cuts[:1], cuts[-1:])
+
+        assert legs.elevation_gain.sum() == pytest.approx(whole.elevation_gain[0])
+        assert legs.elevation_loss.sum() == pytest.approx(whole.elevation_loss[0])
+
+    def test_range_between_two_points(self):
+        index = RangeIndex([0.0, 1000.0], [100.0, 200.0])
+
+        segment = index.interpolated_segments([0.2], [0.6])
+
+        assert segment.num_points[0] == 2
+        assert segment.elevation_gain[0] == pytest.approx(40.0)
+        assert index.elevation_at([500.0]).tolist() == [150.0]
+
+    def test_outside_the_track(self):
+        index = RangeIndex([0.0, 1000.0], [100.0, 200.0])
+
+        segment = index.interpolated_segments([2.0], [3.0])
+
+        assert segment.num_points[0] == 0
+        assert segment.elevation_gain[0] == 0.0
+
+    def test_missing_elevation_next_to_a_boundary(self):
+        index = RangeIndex([0.0, 100.0, 200.0], [10.0, np.nan, 30.0])
+
+        segment = index.interpolated_segments([0.05], [0.2])
+
+        assert segment.elevation_gain[0] == 0.0
+        assert segment.elevation_change[0] == 30.0
+
+    def test_aid_station_table_without_points_between_stations(self):
+        track = TrackArrays(np.zeros(3), np.zeros(3), [10.0, 20.0, 30.0], [0.0, 5000.0, 10000.0])
+        stations = [
+            AidStation(name="Start", distance_km=0),
+            AidStation(name="A", distance_km=1),
+            AidStation(name="B", distance_km=2),
+        ]
+
+        table = AidStationService.generate_aid_station_table(track, stations, interpolate_boundaries=True)
+
+        assert [leg.elevation_gain for leg in table.segments] == pytest.approx([2.0, 2.0])
+        assert table.segments[1].avg_gradient == pytest.approx(0.2)
@@ -0,0 +1,181 @@
+"""
+Tests for track simplification (map levels of detail and elevation profile)
+"""
+from io import BytesIO
+
+import numpy as np
+import pytest
+
+from app.services.simplification import ZOOM_LEVELS, TrackSimplifier
+from app.services.statistics_calculator import StatisticsCalculator
+from app.services.track_arrays import TrackArrays
+from tests.synthetic import generate_points, to_gpx_xml
+
+
+def reference_douglas_peucker(x, y, tolerance):
+    """Textbook recursive Douglas-Peucker, distances to the chord segment"""
+    keep = {0, len(x) - 1}
+
+    def recurse(start, end):
+        if end - start < 2:
+            return
+        ax, ay = x[start], y[start]
+        dx, dy = x[end] - ax, y[end] - ay
+        length_sq = dx * dx + dy * dy
+        best, best_index = -1.0, None
+        for i in range(start + 1, end):
+            px, py = x[i] - ax, y[i] - ay
+            t = 0.0 if length_sq == 0 else min(max((px * dx + py * dy) / length_sq, 0.0), 1.0)
+            d = np.hypot(px - t * dx, py - t * dy)
+            if d > best:
+                best, best_index = d, i
+        if best > tolerance:
+            keep.add(best_index)
+            recurse(start, best_index)
+            recurse(best_index, end)
+
+    recurse(0, len(x) - 1)
+    return np.array(sorted(keep))
+
+
+def reference_lttb(x, y, max_points):
+    """Straightforward LTTB (Steinarsson) with the same bucket edges"""
+    n = len(x)
+    edges = np.linspace(1, n - 1, max_points - 1).astype(int)
+    selected = [0]
+    for b in range(max_points - 2):
+        lo, hi = edges[b], edges[b + 1]
+        if b + 2 < len(edges):
+            cx, cy = np.mean(x[edges[b + 1]:edges[b + 2]]), np.mean(y[edges[b + 1]:edges[b + 2]])
+        else:
+            cx, cy = x[-1], y[-1]
+        a = selected[-1]
+        areas = [abs((x[a] - cx) * (y[i] - y[a]) - (x[a] - x[i]) * (cy - y[a])) for i in range(lo, hi)]
+        selected.append(lo + int(np.argmax(areas)))
+    selected.append(n - 1)
+    return np.array(selected)
+
+
+@pytest.fixture
+def random_walk():
+    rng = np.random.default_rng(42)
+    steps = rng.normal(size=(3000, 2))
+    x, y = np.cumsum(steps, axis=0).T
+    return x, y
+
+
+class TestDouglasPeucker:
+    """Vectorized passes match the recursive algorithm"""
+
+    @pytest.mark.parametrize("tolerance", [0.0, 0.5, 2.0, 10.0, 1000.0])
+    def test_matches_recursive_reference(self, random_walk, tolerance):
+        x, y = random_walk
+        np.testing.assert_array_equal(
+            TrackSimplifier.douglas_peucker(x, y, tolerance),
+            reference_douglas_peucker(x, y, tolerance),
+        )
+
+    def test_closed_loop_keeps_far_point(self):
+        # Start and end coincide: distances fall back to the start point
+        angles = np.linspace(0, 2 * np.pi, 100)
+        indices = TrackSimplifier.douglas_peucker(np.cos(angles), np.sin(angles), 0.1)
+        assert len(indices) > 3
+        assert indices[0] == 0 and indices[-1] == 99
+
+    def test_short_inputs(self):
+        assert TrackSimplifier.douglas_peucker(np.array([1.0]), np.array([1.0]), 1.0).tolist() == [0]
+        assert TrackSimplifier.douglas_peucker(np.zeros(2), np.zeros(2), 1.0).tolist() == [0, 1]
+
+
+class TestLTTB:
+    """Largest-Triangle-Three-Buckets"""
+
+    def test_matches_reference(self, random_walk):
+        x = np.arange(3000, dtype=float)
+        y = random_walk[1]
+        np.testing.assert_array_equal(
+            TrackSimplifier.largest_triangle_three_buckets(x, y, 200),
+            reference_lttb(x, y, 200),
+        )
+
+    def test_keeps_narrow_peak_every_nth_sampling_misses(self):
+        distance = np.arange(10_000, dtype=float)
+        elevation = np.zeros(10_000)
+        elevation[5_050] = 500.0  # summit between two samples of a 100-step grid
+        arrays = TrackArrays(np.zeros(10_000), np.zeros(10_000), elevation, distance)
+
+        profile = StatisticsCalculator.get_elevation_profile(arrays, max_points=100)
+
+        assert len(profile) == 100
+        assert max(p["elevation"] for p in profile) == 500.0
+        assert profile[0]["distance_km"] == 0.0
+        assert profile[-1]["distance_km"] == pytest.approx(9.999)
+
+    def test_short_series_is_returned_whole(self):
+        assert TrackSimplifier.largest_triangle_three_buckets(np.arange(5.0), np.zeros(5), 10).tolist() == [0, 1, 2, 3, 4]
+
+
+class TestLevels:
+    """Precomputed zoom levels"""
+
+    def test_levels_are_nested_and_bounded(self):
+        points = generate_points(5000)
+        arrays = TrackArrays(
+            [p[0] for p in points], [p[1] for p in points], np.zeros(5000), np.zeros(5000)
+        )
+
+        levels = TrackSimplifier.build_levels(arrays)
+
+        assert list(levels) == sorted(ZOOM_LEVELS)
+        sizes = [len(levels[z]) for z in sorted(levels)]
+        assert sizes == sorted(sizes)
+        for coarse, fine in zip(sorted(levels), sorted(levels)[1:]):
+            assert set(levels[coarse]) <= set(levels[fine])
+        for indices in levels.values():
+            assert indices[0] == 0 and indices[-1] == 4999
+
+    def test_level_selection(self):
+        levels = {10: np.array([0, 5]), 14: np.array([0, 2, 5])}
+        assert TrackSimplifier.level_indices(levels, 3).tolist() == [0, 5]
+        assert TrackSimplifier.level_indices(levels, 11).tolist() == [0, 2, 5]
+        assert TrackSimplifier.level_indices(levels, 15) is None
+
+
+class TestLevelOfDetailEndpoints:
+    """Clients request a level instead of every point"""
+
+    @pytest.fixture
+    def long_gpx(self):
+        return to_gpx_xml(generate_points(3000))
+
+    def upload(self, client, content, params=None):
+        files = {'file': ('long.gpx', BytesIO(content.encode()), 'application/gpx+xml')}
+        return client.post('/api/v1/gpx/upload', files=files, params=params)
+
+    def test_upload_with_zoom_returns_fewer_points(self, client, long_gpx):
+        full = self.upload(client, long_gpx).json()['data']['tracks'][0]
+        coarse = self.upload(client, long_gpx, params={'zoom': 8}).json()['data']['tracks'][0]
+
+        assert len(coarse['points']) < len(full['points'])
+        assert coarse['points'][0] == full['points'][0]
+        assert coarse['points'][-1] == full['points'][-1]
+        assert coarse['statistics'] == full['statistics']
+
+    def test_geometry_and_profile_by_file_id(self, client, long_gpx):
+        file_id = self.upload(client, long_gpx).json()['file_id']
+
+        coarse = client.get(f'/api/v1/gpx/tracks/{file_id}/geometry', params={'zoom': 6}).json()
+        fine = client.get(f'/api/v1/gpx/tracks/{file_id}/geometry', params={'zoom': 16}).json()
+        full = client.get(f'/api/v1/gpx/tracks/{file_id}/geometry').json()
+        assert len(coarse['points']) <= len(fine['points']) <= len(full['points']) == 3000
+
+        columnar = client.get(f'/api/v1/gpx/tracks/{file_id}/geometry', params={'zoom': 6, 'format': 'columnar'})
+        assert columnar.json()['columns']['lat'] == [p['lat'] for p in coarse['points']]
+
+        profile = client.get(f'/api/v1/gpx/tracks/{file_id}/profile', params={'max_points': 500})
+        assert profile.status_code == 200
+        assert len(profile.json()) == 500
+
+    def test_unknown_file_id_returns_404(self, client):
+        assert client.get(f'/api/v1/gpx/tracks/{"0" * 64}/geometry').status_code == 404
+        assert client.get(f'/api/v1/gpx/tracks/{"0" * 64}/profile').status_code == 404
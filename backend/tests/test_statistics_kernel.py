@@ -0,0 +1,121 @@
+"""
+Regression harness for the fused track statistics kernel
+
+Every field of TrackStatistics is checked against the numbers produced by
+the gpxpy helpers (get_uphill_downhill, get_moving_data,
+get_elevation_extremes, length_3d, get_time_bounds). The kernel sums in a
+different order than gpxpy, so floats are compared with a relative
+tolerance of 1e-9 (plus 1e-6 absolute for values close to zero); times
+and None-ness must match exactly.
+"""
+import gpxpy
+import pytest
+
+from app.models.gpx import TrackPoint, TrackStatistics
+from app.services.gpx_parse_service import GPXParseService
+from app.services.statistics_calculator import StatisticsCalculator
+from tests.synthetic import generate_points, to_gpx_xml
+
+REL_TOLERANCE = 1e-9
+ABS_TOLERANCE = 1e-6
+
+
+@pytest.fixture(scope="function", autouse=True)
+def setup_database():
+    # Pure unit tests here — no DB needed.
+    yield
+
+
+def gpxpy_reference_statistics(track: gpxpy.gpx.GPXTrack) -> TrackStatistics:
+    """Track statistics computed with the gpxpy helpers (the pre-kernel implementation)"""
+    uphill, downhill = track.get_uphill_downhill()
+    moving_data = track.get_moving_data()
+    elevation_extremes = track.get_elevation_extremes()
+    time_bounds = track.get_time_bounds()
+
+    elevations = [p.elevation for s in track.segments for p in s.points if p.elevation is not None]
+
+    return TrackStatistics(
+        total_distance=track.length_3d() or 0.0,
+        total_elevation_gain=uphill or 0.0,
+        total_elevation_loss=downhill or 0.0,
+        max_elevation=elevation_extremes.maximum if elevation_extremes else None,
+        min_elevation=elevation_extremes.minimum if elevation_extremes else None,
+        avg_elevation=sum(elevations) / len(elevations) if elevations else None,
+        duration=moving_data.moving_time if moving_data and moving_data.moving_time else None,
+        start_time=time_bounds.start_time.isoformat() if time_bounds.start_time else None,
+        end_time=time_bounds.end_time.isoformat() if time_bounds.end_time else None,
+    )
+
+
+def kernel_statistics(track: gpxpy.gpx.GPXTrack) -> TrackStatistics:
+    """Kernel statistics, averaging the same raw elevations as the reference"""
+    points = [
+        TrackPoint(lat=p.latitude, lon=p.longitude, elevation=p.elevation, distance=0.0)
+        for s in track.segments for p in s.points
+    ]
+    return StatisticsCalculator.calculate_track_statistics(track, points)
+
+
+def assert_matches_reference(xml: str):
+    gpx = gpxpy.parse(xml)
+    assert gpx.tracks
+
+    for track in gpx.tracks:
+        expected = gpxpy_reference_statistics(track).model_dump()
+        actual = kernel_statistics(track).model_dump()
+
+        for key, value in expected.items():
+            if isinstance(value, float):
+                assert actual[key] == pytest.approx(value, rel=REL_TOLERANCE, abs=ABS_TOLERANCE), key
+            else:
+                assert actual[key] == value, key
+
+
+class TestStatisticsKernelRegression:
+    """Fused kernel vs gpxpy helpers"""
+
+    def test_fixtures(self, sample_gpx_simple, sample_gpx_with_climb):
+        assert_matches_reference(sample_gpx_simple)
+        assert_matches_reference(sample_gpx_with_climb)
+
+    @pytest.mark.parametrize("seed", [1, 2, 3])
+    def test_synthetic_multi_segment_tracks(self, seed):
+        xml = to_gpx_xml(generate_points(3000, seed=seed, elevation_noise_m=8), segments=4)
+        assert_matches_reference(xml)
+
+    def test_stops_missing_data_and_far_jumps(self):
+        xml = """<?xml version="1.0"?>
+<gpx version="1.1" xmlns="http://www.topografix.com/GPX/1/1">
+  <trk><trkseg>
+    <trkpt lat="45.0" lon="6.0"><ele>0</ele><time>2024-01-01T10:00:00+02:00</time></trkpt>
+    <trkpt lat="45.001" lon="6.0"><ele>12</ele><time>2024-01-01T08:01:00Z</time></trkpt>
+    <trkpt lat="45.001" lon="6.0"><ele>12</ele><time>2024-01-01T08:05:00Z</time></trkpt>
+    <trkpt lat="45.0010001" lon="6.0"><ele>12</ele><time>2024-01-01T08:10:00Z</time></trkpt>
+    <trkpt lat="45.002" lon="6.001"><time>2024-01-01T08:11:00Z</time></trkpt>
+    <trkpt lat="45.003" lon="6.002"><ele>30</ele></trkpt>
+    <trkpt lat="45.6" lon="6.4"><ele>25</ele><time>2024-01-01T09:00:00Z</time></trkpt>
+    <trkpt lat="45.601" lon="6.4"><ele>20</ele><time>2024-01-01T08:59:00Z</time></trkpt>
+  </trkseg>
+  <trkseg></trkseg>
+  <trkseg>
+    <trkpt lat="45.7" lon="6.5"><ele>100</ele></trkpt>
+    <trkpt lat="45.701" lon="6.5"><ele>90</ele></trkpt>
+  </trkseg></trk>
+  <trk><trkseg>
+    <trkpt lat="45.0" lon="6.0"><time>2024-01-01T10:00:00</time></trkpt>
+    <trkpt lat="45.01" lon="6.0"><time>2024-01-01T10:30:00</time></trkpt>
+  </trkseg></trk>
+</gpx>"""
+        assert_matches_reference(xml)
+
+    def test_streaming_path_uses_raw_elevations(self):
+        xml = to_gpx_xml(generate_points(1500, elevation_noise_m=20), segments=2)
+        gpx = gpxpy.parse(xml)
+        reference = gpxpy_reference_statistics(gpx.tracks[0])
+
+        statistics = GPXParseService.analyze_gpx_bytes(xml.encode())[0].statistics
+
+        assert statistics.total_elevation_gain == pytest.approx(reference.total_elevation_gain, rel=REL_TOLERANCE)
+        assert statistics.total_distance == pytest.approx(reference.total_distance, rel=REL_TOLERANCE)
+        assert statistics.duration == pytest.approx(reference.duration, rel=REL_TOLERANCE)
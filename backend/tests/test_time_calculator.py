@@ -4,10 +4,12 @@ Unit tests for TimeCalculator service.
 Covers the 3 calc modes (NAISMITH, CONSTANT_PACE, TRAIL_PLANNER),
 fatigue model, edge cases, and fallback behavior.
 """
+import numpy as np
 import pytest
 
-from app.models.gpx import CalcMode, TrailPlannerConfig
+from app.models.gpx import AidStationScenario, CalcMode, TrailPlannerConfig
 from app.services.time_calculator import TimeCalculator
+from app.services.track_arrays import TrackArrays
 
 
 @pytest.fixture(scope="function", autouse=True)
@@ -343,3 +345,68 @@ class TestFormatTime:
 
     def test_exact_hour(self):
         assert TimeCalculator.format_time(120) == "2h 00min"
+
+
+# ---------------------------------------------------------------------------
+# Array API: predicted time at every point, and its inverse
+# ---------------------------------------------------------------------------
+
+def straight_track(elevations, spacing_m=1000.0):
+    n = len(elevations)
+    distance = np.arange(n) * spacing_m
+    return TrackArrays(np.linspace(45.0, 45.1, n), np.linspace(6.0, 6.1, n), elevations, distance)
+
+
+class TestPredictPointTimes:
+    def test_constant_pace(self):
+        track = straight_track([100.0] * 5)
+        scenario = AidStationScenario(calc_mode=CalcMode.CONSTANT_PACE, constant_pace_kmh=10)
+
+        minutes = TimeCalculator.predict_point_times(track, scenario)
+
+        assert minutes.tolist() == pytest.approx([0, 6, 12, 18, 24])
+
+    def test_each_interval_matches_estimate_segment_time(self):
+        rng = np.random.default_rng(1)
+        track = straight_track(1000 + np.cumsum(rng.normal(0, 80, 60)), spacing_m=500)
+        config = TrailPlannerConfig(
+            flat_pace_kmh=10,
+            climb_penalty_min_per_100m=6,
+            descent_bonus_min_per_100m=2,
+            fatigue_percent_per_interval=10,
+            fatigue_interval_km=5,
+        )
+        scenario = AidStationScenario(calc_mode=CalcMode.TRAIL_PLANNER, trail_planner_config=config)
+
+        minutes = TimeCalculator.predict_point_times(track, scenario)
+
+        deltas = np.diff(track.elevation)
+        expected = [
+            TimeCalculator.estimate_segment_time(
+                0.5, max(d, 0), max(-d, 0), d / 5,
+                calc_mode=CalcMode.TRAIL_PLANNER,
+                trail_planner_config=config,
+                cumulative_distance_km=i * 0.5,
+            )
+            for i, d in enumerate(deltas)
+        ]
+        assert np.diff(minutes) == pytest.approx(expected)
+
+    def test_missing_elevation_counts_as_flat(self):
+        track = straight_track([100.0, np.nan, 300.0])
+
+        minutes = TimeCalculator.predict_point_times(track, AidStationScenario())
+
+        assert minutes.tolist() == pytest.approx([0, 5, 10])
+
+    def test_locate_at_times(self):
+        track = straight_track([100.0] * 5)
+        scenario = AidStationScenario(calc_mode=CalcMode.CONSTANT_PACE, constant_pace_kmh=10)
+        minutes = TimeCalculator.predict_point_times(track, scenario)
+
+        distance_km, lat, lon = TimeCalculator.locate_at_times(track, minutes, [-5, 0, 9, 24, 100])
+
+        assert distance_km.tolist() == pytest.approx([0, 0, 1.5, 4, 4])
+        assert lat[2] == pytest.approx(45.0375)
+        assert lon[3] == pytest.approx(6.1)
+
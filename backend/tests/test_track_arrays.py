@@ -0,0 +1,120 @@
+"""
+Tests for the columnar TrackArrays representation
+
+Services must return the same results whether they are given a list of
+TrackPoint objects or TrackArrays.
+"""
+import numpy as np
+import pytest
+
+from app.models.gpx import AidStation, TrackPoint
+from app.services.aid_station_service import AidStationService
+from app.services.climb_detector import ClimbDetector
+from app.services.gpx_export_service import GPXExportService
+from app.services.gpx_parse_service import GPXParseService
+from app.services.statistics_calculator import StatisticsCalculator
+from app.services.track_arrays import TrackArrays
+from tests.synthetic import generate_points, to_gpx_xml
+
+
+@pytest.fixture(scope="function", autouse=True)
+def setup_database():
+    # Pure unit tests here — no DB needed.
+    yield
+
+
+@pytest.fixture
+def synthetic_points():
+    xml = to_gpx_xml(generate_points(3000, elevation_noise_m=10))
+    return GPXParseService.parse_gpx_file(xml, "synthetic.gpx").tracks[0].points
+
+
+class TestTrackArrays:
+    """Conversion to and from TrackPoint lists"""
+
+    def test_round_trip(self):
+        points = [
+            TrackPoint(lat=45.0, lon=6.0, elevation=1000.0, distance=0.0,
+                       time="2024-01-01T10:00:00+02:00"),
+            TrackPoint(lat=45.001, lon=6.001, elevation=None, distance=130.5),
+            TrackPoint(lat=45.002, lon=6.002, elevation=1010.0, distance=260.0,
+                       time="2024-01-01T08:05:00"),
+        ]
+
+        arrays = TrackArrays.from_track_points(points)
+
+        assert len(arrays) == 3
+        assert arrays.lat.dtype == np.float64
+        assert arrays.time.dtype == np.int64
+        assert np.isnan(arrays.elevation[1])
+        assert arrays.has_time.tolist() == [True, False, True]
+        assert arrays.to_track_points() == points
+
+    def test_coerce_keeps_existing_arrays(self):
+        arrays = TrackArrays([45.0], [6.0], [100.0], [0.0])
+        assert TrackArrays.coerce(arrays) is arrays
+
+    def test_mismatched_lengths_raise(self):
+        with pytest.raises(ValueError, match="same length"):
+            TrackArrays([45.0, 45.1], [6.0], [100.0], [0.0])
+
+    def test_slice_and_take(self):
+        arrays = TrackArrays([1.0, 2.0, 3.0, 4.0], [0.0] * 4, [10.0, 20.0, 30.0, 40.0], [0.0, 1.0, 2.0, 3.0])
+
+        assert arrays.slice(1, 3).elevation.tolist() == [20.0, 30.0]
+        assert arrays.take(arrays.distance >= 2.0).lat.tolist() == [3.0, 4.0]
+
+    def test_range_indexes_stay_out_of_pickles_and_views(self):
+        import pickle
+
+        arrays = TrackArrays([1.0, 2.0, 3.0], [0.0] * 3, [10.0, 20.0, 15.0], [0.0, 1.0, 2.0])
+        size = len(pickle.dumps(arrays))
+        arrays.range_index(5)
+
+        assert len(pickle.dumps(arrays)) == size
+        assert pickle.loads(pickle.dumps(arrays)).elevation.tolist() == [10.0, 20.0, 15.0]
+        view = arrays.view()
+        assert view.lat is not arrays.lat and np.shares_memory(view.lat, arrays.lat)
+        assert view.range_index(5) is not arrays.range_index(5)
+
+    def test_bytes_parser_returns_arrays(self, sample_gpx_simple):
+        analyzed = GPXParseService.analyze_gpx_bytes(sample_gpx_simple.encode())
+
+        assert len(analyzed) == 1
+        arrays = analyzed[0].arrays
+        assert arrays.elevation.dtype == np.float64
+        assert len(arrays) == 3
+        assert arrays.distance[0] == 0.0
+        assert np.all(np.diff(arrays.distance) > 0)
+
+
+class TestServicesAcceptArrays:
+    """Same results from TrackPoint lists and TrackArrays"""
+
+    def test_analyze_segment(self, synthetic_points):
+        arrays = TrackArrays.from_track_points(synthetic_points)
+        assert StatisticsCalculator.analyze_segment(arrays, 2, 12) == \
+            StatisticsCalculator.analyze_segment(synthetic_points, 2, 12)
+
+    def test_detect_climbs(self, synthetic_points):
+        arrays = TrackArrays.from_track_points(synthetic_points)
+        assert ClimbDetector.detect_climbs(arrays, min_elevation_gain=50) == \
+            ClimbDetector.detect_climbs(synthetic_points, min_elevation_gain=50)
+
+    def test_export_segment(self, synthetic_points):
+        arrays = TrackArrays.from_track_points(synthetic_points)
+        xml = GPXExportService.generate_gpx_from_segment(arrays, 1, 3, "Synthetic")
+
+        assert xml == GPXExportService.generate_gpx_from_segment(synthetic_points, 1, 3, "Synthetic")
+        assert "<time>" in xml
+
+    def test_aid_station_table(self, synthetic_points):
+        arrays = TrackArrays.from_track_points(synthetic_points)
+        stations = [
+            AidStation(name="Start", distance_km=0),
+            AidStation(name="Mid", distance_km=10),
+            AidStation(name="Finish", distance_km=synthetic_points[-1].distance / 1000),
+        ]
+
+        assert AidStationService.generate_aid_station_table(arrays, stations) == \
+            AidStationService.generate_aid_station_table(synthetic_points, stations)
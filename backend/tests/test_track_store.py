@@ -0,0 +1,158 @@
+"""
+Tests for server-side track handles (file_id / race slug)
+"""
+from io import BytesIO
+
+from app.db.models import Race
+from app.services.parse_cache import ParseCache
+from tests.conftest import TestingSessionLocal
+
+
+def upload(client, content: str, filename: str = "climb.gpx") -> str:
+    files = {'file': (filename, BytesIO(content.encode()), 'application/gpx+xml')}
+    response = client.post('/api/v1/gpx/upload', files=files)
+    assert response.status_code == 200
+    return response.json()['file_id']
+
+
+def inline_points(client, content: str):
+    files = {'file': ('inline.gpx', BytesIO(content.encode()), 'application/gpx+xml')}
+    return client.post('/api/v1/gpx/upload', files=files).json()['data']['tracks'][0]['points']
+
+
+class TestFileIdHandles:
+    """Analysis endpoints accept the file_id returned by /upload"""
+
+    def test_detect_climbs_by_file_id_matches_inline(self, client, sample_gpx_with_climb):
+        file_id = upload(client, sample_gpx_with_climb)
+        points = inline_points(client, sample_gpx_with_climb)
+
+        by_handle = client.post('/api/v1/gpx/detect-climbs', json={
+            'file_id': file_id, 'start_km': 0, 'end_km': 0,
+        })
+        by_points = client.post('/api/v1/gpx/detect-climbs', json={
+            'track_points': points, 'start_km': 0, 'end_km': 0,
+        })
+
+        assert by_handle.status_code == 200
+        assert by_handle.json() == by_points.json()
+
+    def test_aid_station_table_by_file_id(self, client, sample_gpx_simple):
+        file_id = upload(client, sample_gpx_simple, "simple.gpx")
+        points = inline_points(client, sample_gpx_simple)
+        stations = [
+            {'name': 'Start', 'distance_km': 0},
+            {'name': 'Finish', 'distance_km': points[-1]['distance'] / 1000},
+        ]
+
+        by_handle = client.post('/api/v1/gpx/aid-station-table', json={
+            'file_id': file_id, 'aid_stations': stations,
+        })
+        by_points = client.post('/api/v1/gpx/aid-station-table', json={
+            'track_points': points, 'aid_stations': stations,
+        })
+
+        assert by_handle.status_code == 200
+        assert by_handle.json() == by_points.json()
+
+    def test_export_segment_uses_stored_track_name(self, client, sample_gpx_simple):
+        file_id = upload(client, sample_gpx_simple, "simple.gpx")
+
+        response = client.post('/api/v1/gpx/export-segment', json={
+            'file_id': file_id, 'start_km': 0, 'end_km': 10,
+        })
+
+        assert response.status_code == 200
+        assert 'Test_Track_segment' in response.headers['content-disposition']
+
+    def test_requests_do_not_grow_the_cached_track(self, client, sample_gpx_simple):
+        from app.services.parse_cache import parse_cache
+
+        file_id = upload(client, sample_gpx_simple, "simple.gpx")
+        client.post('/api/v1/gpx/export-segment', json={
+            'file_id': file_id, 'start_km': 0, 'end_km': 10,
+        })
+
+        assert parse_cache.get(file_id)[0].arrays._range_indexes == {}
+
+    def test_unknown_file_id_returns_404(self, client):
+        response = client.post('/api/v1/gpx/detect-climbs', json={
+            'file_id': '0' * 64, 'start_km': 0, 'end_km': 1,
+        })
+        assert response.status_code == 404
+
+        response = client.post('/api/v1/gpx/detect-climbs', json={
+            'file_id': '../../etc/passwd', 'start_km': 0, 'end_km': 1,
+        })
+        assert response.status_code == 404
+
+    def test_missing_track_index_returns_404(self, client, sample_gpx_simple):
+        file_id = upload(client, sample_gpx_simple, "simple.gpx")
+        response = client.post('/api/v1/gpx/detect-climbs', json={
+            'file_id': file_id, 'track_index': 3, 'start_km': 0, 'end_km': 1,
+        })
+        assert response.status_code == 404
+
+    def test_request_without_track_source_is_rejected(self, client):
+        response = client.post('/api/v1/gpx/detect-climbs', json={'start_km': 0, 'end_km': 1})
+        assert response.status_code == 422
+
+
+class TestRaceSlugHandles:
+    """Analysis endpoints accept a published race slug"""
+
+    def add_race(self, content: str, slug: str, published: bool):
+        db = TestingSessionLocal()
+        try:
+            db.add(Race(name="Test Race", slug=slug, gpx_content=content, is_published=published))
+            db.commit()
+        finally:
+            db.close()
+
+    def test_detect_climbs_by_race_slug(self, client, sample_gpx_with_climb):
+        self.add_race(sample_gpx_with_climb, "climb-race", published=True)
+        points = inline_points(client, sample_gpx_with_climb)
+
+        by_slug = client.post('/api/v1/gpx/detect-climbs', json={
+            'race_slug': 'climb-race', 'start_km': 0, 'end_km': 0,
+        })
+        by_points = client.post('/api/v1/gpx/detect-climbs', json={
+            'track_points': points, 'start_km': 0, 'end_km': 0,
+        })
+
+        assert by_slug.status_code == 200
+        assert by_slug.json() == by_points.json()
+
+    def test_unpublished_race_is_not_found(self, client, sample_gpx_simple):
+        self.add_race(sample_gpx_simple, "draft-race", published=False)
+
+        response = client.post('/api/v1/gpx/detect-climbs', json={
+            'race_slug': 'draft-race', 'start_km': 0, 'end_km': 1,
+        })
+        assert response.status_code == 404
+
+
+class TestParseCacheTTL:
+    """Handles expire after the idle TTL"""
+
+    def test_idle_entries_expire(self, sample_gpx_simple, monkeypatch):
+        from app.services import parse_cache as parse_cache_module
+        from app.services.gpx_parse_service import GPXParseService
+
+        now = [1000.0]
+        monkeypatch.setattr(parse_cache_module.time, "monotonic", lambda: now[0])
+
+        cache = ParseCache(max_bytes=10 ** 6, ttl_seconds=60)
+        cache.put("a", GPXParseService.analyze_gpx_bytes(sample_gpx_simple.encode()))
+
+        now[0] += 59
+        assert cache.get("a") is not None  # access refreshes the entry
+        now[0] += 59
+        assert cache.get("a") is not None
+        now[0] += 61
+        assert cache.get("a") is None
+
+        stats = cache.stats()
+        assert stats["expirations"] == 1
+        assert stats["entries"] == 0
+        assert stats["size_bytes"] == 0
@@ -0,0 +1,174 @@
+"""
+Tests for the columnar and binary track point wire formats
+"""
+from io import BytesIO
+
+import numpy as np
+import pytest
+
+from app.db.models import SharedState
+from app.services.gpx_stream_parser import NAIVE_TZ, format_timestamp, parse_timestamp
+from app.services.parse_cache import parse_cache
+from app.services.track_arrays import TrackArrays
+from app.services.wire_format import (
+    BINARY_MEDIA_TYPE,
+    COLUMNAR_MEDIA_TYPE,
+    WireFormat,
+    columnize_points,
+    decode_binary,
+    encode_binary,
+)
+from tests.conftest import TestingSessionLocal
+
+
+def upload(client, content: str, params=None, headers=None):
+    files = {'file': ('test.gpx', BytesIO(content.encode()), 'application/gpx+xml')}
+    return client.post('/api/v1/gpx/upload', files=files, params=params, headers=headers)
+
+
+def points_to_columns(points):
+    return {
+        field: [p[field] for p in points]
+        for field in ("lat", "lon", "elevation", "distance", "time")
+    }
+
+
+class TestBinaryEncoding:
+    """Binary buffer layout"""
+
+    def test_round_trip_keeps_dtypes_and_alignment(self):
+        payload = {
+            "name": "x",
+            "tracks": [{"columns": {
+                "lat": np.array([45.1, 45.2, np.nan]),
+                "tz_offset": np.array([0, -300, NAIVE_TZ], dtype=np.int16),
+            }}],
+            "empty": np.array([], dtype=np.float64),
+        }
+
+        body = encode_binary(payload)
+        decoded = decode_binary(body)
+
+        assert body[:4] == b"GPXC"
+        assert decoded["name"] == "x"
+        lat = decoded["tracks"][0]["columns"]["lat"]
+        np.testing.assert_array_equal(lat, payload["tracks"][0]["columns"]["lat"])
+        np.testing.assert_array_equal(decoded["tracks"][0]["columns"]["tz_offset"], [0, -300, NAIVE_TZ])
+        assert decoded["tracks"][0]["columns"]["tz_offset"].dtype == np.dtype("<i2")
+        assert len(decoded["empty"]) == 0
+
+    def test_rejects_foreign_bodies(self):
+        with pytest.raises(ValueError):
+            decode_binary(b'{"success": true}')
+
+
+class TestTimesIso:
+    """Bulk timestamp formatting matches format_timestamp"""
+
+    def test_matches_per_point_formatting(self):
+        values = [
+            "2024-01-01T10:00:00Z",
+            "2024-01-01T10:00:00.5+02:00",
+            "2024-06-01T23:59:59.123456-05:30",
+            "2024-01-01T10:00:00",
+            None,
+        ]
+        time, tz_offset = zip(*(parse_timestamp(v) for v in values))
+        zeros = np.zeros(len(values))
+        arrays = TrackArrays(zeros, zeros, zeros, zeros, time, tz_offset)
+
+        assert arrays.times_iso() == [format_timestamp(t, tz) for t, tz in zip(time, tz_offset)]
+
+
+class TestNegotiation:
+    """Upload, merge and share responses"""
+
+    def test_upload_columnar_matches_json(self, client, sample_gpx_simple):
+        parse_cache.clear()
+        default = upload(client, sample_gpx_simple).json()
+        columnar = upload(client, sample_gpx_simple, params={'format': 'columnar'})
+
+        assert columnar.headers['content-type'].startswith(COLUMNAR_MEDIA_TYPE)
+        body = columnar.json()
+        assert body['file_id'] == default['file_id']
+        track = body['data']['tracks'][0]
+        expected = default['data']['tracks'][0]
+        assert track['columns'] == points_to_columns(expected['points'])
+        assert track['length'] == len(expected['points'])
+        assert track['statistics'] == expected['statistics']
+
+    def test_upload_binary_via_accept_header(self, client, sample_gpx_simple):
+        default = upload(client, sample_gpx_simple).json()
+        response = upload(client, sample_gpx_simple, headers={'Accept': BINARY_MEDIA_TYPE})
+
+        assert response.headers['content-type'] == BINARY_MEDIA_TYPE
+        body = decode_binary(response.content)
+        columns = body['data']['tracks'][0]['columns']
+        expected = points_to_columns(default['data']['tracks'][0]['points'])
+        np.testing.assert_array_equal(columns['lat'], expected['lat'])
+        np.testing.assert_array_equal(columns['distance'], expected['distance'])
+        assert columns['time'][0] == parse_timestamp(expected['time'][0])[0] / 1e6
+
+    def test_query_parameter_overrides_accept(self, client, sample_gpx_simple):
+        response = upload(client, sample_gpx_simple, params={'format': 'json'},
+                          headers={'Accept': BINARY_MEDIA_TYPE})
+        assert 'points' in response.json()['data']['tracks'][0]
+
+    def test_unknown_format_is_rejected(self, client, sample_gpx_simple):
+        assert upload(client, sample_gpx_simple, params={'format': 'xml'}).status_code == 422
+
+    def test_merge_columnar(self, client, sample_gpx_simple):
+        request_data = {
+            'files': [
+                {'filename': 'file1.gpx', 'content': sample_gpx_simple},
+                {'filename': 'file2.gpx', 'content': sample_gpx_simple},
+            ],
+        }
+        default = client.post('/api/v1/gpx/merge', json=request_data).json()
+        columnar = client.post('/api/v1/gpx/merge', json=request_data, params={'format': 'columnar'}).json()
+
+        assert columnar['merged_gpx'] == default['merged_gpx']
+        assert columnar['warnings'] == default['warnings']
+        assert columnar['data']['tracks'][0]['columns'] == points_to_columns(default['data']['tracks'][0]['points'])
+
+    def test_shared_state_columnar(self, client, sample_gpx_simple):
+        points = upload(client, sample_gpx_simple).json()['data']['tracks'][0]['points']
+        db = TestingSessionLocal()
+        try:
+            db.add(SharedState(share_id="wire0001", state_json={
+                "gpxFiles": [{"data": {"tracks": [{"name": "Test", "points": points}]}}],
+                "waypoints": {"points": [{"lat": 1, "lon": 2}]},
+            }))
+            db.commit()
+        finally:
+            db.close()
+
+        response = client.get('/api/v1/share/wire0001', params={'format': 'columnar'})
+
+        assert response.status_code == 200
+        state = response.json()['state_json']
+        track = state['gpxFiles'][0]['data']['tracks'][0]
+        assert 'points' not in track
+        assert track['columns'] == points_to_columns(points)
+        # Lists that are not track points are left alone
+        assert state['waypoints'] == {"points": [{"lat": 1, "lon": 2}]}
+
+    def test_shared_state_with_invalid_points(self, client):
+        bad = [
+            {"lat": "north", "lon": 6.0, "distance": 0.0},
+            {"lat": 45.0, "lon": 6.0, "distance": None},
+        ]
+        db = TestingSessionLocal()
+        try:
+            db.add(SharedState(share_id="wire0002", state_json={"tracks": [{"points": [p]} for p in bad]}))
+            db.commit()
+        finally:
+            db.close()
+
+        for fmt in ('columnar', 'binary'):
+            response = client.get('/api/v1/share/wire0002', params={'format': fmt})
+            assert response.status_code == 200
+        for fmt in (WireFormat.COLUMNAR, WireFormat.BINARY):
+            assert columnize_points({"tracks": [{"points": [p]} for p in bad]}, fmt) == {
+                "tracks": [{"points": [p]} for p in bad]
+            }